@@ -0,0 +1,152 @@
+"""
+事件幂等存储基准测试
+比较已处理事件标记的三种存储方式在Redis中的内存占用和吞吐量
+
+用法:
+    BENCH_REDIS_URL=redis://127.0.0.1:6379/15 python -m benchmarks.idempotency_store --events 1000000
+
+存储方式:
+    legacy   每个事件一个键，值为含处理结果的JSON，EX 86400（原EventService的写法：MGET判断 + pipeline写入）
+    keys_nx  每个事件一个键，SET NX EX 86400，值为"1"
+    buckets  EventIdempotencyStore：按小时分桶的哈希，字段为12字节摘要（一次Lua预留 + 一次pipeline完成）
+
+buckets模拟事件在24小时内均匀到达，预留时查询保留期内全部已存在的桶。
+目标数据库必须为空，每种方式测量前后各读取一次INFO memory，结束后清空该数据库。
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+from unittest.mock import patch
+
+import redis.asyncio as redis
+import structlog
+
+from src.config.settings import get_settings
+from src.services.idempotency_store import EventIdempotencyStore, ProcessedEventCache
+from src.services.redis_service import RedisService
+
+DEFAULT_REDIS_URL = "redis://127.0.0.1:6379/15"
+LAYOUTS = ["legacy", "keys_nx", "buckets"]
+
+
+class FakeClock:
+    """可控的time.time，用于模拟事件在一天内陆续到达"""
+
+    def __init__(self, start: float):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+
+async def used_memory(client: redis.Redis) -> int:
+    """Redis当前使用的内存字节数"""
+    return (await client.info("memory"))["used_memory"]
+
+
+async def run_legacy(service: RedisService, batches: List[List[str]], clock: FakeClock) -> None:
+    """原写法：MGET判断是否处理过，处理后pipeline写入含结果的标记"""
+    for batch in batches:
+        keys = [f"event:processed:{event_id}" for event_id in batch]
+        await service.get_cache_many(keys)
+        processed_at = datetime.now(timezone.utc).isoformat()
+        await service.set_cache_many({
+            key: {
+                "processed_at": processed_at,
+                "result": {"success": True, "status": "created", "entity_id": str(uuid.uuid4())}
+            }
+            for key in keys
+        }, expire=86400)
+
+
+async def run_keys_nx(service: RedisService, batches: List[List[str]], clock: FakeClock) -> None:
+    """每个事件一个键，用SET NX原子预留"""
+    client = await service.get_client()
+    for batch in batches:
+        pipeline = client.pipeline(transaction=False)
+        for event_id in batch:
+            pipeline.set(f"event:processed:{event_id}", 1, nx=True, ex=86400)
+        await pipeline.execute()
+
+
+async def run_buckets(service: RedisService, batches: List[List[str]], clock: FakeClock) -> None:
+    """EventIdempotencyStore：一次Lua预留，一次pipeline标记完成"""
+    store = EventIdempotencyStore(service, ProcessedEventCache(0))
+    step = 86400 / max(len(batches), 1)
+    # 只测量分桶布局本身，不包含升级期间对旧标记的检查
+    with patch("src.services.idempotency_store.time", clock), \
+            patch.object(store.settings, "EVENT_IDEMPOTENCY_LEGACY_KEYS", False):
+        for batch in batches:
+            await store.reserve(batch)
+            await store.complete(batch)
+            clock.now += step
+
+
+RUNNERS: Dict[str, Callable[..., Any]] = {
+    "legacy": run_legacy,
+    "keys_nx": run_keys_nx,
+    "buckets": run_buckets,
+}
+
+
+async def run(redis_url: str, layouts: List[str], events: int, batch_size: int) -> List[Dict[str, Any]]:
+    settings = get_settings()
+    settings.REDIS_URL = redis_url
+    service = RedisService()
+    client = await service.get_client()
+    if await client.dbsize():
+        raise SystemExit(f"目标数据库不为空，请使用专用的数据库: {redis_url}")
+
+    results = []
+    try:
+        for layout in layouts:
+            event_ids = [str(uuid.uuid4()) for _ in range(events)]
+            batches = [event_ids[i:i + batch_size] for i in range(0, events, batch_size)]
+            before = await used_memory(client)
+            start = time.perf_counter()
+            await RUNNERS[layout](service, batches, FakeClock(time.time()))
+            seconds = time.perf_counter() - start
+            used = await used_memory(client) - before
+            results.append({
+                "layout": layout,
+                "events": events,
+                "keys": await client.dbsize(),
+                "bytes": used,
+                "seconds": seconds,
+            })
+            await client.flushdb()
+    finally:
+        await client.flushdb()
+        await service.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="比较已处理事件标记的存储占用和吞吐量")
+    parser.add_argument("--redis-url", default=os.getenv("BENCH_REDIS_URL", DEFAULT_REDIS_URL))
+    parser.add_argument("--layouts", default=",".join(LAYOUTS), help="逗号分隔：legacy,keys_nx,buckets")
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=1000, help="每次预留/完成的事件数")
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    layouts = [layout.strip() for layout in args.layouts.split(",")]
+    results = asyncio.run(run(args.redis_url, layouts, args.events, args.batch_size))
+
+    print(f"{'layout':<8} {'events':>9} {'keys':>9} {'MB':>8} {'bytes/event':>12} "
+          f"{'MB/1M events':>13} {'events/sec':>11}")
+    for r in results:
+        per_event = r["bytes"] / r["events"]
+        print(f"{r['layout']:<8} {r['events']:>9} {r['keys']:>9} {r['bytes'] / 2**20:>8.1f} {per_event:>12.1f} "
+              f"{per_event * 1e6 / 2**20:>13.1f} {r['events'] / r['seconds']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+本地Model Garden替身
+提供 POST /model-garden/sync/all 和 GET /health，负载由generate_payload合成，
+按Accept协商JSON/MessagePack，按Accept-Encoding协商zstd/gzip/identity，
+请求体支持Content-Encoding压缩，响应带ETag并支持If-None-Match返回304，
+请求体带entities/offset/limit时按实体分页并返回total
+
+用法:
+    python -m benchmarks.model_garden_stub --port 8080 --limits 200000
+"""
+
+import argparse
+import hashlib
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import FastAPI, Request, Response
+
+from benchmarks.sync_write_modes import generate_payload
+from src.utils.payload_codec import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    available_encodings,
+    available_formats,
+    compress,
+    decompress,
+    encode_body,
+    json_loads,
+)
+
+
+def _negotiate_format(accept: Optional[str]) -> str:
+    """按Accept中的顺序选择第一个可用的负载格式，默认JSON"""
+    for item in (accept or "").split(","):
+        media_type = item.split(";")[0].strip().lower()
+        if "msgpack" in media_type and "msgpack" in available_formats():
+            return "msgpack"
+        if media_type in (JSON_MEDIA_TYPE, "*/*"):
+            return "json"
+    return "json"
+
+
+def _negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """按Accept-Encoding中的顺序选择第一个可用的压缩方式，默认不压缩"""
+    for item in (accept_encoding or "").split(","):
+        encoding = item.split(";")[0].strip().lower()
+        if encoding in available_encodings():
+            return encoding
+    return "identity"
+
+
+def create_app(payload: Dict[str, Any]) -> FastAPI:
+    """
+    创建替身应用
+
+    Args:
+        payload: 全量同步负载
+
+    Returns:
+        FastAPI应用
+    """
+    app = FastAPI(title="Model Garden stub")
+    # (请求体, 格式, 压缩方式) -> (编码后的响应体, ETag)，避免重复编码干扰客户端的测量
+    cache: Dict[Tuple[bytes, str, str], Tuple[bytes, str]] = {}
+
+    def select(body: Dict[str, Any]) -> Dict[str, Any]:
+        entities = body.get("entities")
+        if not entities:
+            return payload
+        offset, limit = body.get("offset", 0), body.get("limit")
+        page: Dict[str, Any] = {}
+        for key in entities:
+            rows = payload.get(key, [])
+            page[key] = rows[offset:offset + limit] if limit else rows[offset:]
+            page["total"] = len(rows)
+        return page
+
+    @app.get("/health")
+    async def health() -> Dict[str, str]:
+        return {"status": "healthy"}
+
+    @app.post("/model-garden/sync/all")
+    async def sync_all(request: Request) -> Response:
+        raw = decompress(await request.body(), request.headers.get("content-encoding"))
+        payload_format = _negotiate_format(request.headers.get("accept"))
+        encoding = _negotiate_encoding(request.headers.get("accept-encoding"))
+
+        key = (raw, payload_format, encoding)
+        if key not in cache:
+            encoded = encode_body(select(json_loads(raw) if raw else {}), payload_format)
+            etag = f'"{hashlib.sha256(encoded).hexdigest()}"'
+            cache[key] = (encoded if encoding == "identity" else compress(encoded, encoding), etag)
+        content, etag = cache[key]
+
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        headers = {"ETag": etag, "Vary": "Accept, Accept-Encoding"}
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        media_type = MSGPACK_MEDIA_TYPE if payload_format == "msgpack" else JSON_MEDIA_TYPE
+        return Response(content=content, media_type=media_type, headers=headers)
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="本地Model Garden替身")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--use-cases-per-project", type=int, default=10)
+    parser.add_argument("--models", type=int, default=20)
+    parser.add_argument("--models-per-use-case", type=int, default=5)
+    parser.add_argument("--limits", type=int, default=200000)
+    args = parser.parse_args()
+
+    payload = generate_payload(
+        args.projects, args.use_cases_per_project, args.models,
+        args.models_per_use_case, args.limits
+    )
+    uvicorn.run(create_app(payload), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
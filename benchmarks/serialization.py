@@ -0,0 +1,114 @@
+"""
+JSON序列化微基准
+比较标准库json与orjson在事件路径和同步路径典型负载上的序列化/反序列化耗时
+
+用法:
+    python -m benchmarks.serialization --rows 10000 --number 200
+
+负载:
+    event        一个EventRequest（项目CREATED事件）
+    sync_result  一次同步结果（SyncService.sync_all的返回值，含各实体统计）
+    sync_response 含--rows行数据的SyncResponse，比较JSONResponse与ORJSONResponse的渲染耗时
+"""
+
+import argparse
+import timeit
+import warnings
+from typing import Any, Callable, Dict, List, Tuple
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from benchmarks.sync_write_modes import generate_payload
+from src.utils.serializers import JsonSerializer, get_serializer
+
+warnings.filterwarnings("ignore", message="Field .* has conflict with protected namespace")
+
+from src.schemas.event_request import EventRequest  # noqa: E402
+from src.schemas.sync_response import SyncResponse  # noqa: E402
+
+
+def build_event() -> Dict[str, Any]:
+    """构建一个典型的事件请求"""
+    return EventRequest(
+        event_id="evt-0001",
+        event_type="CREATED",
+        entity_type="project",
+        entity_id="proj-001",
+        timestamp="2025-07-15T14:20:00Z",
+        version="1.0",
+        payload={
+            "id": "proj-001",
+            "project_name": "信用风控AI",
+            "project_code": "CREDIT_AI",
+            "created_time": "2025-07-15T14:00:00Z",
+            "updated_time": "2025-07-15T14:00:00Z"
+        }
+    ).model_dump()
+
+
+def build_sync_result() -> Dict[str, Any]:
+    """构建一次同步结果"""
+    entities = ["projects", "use_cases", "budgets", "models", "deployments", "pricing", "subscriptions", "limits"]
+    details = {
+        name: {"created": 120, "updated": 35, "unchanged": 9845, "errors": 0, "deleted": 0, "error_messages": []}
+        for name in entities
+    }
+    return {
+        "success": True,
+        "start_time": "2025-07-20T10:00:00+00:00",
+        "end_time": "2025-07-20T10:05:00+00:00",
+        "duration_seconds": 300.25,
+        "totals": {"created": 960, "updated": 280, "unchanged": 78760, "errors": 0, "deleted": 0},
+        "details": details
+    }
+
+
+def build_sync_response(rows: int) -> SyncResponse:
+    """构建共约rows行数据的SyncResponse"""
+    projects = max(rows // 1000, 1)
+    payload = generate_payload(projects, 10, 10, 5, max(rows - projects * 75 - 30, 1))
+    return SyncResponse(**payload)
+
+
+def measure(func: Callable[[], Any], number: int) -> float:
+    """返回单次调用的平均耗时（微秒），取三轮中的最小值"""
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="比较标准库json与orjson的序列化耗时")
+    parser.add_argument("--rows", type=int, default=10000, help="SyncResponse中的行数")
+    parser.add_argument("--number", type=int, default=200, help="每轮调用次数（SyncResponse按1/100计）")
+    args = parser.parse_args()
+
+    stdlib = JsonSerializer()
+    fast = get_serializer("orjson")
+    results: List[Tuple[str, str, float, float]] = []
+
+    for name, value, number in (
+        ("event", build_event(), args.number * 50),
+        ("sync_result", build_sync_result(), args.number * 10),
+    ):
+        encoded = stdlib.dumps(value)
+        results.append((name, "dumps", measure(lambda: stdlib.dumps(value), number),
+                        measure(lambda: fast.dumps(value), number)))
+        results.append((name, "loads", measure(lambda: stdlib.loads(encoded), number),
+                        measure(lambda: fast.loads(encoded), number)))
+
+    # 声明response_model时FastAPI先按JSON模式导出模型，再由响应类渲染
+    response = build_sync_response(args.rows)
+    content = response.model_dump(mode="json")
+    number = max(args.number // 100, 1)
+    results.append(("sync_response", "render", measure(lambda: JSONResponse(content), number),
+                    measure(lambda: ORJSONResponse(content), number)))
+    results.append(("sync_response", "dump+render",
+                    measure(lambda: JSONResponse(response.model_dump(mode="json")), number),
+                    measure(lambda: ORJSONResponse(response.model_dump(mode="json")), number)))
+
+    print(f"{'payload':<14} {'op':<14} {'json us':>12} {'orjson us':>12} {'speedup':>8}")
+    for name, op, baseline, optimized in results:
+        print(f"{name:<14} {op:<14} {baseline:>12.1f} {optimized:>12.1f} {baseline / optimized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
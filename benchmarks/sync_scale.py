@@ -0,0 +1,304 @@
+"""
+同步规模基准测试
+按可配置规模生成合成数据，由独立进程中的本地Model Garden替身提供 /model-garden/sync/all，
+端到端执行SyncService.sync_all，报告吞吐量、各实体耗时、峰值RSS和SQL语句数，并与基线比较
+
+用法:
+    python -m benchmarks.sync_scale --projects 1000 --use-cases-per-project 50 --limits 500000 \
+        --database-url sqlite:////tmp/sync_scale.db \
+        --database-url postgresql://postgres@127.0.0.1:5432/sync_bench \
+        --baseline benchmarks/baselines/sync_scale.json
+
+每个数据库在干净的表上依次执行两轮：冷启动（全部为创建）和重复同步相同数据（全部为未变化）。
+替身在子进程中生成数据并预先编码响应，其内存和CPU不计入测量。
+--update-baseline 把本次结果写入基线；否则任一轮吞吐量低于基线超过--tolerance、
+峰值RSS高于基线超过--tolerance或SQL语句数多于基线时以非零状态退出。
+基线与机器相关，规模参数与基线不一致时只报告不比较。
+未运行Redis时同步锁、结果缓存和事件发布会快速失败并被跳过，不影响测量。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from unittest.mock import patch
+
+import httpx
+import structlog
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import Base
+from src.services.sync_service import SyncService
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "sync_scale.json")
+SCALE_ARGS = ("projects", "use_cases_per_project", "models", "models_per_use_case", "limits")
+
+
+def start_stub(args: argparse.Namespace) -> "tuple[subprocess.Popen, str]":
+    """在子进程中启动替身并等待其就绪，返回进程和基础URL"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    command = [sys.executable, "-m", "benchmarks.model_garden_stub", "--port", str(port)]
+    for name in SCALE_ARGS:
+        command += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+    process = subprocess.Popen(command)
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + args.stub_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"替身进程已退出: {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("等待替身就绪超时")
+
+
+class RssSampler:
+    """在后台线程中采样当前进程的RSS，记录采样期间的峰值（MB）"""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak = 0.0
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def current(self) -> float:
+        """当前RSS，无/proc时退化为进程生命周期内的峰值"""
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * self._page_size / 1e6
+        except OSError:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "RssSampler":
+        self.peak = self.current()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[Dict[str, int]]:
+    """统计期间执行的SQL语句数，executemany按一条计"""
+    counter = {"queries": 0}
+
+    def before_cursor_execute(*_: Any) -> None:
+        counter["queries"] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@contextmanager
+def time_entities() -> Iterator[Dict[str, float]]:
+    """按实体名称累计写入耗时，覆盖bulk/copy（含并行）和row两种写入路径"""
+    seconds: Dict[str, float] = defaultdict(float)
+    lock = threading.Lock()
+
+    def timed(method: Callable[..., Any], entity_name: Callable[[tuple], str]) -> Callable[..., Any]:
+        def wrapper(service: SyncService, *args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return method(service, *args, **kwargs)
+            finally:
+                with lock:
+                    seconds[entity_name(args)] += time.perf_counter() - started
+        return wrapper
+
+    with patch.object(SyncService, "_write_entity",
+                      timed(SyncService._write_entity, lambda args: args[1].name)), \
+         patch.object(SyncService, "_sync_rows_in_chunks",
+                      timed(SyncService._sync_rows_in_chunks, lambda args: args[0])):
+        yield seconds
+
+
+async def run_round(engine: Engine, base_url: str, mode: str, parallel: bool) -> Dict[str, Any]:
+    """端到端执行一次同步并收集指标"""
+    session = sessionmaker(bind=engine, autoflush=False)()
+    service = SyncService(session)
+    service.model_garden_client.base_url = base_url
+    fetch_sync_all = service.model_garden_client.sync_all
+    fetch = {"seconds": 0.0}
+
+    async def timed_fetch(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            return await fetch_sync_all(*args, **kwargs)
+        finally:
+            fetch["seconds"] += time.perf_counter() - started
+
+    try:
+        with patch.object(service.settings, "SYNC_WRITE_MODE", mode), \
+             patch.object(service.settings, "SYNC_PARALLEL", parallel), \
+             patch.object(service.model_garden_client, "sync_all", timed_fetch), \
+             time_entities() as entity_seconds, \
+             count_queries(engine) as counter, \
+             RssSampler() as rss:
+            started = time.perf_counter()
+            result = await service.sync_all(session=session)
+            session.commit()
+            elapsed = time.perf_counter() - started
+    finally:
+        session.close()
+
+    if not result.get("success"):
+        raise RuntimeError(f"同步失败: {result.get('error')}")
+    totals = result["totals"]
+    rows = totals["created"] + totals["updated"] + totals["unchanged"] + totals["errors"]
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed else float("inf"),
+        "fetch_seconds": fetch["seconds"],
+        "entity_seconds": dict(entity_seconds),
+        "queries": counter["queries"],
+        "peak_rss_mb": rss.peak,
+        "created": totals["created"],
+        "unchanged": totals["unchanged"],
+        "errors": totals["errors"],
+    }
+
+
+def create_bench_engine(url: str) -> Engine:
+    """创建基准测试引擎，SQLite连接允许在数据库线程池中跨线程使用"""
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False})
+    return create_engine(url)
+
+
+def run_database(url: str, base_url: str, mode: str, parallel: bool) -> Dict[str, Dict[str, Any]]:
+    """在干净的表上对一个数据库执行冷启动和重复两轮同步"""
+    engine = create_bench_engine(url)
+    try:
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        results = {}
+        for label in ("cold", "warm"):
+            results[f"{engine.dialect.name}/{mode}/{label}"] = asyncio.run(run_round(engine, base_url, mode, parallel))
+        Base.metadata.drop_all(engine)
+        return results
+    finally:
+        engine.dispose()
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    与基线比较，返回回归描述列表
+
+    Args:
+        results: 本次结果，键为 数据库/模式/轮次
+        baseline: 基线文件内容
+        tolerance: 吞吐量和峰值RSS允许的相对退化
+
+    Returns:
+        回归描述，为空表示没有回归
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get("results", {}).get(key)
+        if base is None:
+            continue
+        if result["rows_per_sec"] < base["rows_per_sec"] * (1 - tolerance):
+            regressions.append(f"{key}: rows/sec {result['rows_per_sec']:.0f} < 基线 {base['rows_per_sec']:.0f}")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{key}: peak RSS {result['peak_rss_mb']:.0f}MB > 基线 {base['peak_rss_mb']:.0f}MB")
+        if result["queries"] > base["queries"]:
+            regressions.append(f"{key}: queries {result['queries']} > 基线 {base['queries']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="端到端同步规模基准测试")
+    parser.add_argument("--database-url", action="append", dest="database_urls",
+                        help="可重复；默认使用临时SQLite文件和BENCH_DATABASE_URL（如已设置）")
+    parser.add_argument("--mode", default="bulk", help="SYNC_WRITE_MODE：row/bulk/copy（copy仅PostgreSQL）")
+    parser.add_argument("--parallel", action="store_true", help="启用SYNC_PARALLEL按依赖并行同步")
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--use-cases-per-project", type=int, default=50)
+    parser.add_argument("--models", type=int, default=50)
+    parser.add_argument("--models-per-use-case", type=int, default=5)
+    parser.add_argument("--limits", type=int, default=500000)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果写入基线")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的相对退化")
+    parser.add_argument("--stub-timeout", type=float, default=300, help="等待替身生成数据并就绪的最长时间（秒）")
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    urls = args.database_urls or ["sqlite:////tmp/sync_scale.db"] + (
+        [os.environ["BENCH_DATABASE_URL"]] if os.getenv("BENCH_DATABASE_URL") else []
+    )
+    stub, base_url = start_stub(args)
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for url in urls:
+            results.update(run_database(url, base_url, args.mode, args.parallel))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    print(f"{'run':<22} {'rows':>9} {'seconds':>9} {'rows/sec':>10} {'fetch s':>8} "
+          f"{'queries':>8} {'peak MB':>8} {'created':>9} {'unchanged':>9} {'errors':>7}")
+    for key, r in results.items():
+        print(f"{key:<22} {r['rows']:>9} {r['seconds']:>9.2f} {r['rows_per_sec']:>10.0f} {r['fetch_seconds']:>8.2f} "
+              f"{r['queries']:>8} {r['peak_rss_mb']:>8.0f} {r['created']:>9} {r['unchanged']:>9} {r['errors']:>7}")
+        print("    " + " ".join(f"{name}={seconds:.2f}s" for name, seconds in r["entity_seconds"].items()))
+
+    scale = {name: getattr(args, name) for name in SCALE_ARGS}
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"scale": scale, "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"基线已写入 {args.baseline}")
+        return
+
+    baseline: Optional[Dict[str, Any]] = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if baseline is None or baseline.get("scale") != scale:
+        print("没有相同规模的基线，跳过比较")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"回归: {regression}")
+    if regressions:
+        sys.exit(1)
+    print("与基线相比没有回归")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+同步负载传输基准测试
+在本地Model Garden替身上比较各负载格式与压缩方式的传输字节数、获取耗时和解析耗时
+
+用法:
+    python -m benchmarks.sync_transport --limits 200000 --rounds 3
+
+格式json-stdlib为关闭orjson后的标准库json解析，作为改造前的基线。
+替身在后台线程中运行，响应体按(格式, 压缩方式)预先编码并缓存，第一轮为预热不计入结果。
+"""
+
+import argparse
+import asyncio
+import logging
+import socket
+import threading
+import time
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+import httpx
+import structlog
+import uvicorn
+
+from benchmarks.model_garden_stub import create_app
+from benchmarks.sync_write_modes import generate_payload
+from src.services import model_garden_client
+from src.services.model_garden_client import ModelGardenClient
+from src.utils import payload_codec
+
+
+def start_stub(payload: Dict[str, Any]) -> str:
+    """在后台线程启动替身，返回其基础URL"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(payload), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+async def measure(base_url: str, payload_format: str, encoding: str, rounds: int) -> Dict[str, Any]:
+    """以指定格式和压缩方式获取并解析全量负载，返回各轮平均值"""
+    client = ModelGardenClient()
+    client.base_url = base_url
+    codec_format = "json" if payload_format == "json-stdlib" else payload_format
+    fetch_seconds = decode_seconds = 0.0
+    wire_bytes = body_bytes = rows = 0
+
+    with patch.object(client.settings, "MODEL_GARDEN_PAYLOAD_FORMAT", codec_format), \
+         patch.object(client.settings, "MODEL_GARDEN_ACCEPT_ENCODING", encoding), \
+         patch.object(payload_codec, "orjson", None if payload_format == "json-stdlib" else payload_codec.orjson):
+        async with httpx.AsyncClient(**client.client_config) as http:
+            for index in range(rounds + 1):
+                started = time.perf_counter()
+                response = await client._post(http, f"{base_url}/model-garden/sync/all", {})
+                response.raise_for_status()
+                fetched = time.perf_counter()
+                body = model_garden_client._read_body(response)
+                data = payload_codec.decode_body(body, response.headers.get("content-type"))
+                decoded = time.perf_counter()
+                if index == 0:
+                    continue
+                fetch_seconds += fetched - started
+                decode_seconds += decoded - fetched
+                wire_bytes = response.num_bytes_downloaded
+                body_bytes = len(body)
+                rows = sum(len(items) for items in data.values() if isinstance(items, list))
+
+    return {
+        "format": payload_format,
+        "encoding": response.headers.get("content-encoding", "identity"),
+        "wire_bytes": wire_bytes,
+        "body_bytes": body_bytes,
+        "fetch_seconds": fetch_seconds / rounds,
+        "decode_seconds": decode_seconds / rounds,
+        "rows_per_sec": rows * rounds / (fetch_seconds + decode_seconds),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="比较同步负载的传输格式与压缩方式")
+    parser.add_argument("--formats", default="json-stdlib,json,msgpack", help="逗号分隔：json-stdlib,json,msgpack")
+    parser.add_argument("--encodings", default="identity,gzip,zstd", help="逗号分隔：identity,gzip,zstd")
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--use-cases-per-project", type=int, default=10)
+    parser.add_argument("--models", type=int, default=20)
+    parser.add_argument("--models-per-use-case", type=int, default=5)
+    parser.add_argument("--limits", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    payload = generate_payload(
+        args.projects, args.use_cases_per_project, args.models,
+        args.models_per_use_case, args.limits
+    )
+    base_url = start_stub(payload)
+
+    results: List[Dict[str, Any]] = []
+    for payload_format in args.formats.split(","):
+        for encoding in args.encodings.split(","):
+            results.append(asyncio.run(measure(base_url, payload_format.strip(), encoding.strip(), args.rounds)))
+
+    print(f"{'format':<12} {'encoding':<9} {'wire MB':>9} {'body MB':>9} "
+          f"{'fetch s':>8} {'decode s':>9} {'rows/sec':>11}")
+    for r in results:
+        print(f"{r['format']:<12} {r['encoding']:<9} {r['wire_bytes'] / 1e6:>9.2f} {r['body_bytes'] / 1e6:>9.2f} "
+              f"{r['fetch_seconds']:>8.3f} {r['decode_seconds']:>9.3f} {r['rows_per_sec']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
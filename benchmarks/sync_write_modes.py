@@ -0,0 +1,179 @@
+"""
+同步写入方式基准测试
+比较 row / bulk / copy 三种 SYNC_WRITE_MODE 在PostgreSQL上的吞吐量
+
+用法:
+    BENCH_DATABASE_URL=postgresql://postgres@127.0.0.1:5432/sync_bench \
+        python -m benchmarks.sync_write_modes --limits 200000 --modes bulk,copy
+
+加 --parallel 时按外键依赖并行同步各实体。
+每种模式依次执行两轮：冷启动（全部为创建）和重复同步相同数据（全部为未变化）。
+row模式依赖各仓储的按自然键查询方法，在真实仓储上可能只产生错误计数。
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+import structlog
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import Base
+from src.services.sync_service import SyncService
+
+DEFAULT_DATABASE_URL = "postgresql://postgres@127.0.0.1:5432/sync_bench"
+LIMIT_TYPES = ["input_token_limit", "output_token_limit", "request_limit"]
+SCOPES = ["daily", "monthly", "yearly"]
+
+
+def generate_payload(projects: int, use_cases_per_project: int, models: int,
+                     models_per_use_case: int, limits: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    生成与 /model-garden/sync/all 结构一致的合成数据
+
+    Args:
+        projects: 项目数量
+        use_cases_per_project: 每个项目的用例数量
+        models: 模型数量
+        models_per_use_case: 每个用例订阅的模型数量
+        limits: 限制总数，均匀分布在所有订阅上
+
+    Returns:
+        同步负载字典
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    stamps = {"created_time": now, "updated_time": now}
+
+    payload: Dict[str, List[Dict[str, Any]]] = {
+        "projects": [], "use_cases": [], "budgets": [], "models": [],
+        "model_deployments": [], "pricing": [], "use_case_llm_models": [], "limits": []
+    }
+
+    for m in range(models):
+        model_id = str(uuid.uuid4())
+        payload["models"].append({
+            "id": model_id, "model_name": f"model-{m}", "model_type": "chat",
+            "provider": "openai", "model_input": "text", "model_output": "text",
+            "max_content_length": 128000, **stamps
+        })
+        payload["model_deployments"].append({
+            "id": str(uuid.uuid4()), "model_id": model_id, "deployment_name": f"deploy-{m}",
+            "endpoint": f"https://llm.example.com/{m}", "auth_secret_manager_path": f"secret/{m}",
+            "region": "us-east-1", "request_per_min": 600, "token_per_min": 100000,
+            "is_default": True, **stamps
+        })
+        payload["pricing"].append({
+            "id": str(uuid.uuid4()), "model_id": model_id, "input_token_price_cpm": 30,
+            "output_token_price_cpm": 60, "currency": "USD", **stamps
+        })
+
+    for p in range(projects):
+        project_id = str(uuid.uuid4())
+        payload["projects"].append({
+            "id": project_id, "project_name": f"Project {p}", "project_code": f"P{p:06d}", **stamps
+        })
+        for u in range(use_cases_per_project):
+            use_case_id = str(uuid.uuid4())
+            payload["use_cases"].append({
+                "id": use_case_id, "project_id": project_id, "use_case_name": f"use-case-{p}-{u}",
+                "ad_group": f"ad-{p}", "is_active": True, **stamps
+            })
+            payload["budgets"].append({
+                "id": str(uuid.uuid4()), "use_case_id": use_case_id, "budget_cents": 100000,
+                "currency": "USD", **stamps
+            })
+            for k in range(models_per_use_case):
+                model = payload["models"][(p + u + k) % models]
+                payload["use_case_llm_models"].append({
+                    "id": str(uuid.uuid4()), "project_id": project_id, "use_case_id": use_case_id,
+                    "model_id": model["id"], "alias": model["model_name"], **stamps
+                })
+
+    subscriptions = payload["use_case_llm_models"]
+    for i in range(limits):
+        payload["limits"].append({
+            "id": str(uuid.uuid4()), "subscription_id": subscriptions[i % len(subscriptions)]["id"],
+            "limit_type": LIMIT_TYPES[i % len(LIMIT_TYPES)], "scope": SCOPES[(i // 3) % len(SCOPES)],
+            "limit_value": 1000 + i, **stamps
+        })
+
+    return payload
+
+
+async def run_mode(engine, mode: str, payload: Dict[str, Any], parallel: bool = False) -> List[Dict[str, Any]]:
+    """在干净的表上以指定模式执行两轮同步"""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    total_rows = sum(len(rows) for rows in payload.values())
+    rounds = []
+
+    for label in ("cold", "warm"):
+        session = session_factory()
+        service = SyncService(session)
+        try:
+            with patch.object(service.settings, "SYNC_WRITE_MODE", mode), \
+                 patch.object(service.settings, "SYNC_PARALLEL", parallel):
+                started = time.perf_counter()
+                results = await service._apply_sync_data(payload)
+                session.commit()
+                elapsed = time.perf_counter() - started
+        finally:
+            session.close()
+
+        rounds.append({
+            "mode": mode,
+            "round": label,
+            "rows": total_rows,
+            "seconds": elapsed,
+            "rows_per_sec": total_rows / elapsed if elapsed else float("inf"),
+            "created": sum(r["created"] for r in results.values()),
+            "updated": sum(r["updated"] for r in results.values()),
+            "unchanged": sum(r.get("unchanged", 0) for r in results.values()),
+            "errors": sum(r["errors"] for r in results.values()),
+        })
+
+    return rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="比较同步写入方式的吞吐量")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--modes", default="bulk,copy", help="逗号分隔：row,bulk,copy")
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--use-cases-per-project", type=int, default=10)
+    parser.add_argument("--models", type=int, default=20)
+    parser.add_argument("--models-per-use-case", type=int, default=5)
+    parser.add_argument("--limits", type=int, default=200000)
+    parser.add_argument("--parallel", action="store_true", help="启用SYNC_PARALLEL按依赖并行同步")
+    args = parser.parse_args()
+
+    # 逐行/逐块日志会显著拖慢测量结果
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    payload = generate_payload(
+        args.projects, args.use_cases_per_project, args.models,
+        args.models_per_use_case, args.limits
+    )
+    engine = create_engine(args.database_url)
+
+    print(f"{'mode':<6} {'round':<5} {'rows':>9} {'seconds':>9} {'rows/sec':>11} "
+          f"{'created':>9} {'updated':>9} {'unchanged':>9} {'errors':>8}")
+    for mode in args.modes.split(","):
+        for r in asyncio.run(run_mode(engine, mode.strip(), payload, args.parallel)):
+            print(f"{r['mode']:<6} {r['round']:<5} {r['rows']:>9} {r['seconds']:>9.2f} "
+                  f"{r['rows_per_sec']:>11.0f} {r['created']:>9} {r['updated']:>9} {r['unchanged']:>9} {r['errors']:>8}")
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,19 @@ API依赖注入
 提供数据库会话、服务实例等依赖
 """
 
-from typing import Generator
+from typing import AsyncGenerator, Generator, Union
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.config.database import SessionLocal
+from src.config.database import SessionLocal, get_async_session_factory
+from src.config.settings import get_settings
 from src.services.event_service import EventService
 from src.services.sync_service import SyncService
 from src.services.redis_service import RedisService
+from src.tasks.event_consumers import EventConsumerPool, event_consumer_pool
+from src.tasks.sync_jobs import SyncJobManager, sync_job_manager
+from src.utils.db_executor import run_in_db_executor
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -34,6 +39,26 @@ def get_db() -> Generator[Session, None, None]:
 get_db_session = get_db
 
 
+async def get_event_db() -> AsyncGenerator[Union[Session, AsyncSession], None]:
+    """
+    获取事件处理使用的数据库会话
+    
+    DATABASE_ASYNC开启时返回AsyncSession，否则返回同步会话并在数据库线程池中关闭
+    
+    Yields:
+        数据库会话实例
+    """
+    if get_settings().DATABASE_ASYNC:
+        async with get_async_session_factory()() as session:
+            yield session
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_db_executor(db.close)
+
+
 def get_redis_service() -> RedisService:
     """
     获取Redis服务实例
@@ -45,7 +70,7 @@ def get_redis_service() -> RedisService:
 
 
 def get_event_service(
-    db: Session = Depends(get_db),
+    db: Union[Session, AsyncSession] = Depends(get_event_db),
     redis_service: RedisService = Depends(get_redis_service)
 ) -> EventService:
     """
@@ -75,4 +100,24 @@ def get_sync_service(
     Returns:
         SyncService: 同步服务实例
     """
-    return SyncService(db_session=db) 
\ No newline at end of file
+    return SyncService(db_session=db)
+
+
+def get_sync_job_manager() -> SyncJobManager:
+    """
+    获取应用共享的同步任务管理器
+    
+    Returns:
+        SyncJobManager: 同步任务管理器实例
+    """
+    return sync_job_manager
+
+
+def get_event_consumer_pool() -> EventConsumerPool:
+    """
+    获取应用共享的事件消费者池
+    
+    Returns:
+        EventConsumerPool: 事件消费者池实例
+    """
+    return event_consumer_pool
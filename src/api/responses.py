@@ -0,0 +1,12 @@
+"""
+API响应类
+安装orjson时以ORJSONResponse作为应用默认响应类，否则使用JSONResponse
+"""
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from src.utils.payload_codec import orjson_available
+
+DefaultJSONResponse = ORJSONResponse if orjson_available() else JSONResponse
+
+__all__ = ["DefaultJSONResponse"]
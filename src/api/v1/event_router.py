@@ -4,12 +4,15 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Dict, Any
+from typing import Dict, Any, List
 
+from src.config.settings import get_settings
 from src.schemas.event_request import EventRequest
-from src.schemas.event_response import EventResponse
+from src.schemas.event_response import EventBatchResponse, EventResponse, EventResult
 from src.services.event_service import EventService
-from src.api.dependencies import get_event_service
+from src.tasks.event_consumers import EventConsumerPool
+from src.api.dependencies import get_event_consumer_pool, get_event_service
+from src.api.responses import DefaultJSONResponse
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -19,8 +22,13 @@ router = APIRouter()
 @router.post(
     "/api/v1/model-garden/events",
     response_model=EventResponse,
+    responses={
+        202: {"model": EventResponse, "description": "事件已写入事件流，由后台消费者应用"},
+        503: {"description": "事件流不可用"}
+    },
     summary="接收Model Garden的CUD事件",
-    description="处理来自Model Garden的创建、更新、删除事件"
+    description="处理来自Model Garden的创建、更新、删除事件；"
+                "EVENT_ASYNC_INGEST开启时事件写入Redis Stream后立即返回202"
 )
 async def receive_event(
     event: EventRequest,
@@ -34,11 +42,25 @@ async def receive_event(
         event_service: 事件服务实例
         
     Returns:
-        EventResponse: 事件处理结果
+        EventResponse: 事件处理结果；异步接收模式下返回202
         
     Raises:
-        HTTPException: 当事件处理失败时
+        HTTPException: 当事件处理失败或异步接收模式下事件流不可用时
     """
+    if get_settings().EVENT_ASYNC_INGEST:
+        # 写入事件流即确认，应用到数据库的延迟和失败不影响接收
+        entry_id = await event_service.enqueue_event(event)
+        if entry_id is None:
+            logger.error(f"事件入队失败: {event.entity_id}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Event queue unavailable"
+            )
+        return DefaultJSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=EventResponse(status="accepted", message="Event queued for processing").model_dump()
+        )
+    
     try:
         logger.info(f"接收到事件: {event.event_type} - {event.entity_type} - {event.entity_id}")
         
@@ -55,6 +77,126 @@ async def receive_event(
             detail=f"Failed to process event: {str(e)}"
         )
 
+@router.post(
+    "/api/v1/model-garden/events/batch",
+    response_model=EventBatchResponse,
+    responses={
+        202: {"model": EventBatchResponse, "description": "事件已写入分区事件流，由后台消费者应用"},
+        503: {"description": "事件流不可用"}
+    },
+    summary="批量接收Model Garden的CUD事件",
+    description="按数组顺序处理一批事件：一次性判断幂等，在同一个事务中逐个应用（每个事件独立回滚），"
+                "返回与请求顺序一致的逐个事件结果；EVENT_COALESCE开启时同一实体的事件先合并为净效果再应用。"
+                "EVENT_ASYNC_INGEST开启时事件写入各自的分区事件流后立即返回202，与单个事件接口共用同一顺序"
+)
+async def receive_events(
+    events: List[EventRequest],
+    event_service: EventService = Depends(get_event_service)
+) -> EventBatchResponse:
+    """
+    批量接收并处理来自Model Garden的CUD事件
+    
+    Args:
+        events: 按发生顺序排列的事件列表
+        event_service: 事件服务实例
+        
+    Returns:
+        EventBatchResponse: 整体状态和逐个事件的处理结果
+        
+    Raises:
+        HTTPException: 事件数超过EVENT_BATCH_MAX_SIZE、批量处理失败或异步接收模式下事件流不可用时
+    """
+    settings = get_settings()
+    max_size = settings.EVENT_BATCH_MAX_SIZE
+    if len(events) > max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many events in batch: {len(events)} > {max_size}"
+        )
+    
+    if settings.EVENT_ASYNC_INGEST:
+        # 在请求中直接应用会与分区消费者并发处理同一实体，破坏按实体的顺序，因此同样入队
+        if not await event_service.enqueue_events(events):
+            logger.error(f"批量事件入队失败: {len(events)}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Event queue unavailable"
+            )
+        return DefaultJSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=EventBatchResponse(
+                status="accepted",
+                processed=0,
+                skipped=0,
+                failed=0,
+                results=[
+                    EventResult(event_id=event.event_id, success=True, status="queued", entity_id=event.entity_id)
+                    for event in events
+                ]
+            ).model_dump()
+        )
+    
+    try:
+        logger.info(f"接收到批量事件: {len(events)}")
+        results = await event_service.process_events(events)
+    except Exception as e:
+        logger.error(f"批量事件处理失败: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process events: {str(e)}"
+        )
+    
+    skipped = sum(1 for result in results if result.get("status") == "already_processed")
+    failed = sum(1 for result in results if not result.get("success"))
+    coalesced = sum(
+        1 for result in results
+        if result.get("success") and result.get("status") in ("coalesced", "cancelled")
+    )
+    if not failed:
+        overall = "ok"
+    elif failed == len(results):
+        overall = "failed"
+    else:
+        overall = "partial"
+    return EventBatchResponse(
+        status=overall,
+        processed=len(results) - skipped - failed,
+        skipped=skipped,
+        failed=failed,
+        coalesced=coalesced,
+        results=[
+            EventResult(
+                event_id=event.event_id,
+                success=bool(result.get("success")),
+                status=result.get("status"),
+                entity_id=result.get("entity_id"),
+                coalesced_into=result.get("coalesced_into"),
+                error=result.get("error"),
+                retryable=bool(result.get("retryable"))
+            )
+            for event, result in zip(events, results)
+        ]
+    )
+
+@router.get(
+    "/api/v1/model-garden/events/consumers",
+    summary="事件消费者指标",
+    description="获取本实例事件消费者的累计计数、吞吐量，以及各分区事件流的待确认数和积压数"
+)
+async def get_event_consumer_metrics(
+    consumer_pool: EventConsumerPool = Depends(get_event_consumer_pool)
+) -> Dict[str, Any]:
+    """
+    获取事件消费者指标
+    
+    Args:
+        consumer_pool: 事件消费者池
+        
+    Returns:
+        Dict[str, Any]: 消费者指标，Redis不可用时分区只包含名称和租约状态
+    """
+    return await consumer_pool.metrics()
+
 @router.get(
     "/api/v1/model-garden/health",
     summary="健康检查",
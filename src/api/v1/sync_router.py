@@ -3,33 +3,57 @@
 处理全量同步请求
 """
 
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status, Body
+from fastapi.responses import StreamingResponse
 from datetime import datetime
 from sqlalchemy.orm import Session
 
+from src.config.settings import get_settings
 from src.schemas.sync_request import SyncRequest
-from src.schemas.sync_response import SyncResponse
+from src.schemas.sync_response import SyncJobResponse, SyncPlanResponse, SyncResponse
 from src.services.sync_service import SyncService
-from src.api.dependencies import get_sync_service, get_db_session
+from src.tasks.sync_jobs import SyncJobManager
+from src.api.dependencies import get_sync_job_manager, get_sync_service, get_db_session
+from src.api.responses import DefaultJSONResponse
 from src.utils.logger import get_logger
+from src.utils.serializers import get_serializer
 
 logger = get_logger(__name__)
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def _ndjson_lines(records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """把记录逐条序列化为一行JSON"""
+    serializer = get_serializer()
+    async for record in records:
+        yield serializer.dumps(record) + b"\n"
+
 
 @router.post(
     "/api/v1/model-garden/sync/all",
     response_model=SyncResponse,
+    responses={
+        200: {"content": {NDJSON_MEDIA_TYPE: {}}},
+        202: {"model": SyncJobResponse, "description": "同步任务已入队"}
+    },
     summary="全量同步Model Garden配置",
-    description="从Model Garden同步所有配置数据到本地数据库，并发布同步事件"
+    description="从Model Garden同步所有配置数据到本地数据库，并发布同步事件；"
+                "async_job=true时入队为后台任务并立即返回202和任务ID；"
+                "Accept: application/x-ndjson时逐行流式返回已写入的记录，最后一行为同步统计；"
+                "dry_run=true时只返回变更计划，不写入任何数据"
 )
 async def sync_all(
     request: Optional[SyncRequest] = Body(None),
+    async_job: Optional[bool] = Query(None, description="是否以异步任务执行，默认取SYNC_JOB_MODE"),
+    accept: Optional[str] = Header(None),
     sync_service: SyncService = Depends(get_sync_service),
-    db_session: Session = Depends(get_db_session)
-) -> SyncResponse:
+    db_session: Session = Depends(get_db_session),
+    job_manager: SyncJobManager = Depends(get_sync_job_manager)
+):
     """
     执行完整的同步操作
     
@@ -41,11 +65,16 @@ async def sync_all(
     
     Args:
         request: 同步请求参数（可选）
+        async_job: 是否以异步任务执行
+        accept: Accept请求头，包含application/x-ndjson时流式返回
         sync_service: 同步服务实例（依赖注入）
         db_session: 数据库会话（依赖注入）
+        job_manager: 同步任务管理器（依赖注入）
         
     Returns:
-        SyncResponse: 同步结果和统计信息
+        SyncResponse: 同步结果和统计信息；异步任务模式下返回202和任务状态；
+        NDJSON模式下每行一个{"type": "record"}记录，首行为started，末行为summary；
+        dry_run时返回SyncPlanResponse
         
     Raises:
         HTTPException: 当同步失败时
@@ -55,6 +84,29 @@ async def sync_all(
         updated_since = None
         if request and request.updated_since:
             updated_since = request.updated_since
+        
+        if request and request.dry_run:
+            # 只读：不获取同步锁，不写入数据库和Redis，可与正在执行的同步并行
+            plan = await sync_service.sync_all(updated_since=updated_since, session=db_session, dry_run=True)
+            if not plan.get("success"):
+                raise RuntimeError(plan.get("error"))
+            return DefaultJSONResponse(SyncPlanResponse(**plan).model_dump(mode="json"))
+        
+        if get_settings().SYNC_JOB_MODE if async_job is None else async_job:
+            job = await job_manager.submit(updated_since)
+            return DefaultJSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=SyncJobResponse(**job).model_dump(mode="json"),
+                headers={"Location": f"/api/v1/model-garden/sync/jobs/{job['job_id']}"}
+            )
+        
+        if accept and NDJSON_MEDIA_TYPE in accept:
+            # 记录在每个分块提交后输出，首字节时间和内存占用与负载大小无关
+            logger.info("开始流式全量同步", updated_since=updated_since.isoformat() if updated_since else None)
+            return StreamingResponse(
+                _ndjson_lines(sync_service.stream_sync_records(updated_since)),
+                media_type=NDJSON_MEDIA_TYPE
+            )
             
         logger.info(
             "开始执行全量同步",
@@ -138,10 +190,13 @@ async def get_sync_status(
         try:
             latest_sync = await redis_service.get_latest_sync_result()
             sync_in_progress = await redis_service.is_sync_in_progress()
+            # 各实体的创建/更新/未变化/错误计数，同步执行期间每次心跳刷新
+            sync_progress = await redis_service.get_sync_progress()
         except AttributeError:
             # 如果方法不存在，使用默认值
             latest_sync = None
             sync_in_progress = False
+            sync_progress = None
         
         status_info = {
             "status": "healthy",
@@ -149,7 +204,8 @@ async def get_sync_status(
             "version": "1.0.0",
             "last_sync": latest_sync.get("end_time") if latest_sync else None,
             "sync_in_progress": sync_in_progress,
-            "last_sync_totals": latest_sync.get("totals") if latest_sync else None
+            "last_sync_totals": latest_sync.get("totals") if latest_sync else None,
+            "sync_progress": sync_progress
         }
         
         return status_info
@@ -159,4 +215,36 @@ async def get_sync_status(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"获取状态失败: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+
+@router.get(
+    "/api/v1/model-garden/sync/jobs/{job_id}",
+    response_model=SyncJobResponse,
+    summary="获取同步任务状态",
+    description="获取异步同步任务的阶段、进度、吞吐量和最终统计"
+)
+async def get_sync_job(
+    job_id: str,
+    job_manager: SyncJobManager = Depends(get_sync_job_manager)
+) -> SyncJobResponse:
+    """
+    获取同步任务状态
+    
+    Args:
+        job_id: 任务ID
+        job_manager: 同步任务管理器
+        
+    Returns:
+        SyncJobResponse: 任务状态
+        
+    Raises:
+        HTTPException: 任务不存在时返回404
+    """
+    job = await job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"同步任务不存在: {job_id}"
+        )
+    return SyncJobResponse(**job)
@@ -3,9 +3,11 @@
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional
 
 from src.config.settings import get_settings
 
@@ -54,6 +56,86 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+# 异步引擎按需创建，未启用DATABASE_ASYNC时不需要安装asyncpg
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_database_url() -> str:
+    """
+    获取异步数据库连接URL
+    
+    Returns:
+        ASYNC_DATABASE_URL，未设置时把DATABASE_URL的驱动替换为asyncpg（测试环境为aiosqlite）
+    """
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    if settings.TESTING:
+        return "sqlite+aiosqlite:///./test.db"
+    url = make_url(settings.DATABASE_URL)
+    return url.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    获取异步数据库引擎（首次调用时创建）
+    
+    Returns:
+        异步引擎实例
+    """
+    global _async_engine
+    if _async_engine is None:
+        url = get_async_database_url()
+        if url.startswith("sqlite"):
+            _async_engine = create_async_engine(url, echo=settings.DEBUG)
+        else:
+            _async_engine = create_async_engine(
+                url,
+                pool_size=settings.DATABASE_POOL_SIZE,
+                max_overflow=settings.DATABASE_MAX_OVERFLOW,
+                pool_pre_ping=True,
+                echo=settings.DEBUG,
+            )
+    return _async_engine
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """
+    获取异步会话工厂
+    
+    Returns:
+        绑定异步引擎的会话工厂
+    """
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            bind=get_async_engine(),
+            autoflush=False,
+            expire_on_commit=False,  # 提交后继续读取属性不触发隐式IO
+        )
+    return _async_session_factory
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    获取异步数据库会话
+    
+    Yields:
+        异步数据库会话实例
+    """
+    async with get_async_session_factory()() as session:
+        yield session
+
+
+async def dispose_async_engine():
+    """关闭异步引擎的连接池"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+
+
 def create_tables():
     """创建所有表"""
     from src.models.base import Base
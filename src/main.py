@@ -3,15 +3,21 @@
 提供Model Garden事件接收服务
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 import time
 import structlog
 
+from src.api.responses import DefaultJSONResponse
 from src.api.v1.event_router import router as event_router
 from src.api.v1.sync_router import router as sync_router
 from src.config.settings import get_settings
+from src.config.database import dispose_async_engine
+from src.services.model_garden_client import close_shared_client, open_shared_client
+from src.tasks.event_consumers import event_consumer_pool
+from src.tasks.sync_jobs import sync_job_manager
+from src.utils.db_executor import shutdown_db_executor
 from src.utils.logger import setup_logging
 
 # 设置日志
@@ -21,8 +27,27 @@ logger = structlog.get_logger()
 # 获取配置
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时打开共享资源，关闭时按顺序释放"""
+    await open_shared_client()
+    await sync_job_manager.start()
+    await event_consumer_pool.start()
+    try:
+        yield
+    finally:
+        await event_consumer_pool.stop()
+        await sync_job_manager.stop()
+        await close_shared_client()
+        # 等待进行中的数据库操作完成后再关闭连接池
+        shutdown_db_executor()
+        await dispose_async_engine()
+
 # 创建FastAPI应用
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=DefaultJSONResponse,
     title="Synchronize API",
     description="同步API系统，用于接收Model Garden的CUD事件",
     version="1.0.0",
@@ -77,7 +102,7 @@ async def global_exception_handler(request: Request, exc: Exception):
         exc_info=True
     )
     
-    return JSONResponse(
+    return DefaultJSONResponse(
         status_code=500,
         content={
             "detail": "Internal server error",
@@ -12,6 +12,7 @@ from src.models.deployment import ModelDeployment
 from src.models.pricing import ModelPricing
 from src.models.subscription import Subscription
 from src.models.limit import ModelLimit, ModelLimitUsage
+from src.models.sync_watermark import SyncWatermark
 
 # 导出所有模型类
 __all__ = [
@@ -26,5 +27,6 @@ __all__ = [
     "ModelPricing",
     "Subscription",
     "ModelLimit",
-    "ModelLimitUsage"
+    "ModelLimitUsage",
+    "SyncWatermark"
 ] 
\ No newline at end of file
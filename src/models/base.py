@@ -14,6 +14,16 @@ import uuid
 Base = declarative_base()
 
 
+def utcnow() -> datetime:
+    """
+    当前UTC时间（不带时区）
+    
+    时间列为不带时区的DateTime，统一写入UTC naive时间，
+    避免psycopg2按会话时区换算以及asyncpg拒绝带时区的值
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class UniversalUUID(TypeDecorator):
     """
     通用UUID类型，兼容SQLite和PostgreSQL
@@ -58,8 +68,8 @@ class BaseModel(Base):
     # 使用通用UUID类型，自动适配不同数据库
     id = Column(UniversalUUID(), primary_key=True, default=uuid.uuid4, index=True)
     
-    created_time = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    updated_time = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
+    created_time = Column(DateTime, default=utcnow, nullable=False)
+    updated_time = Column(DateTime, default=utcnow, onupdate=utcnow, nullable=False)
     
     def __repr__(self) -> str:
         """字符串表示"""
@@ -90,7 +100,7 @@ class BaseModel(Base):
         for key, value in data.items():
             if hasattr(self, key) and value is not None:
                 setattr(self, key, value)
-        self.updated_time = datetime.now(timezone.utc)
+        self.updated_time = utcnow()
     
     @property
     def created_at(self) -> datetime:
@@ -5,10 +5,9 @@
 
 from datetime import date
 from sqlalchemy import Column, String, BigInteger, ForeignKey, Date, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
-from src.models.base import BaseModel
+from src.models.base import BaseModel, UniversalUUID
 
 class UseCaseBudget(BaseModel):
     """用例预算模型"""
@@ -16,7 +15,7 @@ class UseCaseBudget(BaseModel):
     __tablename__ = "use_case_budget"
     
     # 字段定义
-    use_case_id = Column(UUID(as_uuid=True), ForeignKey("use_cases.id"), nullable=False, index=True)
+    use_case_id = Column(UniversalUUID(), ForeignKey("use_cases.id"), nullable=False, index=True)
     budget_cents = Column(BigInteger, nullable=False)
     currency = Column(String(10), default="USD", nullable=False)
     
@@ -42,7 +41,7 @@ class UseCaseBudgetUsage(BaseModel):
     __tablename__ = "use_case_budget_usage"
     
     # 字段定义
-    use_case_id = Column(UUID(as_uuid=True), ForeignKey("use_cases.id"), nullable=False, index=True)
+    use_case_id = Column(UniversalUUID(), ForeignKey("use_cases.id"), nullable=False, index=True)
     usage_period = Column(Date, nullable=False)
     scope = Column(String(50), nullable=False)  # daily, monthly, yearly
     used_cents = Column(BigInteger, default=0, nullable=False)
@@ -4,10 +4,9 @@
 """
 
 from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Text, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
-from src.models.base import BaseModel
+from src.models.base import BaseModel, UniversalUUID
 
 class ModelDeployment(BaseModel):
     """模型部署模型"""
@@ -15,7 +14,7 @@ class ModelDeployment(BaseModel):
     __tablename__ = "model_deployments"
     
     # 字段定义
-    model_id = Column(UUID(as_uuid=True), ForeignKey("models.id"), nullable=False, index=True)
+    model_id = Column(UniversalUUID(), ForeignKey("models.id"), nullable=False, index=True)
     deployment_name = Column(String(255), nullable=False, index=True)
     endpoint = Column(Text, nullable=False)
     auth_secret_manager_path = Column(Text, nullable=True)
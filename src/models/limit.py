@@ -5,10 +5,9 @@
 
 from datetime import datetime
 from sqlalchemy import Column, String, BigInteger, ForeignKey, DateTime
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
-from src.models.base import BaseModel
+from src.models.base import BaseModel, UniversalUUID
 
 class ModelLimit(BaseModel):
     """模型限制模型"""
@@ -16,7 +15,7 @@ class ModelLimit(BaseModel):
     __tablename__ = "llm_model_limits"
     
     # 字段定义
-    subscription_id = Column(UUID(as_uuid=True), ForeignKey("subscriptions.id"), nullable=False, index=True)
+    subscription_id = Column(UniversalUUID(), ForeignKey("subscriptions.id"), nullable=False, index=True)
     limit_type = Column(String(100), nullable=False, index=True)  # input_token_limit, output_token_limit, request_limit等
     scope = Column(String(50), nullable=False, index=True)  # daily, monthly, yearly
     limit_value = Column(BigInteger, nullable=False)
@@ -44,11 +43,11 @@ class ModelLimitUsage(BaseModel):
     __tablename__ = "llm_model_limits_usage"
     
     # 字段定义
-    limit_id = Column(UUID(as_uuid=True), ForeignKey("llm_model_limits.id"), nullable=False, index=True)
+    limit_id = Column(UniversalUUID(), ForeignKey("llm_model_limits.id"), nullable=False, index=True)
     scope = Column(String(50), nullable=False, index=True)  # daily, monthly, yearly
     usage_period = Column(DateTime, nullable=False, index=True)
     value = Column(BigInteger, default=0, nullable=False)
-    request_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+    request_id = Column(UniversalUUID(), nullable=True, index=True)
     called_by = Column(String(255), nullable=True)
     
     # 关系定义
@@ -4,10 +4,9 @@
 """
 
 from sqlalchemy import Column, String, Integer, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
-from src.models.base import BaseModel
+from src.models.base import BaseModel, UniversalUUID
 
 class ModelPricing(BaseModel):
     """模型定价模型"""
@@ -15,7 +14,7 @@ class ModelPricing(BaseModel):
     __tablename__ = "llm_model_pricing"
     
     # 字段定义
-    model_id = Column(UUID(as_uuid=True), ForeignKey("models.id"), nullable=False, index=True)
+    model_id = Column(UniversalUUID(), ForeignKey("models.id"), nullable=False, index=True)
     input_token_price_cpm = Column(Integer, nullable=False)  # 每千个输入令牌价格（分）
     output_token_price_cpm = Column(Integer, nullable=False)  # 每千个输出令牌价格（分）
     currency = Column(String(10), default="USD", nullable=False)
@@ -4,10 +4,9 @@
 """
 
 from sqlalchemy import Column, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
-from src.models.base import BaseModel
+from src.models.base import BaseModel, UniversalUUID
 
 class Subscription(BaseModel):
     """订阅模型"""
@@ -15,9 +14,9 @@ class Subscription(BaseModel):
     __tablename__ = "subscriptions"
     
     # 字段定义
-    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False, index=True)
-    use_case_id = Column(UUID(as_uuid=True), ForeignKey("use_cases.id"), nullable=False, index=True)
-    model_id = Column(UUID(as_uuid=True), ForeignKey("models.id"), nullable=False, index=True)
+    project_id = Column(UniversalUUID(), ForeignKey("projects.id"), nullable=False, index=True)
+    use_case_id = Column(UniversalUUID(), ForeignKey("use_cases.id"), nullable=False, index=True)
+    model_id = Column(UniversalUUID(), ForeignKey("models.id"), nullable=False, index=True)
     
     # 关系定义
     project = relationship("Project", back_populates="subscriptions")
@@ -0,0 +1,26 @@
+"""
+同步水位模型
+对应sync_watermarks表
+"""
+
+from sqlalchemy import Column, String, DateTime
+
+from src.models.base import Base, utcnow
+
+class SyncWatermark(Base):
+    """
+    同步水位模型
+    
+    记录每种实体已应用数据的最大(updated_time, id)，增量同步只请求水位之后的变化
+    """
+    
+    __tablename__ = "sync_watermarks"
+    
+    # 字段定义
+    entity = Column(String(50), primary_key=True)  # 同步负载中的实体数组字段名
+    watermark_time = Column(DateTime, nullable=False)  # 已应用的最大updated_time（UTC）
+    watermark_id = Column(String(64), nullable=False)  # 同一updated_time下的最大id
+    updated_time = Column(DateTime, default=utcnow, onupdate=utcnow, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<SyncWatermark(entity='{self.entity}', time={self.watermark_time}, id='{self.watermark_id}')>"
@@ -4,10 +4,9 @@
 """
 
 from sqlalchemy import Column, String, Boolean, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
-from src.models.base import BaseModel
+from src.models.base import BaseModel, UniversalUUID
 
 class UseCase(BaseModel):
     """用例模型"""
@@ -15,7 +14,7 @@ class UseCase(BaseModel):
     __tablename__ = "use_cases"
     
     # 字段定义
-    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False, index=True)
+    project_id = Column(UniversalUUID(), ForeignKey("projects.id"), nullable=False, index=True)
     use_case_name = Column(String(255), nullable=False, index=True)
     ad_group = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True, nullable=False, index=True)
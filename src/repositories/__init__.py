@@ -4,14 +4,16 @@
 """
 
 from .base_repository import BaseRepository
-from .project_repository import ProjectRepository
-from .use_case_repository import UseCaseRepository
-from .budget_repository import BudgetRepository, BudgetUsageRepository
-from .model_repository import ModelRepository
-from .deployment_repository import DeploymentRepository
-from .pricing_repository import PricingRepository
-from .subscription_repository import SubscriptionRepository
-from .limit_repository import LimitRepository, LimitUsageRepository
+from .async_base_repository import AsyncBaseRepository
+from .project_repository import ProjectRepository, AsyncProjectRepository
+from .use_case_repository import UseCaseRepository, AsyncUseCaseRepository
+from .budget_repository import BudgetRepository, BudgetUsageRepository, AsyncBudgetRepository, AsyncBudgetUsageRepository
+from .model_repository import ModelRepository, AsyncModelRepository
+from .deployment_repository import DeploymentRepository, AsyncDeploymentRepository
+from .pricing_repository import PricingRepository, AsyncPricingRepository
+from .subscription_repository import SubscriptionRepository, AsyncSubscriptionRepository
+from .limit_repository import LimitRepository, LimitUsageRepository, AsyncLimitRepository, AsyncLimitUsageRepository
+from .sync_watermark_repository import SyncWatermarkRepository
 
 __all__ = [
     'BaseRepository',
@@ -24,5 +26,17 @@ __all__ = [
     'PricingRepository',
     'SubscriptionRepository',
     'LimitRepository',
-    'LimitUsageRepository'
+    'LimitUsageRepository',
+    'SyncWatermarkRepository',
+    'AsyncBaseRepository',
+    'AsyncProjectRepository',
+    'AsyncUseCaseRepository',
+    'AsyncBudgetRepository',
+    'AsyncBudgetUsageRepository',
+    'AsyncModelRepository',
+    'AsyncDeploymentRepository',
+    'AsyncPricingRepository',
+    'AsyncSubscriptionRepository',
+    'AsyncLimitRepository',
+    'AsyncLimitUsageRepository'
 ] 
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+异步基础仓储类
+基于AsyncSession提供与BaseRepository一致的通用CRUD操作
+"""
+
+from typing import Generic, Type, TypeVar, Optional, List, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, select
+
+from .base_repository import BaseRepository
+
+T = TypeVar('T')
+
+class AsyncBaseRepository(Generic[T]):
+    """异步基础仓储类"""
+    
+    # ID和列值转换规则与同步仓储保持一致
+    _convert_id_to_uuid = BaseRepository._convert_id_to_uuid
+    _get_id_value = BaseRepository._get_id_value
+    _column_converters = BaseRepository._column_converters
+    _normalize_for_compare = staticmethod(BaseRepository._normalize_for_compare)
+    
+    def __init__(self, model: Type[T], session: AsyncSession):
+        """
+        初始化仓储
+        
+        Args:
+            model: 模型类
+            session: 异步数据库会话
+        """
+        self.model = model
+        self.session = session
+    
+    def _build_filters(self, **kwargs) -> list:
+        """根据字段条件构建过滤表达式，_id字段按环境转换"""
+        filters = []
+        for key, value in kwargs.items():
+            if hasattr(self.model, key):
+                if key.endswith('_id') and isinstance(value, str):
+                    value = self._get_id_value(value)
+                filters.append(getattr(self.model, key) == value)
+        return filters
+    
+    def _coerce_values(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        转换字段值：asyncpg不会像psycopg2那样由数据库隐式转换字符串，
+        字符串形式的UUID和时间需要先转换，带时区的时间转换为UTC naive时间
+        """
+        converters = self._column_converters()
+        coerced = {}
+        for key, value in values.items():
+            converter = converters.get(key)
+            if converter is not None and isinstance(value, str):
+                value = converter(value)
+            coerced[key] = self._normalize_for_compare(value)
+        return coerced
+    
+    async def create(self, **kwargs) -> T:
+        """
+        创建新记录
+        
+        Args:
+            **kwargs: 模型字段值
+        
+        Returns:
+            创建的模型实例
+        """
+        instance = self.model(**self._coerce_values(kwargs))
+        self.session.add(instance)
+        await self.session.flush()  # 获取ID但不提交
+        return instance
+    
+    async def get_by_id(self, id: str) -> Optional[T]:
+        """
+        根据ID获取记录
+        
+        Args:
+            id: 记录ID
+        
+        Returns:
+            模型实例或None
+        """
+        return await self.session.get(self.model, self._get_id_value(id))
+    
+    async def get_all(self, limit: Optional[int] = None, offset: Optional[int] = None) -> List[T]:
+        """
+        获取所有记录
+        
+        Args:
+            limit: 限制数量
+            offset: 偏移量
+        
+        Returns:
+            模型实例列表
+        """
+        query = select(self.model)
+        if offset:
+            query = query.offset(offset)
+        if limit:
+            query = query.limit(limit)
+        return list((await self.session.scalars(query)).all())
+    
+    async def update(self, id: str, **kwargs) -> Optional[T]:
+        """
+        更新记录
+        
+        Args:
+            id: 记录ID
+            **kwargs: 要更新的字段值
+        
+        Returns:
+            更新后的模型实例或None
+        """
+        instance = await self.get_by_id(id)
+        if instance:
+            for key, value in self._coerce_values(kwargs).items():
+                if hasattr(instance, key):
+                    setattr(instance, key, value)
+            await self.session.flush()
+        return instance
+    
+    async def delete(self, id: str) -> bool:
+        """
+        删除记录
+        
+        Args:
+            id: 记录ID
+        
+        Returns:
+            是否删除成功
+        """
+        instance = await self.get_by_id(id)
+        if instance:
+            await self.session.delete(instance)
+            await self.session.flush()
+            return True
+        return False
+    
+    async def count(self) -> int:
+        """
+        获取记录总数
+        
+        Returns:
+            记录总数
+        """
+        return await self.session.scalar(select(func.count()).select_from(self.model))
+    
+    async def exists(self, id: str) -> bool:
+        """
+        检查记录是否存在
+        
+        Args:
+            id: 记录ID
+        
+        Returns:
+            是否存在
+        """
+        query = select(self.model.id).where(self.model.id == self._get_id_value(id)).limit(1)
+        return await self.session.scalar(query) is not None
+    
+    async def find_by(self, **kwargs) -> List[T]:
+        """
+        根据条件查找记录
+        
+        Args:
+            **kwargs: 查询条件
+        
+        Returns:
+            匹配的模型实例列表
+        """
+        filters = self._build_filters(**kwargs)
+        if filters:
+            return list((await self.session.scalars(select(self.model).where(and_(*filters)))).all())
+        return []
+    
+    async def find_one_by(self, **kwargs) -> Optional[T]:
+        """
+        根据条件查找单条记录
+        
+        Args:
+            **kwargs: 查询条件
+        
+        Returns:
+            匹配的模型实例或None
+        """
+        filters = self._build_filters(**kwargs)
+        if filters:
+            return (await self.session.scalars(select(self.model).where(and_(*filters)).limit(1))).first()
+        return None
+    
+    async def bulk_create(self, instances: List[Dict[str, Any]]) -> List[T]:
+        """
+        批量创建记录
+        
+        Args:
+            instances: 要创建的实例数据列表
+        
+        Returns:
+            创建的模型实例列表
+        """
+        created_instances = [self.model(**self._coerce_values(instance_data)) for instance_data in instances]
+        self.session.add_all(created_instances)
+        await self.session.flush()
+        return created_instances
+    
+    async def bulk_update(self, updates: List[Dict[str, Any]]) -> List[T]:
+        """
+        批量更新记录
+        
+        Args:
+            updates: 更新数据列表，每个字典包含id和要更新的字段
+        
+        Returns:
+            更新后的模型实例列表
+        """
+        updated_instances = []
+        for update_data in updates:
+            id = update_data.pop('id', None)
+            if id:
+                instance = await self.update(id, **update_data)
+                if instance:
+                    updated_instances.append(instance)
+        
+        return updated_instances
+    
+    async def bulk_delete(self, ids: List[str]) -> int:
+        """
+        批量删除记录
+        
+        Args:
+            ids: 要删除的记录ID列表
+        
+        Returns:
+            删除的记录数量
+        """
+        deleted_count = 0
+        for id in ids:
+            if await self.delete(id):
+                deleted_count += 1
+        
+        return deleted_count
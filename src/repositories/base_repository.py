@@ -3,14 +3,24 @@
 提供通用的CRUD操作
 """
 
+import io
 import uuid
 import os
-from typing import Generic, Type, TypeVar, Optional, List, Dict, Any
+from datetime import date, datetime, timezone
+from typing import Generic, Type, TypeVar, Optional, List, Dict, Any, Sequence, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, bindparam, delete, exists, func, select, text, tuple_, update
+from sqlalchemy import Column, Date, DateTime, MetaData, Table, Uuid
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from src.models.base import UniversalUUID
 
 T = TypeVar('T')
 
+# COPY文本格式中需要转义的字符
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
 class BaseRepository(Generic[T]):
     """基础仓储类"""
     
@@ -259,4 +269,546 @@ class BaseRepository(Generic[T]):
             if self.delete(id):
                 deleted_count += 1
         
-        return deleted_count 
\ No newline at end of file
+        return deleted_count
+    
+    def _coerce_row(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将负载数据转换为可直接写入表的列值
+        
+        只保留表中存在的列，并把字符串形式的UUID和时间转换为对应的Python类型
+        
+        Args:
+            data: 负载数据
+            
+        Returns:
+            列名到列值的字典
+        """
+        converters = self._column_converters()
+        row = {}
+        for key, value in data.items():
+            if key not in converters:
+                continue
+            converter = converters[key]
+            if converter is not None and isinstance(value, str):
+                value = converter(value)
+            row[key] = value
+        return row
+    
+    def _column_converters(self) -> Dict[str, Any]:
+        """按列类型缓存字符串到Python值的转换函数"""
+        converters = getattr(self, "_converters", None)
+        if converters is None:
+            converters = {}
+            for column in self.model.__table__.columns:
+                if isinstance(column.type, (Uuid, UniversalUUID)):
+                    converters[column.name] = self._convert_id_to_uuid
+                elif isinstance(column.type, DateTime):
+                    converters[column.name] = lambda value: self._normalize_for_compare(
+                        datetime.fromisoformat(value.replace("Z", "+00:00"))
+                    )
+                elif isinstance(column.type, Date):
+                    converters[column.name] = lambda value: date.fromisoformat(value[:10])
+                else:
+                    converters[column.name] = None
+            self._converters = converters
+        return converters
+    
+    def _onupdate_values(self, exclude: Sequence[str]) -> Dict[str, Any]:
+        """
+        计算未显式提供的Column.onupdate列的值
+        
+        ON CONFLICT / MERGE / Core UPDATE 不会自动触发onupdate，需要手动补上
+        
+        Args:
+            exclude: 已显式提供的列
+            
+        Returns:
+            列名到列值的字典
+        """
+        return {
+            column.name: column.onupdate.arg(None)
+            for column in self.model.__table__.columns
+            if column.onupdate is not None and column.onupdate.is_callable and column.name not in exclude
+        }
+    
+    @staticmethod
+    def _normalize_for_compare(value: Any) -> Any:
+        """统一比较口径：带时区的时间转换为UTC naive时间"""
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    
+    def _diff_rows(self, rows: Sequence[Dict[str, Any]], conflict_columns: Sequence[str]
+                   ) -> Tuple[List[Tuple[Tuple[Any, ...], Dict[str, Any], Dict[str, Any]]],
+                              List[Tuple[Tuple[Any, ...], Dict[str, Any], Dict[str, Any], Tuple[str, ...]]],
+                              int]:
+        """
+        用一次按键查询取出已存在行的当前值，在内存中逐列比较负载
+        
+        同一键出现多次时以最后一行为准
+        
+        Args:
+            rows: 负载数据列表
+            conflict_columns: 键列
+            
+        Returns:
+            (新行列表[(键, 列值, 负载行)], 有变化的行列表[(键, 列值, 负载行, 变化的列)], 未变化数量)
+        """
+        table = self.model.__table__
+        
+        deduped: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        sources: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        for data in rows:
+            row = self._coerce_row(data)
+            key = tuple(row.get(column) for column in conflict_columns)
+            deduped[key] = row
+            sources[key] = data
+        if not deduped:
+            return [], [], 0
+        
+        key_columns = [table.c[column] for column in conflict_columns]
+        compare_columns = sorted({
+            column
+            for row in deduped.values()
+            for column in row
+            if column not in conflict_columns and column != "id"
+        })
+        if len(key_columns) == 1:
+            key_filter = key_columns[0].in_([key[0] for key in deduped])
+        else:
+            key_filter = tuple_(*key_columns).in_(list(deduped))
+        existing = {
+            tuple(record[:len(key_columns)]): record._mapping
+            for record in self.session.execute(
+                select(*key_columns, *[table.c[column] for column in compare_columns]).where(key_filter)
+            )
+        }
+        
+        new_rows = []
+        changed_rows = []
+        unchanged = 0
+        for key, row in deduped.items():
+            current = existing.get(key)
+            if current is None:
+                new_rows.append((key, row, sources[key]))
+                continue
+            changed = tuple(
+                column for column in compare_columns
+                if column in row
+                and self._normalize_for_compare(row[column]) != self._normalize_for_compare(current[column])
+            )
+            if changed:
+                changed_rows.append((key, row, sources[key], changed))
+            else:
+                unchanged += 1
+        return new_rows, changed_rows, unchanged
+    
+    def changed_values(self, instance: T, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        按_diff_rows的比较口径找出负载中与已加载记录不同的列
+        
+        Args:
+            instance: 已加载的模型实例
+            data: 负载数据
+            
+        Returns:
+            有变化的列名到转换后列值的字典，内容相同时为空
+        """
+        return {
+            column: value
+            for column, value in self._coerce_row(data).items()
+            if column != "id"
+            and self._normalize_for_compare(value) != self._normalize_for_compare(getattr(instance, column, None))
+        }
+    
+    def bulk_upsert(self, rows: Sequence[Dict[str, Any]],
+                    conflict_columns: Sequence[str] = ("id",),
+                    changes: Optional[List[Tuple[str, Dict[str, Any]]]] = None) -> Tuple[int, int, int]:
+        """
+        基于集合的批量插入或更新，跳过内容未变化的行
+        
+        先用一次查询取出已存在行的当前值，在内存中逐列比较：
+        新行用 INSERT ... ON CONFLICT DO UPDATE 写入，
+        有变化的行只更新不同的列，完全相同的行不产生任何写入
+        
+        Args:
+            rows: 负载数据列表
+            conflict_columns: 冲突判定列，需有唯一约束或主键
+            changes: 可选列表，传入时按("created"/"updated", 负载行)追加新建和有变化的行
+            
+        Returns:
+            (创建数量, 更新数量, 未变化数量)
+        """
+        table = self.model.__table__
+        if not rows:
+            return 0, 0, 0
+        
+        dialect = self.session.get_bind().dialect.name
+        if dialect == "postgresql":
+            insert_factory = postgresql_insert
+        elif dialect == "sqlite":
+            insert_factory = sqlite_insert
+        else:
+            raise ValueError(f"不支持批量upsert的数据库: {dialect}")
+        
+        key_columns = [table.c[column] for column in conflict_columns]
+        new_rows, changed_rows, unchanged = self._diff_rows(rows, conflict_columns)
+        
+        # executemany要求每组参数的列一致，按列集合分组执行
+        inserts: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for _, row, source in new_rows:
+            inserts.setdefault(tuple(sorted(row)), []).append(row)
+            if changes is not None:
+                changes.append(("created", source))
+        updates: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for _, row, source, changed in changed_rows:
+            updates.setdefault(changed, []).append(row)
+            if changes is not None:
+                changes.append(("updated", source))
+        
+        for columns, values in inserts.items():
+            statement = insert_factory(table)
+            set_ = {
+                column: statement.excluded[column]
+                for column in columns
+                if column not in conflict_columns and column != "id"
+            }
+            set_.update(self._onupdate_values(exclude=set_))
+            if set_:
+                statement = statement.on_conflict_do_update(index_elements=key_columns, set_=set_)
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=key_columns)
+            self.session.execute(statement, values)
+        
+        for columns, values in updates.items():
+            statement = (
+                update(table)
+                .where(and_(*[column == bindparam(f"_key_{column.name}") for column in key_columns]))
+                .values(
+                    **{column: bindparam(f"_value_{column}") for column in columns},
+                    **self._onupdate_values(exclude=columns)
+                )
+            )
+            self.session.execute(statement, [
+                {
+                    **{f"_key_{column}": row[column] for column in conflict_columns},
+                    **{f"_value_{column}": row[column] for column in columns}
+                }
+                for row in values
+            ])
+        
+        created = sum(len(values) for values in inserts.values())
+        updated = sum(len(values) for values in updates.values())
+        return created, updated, unchanged
+    
+    def plan_upsert(self, rows: Sequence[Dict[str, Any]],
+                    conflict_columns: Sequence[str] = ("id",),
+                    sample_size: int = 20) -> Dict[str, Any]:
+        """
+        计算bulk_upsert将产生的变更，不写入任何数据
+        
+        Args:
+            rows: 负载数据列表
+            conflict_columns: 键列
+            sample_size: 每类变更最多返回的示例键数量
+            
+        Returns:
+            包含create/update/unchanged数量、各列变化次数changed_columns和示例键samples的字典
+        """
+        new_rows, changed_rows, unchanged = self._diff_rows(rows, conflict_columns)
+        changed_columns: Dict[str, int] = {}
+        for _, _, _, changed in changed_rows:
+            for column in changed:
+                changed_columns[column] = changed_columns.get(column, 0) + 1
+        return {
+            "create": len(new_rows),
+            "update": len(changed_rows),
+            "unchanged": unchanged,
+            "changed_columns": changed_columns,
+            "samples": {
+                "create": [self._format_key(key) for key, _, _ in new_rows[:sample_size]],
+                "update": [
+                    {"key": self._format_key(key), "columns": list(changed)}
+                    for key, _, _, changed in changed_rows[:sample_size]
+                ]
+            }
+        }
+    
+    @staticmethod
+    def _format_key(key: Tuple[Any, ...]) -> List[Optional[str]]:
+        """把键转换为可JSON序列化的字符串列表"""
+        return [None if value is None else str(value) for value in key]
+    
+    def _insert_defaults(self, present: Sequence[str]) -> Dict[str, Any]:
+        """
+        计算未提供的列在插入时使用的Python端默认值
+        
+        Args:
+            present: 已提供的列
+            
+        Returns:
+            列名到默认值的字典
+        """
+        defaults = {}
+        for column in self.model.__table__.columns:
+            default = column.default
+            if column.name in present or default is None:
+                continue
+            if default.is_callable:
+                defaults[column.name] = default.arg(None)
+            elif default.is_scalar:
+                defaults[column.name] = default.arg
+        return defaults
+    
+    @staticmethod
+    def _copy_text_value(value: Any) -> str:
+        """将值编码为COPY文本格式的字段"""
+        if value is None:
+            return "\\N"
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        return str(value).translate(_COPY_ESCAPES)
+    
+    def copy_merge(self, rows: Sequence[Dict[str, Any]],
+                   conflict_columns: Sequence[str] = ("id",)) -> Tuple[int, int, int]:
+        """
+        通过COPY暂存表和MERGE批量合并数据（仅PostgreSQL）
+        
+        数据先COPY进事务级临时表，再用MERGE合并到目标表，同一键出现多次时以最后一行为准。
+        与bulk_upsert一致，已存在的行只改写负载中携带的列，内容未变化的行不会被改写；
+        id、created_time等列的默认值只用于新插入的行
+        
+        Args:
+            rows: 负载数据列表
+            conflict_columns: 合并判定列
+            
+        Returns:
+            (创建数量, 更新数量, 未变化数量)
+        """
+        dialect = self.session.get_bind().dialect
+        if dialect.name != "postgresql":
+            raise ValueError(f"COPY合并仅支持PostgreSQL: {dialect.name}")
+        
+        # COPY文本由PostgreSQL自行解析UUID和时间，无需在Python端转换类型
+        table = self.model.__table__
+        deduped: Dict[Any, Dict[str, Any]] = {}
+        for index, data in enumerate(rows):
+            row = {key: value for key, value in data.items() if key in table.columns}
+            key = tuple(row.get(column) for column in conflict_columns)
+            deduped[index if None in key else key] = row
+        if not deduped:
+            return 0, 0, 0
+        
+        # 携带的列不同的行分组合并，缺失的列不会以NULL覆盖已存在的值
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for row in deduped.values():
+            groups.setdefault(tuple(column.name for column in table.columns if column.name in row), []).append(row)
+        
+        quote = dialect.identifier_preparer.quote
+        stage = quote(f"_sync_stage_{table.name}")
+        # 临时表本身不写WAL，事务结束时自动删除
+        self.session.execute(text(
+            f"CREATE TEMP TABLE IF NOT EXISTS {stage} "
+            f"(LIKE {quote(table.name)} INCLUDING DEFAULTS, _stage_seq BIGSERIAL) ON COMMIT DROP"
+        ))
+        
+        created = updated = unchanged = 0
+        for columns, group in groups.items():
+            group_created, group_updated, group_unchanged = self._merge_stage_group(
+                stage, group, columns, conflict_columns
+            )
+            created += group_created
+            updated += group_updated
+            unchanged += group_unchanged
+        return created, updated, unchanged
+    
+    def _merge_stage_group(self, stage: str, rows: List[Dict[str, Any]], columns: Sequence[str],
+                           conflict_columns: Sequence[str]) -> Tuple[int, int, int]:
+        """
+        把携带相同列的一组行COPY进暂存表并MERGE到目标表
+        
+        Args:
+            stage: 已创建的暂存表名（已加引号）
+            rows: 携带相同列的负载行，键不重复
+            columns: 负载携带的列
+            conflict_columns: 合并判定列
+            
+        Returns:
+            (创建数量, 更新数量, 未变化数量)
+        """
+        table = self.model.__table__
+        quote = self.session.get_bind().dialect.identifier_preparer.quote
+        target = quote(table.name)
+        insert_only = self._insert_defaults(columns)
+        staged_columns = [column.name for column in table.columns if column.name in columns or column.name in insert_only]
+        keys = [quote(column) for column in conflict_columns]
+        
+        self.session.execute(text(f"TRUNCATE {stage}"))
+        buffer = io.StringIO()
+        for row in rows:
+            values = {**self._insert_defaults(columns), **row}
+            buffer.write("\t".join(self._copy_text_value(values.get(column)) for column in staged_columns))
+            buffer.write("\n")
+        buffer.seek(0)
+        cursor = self.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {stage} ({', '.join(quote(column) for column in staged_columns)}) FROM STDIN",
+                buffer
+            )
+        finally:
+            cursor.close()
+        
+        join_condition = " AND ".join(f"t.{key} = s.{key}" for key in keys)
+        source = (
+            f"(SELECT DISTINCT ON ({', '.join(keys)}) * FROM {stage} "
+            f"ORDER BY {', '.join(keys)}, _stage_seq DESC) AS s"
+        )
+        # 只比较和改写负载携带的列，插入时补上的默认值不参与
+        compare_columns = [column for column in columns if column not in conflict_columns and column != "id"]
+        changed_condition = " OR ".join(
+            f"t.{quote(column)} IS DISTINCT FROM s.{quote(column)}" for column in compare_columns
+        ) or "FALSE"
+        
+        total, matched, updated = self.session.execute(text(
+            f"SELECT count(*), count(t.{keys[0]}), "
+            f"count(*) FILTER (WHERE t.{keys[0]} IS NOT NULL AND ({changed_condition})) "
+            f"FROM {source} LEFT JOIN {target} t ON {join_condition}"
+        )).one()
+        
+        params: Dict[str, Any] = {}
+        assignments = [f"{quote(column)} = s.{quote(column)}" for column in compare_columns]
+        for column, value in self._onupdate_values(exclude=columns).items():
+            params[f"onupdate_{column}"] = value
+            assignments.append(f"{quote(column)} = :onupdate_{column}")
+        
+        # 内容未变化的行不满足WHEN MATCHED条件，不产生新的行版本
+        column_list = ", ".join(quote(column) for column in staged_columns)
+        matched_clause = (
+            f"WHEN MATCHED AND ({changed_condition}) THEN UPDATE SET {', '.join(assignments)} "
+            if compare_columns else ""
+        )
+        self.session.execute(text(
+            f"MERGE INTO {target} AS t "
+            f"USING {source} "
+            f"ON {join_condition} "
+            f"{matched_clause}"
+            f"WHEN NOT MATCHED THEN INSERT ({column_list}) "
+            f"VALUES ({', '.join(f's.{quote(column)}' for column in staged_columns)})"
+        ), params)
+        
+        return total - matched, updated, matched - updated
+    
+    def delete_missing(self, keys: Sequence[Tuple[Any, ...]],
+                       key_columns: Sequence[str] = ("id",),
+                       soft_delete_column: Optional[str] = None,
+                       max_ratio: Optional[float] = None,
+                       min_rows: int = 0) -> Tuple[int, int]:
+        """
+        删除（或软删除）不在给定键集合中的记录
+        
+        键先批量写入临时表，再用 NOT EXISTS 反连接一次性找出并删除缺失的行。
+        软删除时只处理soft_delete_column为真的行，并把该列置为False
+        
+        Args:
+            keys: 应保留的键，每个元素的顺序与key_columns一致
+            key_columns: 键列
+            soft_delete_column: 软删除标记列，为None时物理删除
+            max_ratio: 缺失行占现有行的最大比例，超过时不删除并抛出ValueError
+            min_rows: 缺失行数不超过该值时不检查max_ratio，避免小表上的正常删除被阈值拦截
+            
+        Returns:
+            (删除数量, 现有数量)
+        """
+        table = self.model.__table__
+        converters = self._column_converters()
+        staged = set()
+        for key in keys:
+            if any(value is None for value in key):
+                continue
+            staged.add(tuple(
+                converters[column](value) if converters.get(column) and isinstance(value, str) else value
+                for column, value in zip(key_columns, key)
+            ))
+        
+        # 临时表只在当前连接可见，出错时随外层事务/SAVEPOINT一起回滚
+        stage = Table(
+            f"_sync_keep_{table.name}",
+            MetaData(),
+            *[Column(column, table.c[column].type) for column in key_columns],
+            prefixes=["TEMPORARY"]
+        )
+        connection = self.session.connection()
+        stage.create(connection)
+        if staged:
+            connection.execute(stage.insert(), [dict(zip(key_columns, key)) for key in staged])
+        
+        conditions = []
+        if soft_delete_column is not None:
+            conditions.append(table.c[soft_delete_column].is_(True))
+        total = self.session.scalar(select(func.count()).select_from(table).where(*conditions))
+        conditions.append(~exists().where(and_(*[stage.c[column] == table.c[column] for column in key_columns])))
+        missing = self.session.scalar(select(func.count()).select_from(table).where(*conditions))
+        
+        if missing > min_rows and max_ratio is not None and missing > total * max_ratio:
+            stage.drop(connection)
+            raise ValueError(f"{table.name}待删除{missing}/{total}行，超过阈值{max_ratio:.0%}")
+        if missing:
+            if soft_delete_column is None:
+                self.session.execute(delete(table).where(*conditions))
+            else:
+                self.session.execute(
+                    update(table).where(*conditions).values(
+                        {soft_delete_column: False, **self._onupdate_values(exclude=[soft_delete_column])}
+                    )
+                )
+        stage.drop(connection)
+        
+        return missing, total
+    
+    def plan_deletes(self, keys: Sequence[Tuple[Any, ...]],
+                     key_columns: Sequence[str] = ("id",),
+                     soft_delete_column: Optional[str] = None,
+                     sample_size: int = 20) -> Dict[str, Any]:
+        """
+        计算delete_missing将删除的记录，只读取键列，不写入任何数据（包括临时表）
+        
+        Args:
+            keys: 应保留的键，每个元素的顺序与key_columns一致
+            key_columns: 键列
+            soft_delete_column: 软删除标记列，为None时按物理删除统计
+            sample_size: 最多返回的示例键数量
+            
+        Returns:
+            包含delete（待删除数量）、total（现有数量）和示例键samples的字典
+        """
+        table = self.model.__table__
+        converters = self._column_converters()
+        keep = {
+            tuple(
+                self._normalize_for_compare(
+                    converters[column](value) if converters.get(column) and isinstance(value, str) else value
+                )
+                for column, value in zip(key_columns, key)
+            )
+            for key in keys
+        }
+        
+        query = select(*[table.c[column] for column in key_columns])
+        if soft_delete_column is not None:
+            query = query.where(table.c[soft_delete_column].is_(True))
+        total = 0
+        missing = []
+        for record in self.session.execute(query.execution_options(yield_per=10000)):
+            total += 1
+            key = tuple(self._normalize_for_compare(value) for value in record)
+            if key not in keep:
+                missing.append(key)
+        
+        return {
+            "delete": len(missing),
+            "total": total,
+            "samples": [self._format_key(key) for key in missing[:sample_size]]
+        }
@@ -6,8 +6,10 @@
 from typing import List, Optional
 from datetime import date
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_, or_, func
 from .base_repository import BaseRepository
+from .async_base_repository import AsyncBaseRepository
 from src.models.budget import UseCaseBudget, UseCaseBudgetUsage
 
 class BudgetRepository(BaseRepository[UseCaseBudget]):
@@ -78,4 +80,32 @@ class BudgetUsageRepository(BaseRepository[UseCaseBudgetUsage]):
         return {
             'total_usage_records': total_usage,
             'total_amount_used': float(total_amount)
-        } 
\ No newline at end of file
+        }
+
+class AsyncBudgetRepository(AsyncBaseRepository[UseCaseBudget]):
+    """异步预算仓储类"""
+    
+    def __init__(self, session: AsyncSession):
+        super().__init__(UseCaseBudget, session)
+    
+    async def find_by_use_case_id(self, use_case_id: str) -> List[UseCaseBudget]:
+        """根据用例ID查找预算"""
+        return await self.find_by(use_case_id=use_case_id)
+    
+    async def find_by_currency(self, currency: str) -> List[UseCaseBudget]:
+        """根据货币查找预算"""
+        return await self.find_by(currency=currency)
+
+class AsyncBudgetUsageRepository(AsyncBaseRepository[UseCaseBudgetUsage]):
+    """异步预算使用仓储类"""
+    
+    def __init__(self, session: AsyncSession):
+        super().__init__(UseCaseBudgetUsage, session)
+    
+    async def find_by_use_case_id(self, use_case_id: str) -> List[UseCaseBudgetUsage]:
+        """根据用例ID查找使用记录"""
+        return await self.find_by(use_case_id=use_case_id)
+    
+    async def find_by_period(self, usage_period: date) -> List[UseCaseBudgetUsage]:
+        """根据使用期间查找使用记录"""
+        return await self.find_by(usage_period=usage_period)
@@ -5,8 +5,10 @@
 
 from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_, or_
 from .base_repository import BaseRepository
+from .async_base_repository import AsyncBaseRepository
 from src.models.deployment import ModelDeployment
 
 class DeploymentRepository(BaseRepository[ModelDeployment]):
@@ -110,4 +112,26 @@ class DeploymentRepository(BaseRepository[ModelDeployment]):
             'default_deployments': default_count,
             'region_stats': {region: count for region, count in region_stats},
             'model_stats': {model_id: count for model_id, count in model_stats}
-        } 
\ No newline at end of file
+        }
+
+class AsyncDeploymentRepository(AsyncBaseRepository[ModelDeployment]):
+    """异步部署仓储类"""
+    
+    def __init__(self, session: AsyncSession):
+        super().__init__(ModelDeployment, session)
+    
+    async def find_by_model_id(self, model_id: str) -> List[ModelDeployment]:
+        """根据模型ID查找部署"""
+        return await self.find_by(model_id=model_id)
+    
+    async def find_by_name(self, deployment_name: str) -> Optional[ModelDeployment]:
+        """根据部署名称查找部署"""
+        return await self.find_one_by(deployment_name=deployment_name)
+    
+    async def find_by_region(self, region: str) -> List[ModelDeployment]:
+        """根据区域查找部署"""
+        return await self.find_by(region=region)
+    
+    async def find_default_deployment(self, model_id: str) -> Optional[ModelDeployment]:
+        """查找模型的默认部署"""
+        return await self.find_one_by(model_id=model_id, is_default=True)
@@ -6,8 +6,10 @@
 from typing import List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_, or_, func
 from .base_repository import BaseRepository
+from .async_base_repository import AsyncBaseRepository
 from src.models.limit import ModelLimit, ModelLimitUsage
 
 class LimitRepository(BaseRepository[ModelLimit]):
@@ -133,4 +135,36 @@ class LimitUsageRepository(BaseRepository[ModelLimitUsage]):
         return {
             'total_usage_records': total_usage,
             'total_usage_value': total_value
-        } 
\ No newline at end of file
+        }
+
+class AsyncLimitRepository(AsyncBaseRepository[ModelLimit]):
+    """异步限制仓储类"""
+    
+    def __init__(self, session: AsyncSession):
+        super().__init__(ModelLimit, session)
+    
+    async def find_by_subscription_id(self, subscription_id: str) -> List[ModelLimit]:
+        """根据订阅ID查找限制"""
+        return await self.find_by(subscription_id=subscription_id)
+    
+    async def find_by_type(self, limit_type: str) -> List[ModelLimit]:
+        """根据限制类型查找限制"""
+        return await self.find_by(limit_type=limit_type)
+    
+    async def find_by_subscription_and_type(self, subscription_id: str, limit_type: str) -> Optional[ModelLimit]:
+        """根据订阅ID和类型查找限制"""
+        return await self.find_one_by(subscription_id=subscription_id, limit_type=limit_type)
+
+class AsyncLimitUsageRepository(AsyncBaseRepository[ModelLimitUsage]):
+    """异步限制使用仓储类"""
+    
+    def __init__(self, session: AsyncSession):
+        super().__init__(ModelLimitUsage, session)
+    
+    async def find_by_limit_id(self, limit_id: str) -> List[ModelLimitUsage]:
+        """根据限制ID查找使用记录"""
+        return await self.find_by(limit_id=limit_id)
+    
+    async def find_by_request_id(self, request_id: str) -> Optional[ModelLimitUsage]:
+        """根据请求ID查找使用记录"""
+        return await self.find_one_by(request_id=request_id)
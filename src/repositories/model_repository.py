@@ -5,8 +5,10 @@
 
 from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_, or_, func
 from .base_repository import BaseRepository
+from .async_base_repository import AsyncBaseRepository
 from src.models.model import Model
 
 class ModelRepository(BaseRepository[Model]):
@@ -88,4 +90,22 @@ class ModelRepository(BaseRepository[Model]):
             'total_models': total_models,
             'provider_stats': {provider: count for provider, count in provider_stats},
             'type_stats': {model_type: count for model_type, count in type_stats}
-        } 
\ No newline at end of file
+        }
+
+class AsyncModelRepository(AsyncBaseRepository[Model]):
+    """异步模型仓储类"""
+    
+    def __init__(self, session: AsyncSession):
+        super().__init__(Model, session)
+    
+    async def find_by_name(self, model_name: str) -> Optional[Model]:
+        """根据模型名称查找模型"""
+        return await self.find_one_by(model_name=model_name)
+    
+    async def find_by_type(self, model_type: str) -> List[Model]:
+        """根据模型类型查找模型"""
+        return await self.find_by(model_type=model_type)
+    
+    async def find_by_provider(self, provider: str) -> List[Model]:
+        """根据提供商查找模型"""
+        return await self.find_by(provider=provider)
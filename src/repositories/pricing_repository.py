@@ -5,8 +5,10 @@
 
 from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_, or_, func
 from .base_repository import BaseRepository
+from .async_base_repository import AsyncBaseRepository
 from src.models.pricing import ModelPricing
 
 class PricingRepository(BaseRepository[ModelPricing]):
@@ -80,4 +82,18 @@ class PricingRepository(BaseRepository[ModelPricing]):
                 }
                 for currency, count, avg_input, avg_output in currency_stats
             }
-        } 
\ No newline at end of file
+        }
+
+class AsyncPricingRepository(AsyncBaseRepository[ModelPricing]):
+    """异步定价仓储类"""
+    
+    def __init__(self, session: AsyncSession):
+        super().__init__(ModelPricing, session)
+    
+    async def find_by_model_id(self, model_id: str) -> List[ModelPricing]:
+        """根据模型ID查找定价"""
+        return await self.find_by(model_id=model_id)
+    
+    async def find_by_currency(self, currency: str) -> List[ModelPricing]:
+        """根据货币查找定价"""
+        return await self.find_by(currency=currency)
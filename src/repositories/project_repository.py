@@ -5,8 +5,10 @@
 
 from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_, or_
 from .base_repository import BaseRepository
+from .async_base_repository import AsyncBaseRepository
 from src.models.project import Project
 
 class ProjectRepository(BaseRepository[Project]):
@@ -142,4 +144,22 @@ class ProjectRepository(BaseRepository[Project]):
             'total_projects': total_projects,
             'active_projects': active_projects,
             'inactive_projects': total_projects - active_projects
-        } 
\ No newline at end of file
+        }
+
+class AsyncProjectRepository(AsyncBaseRepository[Project]):
+    """异步项目仓储类"""
+    
+    def __init__(self, session: AsyncSession):
+        super().__init__(Project, session)
+    
+    async def find_by_name(self, project_name: str) -> Optional[Project]:
+        """根据项目名称查找项目"""
+        return await self.find_one_by(project_name=project_name)
+    
+    async def find_by_code(self, project_code: str) -> Optional[Project]:
+        """根据项目代码查找项目"""
+        return await self.find_one_by(project_code=project_code)
+    
+    async def get_projects_by_status(self, is_active: bool) -> List[Project]:
+        """根据状态获取项目"""
+        return await self.find_by(is_active=is_active)
@@ -5,8 +5,10 @@
 
 from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_, or_, func
 from .base_repository import BaseRepository
+from .async_base_repository import AsyncBaseRepository
 from src.models.subscription import Subscription
 
 class SubscriptionRepository(BaseRepository[Subscription]):
@@ -83,4 +85,26 @@ class SubscriptionRepository(BaseRepository[Subscription]):
         return {
             'total_subscriptions': total_subscriptions,
             'model_stats': {model_id: count for model_id, count in model_stats}
-        } 
\ No newline at end of file
+        }
+
+class AsyncSubscriptionRepository(AsyncBaseRepository[Subscription]):
+    """异步订阅仓储类"""
+    
+    def __init__(self, session: AsyncSession):
+        super().__init__(Subscription, session)
+    
+    async def find_by_project_id(self, project_id: str) -> List[Subscription]:
+        """根据项目ID查找订阅"""
+        return await self.find_by(project_id=project_id)
+    
+    async def find_by_use_case_id(self, use_case_id: str) -> List[Subscription]:
+        """根据用例ID查找订阅"""
+        return await self.find_by(use_case_id=use_case_id)
+    
+    async def find_by_model_id(self, model_id: str) -> List[Subscription]:
+        """根据模型ID查找订阅"""
+        return await self.find_by(model_id=model_id)
+    
+    async def find_by_project_and_use_case(self, project_id: str, use_case_id: str) -> List[Subscription]:
+        """根据项目ID和用例ID查找订阅"""
+        return await self.find_by(project_id=project_id, use_case_id=use_case_id)
@@ -0,0 +1,55 @@
+"""
+同步水位仓储类
+提供增量同步水位的读取和推进
+"""
+
+from datetime import datetime
+from typing import Dict, Tuple
+from sqlalchemy.orm import Session
+from .base_repository import BaseRepository
+from src.models.sync_watermark import SyncWatermark
+
+class SyncWatermarkRepository(BaseRepository[SyncWatermark]):
+    """同步水位仓储类"""
+    
+    def __init__(self, session: Session):
+        super().__init__(SyncWatermark, session)
+    
+    def get_watermarks(self) -> Dict[str, Tuple[datetime, str]]:
+        """
+        获取所有实体的水位
+        
+        Returns:
+            实体数组字段名到(watermark_time, watermark_id)的映射
+        """
+        return {
+            watermark.entity: (watermark.watermark_time, watermark.watermark_id)
+            for watermark in self.session.query(self.model).all()
+        }
+    
+    def advance(self, watermarks: Dict[str, Tuple[datetime, str]]) -> Dict[str, Tuple[datetime, str]]:
+        """
+        推进水位，只在新水位大于已保存的水位时更新
+        
+        Args:
+            watermarks: 实体数组字段名到(watermark_time, watermark_id)的映射
+            
+        Returns:
+            实际推进的水位
+        """
+        advanced = {}
+        for entity, (watermark_time, watermark_id) in watermarks.items():
+            existing = self.session.get(self.model, entity)
+            if existing is None:
+                self.session.add(self.model(
+                    entity=entity, watermark_time=watermark_time, watermark_id=watermark_id
+                ))
+            elif (watermark_time, watermark_id) > (existing.watermark_time, existing.watermark_id):
+                existing.watermark_time = watermark_time
+                existing.watermark_id = watermark_id
+            else:
+                continue
+            advanced[entity] = (watermark_time, watermark_id)
+        
+        self.session.flush()
+        return advanced
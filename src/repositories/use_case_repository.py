@@ -5,8 +5,10 @@
 
 from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_, or_
 from .base_repository import BaseRepository
+from .async_base_repository import AsyncBaseRepository
 from src.models.use_case import UseCase
 
 class UseCaseRepository(BaseRepository[UseCase]):
@@ -168,4 +170,26 @@ class UseCaseRepository(BaseRepository[UseCase]):
             'total_use_cases': total_use_cases,
             'active_use_cases': active_use_cases,
             'inactive_use_cases': total_use_cases - active_use_cases
-        } 
\ No newline at end of file
+        }
+
+class AsyncUseCaseRepository(AsyncBaseRepository[UseCase]):
+    """异步用例仓储类"""
+    
+    def __init__(self, session: AsyncSession):
+        super().__init__(UseCase, session)
+    
+    async def find_by_project_id(self, project_id: str) -> List[UseCase]:
+        """根据项目ID查找用例"""
+        return await self.find_by(project_id=project_id)
+    
+    async def find_by_name(self, use_case_name: str) -> Optional[UseCase]:
+        """根据用例名称查找用例"""
+        return await self.find_one_by(use_case_name=use_case_name)
+    
+    async def find_by_project_and_name(self, project_id: str, use_case_name: str) -> Optional[UseCase]:
+        """根据项目ID和用例名称查找用例"""
+        return await self.find_one_by(project_id=project_id, use_case_name=use_case_name)
+    
+    async def get_active_use_cases(self) -> List[UseCase]:
+        """获取所有活跃用例"""
+        return await self.find_by(is_active=True)
@@ -3,6 +3,8 @@
 定义事件处理的响应数据结构
 """
 
+from typing import List, Optional
+
 from pydantic import BaseModel, Field
 
 class EventResponse(BaseModel):
@@ -17,4 +19,46 @@ class EventResponse(BaseModel):
                 "status": "ok",
                 "message": "Event processed successfully"
             }
-        } 
\ No newline at end of file
+        } 
+
+
+class EventResult(BaseModel):
+    """批量事件中单个事件的处理结果"""
+    
+    event_id: str = Field(..., description="事件ID")
+    success: bool = Field(..., description="是否处理成功")
+    status: Optional[str] = Field(
+        None,
+        description="处理状态：created/updated/deleted/not_found/already_processed/coalesced/cancelled/in_progress/deferred，"
+                    "异步接收模式下为queued"
+    )
+    entity_id: Optional[str] = Field(None, description="实体ID")
+    coalesced_into: Optional[str] = Field(None, description="合并后实际应用的事件ID（status为coalesced时）")
+    error: Optional[str] = Field(None, description="失败原因")
+    retryable: bool = Field(False, description="失败是否由数据库连接或提交错误引起、或事件正在处理中，可原样重试")
+
+
+class EventBatchResponse(BaseModel):
+    """批量事件响应模式"""
+    
+    status: str = Field(..., description="整体状态：ok（全部成功）/partial（部分失败）/failed（全部失败）/accepted（已入队）")
+    processed: int = Field(..., description="本次应用成功的事件数")
+    skipped: int = Field(..., description="已处理过而跳过的事件数")
+    failed: int = Field(..., description="处理失败的事件数")
+    coalesced: int = Field(0, description="合并到其他事件或相互抵消、未单独写入数据库的事件数")
+    results: List[EventResult] = Field(..., description="与请求顺序一致的逐个事件结果")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status": "partial",
+                "processed": 1,
+                "skipped": 1,
+                "failed": 1,
+                "results": [
+                    {"event_id": "evt-0001", "success": True, "status": "created", "entity_id": "proj-001"},
+                    {"event_id": "evt-0002", "success": True, "status": "already_processed"},
+                    {"event_id": "evt-0003", "success": False, "error": "不支持的实体类型: unknown"}
+                ]
+            }
+        }
@@ -16,6 +16,10 @@ class SyncRequest(BaseModel):
         description="增量同步起始时间，如果不提供则进行全量同步",
         example="2025-07-01T00:00:00Z"
     )
+    dry_run: bool = Field(
+        False,
+        description="只计算同步将产生的创建/更新/删除变更，不写入任何数据"
+    )
     
     class Config:
         json_encoders = {
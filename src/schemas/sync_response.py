@@ -2,7 +2,8 @@
 同步API响应数据模式
 """
 
-from typing import List
+from typing import Any, Dict, List, Optional
+from datetime import datetime
 from pydantic import BaseModel, Field
 
 from src.schemas.payloads import (
@@ -79,4 +80,89 @@ class SyncResponse(BaseModel):
                     }
                 ]
             }
-        } 
\ No newline at end of file
+        }
+
+
+class SyncJobResponse(BaseModel):
+    """
+    异步同步任务状态模式
+    """
+    job_id: str = Field(..., description="任务ID")
+    status: str = Field(..., description="任务状态：queued/running/succeeded/failed")
+    phase: Optional[str] = Field(
+        None,
+        description="执行阶段：queued/fetching/writing/reconciling/completed/failed/joined/cancelled"
+    )
+    updated_since: Optional[datetime] = Field(None, description="增量同步起始时间")
+    created_at: datetime = Field(..., description="入队时间")
+    started_at: Optional[datetime] = Field(None, description="开始执行时间")
+    finished_at: Optional[datetime] = Field(None, description="结束时间")
+    progress: Dict[str, Dict[str, int]] = Field(
+        default_factory=dict,
+        description="各实体已处理的创建/更新/未变化/错误数量"
+    )
+    rows_processed: int = Field(0, description="已处理行数")
+    rows_per_sec: Optional[float] = Field(None, description="吞吐量（行/秒）")
+    totals: Optional[Dict[str, Any]] = Field(None, description="同步完成后的汇总统计")
+    error: Optional[str] = Field(None, description="失败原因")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "job_id": "5f0c2d8e6a8b4c1e9d7f3a2b1c0d9e8f",
+                "status": "running",
+                "phase": "writing",
+                "updated_since": None,
+                "created_at": "2025-07-20T10:00:00Z",
+                "started_at": "2025-07-20T10:00:01Z",
+                "finished_at": None,
+                "progress": {"projects": {"created": 120, "updated": 3, "unchanged": 0, "errors": 0}},
+                "rows_processed": 123,
+                "rows_per_sec": 61.5,
+                "totals": None,
+                "error": None
+            }
+        }
+
+
+class SyncPlanResponse(BaseModel):
+    """
+    同步变更计划模式（dry_run）
+    """
+    dry_run: bool = Field(True, description="是否为变更计划")
+    start_time: datetime = Field(..., description="开始时间")
+    end_time: datetime = Field(..., description="结束时间")
+    duration_seconds: float = Field(..., description="计算耗时（秒）")
+    totals: Dict[str, int] = Field(..., description="创建/更新/未变化/删除的总数量")
+    plan: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict,
+        description="按实体汇总的变更数量、各列变化次数changed_columns和示例键samples"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "dry_run": True,
+                "start_time": "2025-07-20T10:00:00Z",
+                "end_time": "2025-07-20T10:00:01Z",
+                "duration_seconds": 0.82,
+                "totals": {"create": 1, "update": 2, "unchanged": 9997, "delete": 0},
+                "plan": {
+                    "models": {
+                        "create": 1,
+                        "update": 2,
+                        "unchanged": 97,
+                        "delete": 0,
+                        "changed_columns": {"max_content_length": 2},
+                        "samples": {
+                            "create": [["model-101"]],
+                            "update": [
+                                {"key": ["model-007"], "columns": ["max_content_length"]},
+                                {"key": ["model-042"], "columns": ["max_content_length"]}
+                            ],
+                            "delete": []
+                        }
+                    }
+                }
+            }
+        }
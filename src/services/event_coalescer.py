@@ -0,0 +1,187 @@
+"""
+事件合并
+在批量应用前把同一实体（entity_type, entity_id）的多个事件合并为净效果：
+连续的UPDATE按timestamp逐字段后写覆盖合并为一个UPDATE，CREATE之后的UPDATE并入CREATE，
+UPDATE之后的DELETE只保留DELETE，CREATE之后的DELETE相互抵消
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.schemas.event_request import EventRequest
+
+
+@dataclass
+class _Run:
+    """同一实体可继续合并的一组事件，第一个为合并基准"""
+    event_type: str
+    indexes: List[int]
+
+
+@dataclass
+class CoalescedBatch:
+    """
+    合并结果
+
+    Attributes:
+        events: 需要应用的净事件，保持原有顺序
+        owners: 每个净事件对应的原事件下标（结果归属于该事件）
+        folded: 每个净事件合并进来的其他原事件下标
+        cancelled: 相互抵消、不需要应用的原事件下标
+        total: 原事件数
+    """
+    events: List[EventRequest] = field(default_factory=list)
+    owners: List[int] = field(default_factory=list)
+    folded: List[List[int]] = field(default_factory=list)
+    cancelled: List[int] = field(default_factory=list)
+    total: int = 0
+
+    @property
+    def saved(self) -> int:
+        """合并后少写入的事件数"""
+        return self.total - len(self.events)
+
+    def expand(self, results: List[Dict[str, Any]], originals: List[EventRequest]) -> List[Dict[str, Any]]:
+        """
+        把净事件的处理结果展开为与原事件一一对应的结果
+
+        被合并的事件继承净事件的成功与否，状态为coalesced；相互抵消的事件状态为cancelled
+
+        Args:
+            results: 与events顺序一致的处理结果
+            originals: 合并前的原事件列表
+
+        Returns:
+            与originals顺序一致的处理结果
+        """
+        expanded: List[Optional[Dict[str, Any]]] = [None] * self.total
+        for event, owner, folded, result in zip(self.events, self.owners, self.folded, results):
+            expanded[owner] = result
+            for index in folded:
+                expanded[index] = {
+                    "success": bool(result.get("success")),
+                    "status": "coalesced",
+                    "event_id": originals[index].event_id,
+                    "entity_id": originals[index].entity_id,
+                    "coalesced_into": event.event_id,
+                    **{key: result[key] for key in ("error", "retryable") if key in result}
+                }
+        for index in self.cancelled:
+            expanded[index] = {
+                "success": True,
+                "status": "cancelled",
+                "event_id": originals[index].event_id,
+                "entity_id": originals[index].entity_id
+            }
+        return expanded
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """解析ISO 8601时间戳，兼容Z后缀"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _by_timestamp(events: List[EventRequest]) -> List[EventRequest]:
+    """按timestamp稳定排序，存在无法解析或无法比较的时间戳时保持到达顺序"""
+    try:
+        return sorted(events, key=lambda event: _parse_timestamp(event.timestamp))
+    except (TypeError, ValueError):
+        return events
+
+
+def _merge(base: EventRequest, updates: List[EventRequest]) -> EventRequest:
+    """
+    合并base与其后的updates，时间戳取最新的一个
+
+    UPDATE之间按timestamp逐字段后写覆盖；base为CREATE时始终作为底层，只有updates参与排序
+    """
+    if base.event_type.upper() == "CREATE":
+        layers = [base] + _by_timestamp(updates)
+    else:
+        layers = _by_timestamp([base] + updates)
+    payload: Dict[str, Any] = {}
+    for layer in layers:
+        payload.update(layer.payload)
+    latest = _by_timestamp([base] + updates)[-1].timestamp
+    return base.model_copy(update={"payload": payload, "timestamp": latest})
+
+
+def _referenced(events: List[EventRequest], key: Tuple[str, str], start: int, end: int) -> bool:
+    """(start, end)之间是否有其他实体的事件在负载中引用了该实体ID（如外键）"""
+    entity_id = key[1]
+    for event in events[start + 1:end]:
+        if (event.entity_type.lower(), event.entity_id) == key:
+            continue
+        if any(value == entity_id for value in event.payload.values()):
+            return True
+    return False
+
+
+def _depends_between(events: List[EventRequest], key: Tuple[str, str], start: int, end: int) -> bool:
+    """(start, end)之间是否有其他实体的事件，其实体ID被第end个事件的负载引用（如外键指向期间创建的实体）"""
+    payload = events[end].payload
+    for event in events[start + 1:end]:
+        if (event.entity_type.lower(), event.entity_id) == key:
+            continue
+        if any(value == event.entity_id for value in payload.values()):
+            return True
+    return False
+
+
+def coalesce_events(events: List[EventRequest]) -> CoalescedBatch:
+    """
+    合并一批按发生顺序排列的事件
+
+    CREATE之后的DELETE只有在期间没有其他实体的事件引用该实体时才抵消，
+    避免引用它的子实体因父实体未创建而失败；UPDATE引用了期间其他事件所属的实体时不并入之前的事件，
+    而是作为新的合并基准，避免被提前到所引用的实体创建之前；CREATE/UPDATE/DELETE以外的事件类型不参与合并
+
+    Args:
+        events: 按发生顺序排列的事件列表
+
+    Returns:
+        合并结果
+    """
+    runs: List[Optional[_Run]] = []
+    open_runs: Dict[Tuple[str, str], int] = {}
+    cancelled: List[int] = []
+    for index, event in enumerate(events):
+        key = (event.entity_type.lower(), event.entity_id)
+        event_type = event.event_type.upper()
+        slot = open_runs.get(key)
+        run = runs[slot] if slot is not None else None
+
+        if run is not None and event_type == "UPDATE" and not _depends_between(events, key, run.indexes[0], index):
+            run.indexes.append(index)
+            continue
+        if run is not None and event_type == "DELETE" and run.event_type == "CREATE" \
+                and not _referenced(events, key, run.indexes[0], index):
+            cancelled.extend(run.indexes + [index])
+            runs[slot] = None
+            del open_runs[key]
+            continue
+        if run is not None and event_type == "DELETE" and run.event_type == "UPDATE":
+            # 实体即将被删除，之前的更新不再需要写入，DELETE保持在原位置
+            runs[slot] = None
+            runs.append(_Run(event_type, [index] + run.indexes))
+            open_runs.pop(key)
+            continue
+
+        open_runs.pop(key, None)
+        runs.append(_Run(event_type, [index]))
+        if event_type in ("CREATE", "UPDATE"):
+            open_runs[key] = len(runs) - 1
+
+    batch = CoalescedBatch(cancelled=sorted(cancelled), total=len(events))
+    for run in runs:
+        if run is None:
+            continue
+        owner, folded = run.indexes[0], run.indexes[1:]
+        event = events[owner]
+        if folded and run.event_type in ("CREATE", "UPDATE"):
+            event = _merge(event, [events[index] for index in folded])
+        batch.events.append(event)
+        batch.owners.append(owner)
+        batch.folded.append(sorted(folded))
+    return batch
@@ -3,34 +3,70 @@
 负责处理Model Garden发送的CUD事件
 """
 
-from typing import Dict, Any, Optional
+import inspect
+import zlib
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime, timezone
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import structlog
 
+from src.services.event_coalescer import coalesce_events
+from src.services.idempotency_store import EventIdempotencyStore
 from src.services.redis_service import RedisService
-from src.repositories.project_repository import ProjectRepository
-from src.repositories.use_case_repository import UseCaseRepository
-from src.repositories.budget_repository import BudgetRepository
-from src.repositories.model_repository import ModelRepository
-from src.repositories.deployment_repository import DeploymentRepository
-from src.repositories.pricing_repository import PricingRepository
-from src.repositories.subscription_repository import SubscriptionRepository
-from src.repositories.limit_repository import LimitRepository
+from src.repositories.project_repository import ProjectRepository, AsyncProjectRepository
+from src.repositories.use_case_repository import UseCaseRepository, AsyncUseCaseRepository
+from src.repositories.budget_repository import BudgetRepository, AsyncBudgetRepository
+from src.repositories.model_repository import ModelRepository, AsyncModelRepository
+from src.repositories.deployment_repository import DeploymentRepository, AsyncDeploymentRepository
+from src.repositories.pricing_repository import PricingRepository, AsyncPricingRepository
+from src.repositories.subscription_repository import SubscriptionRepository, AsyncSubscriptionRepository
+from src.repositories.limit_repository import LimitRepository, AsyncLimitRepository
 from src.schemas.event_request import EventRequest
 from src.config.settings import get_settings
+from src.utils.db_executor import run_coroutine_in_db_executor, run_in_db_executor
 from src.utils.logger import get_logger
 
 logger = get_logger()
 
+def event_partition(entity_id: str, partitions: int) -> int:
+    """
+    计算实体所属的事件分区，使用crc32使不同进程和节点的结果一致
+    
+    Args:
+        entity_id: 实体ID
+        partitions: 分区数
+        
+    Returns:
+        分区号
+    """
+    return zlib.crc32(entity_id.encode("utf-8")) % max(partitions, 1)
+
+
+def partition_stream(stream_name: str, partition: int) -> str:
+    """
+    获取分区对应的事件流名称
+    
+    Args:
+        stream_name: 事件流前缀
+        partition: 分区号
+        
+    Returns:
+        分区事件流名称
+    """
+    return f"{stream_name}:{partition}"
+
 
 class EventService:
     """事件服务类"""
     
-    def __init__(self, db_session: Optional[Session] = None):
+    def __init__(self, db_session: Optional[Union[Session, AsyncSession]] = None):
         self.settings = get_settings()
         self.redis_service = RedisService()
+        self.idempotency_store = EventIdempotencyStore(self.redis_service)
         self.db_session = db_session
+        self.is_async = False
         
         # 初始化仓储（如果有session则使用，否则延迟初始化）
         if db_session:
@@ -38,20 +74,57 @@ class EventService:
         else:
             self._repositories_initialized = False
     
-    def _init_repositories(self, session: Session):
-        """初始化仓储"""
-        self.project_repo = ProjectRepository(session)
-        self.use_case_repo = UseCaseRepository(session)
-        self.budget_repo = BudgetRepository(session)
-        self.model_repo = ModelRepository(session)
-        self.deployment_repo = DeploymentRepository(session)
-        self.pricing_repo = PricingRepository(session)
-        self.subscription_repo = SubscriptionRepository(session)
-        self.limit_repo = LimitRepository(session)
+    def _init_repositories(self, session: Union[Session, AsyncSession]):
+        """初始化仓储，AsyncSession使用异步仓储"""
+        self.db_session = session
+        self.is_async = isinstance(session, AsyncSession)
+        if self.is_async:
+            self.project_repo = AsyncProjectRepository(session)
+            self.use_case_repo = AsyncUseCaseRepository(session)
+            self.budget_repo = AsyncBudgetRepository(session)
+            self.model_repo = AsyncModelRepository(session)
+            self.deployment_repo = AsyncDeploymentRepository(session)
+            self.pricing_repo = AsyncPricingRepository(session)
+            self.subscription_repo = AsyncSubscriptionRepository(session)
+            self.limit_repo = AsyncLimitRepository(session)
+        else:
+            self.project_repo = ProjectRepository(session)
+            self.use_case_repo = UseCaseRepository(session)
+            self.budget_repo = BudgetRepository(session)
+            self.model_repo = ModelRepository(session)
+            self.deployment_repo = DeploymentRepository(session)
+            self.pricing_repo = PricingRepository(session)
+            self.subscription_repo = SubscriptionRepository(session)
+            self.limit_repo = LimitRepository(session)
         self._repositories_initialized = True
     
+    @staticmethod
+    async def _resolve(result: Any) -> Any:
+        """兼容同步与异步仓储的返回值"""
+        if inspect.isawaitable(result):
+            return await result
+        return result
+    
+    async def _commit(self):
+        """提交事件处理产生的变更"""
+        if self.db_session is None:
+            return
+        if self.is_async:
+            await self.db_session.commit()
+        else:
+            await run_in_db_executor(self.db_session.commit)
+    
+    async def _rollback(self):
+        """回滚未提交的变更"""
+        if self.db_session is None:
+            return
+        if self.is_async:
+            await self.db_session.rollback()
+        else:
+            await run_in_db_executor(self.db_session.rollback)
+    
     async def process_event(self, event_request: EventRequest, 
-                           session: Optional[Session] = None) -> Dict[str, Any]:
+                           session: Optional[Union[Session, AsyncSession]] = None) -> Dict[str, Any]:
         """
         处理CUD事件
         
@@ -75,25 +148,28 @@ class EventService:
             entity_id=event_request.entity_id
         )
         
+        reserved = False
         try:
-            # 检查事件是否已处理（幂等性）
-            cache_key = f"event:processed:{event_request.event_id}"
-            if await self.redis_service.get_cache(cache_key):
+            # 原子地预留事件（幂等性），并发的重复事件只有一个会被处理
+            state = (await self.idempotency_store.reserve([event_request.event_id]))[0]
+            if state == EventIdempotencyStore.PROCESSED:
                 logger.info("事件已处理，跳过", event_id=event_request.event_id)
                 return {
                     "success": True,
                     "status": "already_processed",
                     "event_id": event_request.event_id
                 }
+            if state == EventIdempotencyStore.IN_PROGRESS:
+                logger.info("事件正在处理中，跳过", event_id=event_request.event_id)
+                return self._in_progress_result(event_request)
+            reserved = True
             
             # 根据实体类型和事件类型分发处理
             result = await self._dispatch_event(event_request)
+            await self._commit()
             
             # 标记事件已处理
-            await self.redis_service.set_cache(cache_key, {
-                "processed_at": start_time.isoformat(),
-                "result": result
-            }, expire=86400)  # 24小时
+            await self.idempotency_store.complete([event_request.event_id])
             
             # 发布事件处理完成到Redis Stream
             await self.redis_service.publish_event("event_processed", {
@@ -115,6 +191,9 @@ class EventService:
             return result
             
         except Exception as e:
+            await self._rollback()
+            if reserved:
+                await self.idempotency_store.release([event_request.event_id])
             logger.error(
                 "事件处理失败",
                 event_id=event_request.event_id,
@@ -139,18 +218,232 @@ class EventService:
                 "event_id": event_request.event_id
             }
     
-    async def _dispatch_event(self, event_request: EventRequest) -> Dict[str, Any]:
+    async def enqueue_event(self, event_request: EventRequest) -> Optional[str]:
         """
-        根据实体类型分发事件处理
+        把事件追加到按entity_id选择的分区事件流，由后台消费者按分区顺序应用
         
         Args:
             event_request: 事件请求对象
             
         Returns:
-            处理结果字典
+            Stream条目ID，写入失败返回None
+        """
+        return await self.redis_service.publish_event(
+            self._partition_stream(event_request), self._stream_fields(event_request)
+        )
+    
+    async def enqueue_events(self, events: List[EventRequest]) -> bool:
+        """
+        把一批事件按entity_id追加到各自的分区事件流，每个分区用一次pipeline写入，分区内保持数组顺序
+        
+        Args:
+            events: 按发生顺序排列的事件请求列表
+            
+        Returns:
+            是否全部写入成功；部分分区写入失败时已写入的事件仍会被应用，整批重试时由幂等判断跳过
+        """
+        partitions: Dict[str, List[Dict[str, Any]]] = {}
+        for event in events:
+            partitions.setdefault(self._partition_stream(event), []).append(self._stream_fields(event))
+        for stream_name, fields in partitions.items():
+            if None in await self.redis_service.publish_events(stream_name, fields):
+                return False
+        return True
+    
+    def _partition_stream(self, event_request: EventRequest) -> str:
+        """事件所属的分区事件流"""
+        partition = event_partition(event_request.entity_id, self.settings.EVENT_PARTITIONS)
+        return partition_stream(self.settings.EVENT_INGEST_STREAM, partition)
+    
+    @staticmethod
+    def _stream_fields(event_request: EventRequest) -> Dict[str, Any]:
+        """事件写入事件流的字段"""
+        return {
+            "event_id": event_request.event_id,
+            "event_type": event_request.event_type,
+            "entity_type": event_request.entity_type,
+            "entity_id": event_request.entity_id,
+            "event": event_request.model_dump()
+        }
+    
+    async def process_events(self, events: List[EventRequest],
+                             session: Optional[Union[Session, AsyncSession]] = None) -> List[Dict[str, Any]]:
+        """
+        按顺序批量处理CUD事件
+        
+        用一次Lua调用原子地预留全部事件，批内重复的event_id只处理第一次；预留成功的事件在同一个事务中应用，
+        每个事件在独立的SAVEPOINT中执行，失败只回滚该事件。提交后用一次pipeline写入
+        已处理标记并释放失败事件的预留，再用一次pipeline发布所有处理结果。
+        正在由其他请求或消费者处理的事件状态为in_progress，带retryable标记；同一实体排在其后的事件
+        状态为deferred，同样带retryable标记且不应用，重试时仍按原顺序处理。
+        数据库连接错误或提交失败时整批回滚，所有待处理事件的结果带retryable标记。
+        EVENT_COALESCE开启时只应用同一实体事件合并后的净效果，被合并的事件状态为coalesced，
+        相互抵消的事件状态为cancelled
+        
+        Args:
+            events: 按发生顺序排列的事件请求列表
+            session: 数据库会话
+            
+        Returns:
+            与events顺序一致的处理结果列表
+        """
+        if session and not self._repositories_initialized:
+            self._init_repositories(session)
+        
+        start_time = datetime.now(timezone.utc)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(events)
+        unique: List[int] = []
+        seen = set()
+        for index, event in enumerate(events):
+            if event.event_id in seen:
+                results[index] = {"success": True, "status": "already_processed", "event_id": event.event_id}
+            else:
+                seen.add(event.event_id)
+                unique.append(index)
+        
+        states = await self.idempotency_store.reserve([events[index].event_id for index in unique])
+        pending: List[int] = []
+        deferred: List[int] = []
+        blocked = set()
+        for index, state in zip(unique, states):
+            entity = (events[index].entity_type, events[index].entity_id)
+            if state == EventIdempotencyStore.PROCESSED:
+                results[index] = {"success": True, "status": "already_processed", "event_id": events[index].event_id}
+            elif state == EventIdempotencyStore.IN_PROGRESS:
+                results[index] = self._in_progress_result(events[index])
+                blocked.add(entity)
+            elif entity in blocked:
+                # 同一实体更早的事件还未处理，先应用后续事件会打乱该实体的事件顺序
+                results[index] = self._deferred_result(events[index])
+                deferred.append(index)
+            else:
+                pending.append(index)
+        
+        pending_events = [events[index] for index in pending]
+        batch = coalesce_events(pending_events) if self.settings.EVENT_COALESCE else None
+        apply_events = batch.events if batch is not None else pending_events
+        try:
+            if self.is_async:
+                applied = await self._apply_events(apply_events)
+            else:
+                # 整批在数据库线程池的同一个线程中执行，只占用一次线程池调度
+                applied = await run_coroutine_in_db_executor(self._apply_events, apply_events)
+            await self._commit()
+            if batch is not None:
+                applied = batch.expand(applied, pending_events)
+        except Exception as e:
+            await self._rollback()
+            logger.error("批量事件处理失败", events=len(pending_events), error=str(e), exc_info=True)
+            applied = [
+                {"success": False, "error": str(e), "event_id": event.event_id, "retryable": True}
+                for event in pending_events
+            ]
+        for index, result in zip(pending, applied):
+            results[index] = result
+        
+        processing_time = (datetime.now(timezone.utc) - start_time).total_seconds()
+        await self.idempotency_store.complete([
+            events[index].event_id for index in pending if results[index].get("success")
+        ])
+        await self.idempotency_store.release([
+            events[index].event_id for index in pending if not results[index].get("success")
+        ] + [events[index].event_id for index in deferred])
+        await self.redis_service.publish_events("event_processed", [
+            {
+                "event_id": events[index].event_id,
+                "event_type": events[index].event_type,
+                "entity_type": events[index].entity_type,
+                "entity_id": events[index].entity_id,
+                "status": "success" if results[index].get("success") else "failed",
+                **({} if results[index].get("success") else {"error": results[index].get("error")}),
+                "processing_time": processing_time
+            }
+            for index in pending
+        ])
+        
+        failed = sum(1 for index in pending if not results[index].get("success"))
+        logger.info(
+            "批量事件处理完成",
+            events=len(events),
+            applied=len(pending) - failed,
+            skipped=len(events) - len(pending),
+            failed=failed,
+            coalesced=batch.saved if batch is not None else 0,
+            processing_time=processing_time
+        )
+        return results
+    
+    @staticmethod
+    def _in_progress_result(event_request: EventRequest) -> Dict[str, Any]:
+        """事件已被其他请求或消费者预留时的结果，调用方应稍后重试"""
+        return {
+            "success": False,
+            "status": "in_progress",
+            "error": "事件正在处理中",
+            "event_id": event_request.event_id,
+            "retryable": True
+        }
+    
+    @staticmethod
+    def _deferred_result(event_request: EventRequest) -> Dict[str, Any]:
+        """同一实体更早的事件正在处理中时的结果，调用方应在其之后按序重试"""
+        return {
+            "success": False,
+            "status": "deferred",
+            "error": "同一实体更早的事件正在处理中",
+            "event_id": event_request.event_id,
+            "retryable": True
+        }
+    
+    async def _apply_events(self, events: List[EventRequest]) -> List[Dict[str, Any]]:
+        """
+        在当前事务中依次应用事件，每个事件使用独立的SAVEPOINT
+        
+        同步会话时在数据库线程池中调用，处理器直接执行不再次调度到线程池
+        
+        Args:
+            events: 事件请求列表
+            
+        Returns:
+            与events顺序一致的处理结果列表
+        """
+        results = []
+        for event in events:
+            try:
+                handler, event_type = self._get_handler(event)
+                if self.is_async:
+                    async with self.db_session.begin_nested():
+                        result = await handler(event_type, event)
+                else:
+                    with self.db_session.begin_nested():
+                        result = await handler(event_type, event)
+            except DBAPIError as e:
+                # 连接层面的错误不属于单个事件，交给调用方整批回滚
+                if isinstance(e, OperationalError) or e.connection_invalidated:
+                    raise
+                logger.warning("事件处理失败，已回滚该事件", event_id=event.event_id, error=str(e))
+                result = {"success": False, "error": str(e), "event_id": event.event_id}
+            except Exception as e:
+                logger.warning("事件处理失败，已回滚该事件", event_id=event.event_id, error=str(e))
+                result = {"success": False, "error": str(e), "event_id": event.event_id}
+            results.append(result)
+        return results
+    
+    def _get_handler(self, event_request: EventRequest
+                     ) -> Tuple[Callable[[str, EventRequest], Awaitable[Dict[str, Any]]], str]:
+        """
+        根据实体类型选择事件处理器
+        
+        Args:
+            event_request: 事件请求对象
+            
+        Returns:
+            (处理器, 大写的事件类型)
+            
+        Raises:
+            ValueError: 不支持的实体类型
         """
         entity_type = event_request.entity_type.lower()
-        event_type = event_request.event_type.upper()
         
         # 实体类型处理映射
         handlers = {
@@ -167,13 +460,31 @@ class EventService:
         handler = handlers.get(entity_type)
         if not handler:
             raise ValueError(f"不支持的实体类型: {entity_type}")
+        return handler, event_request.event_type.upper()
+    
+    async def _dispatch_event(self, event_request: EventRequest) -> Dict[str, Any]:
+        """
+        根据实体类型分发事件处理
+        
+        Args:
+            event_request: 事件请求对象
+            
+        Returns:
+            处理结果字典
+        """
+        handler, event_type = self._get_handler(event_request)
+        
+        if self.is_async:
+            # 异步仓储不阻塞事件循环，直接执行
+            return await handler(event_type, event_request)
         
-        return await handler(event_type, event_request)
+        # 处理器内部直接调用同步Session，放到数据库线程池中执行
+        return await run_coroutine_in_db_executor(handler, event_type, event_request)
     
     async def _handle_project_event(self, event_type: str, event_request: EventRequest) -> Dict[str, Any]:
         """处理项目事件"""
         if event_type == "CREATE":
-            project = self.project_repo.create(**event_request.payload)
+            project = await self._resolve(self.project_repo.create(**event_request.payload))
             return {
                 "success": True,
                 "status": "created",
@@ -181,7 +492,7 @@ class EventService:
             }
         
         elif event_type == "UPDATE":
-            project = self.project_repo.update(event_request.entity_id, **event_request.payload)
+            project = await self._resolve(self.project_repo.update(event_request.entity_id, **event_request.payload))
             return {
                 "success": True,
                 "status": "updated" if project else "not_found",
@@ -189,7 +500,7 @@ class EventService:
             }
         
         elif event_type == "DELETE":
-            success = self.project_repo.delete(event_request.entity_id)
+            success = await self._resolve(self.project_repo.delete(event_request.entity_id))
             return {
                 "success": True,
                 "status": "deleted" if success else "not_found",
@@ -202,7 +513,7 @@ class EventService:
     async def _handle_use_case_event(self, event_type: str, event_request: EventRequest) -> Dict[str, Any]:
         """处理用例事件"""
         if event_type == "CREATE":
-            use_case = self.use_case_repo.create(**event_request.payload)
+            use_case = await self._resolve(self.use_case_repo.create(**event_request.payload))
             return {
                 "success": True,
                 "status": "created",
@@ -210,7 +521,7 @@ class EventService:
             }
         
         elif event_type == "UPDATE":
-            use_case = self.use_case_repo.update(event_request.entity_id, **event_request.payload)
+            use_case = await self._resolve(self.use_case_repo.update(event_request.entity_id, **event_request.payload))
             return {
                 "success": True,
                 "status": "updated" if use_case else "not_found",
@@ -218,7 +529,7 @@ class EventService:
             }
         
         elif event_type == "DELETE":
-            success = self.use_case_repo.delete(event_request.entity_id)
+            success = await self._resolve(self.use_case_repo.delete(event_request.entity_id))
             return {
                 "success": True,
                 "status": "deleted" if success else "not_found",
@@ -235,10 +546,10 @@ class EventService:
         
         if event_type == "CREATE":
             if budget_type == "budget":
-                budget = self.budget_repo.create(**payload)
+                budget = await self._resolve(self.budget_repo.create(**payload))
                 entity_id = str(budget.id) if budget else None
             else:
-                usage = self.budget_repo.create_usage(**payload)
+                usage = await self._resolve(self.budget_repo.create_usage(**payload))
                 entity_id = str(usage.id) if usage else None
             
             return {
@@ -249,9 +560,9 @@ class EventService:
         
         elif event_type == "UPDATE":
             if budget_type == "budget":
-                result = self.budget_repo.update(event_request.entity_id, **payload)
+                result = await self._resolve(self.budget_repo.update(event_request.entity_id, **payload))
             else:
-                result = self.budget_repo.update_usage(event_request.entity_id, **payload)
+                result = await self._resolve(self.budget_repo.update_usage(event_request.entity_id, **payload))
             
             return {
                 "success": True,
@@ -261,9 +572,9 @@ class EventService:
         
         elif event_type == "DELETE":
             if budget_type == "budget":
-                success = self.budget_repo.delete(event_request.entity_id)
+                success = await self._resolve(self.budget_repo.delete(event_request.entity_id))
             else:
-                success = self.budget_repo.delete_usage(event_request.entity_id)
+                success = await self._resolve(self.budget_repo.delete_usage(event_request.entity_id))
             
             return {
                 "success": True,
@@ -277,7 +588,7 @@ class EventService:
     async def _handle_model_event(self, event_type: str, event_request: EventRequest) -> Dict[str, Any]:
         """处理模型事件"""
         if event_type == "CREATE":
-            model = self.model_repo.create(**event_request.payload)
+            model = await self._resolve(self.model_repo.create(**event_request.payload))
             return {
                 "success": True,
                 "status": "created",
@@ -285,7 +596,7 @@ class EventService:
             }
         
         elif event_type == "UPDATE":
-            model = self.model_repo.update(event_request.entity_id, **event_request.payload)
+            model = await self._resolve(self.model_repo.update(event_request.entity_id, **event_request.payload))
             return {
                 "success": True,
                 "status": "updated" if model else "not_found",
@@ -293,7 +604,7 @@ class EventService:
             }
         
         elif event_type == "DELETE":
-            success = self.model_repo.delete(event_request.entity_id)
+            success = await self._resolve(self.model_repo.delete(event_request.entity_id))
             return {
                 "success": True,
                 "status": "deleted" if success else "not_found",
@@ -306,7 +617,7 @@ class EventService:
     async def _handle_deployment_event(self, event_type: str, event_request: EventRequest) -> Dict[str, Any]:
         """处理部署事件"""
         if event_type == "CREATE":
-            deployment = self.deployment_repo.create(**event_request.payload)
+            deployment = await self._resolve(self.deployment_repo.create(**event_request.payload))
             return {
                 "success": True,
                 "status": "created",
@@ -314,7 +625,7 @@ class EventService:
             }
         
         elif event_type == "UPDATE":
-            deployment = self.deployment_repo.update(event_request.entity_id, **event_request.payload)
+            deployment = await self._resolve(self.deployment_repo.update(event_request.entity_id, **event_request.payload))
             return {
                 "success": True,
                 "status": "updated" if deployment else "not_found",
@@ -322,7 +633,7 @@ class EventService:
             }
         
         elif event_type == "DELETE":
-            success = self.deployment_repo.delete(event_request.entity_id)
+            success = await self._resolve(self.deployment_repo.delete(event_request.entity_id))
             return {
                 "success": True,
                 "status": "deleted" if success else "not_found",
@@ -335,7 +646,7 @@ class EventService:
     async def _handle_pricing_event(self, event_type: str, event_request: EventRequest) -> Dict[str, Any]:
         """处理定价事件"""
         if event_type == "CREATE":
-            pricing = self.pricing_repo.create(**event_request.payload)
+            pricing = await self._resolve(self.pricing_repo.create(**event_request.payload))
             return {
                 "success": True,
                 "status": "created",
@@ -343,7 +654,7 @@ class EventService:
             }
         
         elif event_type == "UPDATE":
-            pricing = self.pricing_repo.update(event_request.entity_id, **event_request.payload)
+            pricing = await self._resolve(self.pricing_repo.update(event_request.entity_id, **event_request.payload))
             return {
                 "success": True,
                 "status": "updated" if pricing else "not_found",
@@ -351,7 +662,7 @@ class EventService:
             }
         
         elif event_type == "DELETE":
-            success = self.pricing_repo.delete(event_request.entity_id)
+            success = await self._resolve(self.pricing_repo.delete(event_request.entity_id))
             return {
                 "success": True,
                 "status": "deleted" if success else "not_found",
@@ -364,7 +675,7 @@ class EventService:
     async def _handle_subscription_event(self, event_type: str, event_request: EventRequest) -> Dict[str, Any]:
         """处理订阅事件"""
         if event_type == "CREATE":
-            subscription = self.subscription_repo.create(**event_request.payload)
+            subscription = await self._resolve(self.subscription_repo.create(**event_request.payload))
             return {
                 "success": True,
                 "status": "created",
@@ -372,7 +683,7 @@ class EventService:
             }
         
         elif event_type == "UPDATE":
-            subscription = self.subscription_repo.update(event_request.entity_id, **event_request.payload)
+            subscription = await self._resolve(self.subscription_repo.update(event_request.entity_id, **event_request.payload))
             return {
                 "success": True,
                 "status": "updated" if subscription else "not_found",
@@ -380,7 +691,7 @@ class EventService:
             }
         
         elif event_type == "DELETE":
-            success = self.subscription_repo.delete(event_request.entity_id)
+            success = await self._resolve(self.subscription_repo.delete(event_request.entity_id))
             return {
                 "success": True,
                 "status": "deleted" if success else "not_found",
@@ -397,10 +708,10 @@ class EventService:
         
         if event_type == "CREATE":
             if limit_type == "limit":
-                limit = self.limit_repo.create(**payload)
+                limit = await self._resolve(self.limit_repo.create(**payload))
                 entity_id = str(limit.id) if limit else None
             else:
-                usage = self.limit_repo.create_usage(**payload)
+                usage = await self._resolve(self.limit_repo.create_usage(**payload))
                 entity_id = str(usage.id) if usage else None
             
             return {
@@ -411,9 +722,9 @@ class EventService:
         
         elif event_type == "UPDATE":
             if limit_type == "limit":
-                result = self.limit_repo.update(event_request.entity_id, **payload)
+                result = await self._resolve(self.limit_repo.update(event_request.entity_id, **payload))
             else:
-                result = self.limit_repo.update_usage(event_request.entity_id, **payload)
+                result = await self._resolve(self.limit_repo.update_usage(event_request.entity_id, **payload))
             
             return {
                 "success": True,
@@ -423,9 +734,9 @@ class EventService:
         
         elif event_type == "DELETE":
             if limit_type == "limit":
-                success = self.limit_repo.delete(event_request.entity_id)
+                success = await self._resolve(self.limit_repo.delete(event_request.entity_id))
             else:
-                success = self.limit_repo.delete_usage(event_request.entity_id)
+                success = await self._resolve(self.limit_repo.delete_usage(event_request.entity_id))
             
             return {
                 "success": True,
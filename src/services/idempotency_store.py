@@ -0,0 +1,193 @@
+"""
+事件幂等存储
+处理前用一次Lua调用原子地预留事件，并发的重复事件只有一个能获得预留；处理成功后标记为已处理，
+失败时释放预留以便重试。
+已处理标记按时间分桶（默认每小时一个）存储在哈希中（字段为事件ID的12字节摘要），每个桶在保留期结束后整体过期，
+代替每个事件一个带TTL的键；进程内LRU缓存最近完成的事件，重复投递命中时不访问Redis
+"""
+
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from src.config.settings import get_settings
+from src.services.redis_service import RedisService
+
+# 已处理事件的分桶哈希，bucket为Unix时间除以分桶时长
+EVENT_PROCESSED_BUCKET_KEY = "events:processed:{bucket}"
+
+# 升级前每个事件一个的已处理标记，在保留期内仍需检查
+LEGACY_EVENT_PROCESSED_KEY = "event:processed:{event_id}"
+
+# reserve_events返回的状态码
+_STATE_RESERVED = 0
+_STATE_PROCESSED = 1
+
+
+class ProcessedEventCache:
+    """最近完成的事件标识的LRU集合"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._members: "OrderedDict[bytes, None]" = OrderedDict()
+
+    def __contains__(self, member: bytes) -> bool:
+        if member not in self._members:
+            return False
+        self._members.move_to_end(member)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def add(self, members: List[bytes]):
+        """加入事件标识，超出容量时淘汰最久未使用的"""
+        if self.max_size <= 0:
+            return
+        for member in members:
+            self._members[member] = None
+            self._members.move_to_end(member)
+        while len(self._members) > self.max_size:
+            self._members.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        self._members.clear()
+
+
+# 进程内共享的已处理事件缓存
+processed_event_cache = ProcessedEventCache(get_settings().EVENT_IDEMPOTENCY_LRU_SIZE)
+
+
+class EventIdempotencyStore:
+    """事件幂等存储"""
+
+    RESERVED = "reserved"
+    PROCESSED = "processed"
+    IN_PROGRESS = "in_progress"
+
+    def __init__(self, redis_service: RedisService, cache: Optional[ProcessedEventCache] = None):
+        """
+        初始化幂等存储
+
+        Args:
+            redis_service: Redis服务
+            cache: 已处理事件缓存，默认使用进程内共享的缓存
+        """
+        self.settings = get_settings()
+        self.redis_service = redis_service
+        self.cache = cache if cache is not None else processed_event_cache
+
+    @staticmethod
+    def member(event_id: str) -> bytes:
+        """事件ID的12字节摘要，作为哈希字段"""
+        return hashlib.blake2b(event_id.encode("utf-8"), digest_size=12).digest()
+
+    def _bucket_keys(self, now: float, count: Optional[int] = None) -> List[str]:
+        """从当前桶开始向前的分桶键，默认覆盖整个保留期"""
+        bucket_seconds = max(self.settings.EVENT_IDEMPOTENCY_BUCKET_SECONDS, 1)
+        if count is None:
+            count = math.ceil(self.settings.EVENT_IDEMPOTENCY_TTL_SECONDS / bucket_seconds) + 1
+        bucket = int(now // bucket_seconds)
+        return [EVENT_PROCESSED_BUCKET_KEY.format(bucket=bucket - offset) for offset in range(count)]
+
+    def _expire_at(self, now: float) -> int:
+        """当前桶的过期时间：桶结束后再保留EVENT_IDEMPOTENCY_TTL_SECONDS"""
+        bucket_seconds = max(self.settings.EVENT_IDEMPOTENCY_BUCKET_SECONDS, 1)
+        return (int(now // bucket_seconds) + 1) * bucket_seconds + self.settings.EVENT_IDEMPOTENCY_TTL_SECONDS
+
+    async def reserve(self, event_ids: List[str]) -> List[str]:
+        """
+        预留一批事件
+
+        Args:
+            event_ids: 不重复的事件ID
+
+        Returns:
+            与event_ids顺序一致的状态：reserved（由调用方处理）/processed/in_progress；
+            Redis不可用时未命中缓存的事件均为reserved；EVENT_IDEMPOTENCY_LEGACY_KEYS开启时，
+            存在升级前的已处理标记的事件为processed
+        """
+        members = [self.member(event_id) for event_id in event_ids]
+        states = [self.PROCESSED if member in self.cache else None for member in members]
+        lookup = [index for index, state in enumerate(states) if state is None]
+        if not lookup:
+            return states
+
+        now = time.time()
+        codes = await self.redis_service.reserve_events(
+            self._bucket_keys(now),
+            [members[index] for index in lookup],
+            int(now * 1000),
+            int((now + self.settings.EVENT_IDEMPOTENCY_RESERVE_SECONDS) * 1000),
+            self._expire_at(now)
+        )
+        if codes is None:
+            # 与Redis不可用时的其他缓存操作一致：不阻塞事件处理
+            codes = [_STATE_RESERVED] * len(lookup)
+        processed = []
+        for index, code in zip(lookup, codes):
+            if code == _STATE_RESERVED:
+                states[index] = self.RESERVED
+            elif code == _STATE_PROCESSED:
+                states[index] = self.PROCESSED
+                processed.append(members[index])
+            else:
+                states[index] = self.IN_PROGRESS
+        self.cache.add(processed)
+        if self.settings.EVENT_IDEMPOTENCY_LEGACY_KEYS:
+            await self._check_legacy(event_ids, states)
+        return states
+
+    async def _check_legacy(self, event_ids: List[str], states: List[Optional[str]]):
+        """用一次MGET检查预留成功的事件是否有升级前的已处理标记，有则改为processed并写入新的标记"""
+        reserved = [index for index, state in enumerate(states) if state == self.RESERVED]
+        if not reserved:
+            return
+        values = await self.redis_service.get_cache_many(
+            [LEGACY_EVENT_PROCESSED_KEY.format(event_id=event_ids[index]) for index in reserved]
+        )
+        legacy = [index for index, value in zip(reserved, values) if value is not None]
+        if not legacy:
+            return
+        for index in legacy:
+            states[index] = self.PROCESSED
+        # 覆盖刚写入的预留，之后不再需要查询旧标记
+        await self.complete([event_ids[index] for index in legacy])
+
+    async def complete(self, event_ids: List[str]) -> bool:
+        """
+        把已预留的事件标记为已处理
+
+        Args:
+            event_ids: 处理成功的事件ID
+
+        Returns:
+            是否写入成功
+        """
+        if not event_ids:
+            return True
+        members = [self.member(event_id) for event_id in event_ids]
+        now = time.time()
+        written = await self.redis_service.complete_events(self._bucket_keys(now, 1)[0], members, self._expire_at(now))
+        self.cache.add(members)
+        return written
+
+    async def release(self, event_ids: List[str]) -> int:
+        """
+        释放处理失败的事件的预留
+
+        Args:
+            event_ids: 处理失败的事件ID
+
+        Returns:
+            释放的预留数量
+        """
+        if not event_ids:
+            return 0
+        # 预留写入当时的当前桶，处理跨越分桶边界时位于上一个桶
+        return await self.redis_service.release_events(
+            self._bucket_keys(time.time(), 2), [self.member(event_id) for event_id in event_ids]
+        )
@@ -4,16 +4,59 @@ Model Garden客户端
 """
 
 import asyncio
-from typing import Dict, Any, Optional
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
 from datetime import datetime
 import httpx
 import structlog
 
+try:
+    import ijson
+except ImportError:  # pragma: no cover - 未安装时回退到整体解析
+    ijson = None
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - 未安装时使用HTTP/1.1
+    HTTP2_AVAILABLE = False
+
+try:
+    from httpx._decoders import SUPPORTED_DECODERS as _HTTPX_DECODERS
+except ImportError:  # pragma: no cover - httpx内部结构变化时按0.25的能力处理
+    _HTTPX_DECODERS = {"identity": None, "gzip": None, "deflate": None}
+
 from src.config.settings import get_settings
 from src.utils.logger import get_logger
+from src.utils.payload_codec import (
+    build_accept,
+    build_accept_encoding,
+    compress,
+    decode_body,
+    decompress,
+    decompress_stream,
+    json_dumps,
+)
 
 logger = get_logger()
 
+# 同步负载中的实体数组字段，按外键依赖排列
+SYNC_ENTITY_KEYS = [
+    "projects",
+    "use_cases",
+    "budgets",
+    "models",
+    "model_deployments",
+    "pricing",
+    "use_case_llm_models",
+    "limits",
+]
+
+
+# 应用生命周期内共享的HTTP客户端，由open_shared_client/close_shared_client管理
+_shared_client: Optional[httpx.AsyncClient] = None
+
 
 class ModelGardenClient:
     """Model Garden API客户端"""
@@ -34,12 +77,83 @@ class ModelGardenClient:
             }
         }
     
-    async def sync_all(self, updated_since: Optional[datetime] = None) -> Dict[str, Any]:
+    @asynccontextmanager
+    async def _client(self) -> AsyncIterator[httpx.AsyncClient]:
+        """获取HTTP客户端：优先使用共享连接池，未打开时为本次调用创建临时客户端"""
+        if _shared_client is not None and not _shared_client.is_closed:
+            yield _shared_client
+            return
+        async with httpx.AsyncClient(**self.client_config) as client:
+            yield client
+    
+    def _build_request_data(self, updated_since: Optional[datetime] = None,
+                            watermarks: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, Any]:
+        """
+        构建同步请求体
+        
+        Args:
+            updated_since: 可选的更新时间，用于增量同步
+            watermarks: 可选的各实体水位，格式为{实体数组字段名: {"updated_since": ..., "after_id": ...}}
+            
+        Returns:
+            请求体字典
+        """
+        request_data: Dict[str, Any] = {}
+        if updated_since:
+            request_data["updated_since"] = updated_since.isoformat()
+        if watermarks:
+            request_data["watermarks"] = watermarks
+        return request_data
+    
+    def _negotiation_headers(self, payload_format: Optional[str] = None) -> Dict[str, str]:
+        """
+        构建内容协商请求头
+        
+        Args:
+            payload_format: 首选响应格式，默认使用MODEL_GARDEN_PAYLOAD_FORMAT
+            
+        Returns:
+            Accept和Accept-Encoding请求头
+        """
+        return {
+            "Accept": build_accept(payload_format or self.settings.MODEL_GARDEN_PAYLOAD_FORMAT),
+            "Accept-Encoding": build_accept_encoding(self.settings.MODEL_GARDEN_ACCEPT_ENCODING)
+        }
+    
+    def _encode_request(self, request_data: Dict[str, Any],
+                        payload_format: Optional[str] = None) -> Tuple[bytes, Dict[str, str]]:
+        """
+        序列化并按配置压缩请求体
+        
+        Args:
+            request_data: 请求体字典
+            payload_format: 首选响应格式
+            
+        Returns:
+            (请求体字节, 请求头)
+        """
+        body = json_dumps(request_data)
+        headers = self._negotiation_headers(payload_format)
+        encoding = self.settings.MODEL_GARDEN_REQUEST_ENCODING
+        if encoding and len(body) >= self.settings.MODEL_GARDEN_REQUEST_COMPRESS_MIN_BYTES:
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+        return body, headers
+    
+    async def _post(self, client: httpx.AsyncClient, url: str, request_data: Dict[str, Any],
+                    headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """发送同步请求，请求体使用orjson序列化"""
+        body, request_headers = self._encode_request(request_data)
+        return await client.post(url, content=body, headers={**request_headers, **(headers or {})})
+    
+    async def sync_all(self, updated_since: Optional[datetime] = None,
+                       watermarks: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, Any]:
         """
         调用全量同步API
         
         Args:
             updated_since: 可选的更新时间，用于增量同步
+            watermarks: 可选的各实体水位，服务端据此只返回水位之后的变化
             
         Returns:
             同步数据字典
@@ -51,9 +165,7 @@ class ModelGardenClient:
         url = f"{self.base_url}/model-garden/sync/all"
         
         # 构建请求数据
-        request_data = {}
-        if updated_since:
-            request_data["updated_since"] = updated_since.isoformat()
+        request_data = self._build_request_data(updated_since, watermarks)
         
         logger.info(
             "开始调用Model Garden同步API",
@@ -61,14 +173,16 @@ class ModelGardenClient:
             updated_since=updated_since.isoformat() if updated_since else None
         )
         
-        async with httpx.AsyncClient(**self.client_config) as client:
+        async with self._client() as client:
             try:
-                response = await client.post(url, json=request_data)
+                response = await self._post(client, url, request_data)
                 response.raise_for_status()
                 
-                data = response.json()
+                data = _decode_response(response)
                 logger.info(
                     "成功获取同步数据",
+                    content_type=response.headers.get("content-type"),
+                    content_encoding=response.headers.get("content-encoding"),
                     projects_count=len(data.get("projects", [])),
                     use_cases_count=len(data.get("use_cases", [])),
                     budgets_count=len(data.get("budgets", [])),
@@ -97,6 +211,287 @@ class ModelGardenClient:
                 )
                 raise
     
+    async def sync_all_if_changed(self, updated_since: Optional[datetime] = None,
+                                  validators: Optional[Dict[str, Any]] = None,
+                                  watermarks: Optional[Dict[str, Dict[str, str]]] = None
+                                  ) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        条件调用全量同步API
+        
+        携带上次已应用负载的校验信息发送If-None-Match/If-Modified-Since，
+        返回304或响应体摘要与上次一致时不解析响应体
+        
+        Args:
+            updated_since: 可选的更新时间，用于增量同步
+            validators: 上次已应用负载的校验信息（etag/last_modified/digest）
+            watermarks: 可选的各实体水位
+            
+        Returns:
+            (同步数据, 本次校验信息)，内容未变化时同步数据为None
+            
+        Raises:
+            httpx.HTTPStatusError: HTTP错误
+            httpx.RequestError: 请求错误
+        """
+        url = f"{self.base_url}/model-garden/sync/all"
+        validators = validators or {}
+        
+        request_data = self._build_request_data(updated_since, watermarks)
+        
+        # 服务端未提供ETag时使用响应体摘要作为实体标签
+        headers = {}
+        etag = validators.get("etag") or (f'"{validators["digest"]}"' if validators.get("digest") else None)
+        if etag:
+            headers["If-None-Match"] = etag
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        
+        logger.info(
+            "开始条件调用Model Garden同步API",
+            url=url,
+            updated_since=updated_since.isoformat() if updated_since else None,
+            conditional=bool(headers)
+        )
+        
+        async with self._client() as client:
+            try:
+                response = await self._post(client, url, request_data, headers)
+                
+                if response.status_code == httpx.codes.NOT_MODIFIED:
+                    logger.info("同步数据未变化（304）", url=url)
+                    return None, validators
+                
+                response.raise_for_status()
+                
+                # 摘要基于解压后的负载计算，压缩方式变化不影响判断
+                content = _read_body(response)
+                digest = hashlib.sha256(content).hexdigest()
+                current = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "digest": digest
+                }
+                if digest == validators.get("digest"):
+                    logger.info("同步数据未变化（摘要一致）", url=url, digest=digest)
+                    return None, current
+                
+                data = decode_body(content, response.headers.get("content-type"))
+                logger.info(
+                    "成功获取同步数据",
+                    digest=digest,
+                    bytes=len(content),
+                    wire_bytes=response.num_bytes_downloaded,
+                    projects_count=len(data.get("projects", [])),
+                    limits_count=len(data.get("limits", []))
+                )
+                return data, current
+                
+            except httpx.HTTPStatusError as e:
+                logger.error(
+                    "Model Garden API返回错误",
+                    status_code=e.response.status_code,
+                    response_text=e.response.text,
+                    url=url
+                )
+                raise
+            except httpx.RequestError as e:
+                logger.error(
+                    "调用Model Garden API失败",
+                    error=str(e),
+                    url=url
+                )
+                raise
+    
+    async def stream_sync_all(self, updated_since: Optional[datetime] = None,
+                              chunk_size: Optional[int] = None,
+                              watermarks: Optional[Dict[str, Dict[str, str]]] = None) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        流式调用全量同步API，按块产出各实体数组
+        
+        响应体通过 aiter_bytes 增量读取并交给事件驱动的JSON解析器，
+        内存中最多只保留一个未产出的块，而不是整个同步文档
+        
+        Args:
+            updated_since: 可选的更新时间，用于增量同步
+            chunk_size: 每块的最大条数，默认使用SYNC_BATCH_SIZE
+            watermarks: 可选的各实体水位
+            
+        Yields:
+            (实体数组字段名, 该数组中的一块数据)
+            
+        Raises:
+            httpx.HTTPStatusError: HTTP错误
+            httpx.RequestError: 请求错误
+        """
+        chunk_size = max(chunk_size or self.settings.SYNC_BATCH_SIZE, 1)
+        
+        if ijson is None:
+            logger.warning("未安装ijson，回退为整体解析同步响应")
+            data = await self.sync_all(updated_since, watermarks)
+            for key, items in data.items():
+                if isinstance(items, list):
+                    for offset in range(0, len(items), chunk_size):
+                        yield key, items[offset:offset + chunk_size]
+            return
+        
+        url = f"{self.base_url}/model-garden/sync/all"
+        request_data = self._build_request_data(updated_since, watermarks)
+        
+        logger.info(
+            "开始流式调用Model Garden同步API",
+            url=url,
+            updated_since=updated_since.isoformat() if updated_since else None
+        )
+        
+        async with self._client() as client:
+            try:
+                # 增量解析只支持JSON，压缩仍按配置协商
+                body, headers = self._encode_request(request_data, payload_format="json")
+                async with client.stream("POST", url, content=body, headers=headers) as response:
+                    if response.is_error:
+                        await response.aread()
+                    response.raise_for_status()
+                    
+                    counts: Dict[str, int] = {}
+                    byte_iterator = decompress_stream(response.aiter_bytes(), _pending_encoding(response))
+                    async for key, chunk in _iter_entity_chunks(byte_iterator, chunk_size):
+                        counts[key] = counts.get(key, 0) + len(chunk)
+                        yield key, chunk
+                    
+                    logger.info("流式获取同步数据完成", counts=counts)
+                    
+            except httpx.HTTPStatusError as e:
+                logger.error(
+                    "Model Garden API返回错误",
+                    status_code=e.response.status_code,
+                    response_text=e.response.text,
+                    url=url
+                )
+                raise
+            except httpx.RequestError as e:
+                logger.error(
+                    "调用Model Garden API失败",
+                    error=str(e),
+                    url=url
+                )
+                raise
+    
+    async def _fetch_sync_page(self, client: httpx.AsyncClient, entity_key: str, offset: int,
+                               limit: int, updated_since: Optional[datetime] = None,
+                               watermarks: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, Any]:
+        """
+        获取单个实体的一页同步数据
+        
+        请求体在全量同步参数基础上增加 entities/offset/limit，
+        响应中除实体数组外可带 total 表示该实体的总条数
+        
+        Args:
+            client: HTTP客户端
+            entity_key: 实体数组字段名
+            offset: 偏移量
+            limit: 每页条数
+            updated_since: 可选的更新时间
+            watermarks: 可选的各实体水位
+            
+        Returns:
+            该页的响应数据
+        """
+        url = f"{self.base_url}/model-garden/sync/all"
+        request_data = self._build_request_data(updated_since, watermarks)
+        request_data.update({"entities": [entity_key], "offset": offset, "limit": limit})
+        
+        response = await self._post(client, url, request_data)
+        response.raise_for_status()
+        logger.debug("获取同步分页", entity=entity_key, offset=offset, limit=limit)
+        return _decode_response(response)
+    
+    async def paginated_sync_all(self, updated_since: Optional[datetime] = None,
+                                 page_size: Optional[int] = None,
+                                 concurrency: Optional[int] = None,
+                                 watermarks: Optional[Dict[str, Dict[str, str]]] = None) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        按实体分页并发获取同步数据
+        
+        所有实体同时开始预取，在途请求数受concurrency限制；
+        产出顺序按SYNC_ENTITY_KEYS（父实体在前），同一实体内按到达顺序产出。
+        每页独立使用retry_with_backoff重试，响应带total时该实体的剩余页并发获取，
+        否则顺序翻页直到出现不满一页的响应
+        
+        Args:
+            updated_since: 可选的更新时间，用于增量同步
+            page_size: 每页条数，默认使用SYNC_BATCH_SIZE
+            concurrency: 最大在途请求数，默认使用SYNC_FETCH_CONCURRENCY
+            watermarks: 可选的各实体水位
+            
+        Yields:
+            (实体数组字段名, 一页数据)
+        """
+        page_size = max(page_size or self.settings.SYNC_BATCH_SIZE, 1)
+        concurrency = max(concurrency or self.settings.SYNC_FETCH_CONCURRENCY, 1)
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        logger.info(
+            "开始分页获取Model Garden同步数据",
+            page_size=page_size,
+            concurrency=concurrency,
+            updated_since=updated_since.isoformat() if updated_since else None
+        )
+        
+        async with self._client() as client:
+            
+            async def fetch(entity_key: str, offset: int) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self.retry_with_backoff(
+                        lambda: self._fetch_sync_page(client, entity_key, offset, page_size, updated_since, watermarks)
+                    )
+            
+            async def produce(entity_key: str, queue: asyncio.Queue):
+                try:
+                    first = await fetch(entity_key, 0)
+                    items = first.get(entity_key, [])
+                    await queue.put(items)
+                    total = first.get("total")
+                    
+                    if total is not None:
+                        offsets = list(range(page_size, total, page_size))
+                        
+                        async def worker():
+                            while offsets:
+                                page = await fetch(entity_key, offsets.pop(0))
+                                await queue.put(page.get(entity_key, []))
+                        
+                        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(offsets)))))
+                    else:
+                        offset = page_size
+                        while len(items) >= page_size:
+                            items = (await fetch(entity_key, offset)).get(entity_key, [])
+                            await queue.put(items)
+                            offset += page_size
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    await queue.put(e)
+                    return
+                await queue.put(None)
+            
+            # 每个实体的队列有界，消费较慢时预取自动暂停
+            queues = {key: asyncio.Queue(maxsize=concurrency) for key in SYNC_ENTITY_KEYS}
+            producers = [asyncio.create_task(produce(key, queue)) for key, queue in queues.items()]
+            try:
+                for key, queue in queues.items():
+                    while True:
+                        page = await queue.get()
+                        if page is None:
+                            break
+                        if isinstance(page, Exception):
+                            raise page
+                        if page:
+                            yield key, page
+            finally:
+                for producer in producers:
+                    producer.cancel()
+                await asyncio.gather(*producers, return_exceptions=True)
+    
     async def health_check(self) -> bool:
         """
         检查Model Garden API健康状态
@@ -107,7 +502,7 @@ class ModelGardenClient:
         url = f"{self.base_url}/health"
         
         try:
-            async with httpx.AsyncClient(**self.client_config) as client:
+            async with self._client() as client:
                 response = await client.get(url)
                 response.raise_for_status()
                 logger.debug("Model Garden健康检查通过")
@@ -158,4 +553,130 @@ class ModelGardenClient:
                 )
                 await asyncio.sleep(delay)
         
-        raise last_exception 
\ No newline at end of file
+        raise last_exception
+
+
+def get_shared_client() -> Optional[httpx.AsyncClient]:
+    """获取已打开的共享HTTP客户端，未打开时返回None"""
+    if _shared_client is not None and not _shared_client.is_closed:
+        return _shared_client
+    return None
+
+
+async def open_shared_client(**overrides: Any) -> httpx.AsyncClient:
+    """
+    打开应用生命周期内共享的HTTP客户端
+    
+    连接池、keep-alive和HTTP/2由MODEL_GARDEN_*配置决定，已打开时直接返回现有客户端
+    
+    Args:
+        **overrides: 覆盖httpx.AsyncClient的构造参数
+        
+    Returns:
+        共享HTTP客户端
+    """
+    global _shared_client
+    if get_shared_client() is not None:
+        return _shared_client
+    
+    settings = get_settings()
+    http2 = settings.MODEL_GARDEN_HTTP2
+    if http2 and not HTTP2_AVAILABLE:
+        logger.warning("未安装h2，Model Garden客户端使用HTTP/1.1")
+        http2 = False
+    
+    config = {
+        **ModelGardenClient().client_config,
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=settings.MODEL_GARDEN_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MODEL_GARDEN_MAX_KEEPALIVE,
+            keepalive_expiry=settings.MODEL_GARDEN_KEEPALIVE_EXPIRY
+        ),
+        **overrides
+    }
+    _shared_client = httpx.AsyncClient(**config)
+    logger.info(
+        "Model Garden共享客户端已打开",
+        http2=http2,
+        max_connections=settings.MODEL_GARDEN_MAX_CONNECTIONS,
+        max_keepalive=settings.MODEL_GARDEN_MAX_KEEPALIVE
+    )
+    return _shared_client
+
+
+async def close_shared_client() -> None:
+    """关闭共享HTTP客户端及其连接池"""
+    global _shared_client
+    client, _shared_client = _shared_client, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("Model Garden共享客户端已关闭")
+
+
+def _pending_encoding(response: httpx.Response) -> Optional[str]:
+    """返回httpx未自动解码的内容编码（httpx 0.25不支持zstd），无则返回None"""
+    encodings = [item.strip().lower() for item in (response.headers.get("content-encoding") or "").split(",")]
+    pending = [item for item in encodings if item and item not in _HTTPX_DECODERS]
+    return ", ".join(pending) or None
+
+
+def _read_body(response: httpx.Response) -> bytes:
+    """返回完全解压后的响应体"""
+    return decompress(response.content, _pending_encoding(response))
+
+
+def _decode_response(response: httpx.Response) -> Any:
+    """按Content-Type和Content-Encoding解析响应体"""
+    return decode_body(_read_body(response), response.headers.get("content-type"))
+
+
+class _AsyncByteReader:
+    """把字节异步迭代器适配为ijson所需的 async read() 接口"""
+    
+    def __init__(self, byte_iterator: AsyncIterator[bytes]):
+        self._iterator = byte_iterator.__aiter__()
+    
+    async def read(self, size: int = -1) -> bytes:
+        # ijson会先调用read(0)探测返回类型，此时不能消费数据
+        if size == 0:
+            return b""
+        try:
+            return await self._iterator.__anext__()
+        except StopAsyncIteration:
+            return b""
+
+
+async def _iter_entity_chunks(byte_iterator: AsyncIterator[bytes],
+                              chunk_size: int) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    增量解析 {"<实体>": [{...}, ...], ...} 结构的JSON字节流
+    
+    Args:
+        byte_iterator: 响应体字节迭代器
+        chunk_size: 每块的最大条数
+        
+    Yields:
+        (实体数组字段名, 该数组中的一块数据)
+    """
+    builder = None
+    item_prefix = None
+    chunk: List[Dict[str, Any]] = []
+    
+    # use_float与response.json()保持一致，否则小数会解析为Decimal，无法被orjson和缓存序列化
+    async for prefix, event, value in ijson.parse_async(_AsyncByteReader(byte_iterator), use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == item_prefix and event == "end_map":
+                chunk.append(builder.value)
+                builder = None
+                if len(chunk) >= chunk_size:
+                    yield item_prefix[:-len(".item")], chunk
+                    chunk = []
+        elif event == "start_map" and prefix.endswith(".item") and prefix.count(".") == 1:
+            item_prefix = prefix
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+        elif event == "end_array" and "." not in prefix and chunk:
+            yield prefix, chunk
+            chunk = []
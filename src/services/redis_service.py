@@ -3,28 +3,152 @@ Redis服务
 负责缓存和事件流管理
 """
 
-import json
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Tuple
 from datetime import datetime, timezone
 import redis.asyncio as redis
 import structlog
 
 from src.config.settings import get_settings
 from src.utils.logger import get_logger
+from src.utils.serializers import Serializer, get_serializer
 
 logger = get_logger()
 
+# 全局同步租约锁、栅栏令牌计数器、进度和结果的键
+SYNC_LOCK_KEY = "sync:lock"
+SYNC_FENCE_KEY = "sync:fence"
+SYNC_PROGRESS_KEY = "sync:progress"
+SYNC_LATEST_RESULT_KEY = "sync:result:latest"
+SYNC_RUN_RESULT_KEY = "sync:result:run:{token}"
+
+# 锁空闲时递增栅栏令牌并以令牌为值加锁，返回令牌；锁被占用时返回nil
+_ACQUIRE_LOCK_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return false
+end
+local token = redis.call('INCR', KEYS[2])
+redis.call('SET', KEYS[1], token, 'PX', ARGV[1])
+return token
+"""
+
+# 只有仍持有令牌时才续租
+_RENEW_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# 只有仍持有令牌时才释放
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# 只有仍持有令牌时才写入进度，失去租约的旧执行者不能覆盖新执行者的进度
+_WRITE_PROGRESS_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[2])
+redis.call('HSET', KEYS[2], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return 1
+"""
+
+# 在按时间分桶的哈希中批量预留事件，KEYS为从新到旧的桶，KEYS[1]为当前桶；
+# ARGV[1]为当前毫秒时间，ARGV[2]为预留截止毫秒时间，ARGV[3]为当前桶的过期时间戳（秒），其余为事件标识。
+# 字段值为'1'表示已处理，否则为预留截止时间；过期的预留视为未处理。
+# 逐个桶用HMGET分块查询仍未确定的事件，不存在的桶直接跳过。
+# 返回与事件标识顺序一致的状态：0 预留成功，1 已处理，2 正在处理
+_RESERVE_EVENTS_SCRIPT = """
+local now = tonumber(ARGV[1])
+local chunk = 1000
+local states = {}
+local unresolved = {}
+for i = 4, #ARGV do
+    unresolved[#unresolved + 1] = i
+end
+for k = 1, #KEYS do
+    if #unresolved == 0 then
+        break
+    end
+    if redis.call('EXISTS', KEYS[k]) == 1 then
+        local remaining = {}
+        for first = 1, #unresolved, chunk do
+            local last = math.min(first + chunk - 1, #unresolved)
+            local fields = {}
+            for j = first, last do
+                fields[#fields + 1] = ARGV[unresolved[j]]
+            end
+            local values = redis.call('HMGET', KEYS[k], unpack(fields))
+            for j = 1, #fields do
+                local position = unresolved[first + j - 1]
+                local value = values[j]
+                if value == '1' then
+                    states[position - 3] = 1
+                elseif value and tonumber(value) > now then
+                    states[position - 3] = 2
+                else
+                    if value then
+                        redis.call('HDEL', KEYS[k], fields[j])
+                    end
+                    remaining[#remaining + 1] = position
+                end
+            end
+        end
+        unresolved = remaining
+    end
+end
+for first = 1, #unresolved, chunk do
+    local pairs = {}
+    for j = first, math.min(first + chunk - 1, #unresolved) do
+        states[unresolved[j] - 3] = 0
+        pairs[#pairs + 1] = ARGV[unresolved[j]]
+        pairs[#pairs + 1] = ARGV[2]
+    end
+    redis.call('HSET', KEYS[1], unpack(pairs))
+end
+redis.call('EXPIREAT', KEYS[1], ARGV[3])
+return states
+"""
+
+# 删除尚未完成的预留，已处理的标记保留
+_RELEASE_EVENTS_SCRIPT = """
+local released = 0
+for i = 1, #ARGV do
+    for k = 1, #KEYS do
+        local value = redis.call('HGET', KEYS[k], ARGV[i])
+        if value and value ~= '1' then
+            released = released + redis.call('HDEL', KEYS[k], ARGV[i])
+        end
+    end
+end
+return released
+"""
+
 
 class RedisService:
     """Redis服务类"""
     
-    def __init__(self):
+    def __init__(self, serializer: Optional[Serializer] = None):
+        """
+        初始化Redis服务
+        
+        Args:
+            serializer: 提供dumps/loads的序列化器，默认按REDIS_SERIALIZER选择
+        """
         self.settings = get_settings()
         self.redis_url = self.settings.REDIS_URL
         self.pool_size = self.settings.REDIS_POOL_SIZE
+        self.serializer = serializer or get_serializer(self.settings.REDIS_SERIALIZER)
         self._pool: Optional[redis.ConnectionPool] = None
         self._client: Optional[redis.Redis] = None
+        # 本实例已确认存在的(流, 消费者组)，避免每次读取都执行XGROUP CREATE
+        self._groups: Set[Tuple[str, str]] = set()
     
     async def get_client(self) -> redis.Redis:
         """
@@ -69,7 +193,7 @@ class RedisService:
             
             # 序列化值
             if isinstance(value, (dict, list)):
-                value = json.dumps(value, ensure_ascii=False)
+                value = self.serializer.dumps(value)
             
             result = await client.set(key, value, ex=expire)
             
@@ -105,14 +229,70 @@ class RedisService:
             
             # 尝试反序列化JSON
             try:
-                return json.loads(value)
-            except json.JSONDecodeError:
+                return self.serializer.loads(value)
+            except ValueError:
                 return value.decode('utf-8')
                 
         except Exception as e:
             logger.error("获取缓存失败", key=key, error=str(e))
             return None
     
+    async def get_cache_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        用一次MGET批量获取缓存
+        
+        Args:
+            keys: 缓存键列表
+            
+        Returns:
+            与keys顺序一致的缓存值列表，不存在或获取失败的位置为None
+        """
+        if not keys:
+            return []
+        try:
+            client = await self.get_client()
+            values = await client.mget(keys)
+        except Exception as e:
+            logger.error("批量获取缓存失败", keys=len(keys), error=str(e))
+            return [None] * len(keys)
+        
+        results: List[Optional[Any]] = []
+        for value in values:
+            if value is None:
+                results.append(None)
+                continue
+            try:
+                results.append(self.serializer.loads(value))
+            except ValueError:
+                results.append(value.decode('utf-8'))
+        return results
+    
+    async def set_cache_many(self, values: Dict[str, Any], expire: Optional[int] = None) -> bool:
+        """
+        用一次pipeline批量设置缓存
+        
+        Args:
+            values: 缓存键到缓存值的映射
+            expire: 过期时间（秒）
+            
+        Returns:
+            是否全部设置成功
+        """
+        if not values:
+            return True
+        try:
+            client = await self.get_client()
+            pipeline = client.pipeline(transaction=False)
+            for key, value in values.items():
+                if isinstance(value, (dict, list)):
+                    value = self.serializer.dumps(value)
+                pipeline.set(key, value, ex=expire)
+            results = await pipeline.execute()
+            return all(results)
+        except Exception as e:
+            logger.error("批量设置缓存失败", keys=len(values), error=str(e))
+            return False
+    
     async def delete_cache(self, key: str) -> bool:
         """
         删除缓存
@@ -160,8 +340,8 @@ class RedisService:
                 "source": "synchronize_api"
             }
             
-            # 发布到Stream
-            event_id = await client.xadd(stream_name, event_data)
+            # 发布到Stream，Stream字段只接受字符串和数字，其他值序列化为JSON
+            event_id = await client.xadd(stream_name, self._encode_fields(event_data))
             
             logger.info(
                 "发布事件到Redis Stream",
@@ -183,8 +363,80 @@ class RedisService:
             )
             return None
     
+    async def publish_events(self, stream_name: str, events: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """
+        用一次pipeline批量发布事件到Redis Stream，保持列表顺序
+        
+        Args:
+            stream_name: 流名称
+            events: 事件数据列表
+            
+        Returns:
+            与events顺序一致的事件ID列表，失败时全部为None
+        """
+        if not events:
+            return []
+        try:
+            client = await self.get_client()
+            timestamp = datetime.now(timezone.utc).isoformat()
+            pipeline = client.pipeline(transaction=False)
+            for event_data in events:
+                pipeline.xadd(stream_name, self._encode_fields({
+                    **event_data,
+                    "timestamp": timestamp,
+                    "source": "synchronize_api"
+                }))
+            event_ids = await pipeline.execute()
+            
+            logger.info("批量发布事件到Redis Stream", stream_name=stream_name, events=len(event_ids))
+            return event_ids
+            
+        except Exception as e:
+            logger.error("批量发布事件失败", stream_name=stream_name, events=len(events), error=str(e))
+            return [None] * len(events)
+    
+    def _encode_fields(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """把Stream字段中的字典、列表、布尔值和None序列化为JSON"""
+        return {
+            key: value if isinstance(value, (str, bytes, int, float)) and not isinstance(value, bool)
+            else self.serializer.dumps(value)
+            for key, value in data.items()
+        }
+    
+    async def ensure_consumer_group(self, stream_name: str, consumer_group: str) -> bool:
+        """
+        确保消费者组存在（不存在时连同流一起创建），每个(流, 消费者组)只检查一次
+        
+        Args:
+            stream_name: 流名称
+            consumer_group: 消费者组
+            
+        Returns:
+            消费者组是否存在
+        """
+        if (stream_name, consumer_group) in self._groups:
+            return True
+        try:
+            client = await self.get_client()
+            await client.xgroup_create(stream_name, consumer_group, id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                logger.error("创建消费者组失败", stream_name=stream_name, consumer_group=consumer_group, error=str(e))
+                return False
+        except Exception as e:
+            logger.error("创建消费者组失败", stream_name=stream_name, consumer_group=consumer_group, error=str(e))
+            return False
+        self._groups.add((stream_name, consumer_group))
+        return True
+    
+    def _forget_group(self, stream_name: str, consumer_group: str, error: Exception):
+        """流或消费者组被删除（NOGROUP）后，下次读取时重新创建"""
+        if "NOGROUP" in str(error):
+            self._groups.discard((stream_name, consumer_group))
+    
     async def read_events(self, stream_name: str, consumer_group: str, 
-                         consumer_name: str, count: int = 10) -> List[Dict[str, Any]]:
+                         consumer_name: str, count: int = 10,
+                         block_ms: Optional[int] = 1000) -> List[Dict[str, Any]]:
         """
         从Redis Stream读取事件
         
@@ -193,27 +445,23 @@ class RedisService:
             consumer_group: 消费者组
             consumer_name: 消费者名称
             count: 读取数量
+            block_ms: 没有新事件时阻塞等待的毫秒数，None表示不阻塞
             
         Returns:
             事件列表
         """
         try:
+            if not await self.ensure_consumer_group(stream_name, consumer_group):
+                return []
             client = await self.get_client()
             
-            # 确保消费者组存在
-            try:
-                await client.xgroup_create(stream_name, consumer_group, id='0', mkstream=True)
-            except redis.RedisError:
-                # 消费者组可能已存在
-                pass
-            
             # 读取事件
             messages = await client.xreadgroup(
                 consumer_group,
                 consumer_name,
                 {stream_name: '>'},
                 count=count,
-                block=1000  # 阻塞1秒
+                block=block_ms
             )
             
             events = []
@@ -237,6 +485,7 @@ class RedisService:
             return events
             
         except Exception as e:
+            self._forget_group(stream_name, consumer_group, e)
             logger.error(
                 "读取事件失败",
                 stream_name=stream_name,
@@ -282,6 +531,267 @@ class RedisService:
             )
             return False
     
+    async def claim_events(self, stream_name: str, consumer_group: str, consumer_name: str,
+                           min_idle_ms: int, count: int = 10) -> List[Dict[str, Any]]:
+        """
+        认领其他消费者读取后超过min_idle_ms仍未确认的事件（XAUTOCLAIM）
+        
+        用于重新投递处理失败或消费者崩溃后遗留的事件
+        
+        Args:
+            stream_name: 流名称
+            consumer_group: 消费者组
+            consumer_name: 认领者名称
+            min_idle_ms: 最小空闲时间（毫秒）
+            count: 最多认领数量
+            
+        Returns:
+            事件列表，格式与read_events相同
+        """
+        try:
+            if not await self.ensure_consumer_group(stream_name, consumer_group):
+                return []
+            client = await self.get_client()
+            response = await client.xautoclaim(
+                stream_name, consumer_group, consumer_name, min_idle_ms, start_id="0-0", count=count
+            )
+            # Redis 7返回[下一个游标, 事件, 已删除的ID]，Redis 6.2没有第三项
+            return [
+                {"id": msg_id, "stream": stream_name, **fields}
+                for msg_id, fields in response[1]
+                if fields is not None
+            ]
+        except Exception as e:
+            self._forget_group(stream_name, consumer_group, e)
+            logger.error(
+                "认领事件失败",
+                stream_name=stream_name,
+                consumer_group=consumer_group,
+                consumer_name=consumer_name,
+                error=str(e)
+            )
+            return []
+    
+    async def ack_events(self, stream_name: str, consumer_group: str, event_ids: List[str]) -> int:
+        """
+        用一次XACK确认多个事件
+        
+        Args:
+            stream_name: 流名称
+            consumer_group: 消费者组
+            event_ids: 事件ID列表
+            
+        Returns:
+            确认成功的数量
+        """
+        if not event_ids:
+            return 0
+        try:
+            client = await self.get_client()
+            return await client.xack(stream_name, consumer_group, *event_ids)
+        except Exception as e:
+            logger.error(
+                "确认事件失败",
+                stream_name=stream_name,
+                consumer_group=consumer_group,
+                events=len(event_ids),
+                error=str(e)
+            )
+            return 0
+    
+    async def trim_acknowledged(self, stream_name: str, consumer_group: str) -> int:
+        """
+        删除消费者组已确认的Stream条目（XTRIM MINID，需要Redis 6.2+）
+        
+        保留最早的未确认条目及其之后的条目，没有未确认条目时保留尚未投递的条目；
+        使用近似裁剪，只删除完整的内部节点，开销与确认量无关
+        
+        Args:
+            stream_name: 流名称
+            consumer_group: 消费者组
+            
+        Returns:
+            删除的条目数，失败返回0
+        """
+        try:
+            client = await self.get_client()
+            pending = await client.xpending(stream_name, consumer_group)
+            if pending["pending"]:
+                min_id = pending["min"]
+            else:
+                name = consumer_group.encode()
+                last_id = next(
+                    (group["last-delivered-id"] for group in await client.xinfo_groups(stream_name)
+                     if group.get("name") in (name, consumer_group)),
+                    None
+                )
+                if last_id is None:
+                    return 0
+                if isinstance(last_id, bytes):
+                    last_id = last_id.decode()
+                milliseconds, sequence = last_id.split("-")
+                min_id = f"{milliseconds}-{int(sequence) + 1}"
+            return await client.xtrim(stream_name, minid=min_id, approximate=True)
+        except Exception as e:
+            logger.error("裁剪事件流失败", stream_name=stream_name, consumer_group=consumer_group, error=str(e))
+            return 0
+    
+    async def stream_group_info(self, stream_name: str, consumer_group: str) -> Optional[Dict[str, Any]]:
+        """
+        获取流长度以及消费者组的待确认数和积压数
+        
+        Args:
+            stream_name: 流名称
+            consumer_group: 消费者组
+            
+        Returns:
+            length/pending/lag，lag为尚未投递给消费者组的条目数（Redis 7以下为None）；
+            Redis不可用时返回None
+        """
+        try:
+            client = await self.get_client()
+            length = await client.xlen(stream_name)
+            if not length:
+                return {"length": 0, "pending": 0, "lag": 0}
+            name = consumer_group.encode()
+            for group in await client.xinfo_groups(stream_name):
+                if group.get("name") in (name, consumer_group):
+                    return {"length": length, "pending": group.get("pending", 0), "lag": group.get("lag")}
+            # 消费者组尚未创建，所有条目都在积压中
+            return {"length": length, "pending": 0, "lag": length}
+        except Exception as e:
+            logger.error("获取事件流状态失败", stream_name=stream_name, consumer_group=consumer_group, error=str(e))
+            return None
+    
+    async def acquire_lease(self, key: str, owner: str, ttl_ms: int) -> bool:
+        """
+        获取以owner为值的租约（SET NX PX）
+        
+        Args:
+            key: 租约键
+            owner: 持有者标识
+            ttl_ms: 租约时长（毫秒）
+            
+        Returns:
+            是否获得租约，Redis不可用时返回False
+        """
+        try:
+            client = await self.get_client()
+            return bool(await client.set(key, owner, nx=True, px=ttl_ms))
+        except Exception as e:
+            logger.warning("获取租约失败", key=key, error=str(e))
+            return False
+    
+    async def renew_lease(self, key: str, owner: str, ttl_ms: int) -> bool:
+        """
+        续租，只有仍持有租约时才生效
+        
+        Args:
+            key: 租约键
+            owner: 持有者标识
+            ttl_ms: 新的租约时长（毫秒）
+            
+        Returns:
+            是否仍持有租约
+        """
+        try:
+            client = await self.get_client()
+            return bool(await client.eval(_RENEW_LOCK_SCRIPT, 1, key, owner, ttl_ms))
+        except Exception as e:
+            logger.error("续租失败", key=key, error=str(e))
+            return False
+    
+    async def release_lease(self, key: str, owner: str) -> bool:
+        """
+        释放租约，只有仍持有租约时才生效
+        
+        Args:
+            key: 租约键
+            owner: 持有者标识
+            
+        Returns:
+            是否释放成功
+        """
+        try:
+            client = await self.get_client()
+            return bool(await client.eval(_RELEASE_LOCK_SCRIPT, 1, key, owner))
+        except Exception as e:
+            logger.error("释放租约失败", key=key, error=str(e))
+            return False
+    
+    async def reserve_events(self, bucket_keys: List[str], members: List[Any], now_ms: int,
+                             reserve_until_ms: int, expire_at: int) -> Optional[List[int]]:
+        """
+        用一次Lua调用原子地预留一批事件
+        
+        Args:
+            bucket_keys: 从新到旧的分桶哈希键，新的预留写入第一个桶
+            members: 事件标识
+            now_ms: 当前毫秒时间，早于该时间的预留视为已失效
+            reserve_until_ms: 新预留的截止毫秒时间
+            expire_at: 第一个桶的过期时间戳（秒）
+            
+        Returns:
+            与members顺序一致的状态（0 预留成功，1 已处理，2 正在处理），Redis不可用时返回None
+        """
+        if not members:
+            return []
+        try:
+            client = await self.get_client()
+            states = await client.eval(
+                _RESERVE_EVENTS_SCRIPT, len(bucket_keys), *bucket_keys,
+                now_ms, reserve_until_ms, expire_at, *members
+            )
+            return [int(state) for state in states]
+        except Exception as e:
+            logger.warning("预留事件失败", events=len(members), error=str(e))
+            return None
+    
+    async def complete_events(self, bucket_key: str, members: List[Any], expire_at: int) -> bool:
+        """
+        用一次pipeline把事件标记为已处理
+        
+        Args:
+            bucket_key: 当前分桶哈希键
+            members: 事件标识
+            expire_at: 分桶的过期时间戳（秒）
+            
+        Returns:
+            是否写入成功
+        """
+        if not members:
+            return True
+        try:
+            client = await self.get_client()
+            pipeline = client.pipeline(transaction=False)
+            pipeline.hset(bucket_key, mapping={member: 1 for member in members})
+            pipeline.expireat(bucket_key, expire_at)
+            await pipeline.execute()
+            return True
+        except Exception as e:
+            logger.error("标记事件已处理失败", events=len(members), error=str(e))
+            return False
+    
+    async def release_events(self, bucket_keys: List[str], members: List[Any]) -> int:
+        """
+        释放尚未完成的事件预留，使事件可以重新处理
+        
+        Args:
+            bucket_keys: 可能包含预留的分桶哈希键
+            members: 事件标识
+            
+        Returns:
+            释放的预留数量
+        """
+        if not members:
+            return 0
+        try:
+            client = await self.get_client()
+            return int(await client.eval(_RELEASE_EVENTS_SCRIPT, len(bucket_keys), *bucket_keys, *members))
+        except Exception as e:
+            logger.error("释放事件预留失败", events=len(members), error=str(e))
+            return 0
+    
     async def health_check(self) -> bool:
         """
         Redis健康检查
@@ -296,4 +806,169 @@ class RedisService:
             return True
         except Exception as e:
             logger.warning("Redis健康检查失败", error=str(e))
-            return False 
\ No newline at end of file
+            return False
+    
+    async def acquire_sync_lock(self, ttl_seconds: int) -> Optional[int]:
+        """
+        获取全局同步租约锁
+        
+        Args:
+            ttl_seconds: 租约时长（秒），持有者需在到期前续租
+            
+        Returns:
+            单调递增的栅栏令牌；锁已被占用时返回None；Redis不可用时返回0，由调用方决定是否不加锁执行
+        """
+        try:
+            client = await self.get_client()
+            token = await client.eval(_ACQUIRE_LOCK_SCRIPT, 2, SYNC_LOCK_KEY, SYNC_FENCE_KEY, ttl_seconds * 1000)
+            logger.debug("获取同步锁", token=token, acquired=token is not None)
+            return int(token) if token is not None else None
+        except Exception as e:
+            logger.warning("获取同步锁失败", error=str(e))
+            return 0
+    
+    async def renew_sync_lock(self, token: int, ttl_seconds: int) -> bool:
+        """
+        续租同步锁
+        
+        Args:
+            token: 栅栏令牌
+            ttl_seconds: 新的租约时长（秒）
+            
+        Returns:
+            是否仍持有锁
+        """
+        try:
+            client = await self.get_client()
+            return bool(await client.eval(_RENEW_LOCK_SCRIPT, 1, SYNC_LOCK_KEY, token, ttl_seconds * 1000))
+        except Exception as e:
+            logger.error("续租同步锁失败", token=token, error=str(e))
+            return False
+    
+    async def release_sync_lock(self, token: int) -> bool:
+        """
+        释放同步锁
+        
+        Args:
+            token: 栅栏令牌
+            
+        Returns:
+            是否释放成功
+        """
+        try:
+            client = await self.get_client()
+            return bool(await client.eval(_RELEASE_LOCK_SCRIPT, 1, SYNC_LOCK_KEY, token))
+        except Exception as e:
+            logger.error("释放同步锁失败", token=token, error=str(e))
+            return False
+    
+    async def get_sync_lock_token(self) -> Optional[int]:
+        """
+        获取当前持有同步锁的栅栏令牌
+        
+        Returns:
+            栅栏令牌，锁空闲或Redis不可用时返回None
+        """
+        try:
+            client = await self.get_client()
+            token = await client.get(SYNC_LOCK_KEY)
+            return int(token) if token is not None else None
+        except Exception as e:
+            logger.error("获取同步锁状态失败", error=str(e))
+            return None
+    
+    async def is_sync_in_progress(self) -> bool:
+        """
+        检查集群中是否有同步正在执行
+        
+        Returns:
+            是否有同步正在执行
+        """
+        return await self.get_sync_lock_token() is not None
+    
+    async def set_sync_progress(self, token: int, progress: Dict[str, Any], expire: int = 86400) -> bool:
+        """
+        以栅栏令牌为条件写入同步进度
+        
+        Args:
+            token: 栅栏令牌
+            progress: 字段到值的映射，字典和列表值序列化为JSON
+            expire: 过期时间（秒）
+            
+        Returns:
+            是否写入成功（失去租约时返回False）
+        """
+        fields = []
+        for key, value in {**progress, "token": token}.items():
+            fields.extend([key, self.serializer.dumps(value) if isinstance(value, (dict, list)) else value])
+        try:
+            client = await self.get_client()
+            return bool(await client.eval(
+                _WRITE_PROGRESS_SCRIPT, 2, SYNC_LOCK_KEY, SYNC_PROGRESS_KEY, token, expire, *fields
+            ))
+        except Exception as e:
+            logger.error("写入同步进度失败", token=token, error=str(e))
+            return False
+    
+    async def get_sync_progress(self) -> Optional[Dict[str, Any]]:
+        """
+        获取最近一次同步的进度
+        
+        Returns:
+            进度字典，不存在时返回None
+        """
+        try:
+            client = await self.get_client()
+            fields = await client.hgetall(SYNC_PROGRESS_KEY)
+        except Exception as e:
+            logger.error("获取同步进度失败", error=str(e))
+            return None
+        if not fields:
+            return None
+        progress = {}
+        for key, value in fields.items():
+            key = key.decode("utf-8") if isinstance(key, bytes) else key
+            value = value.decode("utf-8") if isinstance(value, bytes) else value
+            try:
+                progress[key] = self.serializer.loads(value)
+            except ValueError:
+                progress[key] = value
+        return progress
+    
+    async def set_sync_result(self, token: int, result: Dict[str, Any], expire: int = 86400) -> bool:
+        """
+        保存一次同步的结果，供等待该同步的调用方读取
+        
+        Args:
+            token: 栅栏令牌
+            result: 同步结果
+            expire: 过期时间（秒）
+            
+        Returns:
+            是否保存成功
+        """
+        saved = await self.set_cache(SYNC_LATEST_RESULT_KEY, result, expire=expire)
+        if token:
+            saved = await self.set_cache(SYNC_RUN_RESULT_KEY.format(token=token), result, expire=expire) and saved
+        return saved
+    
+    async def get_sync_result(self, token: int) -> Optional[Dict[str, Any]]:
+        """
+        获取指定令牌的同步结果
+        
+        Args:
+            token: 栅栏令牌
+            
+        Returns:
+            同步结果，不存在时返回None
+        """
+        return await self.get_cache(SYNC_RUN_RESULT_KEY.format(token=token))
+    
+    async def get_latest_sync_result(self) -> Optional[Dict[str, Any]]:
+        """
+        获取最近一次同步结果
+        
+        Returns:
+            同步结果，不存在时返回None
+        """
+        return await self.get_cache(SYNC_LATEST_RESULT_KEY)
@@ -0,0 +1,120 @@
+"""
+同步实体注册表
+描述Model Garden同步负载中各实体与本地表的对应关系
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from src.models.base import BaseModel
+from src.models.project import Project
+from src.models.use_case import UseCase
+from src.models.budget import UseCaseBudget, UseCaseBudgetUsage
+from src.models.model import Model
+from src.models.deployment import ModelDeployment
+from src.models.pricing import ModelPricing
+from src.models.subscription import Subscription
+from src.models.limit import ModelLimit, ModelLimitUsage
+from src.repositories.base_repository import BaseRepository
+from src.repositories.project_repository import ProjectRepository
+from src.repositories.use_case_repository import UseCaseRepository
+from src.repositories.budget_repository import BudgetRepository, BudgetUsageRepository
+from src.repositories.model_repository import ModelRepository
+from src.repositories.deployment_repository import DeploymentRepository
+from src.repositories.pricing_repository import PricingRepository
+from src.repositories.subscription_repository import SubscriptionRepository
+from src.repositories.limit_repository import LimitRepository, LimitUsageRepository
+
+
+@dataclass(frozen=True)
+class SyncEntity:
+    """
+    同步实体描述
+
+    Attributes:
+        name: 同步结果中的实体名称
+        payload_key: 同步负载中的数组字段名
+        model: 目标模型类
+        repository: 目标仓储类
+        conflict_columns: 用于upsert冲突判定的唯一键列
+        row_type: 负载中type字段的取值，用于区分同一数组中的主表和使用量表
+        soft_delete_column: 对账时用于软删除的标记列，为None时物理删除
+    """
+    name: str
+    payload_key: str
+    model: Type[BaseModel]
+    repository: Type[BaseRepository]
+    conflict_columns: Tuple[str, ...] = ("id",)
+    row_type: Optional[str] = None
+    soft_delete_column: Optional[str] = None
+
+    def matches(self, row: Dict[str, Any]) -> bool:
+        """判断负载中的一行是否属于该实体"""
+        if self.row_type is None:
+            return True
+        # 与事件服务保持一致：缺省type视为主表数据
+        if not row.get("type"):
+            return self.row_type != "usage"
+        return row.get("type") == self.row_type
+
+    def payload_rows(self, sync_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        取出同步负载中属于该实体的行
+
+        有软删除标记列时，负载中出现的行视为有效：未携带该列的行补为True，
+        使对账时被软删除、之后重新出现的数据恢复有效
+        """
+        rows = [row for row in sync_data.get(self.payload_key, []) if self.matches(row)]
+        if self.soft_delete_column is None:
+            return rows
+        return [row if self.soft_delete_column in row else {**row, self.soft_delete_column: True} for row in rows]
+
+
+# 按外键依赖顺序排列
+SYNC_ENTITIES: List[SyncEntity] = [
+    SyncEntity(
+        "projects", "projects", Project, ProjectRepository, ("project_code",),
+        soft_delete_column="is_active"
+    ),
+    SyncEntity("use_cases", "use_cases", UseCase, UseCaseRepository, soft_delete_column="is_active"),
+    SyncEntity("budgets", "budgets", UseCaseBudget, BudgetRepository, row_type="budget"),
+    SyncEntity(
+        "budgets", "budgets", UseCaseBudgetUsage, BudgetUsageRepository,
+        ("use_case_id", "usage_period", "scope"), row_type="usage"
+    ),
+    SyncEntity("models", "models", Model, ModelRepository),
+    SyncEntity(
+        "deployments", "model_deployments", ModelDeployment, DeploymentRepository,
+        ("model_id", "deployment_name")
+    ),
+    SyncEntity("pricing", "pricing", ModelPricing, PricingRepository),
+    SyncEntity("subscriptions", "use_case_llm_models", Subscription, SubscriptionRepository),
+    SyncEntity("limits", "limits", ModelLimit, LimitRepository, row_type="limit"),
+    SyncEntity("limits", "limits", ModelLimitUsage, LimitUsageRepository, row_type="usage"),
+]
+
+
+def entity_names() -> List[str]:
+    """按同步顺序返回去重后的实体名称"""
+    names: List[str] = []
+    for entity in SYNC_ENTITIES:
+        if entity.name not in names:
+            names.append(entity.name)
+    return names
+
+
+def entity_dependencies() -> Dict[str, List[str]]:
+    """
+    根据模型外键推导实体之间的依赖关系
+
+    Returns:
+        实体名称到其依赖实体名称列表的映射，按同步顺序排列
+    """
+    owners = {entity.model.__tablename__: entity.name for entity in SYNC_ENTITIES}
+    dependencies: Dict[str, List[str]] = {name: [] for name in entity_names()}
+    for entity in SYNC_ENTITIES:
+        for foreign_key in entity.model.__table__.foreign_keys:
+            owner = owners.get(foreign_key.column.table.name)
+            if owner and owner != entity.name and owner not in dependencies[entity.name]:
+                dependencies[entity.name].append(owner)
+    return dependencies
@@ -3,13 +3,26 @@
 负责全量同步和增量同步逻辑
 """
 
-from typing import Dict, Any, List, Optional
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError as FutureCancelledError
+from typing import Dict, Any, List, Optional, AsyncIterator, Callable, Tuple
 from datetime import datetime, timezone
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 import structlog
 
-from src.services.model_garden_client import ModelGardenClient
+from src.services.model_garden_client import ModelGardenClient, SYNC_ENTITY_KEYS
 from src.services.redis_service import RedisService
+from src.models.project import Project
+from src.models.use_case import UseCase
+from src.models.budget import UseCaseBudget, UseCaseBudgetUsage
+from src.models.model import Model
+from src.models.deployment import ModelDeployment
+from src.models.pricing import ModelPricing
+from src.models.subscription import Subscription
+from src.models.limit import ModelLimit, ModelLimitUsage
+from src.repositories.base_repository import BaseRepository
 from src.repositories.project_repository import ProjectRepository
 from src.repositories.use_case_repository import UseCaseRepository
 from src.repositories.budget_repository import BudgetRepository
@@ -18,11 +31,30 @@ from src.repositories.deployment_repository import DeploymentRepository
 from src.repositories.pricing_repository import PricingRepository
 from src.repositories.subscription_repository import SubscriptionRepository
 from src.repositories.limit_repository import LimitRepository
+from src.repositories.sync_watermark_repository import SyncWatermarkRepository
+from src.services.sync_entities import SYNC_ENTITIES, SyncEntity, entity_dependencies, entity_names
+from src.config.database import SessionLocal
 from src.config.settings import get_settings
+from src.utils.db_executor import run_coroutine_in_db_executor, run_in_db_executor
 from src.utils.logger import get_logger
 
 logger = get_logger()
 
+# 上次成功应用的全量负载校验信息（etag/last_modified/digest）
+SYNC_VALIDATORS_KEY = "sync:validators"
+
+# 客户端断开后仍在后台完成的流式同步任务，保持引用避免被回收
+_background_syncs: set = set()
+
+
+def _parse_updated_time(value: Any) -> Optional[datetime]:
+    """把负载中的updated_time转换为UTC naive时间"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value if isinstance(value, datetime) else None
+
 
 class SyncService:
     """同步服务类"""
@@ -32,6 +64,16 @@ class SyncService:
         self.model_garden_client = ModelGardenClient()
         self.redis_service = RedisService()
         self.db_session = db_session
+        # 流式输出时接收每个已提交分块中新建和更新的行，在数据库线程池中调用
+        self._row_sink: Optional[Callable[[str, List[Tuple[str, Dict[str, Any]]]], None]] = None
+        # 心跳续租失败后置为True，之后的分块不再提交
+        self._lease_lost = False
+        # 持有同步锁时的(栅栏令牌, 主事件循环)，每个分块提交前据此确认仍持有锁
+        self._fence: Optional[Tuple[int, asyncio.AbstractEventLoop]] = None
+        # 并行同步中任一实体失败后置位，其余实体在下一次提交前放弃
+        self._parallel_abort = threading.Event()
+        # 逐行同步时按模型缓存的比较用仓储
+        self._comparers: Dict[type, BaseRepository] = {}
         
         # 初始化仓储（如果有session则使用，否则延迟初始化）
         if db_session:
@@ -41,6 +83,7 @@ class SyncService:
     
     def _init_repositories(self, session: Session):
         """初始化仓储"""
+        self.db_session = session
         self.project_repo = ProjectRepository(session)
         self.use_case_repo = UseCaseRepository(session)
         self.budget_repo = BudgetRepository(session)
@@ -49,21 +92,216 @@ class SyncService:
         self.pricing_repo = PricingRepository(session)
         self.subscription_repo = SubscriptionRepository(session)
         self.limit_repo = LimitRepository(session)
+        self.watermark_repo = SyncWatermarkRepository(session)
         self._repositories_initialized = True
     
     async def sync_all(self, updated_since: Optional[datetime] = None, 
-                      session: Optional[Session] = None) -> Dict[str, Any]:
+                      session: Optional[Session] = None,
+                      use_watermarks: Optional[bool] = None,
+                      dry_run: bool = False) -> Dict[str, Any]:
         """
         执行全量同步
         
+        同一时间集群内只有一个同步在执行：获取Redis租约锁后才开始写入，
+        锁已被占用时等待正在执行的同步完成并返回它的结果。
+        Redis不可用时默认放弃本次同步，SYNC_LOCK_FAIL_OPEN开启时不加锁执行
+        
         Args:
             updated_since: 可选的增量同步时间
             session: 数据库会话
+            use_watermarks: 未指定updated_since时按持久化的实体水位增量同步，默认取SYNC_WATERMARKS
+            dry_run: 只计算变更计划，不写入数据库和Redis，也不获取同步锁
             
         Returns:
-            同步结果字典
+            同步结果字典，dry_run时为变更计划
+        """
+        if dry_run:
+            return await self._plan_sync(updated_since, session)
+        
+        ttl = self.settings.SYNC_LOCK_TTL_SECONDS
+        self._progress: Dict[str, Dict[str, int]] = {}
+        self._progress_lock = threading.Lock()
+        token = await self.redis_service.acquire_sync_lock(ttl)
+        if token is None:
+            self._phase = "joined"
+            return await self._join_running_sync()
+        if not token and not self.settings.SYNC_LOCK_FAIL_OPEN:
+            logger.error("无法获取同步锁，放弃本次同步")
+            return {"success": False, "error": "无法获取同步锁（Redis不可用）"}
+        
+        self._lease_lost = False
+        self._fence = (token, asyncio.get_running_loop()) if token else None
+        self._phase = "fetching"
+        heartbeat = asyncio.create_task(self._heartbeat(token)) if token else None
+        state = "failed"
+        result: Dict[str, Any] = {"success": False, "error": "同步异常终止"}
+        try:
+            result = await self._execute_sync(updated_since, session, use_watermarks)
+            state = "completed" if result["success"] else "failed"
+        except asyncio.CancelledError:
+            # 任务被取消或流式输出的客户端断开
+            state = "cancelled"
+            result = {"success": False, "cancelled": True, "error": "同步已取消"}
+            raise
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+            raise
+        finally:
+            self._fence = None
+            if heartbeat is not None:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+            # 无论同步如何结束都发布结果并释放锁，等待的请求不必等到租约过期
+            if token:
+                await self._publish_progress(token, state)
+                await self.redis_service.set_sync_result(token, result)
+                await self.redis_service.release_sync_lock(token)
+        return result
+    
+    async def stream_sync_records(self, updated_since: Optional[datetime] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        执行同步并按处理顺序产出已写入的记录
+        
+        每个分块提交后产出其中新建和更新的行，最后产出同步结果（不含各实体明细数据）。
+        写入线程在输出队列满时等待，内存占用只与SYNC_STREAM_QUEUE_SIZE个分块有关。
+        同步使用独立的数据库会话，调用方提前关闭迭代器时同步在后台继续执行，只是不再输出记录
+        
+        Args:
+            updated_since: 可选的增量同步时间
+            
+        Yields:
+            {"type": "record", "entity", "status", "data"}，最后一项为{"type": "summary", ...}
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(self.settings.SYNC_STREAM_QUEUE_SIZE, 1))
+        pending: set = set()
+        closed = threading.Event()
+        
+        def sink(name: str, changes: List[Tuple[str, Dict[str, Any]]]):
+            if closed.is_set():
+                return
+            future = asyncio.run_coroutine_threadsafe(queue.put((name, changes)), loop)
+            pending.add(future)
+            try:
+                future.result()
+            except FutureCancelledError:
+                pass
+            finally:
+                pending.discard(future)
+        
+        async def run() -> Dict[str, Any]:
+            session = SessionLocal()
+            try:
+                result = await self.sync_all(updated_since, session=session)
+                await run_in_db_executor(session.commit if result.get("success") else session.rollback)
+                return result
+            finally:
+                await run_in_db_executor(session.close)
+                await queue.put(None)
+        
+        self._row_sink = sink
+        task = asyncio.create_task(run())
+        _background_syncs.add(task)
+        task.add_done_callback(_background_syncs.discard)
+        try:
+            yield {"type": "started", "updated_since": updated_since.isoformat() if updated_since else None}
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                name, changes = item
+                for status, row in changes:
+                    yield {"type": "record", "entity": name, "status": status, "data": row}
+            result = await task
+            yield {"type": "summary", **{key: value for key, value in result.items() if key != "details"},
+                   "entities": {
+                       name: {key: value for key, value in counts.items() if isinstance(value, (int, float))}
+                       for name, counts in result.get("details", {}).items()
+                   }}
+        finally:
+            # 客户端断开时解除写入线程的等待，同步在后台完成
+            self._row_sink = None
+            closed.set()
+            for future in list(pending):
+                future.cancel()
+            while not queue.empty():
+                queue.get_nowait()
+    
+    def _emit_rows(self, name: str, changes: List[Tuple[str, Dict[str, Any]]]):
+        """把已提交分块中新建和更新的行交给流式输出（在数据库线程池中调用）"""
+        if self._row_sink is not None and changes:
+            self._row_sink(name, changes)
+    
+    async def _heartbeat(self, token: int):
+        """定期续租同步锁并发布进度，租约丢失后停止写入"""
+        ttl = self.settings.SYNC_LOCK_TTL_SECONDS
+        while True:
+            await asyncio.sleep(self.settings.SYNC_HEARTBEAT_SECONDS)
+            if not await self.redis_service.renew_sync_lock(token, ttl):
+                self._lease_lost = True
+                logger.error("同步租约已丢失，停止写入", token=token)
+                return
+            await self._publish_progress(token, "running")
+    
+    def get_progress(self) -> Dict[str, Any]:
+        """
+        获取当前同步的阶段和各实体进度
+        
+        Returns:
+            包含phase（fetching/writing/reconciling/joined）和entities的字典
+        """
+        progress_lock = getattr(self, "_progress_lock", None)
+        if progress_lock is None:
+            return {"phase": None, "entities": {}}
+        with progress_lock:
+            entities = {name: dict(counts) for name, counts in self._progress.items()}
+        return {"phase": getattr(self, "_phase", None), "entities": entities}
+    
+    async def _publish_progress(self, token: int, state: str):
+        """以栅栏令牌为条件发布各实体的同步进度"""
+        await self.redis_service.set_sync_progress(token, {
+            **self.get_progress(),
+            "state": state,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        })
+    
+    def _report_progress(self, name: str, **counts: int):
+        """累加实体的同步进度（在数据库线程池中调用）"""
+        progress_lock = getattr(self, "_progress_lock", None)
+        if progress_lock is None:
+            return
+        with progress_lock:
+            entity = self._progress.setdefault(name, {})
+            for key, value in counts.items():
+                entity[key] = entity.get(key, 0) + value
+    
+    async def _join_running_sync(self) -> Dict[str, Any]:
         """
-        if session and not self._repositories_initialized:
+        等待正在执行的同步完成并返回它的结果
+        
+        Returns:
+            正在执行的同步的结果，附带joined标记
+        """
+        token = await self.redis_service.get_sync_lock_token()
+        logger.info("已有同步正在执行，等待其结果", token=token)
+        deadline = time.monotonic() + self.settings.SYNC_JOIN_TIMEOUT_SECONDS
+        while token is not None and await self.redis_service.get_sync_lock_token() == token:
+            if time.monotonic() > deadline:
+                return {"success": False, "joined": True, "error": f"等待同步{token}超时"}
+            await asyncio.sleep(self.settings.SYNC_HEARTBEAT_SECONDS)
+        
+        result = await self.redis_service.get_sync_result(token) if token is not None else None
+        if result is None:
+            result = await self.redis_service.get_latest_sync_result()
+        if result is None:
+            return {"success": False, "joined": True, "error": "正在执行的同步没有返回结果"}
+        return {**result, "joined": True}
+    
+    async def _execute_sync(self, updated_since: Optional[datetime] = None,
+                            session: Optional[Session] = None,
+                            use_watermarks: Optional[bool] = None) -> Dict[str, Any]:
+        """持有同步锁时执行同步，参数同sync_all"""
+        if session is not None and session is not self.db_session:
             self._init_repositories(session)
         
         start_time = datetime.now(timezone.utc)
@@ -73,41 +311,75 @@ class SyncService:
             updated_since=updated_since.isoformat() if updated_since else None
         )
         
+        not_modified = False
+        self._watermark_candidates: Dict[str, Tuple[datetime, str]] = {}
+        if use_watermarks is None:
+            use_watermarks = self.settings.SYNC_WATERMARKS
+        use_watermarks = use_watermarks and updated_since is None
+        # 只有不带任何增量条件的全量负载才能判断哪些数据已被删除
+        reconcile = self.settings.SYNC_RECONCILE_DELETES and updated_since is None and not use_watermarks
+        self._seen_keys: Optional[Dict[int, set]] = {} if reconcile else None
         try:
-            # 调用Model Garden API获取数据
-            sync_data = await self.model_garden_client.sync_all(updated_since)
-            
-            # 同步各种实体
-            results = {}
-            
-            # 1. 同步项目
-            results["projects"] = await self._sync_projects(sync_data.get("projects", []))
-            
-            # 2. 同步用例
-            results["use_cases"] = await self._sync_use_cases(sync_data.get("use_cases", []))
+            fetch_kwargs = {}
+            if use_watermarks:
+                watermarks = await run_in_db_executor(self.watermark_repo.get_watermarks)
+                updated_since = self._watermark_floor(watermarks)
+                if watermarks:
+                    fetch_kwargs["watermarks"] = {
+                        key: {
+                            "updated_since": watermark_time.replace(tzinfo=timezone.utc).isoformat(),
+                            "after_id": watermark_id
+                        }
+                        for key, (watermark_time, watermark_id) in watermarks.items()
+                    }
             
-            # 3. 同步预算
-            results["budgets"] = await self._sync_budgets(sync_data.get("budgets", []))
-            
-            # 4. 同步模型
-            results["models"] = await self._sync_models(sync_data.get("models", []))
-            
-            # 5. 同步部署
-            results["deployments"] = await self._sync_deployments(sync_data.get("model_deployments", []))
+            if self.settings.SYNC_CONDITIONAL and (self.settings.SYNC_PAGINATED or self.settings.SYNC_STREAMING):
+                # 条件获取需要完整负载计算摘要，分页和流式获取优先，条件获取不生效
+                logger.warning(
+                    "SYNC_CONDITIONAL与SYNC_PAGINATED/SYNC_STREAMING同时开启，本次不做条件获取",
+                    paginated=self.settings.SYNC_PAGINATED,
+                    streaming=self.settings.SYNC_STREAMING
+                )
+            if self.settings.SYNC_PAGINATED:
+                # 分页并发获取，逐页入库
+                results = await self._stream_sync_data(
+                    self.model_garden_client.paginated_sync_all(updated_since, **fetch_kwargs)
+                )
+            elif self.settings.SYNC_STREAMING:
+                # 边下载解析边入库
+                results = await self._stream_sync_data(
+                    self.model_garden_client.stream_sync_all(updated_since, **fetch_kwargs)
+                )
+            elif self.settings.SYNC_CONDITIONAL:
+                # 负载未变化时不解析、不入库
+                results = await self._conditional_sync_data(updated_since, **fetch_kwargs)
+                not_modified = results is None
+            else:
+                # 调用Model Garden API获取数据
+                sync_data = await self.model_garden_client.sync_all(updated_since, **fetch_kwargs)
+                
+                # 同步各种实体
+                results = await self._apply_sync_data(sync_data)
             
-            # 6. 同步定价
-            results["pricing"] = await self._sync_pricing(sync_data.get("pricing", []))
+            results = results or {}
             
-            # 7. 同步订阅
-            results["subscriptions"] = await self._sync_subscriptions(sync_data.get("use_case_llm_models", []))
+            if use_watermarks:
+                await self._advance_watermarks(results)
+            if reconcile and not not_modified:
+                self._phase = "reconciling"
+                reconcile_result = await run_in_db_executor(self._reconcile_deletes)
+                for name, deleted in reconcile_result.get("deleted", {}).items():
+                    results.setdefault(name, {})["deleted"] = deleted
             
-            # 8. 同步限制
-            results["limits"] = await self._sync_limits(sync_data.get("limits", []))
+            # 提交最后一个分块之后的写入（水位、对账删除）
+            await run_in_db_executor(self._commit_chunk, self.db_session)
             
             # 计算总计
             total_created = sum(r.get("created", 0) for r in results.values())
             total_updated = sum(r.get("updated", 0) for r in results.values())
+            total_unchanged = sum(r.get("unchanged", 0) for r in results.values())
             total_errors = sum(r.get("errors", 0) for r in results.values())
+            total_deleted = sum(r.get("deleted", 0) for r in results.values())
             
             end_time = datetime.now(timezone.utc)
             duration = (end_time - start_time).total_seconds()
@@ -120,10 +392,16 @@ class SyncService:
                 "totals": {
                     "created": total_created,
                     "updated": total_updated,
-                    "errors": total_errors
+                    "unchanged": total_unchanged,
+                    "errors": total_errors,
+                    "deleted": total_deleted
                 },
                 "details": results
             }
+            if not_modified:
+                result["not_modified"] = True
+            if reconcile and not not_modified:
+                result["reconcile"] = reconcile_result
             
             # 缓存同步结果
             cache_key = f"sync:result:{start_time.strftime('%Y%m%d_%H%M%S')}"
@@ -134,6 +412,7 @@ class SyncService:
                 "event_type": "sync_completed",
                 "sync_type": "incremental" if updated_since else "full",
                 "totals": result["totals"],
+                "not_modified": not_modified,
                 "duration_seconds": duration
             })
             
@@ -142,7 +421,9 @@ class SyncService:
                 duration_seconds=duration,
                 created=total_created,
                 updated=total_updated,
-                errors=total_errors
+                unchanged=total_unchanged,
+                errors=total_errors,
+                deleted=total_deleted
             )
             
             return result
@@ -164,271 +445,829 @@ class SyncService:
                 "end_time": datetime.now(timezone.utc).isoformat()
             }
     
-    async def _sync_projects(self, projects_data: List[Dict[str, Any]]) -> Dict[str, int]:
-        """同步项目数据"""
-        created = 0
-        updated = 0
-        errors = 0
+    async def _conditional_sync_data(self, updated_since: Optional[datetime] = None,
+                                     watermarks: Optional[Dict[str, Dict[str, str]]] = None
+                                     ) -> Optional[Dict[str, Dict[str, int]]]:
+        """
+        条件获取并同步数据
+        
+        校验信息只对相同的请求参数有效，且只在本次同步没有错误时保存，
+        保证部分失败的负载在下次同步时会被重新应用
+        
+        Args:
+            updated_since: 可选的增量同步时间
+            watermarks: 可选的各实体水位
+            
+        Returns:
+            按实体名称汇总的同步结果，负载未变化时返回None
+        """
+        request_key = updated_since.isoformat() if updated_since else None
+        validators = await self.redis_service.get_cache(SYNC_VALIDATORS_KEY)
+        if not isinstance(validators, dict) or validators.get("updated_since") != request_key:
+            validators = None
         
-        for project_data in projects_data:
+        if watermarks:
+            sync_data, current = await self.model_garden_client.sync_all_if_changed(
+                updated_since, validators, watermarks=watermarks
+            )
+        else:
+            sync_data, current = await self.model_garden_client.sync_all_if_changed(updated_since, validators)
+        if sync_data is None:
+            return None
+        
+        results = await self._apply_sync_data(sync_data)
+        if not any(counts.get("errors", 0) for counts in results.values()):
+            await self.redis_service.set_cache(SYNC_VALIDATORS_KEY, {**current, "updated_since": request_key})
+        return results
+    
+    async def _stream_sync_data(self, chunks: AsyncIterator[Tuple[str, List[Dict[str, Any]]]]) -> Dict[str, Dict[str, int]]:
+        """
+        以流水线方式同步：获取任务把实体块放入有界队列，当前协程逐块写库
+        
+        Args:
+            chunks: 产出(实体数组字段名, 数据块)的异步迭代器
+            
+        Returns:
+            按实体名称汇总的同步结果
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(self.settings.SYNC_STREAM_QUEUE_SIZE, 1))
+        
+        async def produce():
             try:
-                existing = self.project_repo.get_by_project_code(project_data.get("project_code"))
-                
-                if existing:
-                    # 更新现有项目
-                    updated_project = self.project_repo.update(
-                        str(existing.id),
-                        project_name=project_data.get("project_name"),
-                        project_code=project_data.get("project_code")
-                    )
-                    if updated_project:
-                        updated += 1
-                        logger.debug("更新项目", project_id=existing.id, project_code=project_data.get("project_code"))
-                else:
-                    # 创建新项目
-                    new_project = self.project_repo.create(
-                        project_name=project_data.get("project_name"),
-                        project_code=project_data.get("project_code")
-                    )
-                    if new_project:
-                        created += 1
-                        logger.debug("创建项目", project_id=new_project.id, project_code=project_data.get("project_code"))
-                        
+                async for key, chunk in chunks:
+                    await queue.put((key, chunk))
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                errors += 1
-                logger.error("同步项目失败", project_data=project_data, error=str(e))
+                # 解析失败时把异常交给消费端，由sync_all统一处理
+                await queue.put(e)
+                return
+            await queue.put(None)
+        
+        producer = asyncio.create_task(produce())
+        results: Dict[str, Dict[str, int]] = {}
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                key, chunk = item
+                for name, counts in (await self._apply_sync_data({key: chunk})).items():
+                    totals = results.setdefault(name, {})
+                    for field, value in counts.items():
+                        totals[field] = totals.get(field, 0) + value
+        finally:
+            producer.cancel()
         
-        return {"created": created, "updated": updated, "errors": errors}
+        return results
     
-    async def _sync_use_cases(self, use_cases_data: List[Dict[str, Any]]) -> Dict[str, int]:
-        """同步用例数据"""
-        created = 0
-        updated = 0
-        errors = 0
+    @staticmethod
+    def _watermark_floor(watermarks: Dict[str, Tuple[datetime, str]]) -> Optional[datetime]:
+        """
+        计算兼容旧接口的updated_since：所有实体都有水位时取最小值，否则全量获取
         
-        for use_case_data in use_cases_data:
-            try:
-                existing = self.use_case_repo.get_by_project_and_name(
-                    use_case_data.get("project_id"),
-                    use_case_data.get("use_case_name")
-                )
+        只认识updated_since的服务端会多返回一些已应用的数据，批量写入会把它们计为未变化
+        """
+        if not watermarks or any(key not in watermarks for key in SYNC_ENTITY_KEYS):
+            return None
+        return min(watermark_time for watermark_time, _ in watermarks.values()).replace(tzinfo=timezone.utc)
+    
+    def _record_watermark_candidates(self, sync_data: Dict[str, Any]):
+        """记录本次同步中各实体出现的最大(updated_time, id)"""
+        candidates = getattr(self, "_watermark_candidates", None)
+        if candidates is None:
+            return
+        for key, rows in sync_data.items():
+            if not isinstance(rows, list):
+                continue
+            best = candidates.get(key)
+            for row in rows:
+                updated_time = _parse_updated_time(row.get("updated_time"))
+                if updated_time is None:
+                    continue
+                candidate = (updated_time, str(row.get("id", "")))
+                if best is None or candidate > best:
+                    best = candidate
+            if best is not None:
+                candidates[key] = best
+    
+    async def _advance_watermarks(self, results: Dict[str, Dict[str, Any]]):
+        """
+        推进本次同步没有错误的实体的水位
+        
+        有错误的实体保持原水位，失败的数据在下次同步时会被重新获取
+        """
+        names = {entity.payload_key: entity.name for entity in SYNC_ENTITIES}
+        advancing = {
+            key: candidate
+            for key, candidate in self._watermark_candidates.items()
+            if key in names and not results.get(names[key], {}).get("errors", 0)
+        }
+        if not advancing:
+            return
+        advanced = await run_in_db_executor(self.watermark_repo.advance, advancing)
+        logger.info(
+            "推进同步水位",
+            watermarks={key: watermark_time.isoformat() for key, (watermark_time, _) in advanced.items()},
+            held=sorted(set(self._watermark_candidates) - set(advancing))
+        )
+    
+    def _record_seen_keys(self, sync_data: Dict[str, Any]):
+        """记录全量负载中出现的各实体键，供对账删除使用"""
+        seen_keys = getattr(self, "_seen_keys", None)
+        if seen_keys is None:
+            return
+        for index, entity in enumerate(SYNC_ENTITIES):
+            keys = seen_keys.setdefault(index, set())
+            for row in sync_data.get(entity.payload_key, []):
+                if entity.matches(row):
+                    keys.add(tuple(row.get(column) for column in entity.conflict_columns))
+    
+    def _reconcile_deletes(self) -> Dict[str, Any]:
+        """
+        删除全量负载中已不存在的本地数据
+        
+        按外键依赖的逆序处理，先删除子表数据。所有实体在同一个SAVEPOINT中执行，
+        任一实体的待删除行数超过SYNC_DELETE_MIN_ROWS且比例超过SYNC_DELETE_MAX_RATIO、或删除失败时
+        整体回滚，不删除任何数据
+        
+        Returns:
+            对账结果，包含是否放弃（aborted）和按实体名称汇总的删除数量
+        """
+        deleted: Dict[str, int] = {}
+        try:
+            with self.db_session.begin_nested():
+                for index in reversed(range(len(SYNC_ENTITIES))):
+                    entity = SYNC_ENTITIES[index]
+                    missing, total = entity.repository(self.db_session).delete_missing(
+                        self._seen_keys.get(index, set()),
+                        entity.conflict_columns,
+                        soft_delete_column=entity.soft_delete_column,
+                        max_ratio=self.settings.SYNC_DELETE_MAX_RATIO,
+                        min_rows=self.settings.SYNC_DELETE_MIN_ROWS
+                    )
+                    deleted[entity.name] = deleted.get(entity.name, 0) + missing
+        except Exception as e:
+            logger.error("对账删除已放弃", error=str(e))
+            return {"aborted": True, "error": str(e), "deleted": {}}
+        
+        logger.info("对账删除完成", deleted={name: count for name, count in deleted.items() if count})
+        return {"aborted": False, "deleted": deleted}
+    
+    async def _plan_sync(self, updated_since: Optional[datetime] = None,
+                         session: Optional[Session] = None) -> Dict[str, Any]:
+        """
+        获取同步负载并计算应用后将产生的变更，不做任何写入
+        
+        Args:
+            updated_since: 可选的增量同步时间
+            session: 数据库会话
+            
+        Returns:
+            包含totals（create/update/unchanged/delete）和按实体名称汇总的plan的字典
+        """
+        if session is not None and session is not self.db_session:
+            self._init_repositories(session)
+        
+        start_time = datetime.now(timezone.utc)
+        try:
+            sync_data = await self.model_garden_client.sync_all(updated_since)
+            # 只有全量负载才能判断哪些数据已被删除
+            plan = await run_in_db_executor(self._plan_entities, sync_data, updated_since is None)
+        except Exception as e:
+            logger.error("同步变更计划失败", error=str(e), exc_info=True)
+            return {
+                "success": False,
+                "dry_run": True,
+                "error": str(e),
+                "start_time": start_time.isoformat(),
+                "end_time": datetime.now(timezone.utc).isoformat()
+            }
+        
+        totals = {
+            key: sum(entity.get(key, 0) for entity in plan.values())
+            for key in ("create", "update", "unchanged", "delete")
+        }
+        end_time = datetime.now(timezone.utc)
+        duration = (end_time - start_time).total_seconds()
+        logger.info("同步变更计划完成", duration_seconds=duration, **totals)
+        return {
+            "success": True,
+            "dry_run": True,
+            "start_time": start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+            "duration_seconds": duration,
+            "totals": totals,
+            "plan": plan
+        }
+    
+    def _plan_entities(self, sync_data: Dict[str, Any], include_deletes: bool) -> Dict[str, Dict[str, Any]]:
+        """
+        按实体计算变更计划（在数据库线程池中调用）
+        
+        每个实体按SYNC_BATCH_SIZE分块用一次键查询取出现有行并在内存中比较，
+        同名实体（如限制及其使用量）的结果合并。完成后回滚会话，不留下任何读事务
+        
+        Args:
+            sync_data: Model Garden返回的同步数据
+            include_deletes: 是否统计负载中已不存在、对账时会被删除的本地数据
+            
+        Returns:
+            按实体名称汇总的变更计划
+        """
+        sample_size = self.settings.SYNC_DRY_RUN_SAMPLE_SIZE
+        batch_size = max(self.settings.SYNC_BATCH_SIZE, 1)
+        plan: Dict[str, Dict[str, Any]] = {}
+        try:
+            for entity in SYNC_ENTITIES:
+                repository = entity.repository(self.db_session)
+                rows = entity.payload_rows(sync_data)
+                entry = plan.setdefault(entity.name, {
+                    "create": 0, "update": 0, "unchanged": 0, "delete": 0,
+                    "changed_columns": {},
+                    "samples": {"create": [], "update": [], "delete": []}
+                })
+                for offset in range(0, len(rows), batch_size):
+                    chunk_plan = repository.plan_upsert(
+                        rows[offset:offset + batch_size], entity.conflict_columns, sample_size
+                    )
+                    for key in ("create", "update", "unchanged"):
+                        entry[key] += chunk_plan[key]
+                    for column, count in chunk_plan["changed_columns"].items():
+                        entry["changed_columns"][column] = entry["changed_columns"].get(column, 0) + count
+                    for key in ("create", "update"):
+                        samples = entry["samples"][key]
+                        samples.extend(chunk_plan["samples"][key][:sample_size - len(samples)])
                 
-                if existing:
-                    # 更新现有用例
-                    updated_use_case = self.use_case_repo.update(
-                        str(existing.id),
-                        **use_case_data
+                if include_deletes:
+                    delete_plan = repository.plan_deletes(
+                        [tuple(row.get(column) for column in entity.conflict_columns) for row in rows],
+                        entity.conflict_columns,
+                        soft_delete_column=entity.soft_delete_column,
+                        sample_size=sample_size
                     )
-                    if updated_use_case:
-                        updated += 1
-                        logger.debug("更新用例", use_case_id=existing.id)
-                else:
-                    # 创建新用例
-                    new_use_case = self.use_case_repo.create(**use_case_data)
-                    if new_use_case:
-                        created += 1
-                        logger.debug("创建用例", use_case_id=new_use_case.id)
-                        
-            except Exception as e:
-                errors += 1
-                logger.error("同步用例失败", use_case_data=use_case_data, error=str(e))
+                    entry["delete"] += delete_plan["delete"]
+                    samples = entry["samples"]["delete"]
+                    samples.extend(delete_plan["samples"][:sample_size - len(samples)])
+        finally:
+            self.db_session.rollback()
+        return plan
+    
+    async def _apply_sync_data(self, sync_data: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+        """根据SYNC_WRITE_MODE选择写入方式"""
+        self._phase = "writing"
+        self._record_watermark_candidates(sync_data)
+        self._record_seen_keys(sync_data)
+        if self.settings.SYNC_WRITE_MODE in ("bulk", "copy"):
+            if self.settings.SYNC_PARALLEL:
+                # SQLite同一时间只允许一个写事务，多个写会话并发只会互相等待锁超时
+                if self.db_session.get_bind().dialect.name != "sqlite":
+                    return await self._parallel_sync_all(sync_data)
+                logger.warning("SQLite不支持并发写入，SYNC_PARALLEL按顺序同步")
+            return await self._bulk_sync_all(sync_data)
+        # 逐行同步的各步骤直接调用同步Session，整体放到数据库线程池中执行
+        return await run_coroutine_in_db_executor(self._row_sync_all, sync_data)
+    
+    async def _row_sync_all(self, sync_data: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+        """逐行同步所有实体"""
+        results = {}
         
-        return {"created": created, "updated": updated, "errors": errors}
+        # 1. 同步项目
+        results["projects"] = await self._sync_projects(sync_data.get("projects", []))
+        
+        # 2. 同步用例
+        results["use_cases"] = await self._sync_use_cases(sync_data.get("use_cases", []))
+        
+        # 3. 同步预算
+        results["budgets"] = await self._sync_budgets(sync_data.get("budgets", []))
+        
+        # 4. 同步模型
+        results["models"] = await self._sync_models(sync_data.get("models", []))
+        
+        # 5. 同步部署
+        results["deployments"] = await self._sync_deployments(sync_data.get("model_deployments", []))
+        
+        # 6. 同步定价
+        results["pricing"] = await self._sync_pricing(sync_data.get("pricing", []))
+        
+        # 7. 同步订阅
+        results["subscriptions"] = await self._sync_subscriptions(sync_data.get("use_case_llm_models", []))
+        
+        # 8. 同步限制
+        results["limits"] = await self._sync_limits(sync_data.get("limits", []))
+
+        return results
     
-    async def _sync_budgets(self, budgets_data: List[Dict[str, Any]]) -> Dict[str, int]:
-        """同步预算数据"""
+    async def _bulk_sync_all(self, sync_data: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+        """
+        使用批量upsert同步所有实体
+        
+        Args:
+            sync_data: Model Garden返回的同步数据
+            
+        Returns:
+            按实体名称汇总的创建/更新/未变化/错误数量
+        """
+        results = {
+            name: {"created": 0, "updated": 0, "unchanged": 0, "errors": 0}
+            for name in entity_names()
+        }
+        
+        for entity in SYNC_ENTITIES:
+            rows = entity.payload_rows(sync_data)
+            counts = await self._bulk_sync_entity(entity, rows)
+            for key, value in counts.items():
+                results[entity.name][key] += value
+        
+        return results
+    
+    async def _parallel_sync_all(self, sync_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        按外键依赖图并行同步所有实体
+        
+        每个实体在其依赖实体提交后开始，使用独立的会话和连接在数据库线程池中写入并提交，
+        互不依赖的分支（如projects→use_cases与models→deployments/pricing）同时执行。
+        任一实体失败时通知其余实体放弃提交，并等待线程池中已开始的写入结束后才返回。
+        结果中每个实体附带wait_seconds（等待依赖的时间）和seconds（写入耗时）
+        
+        Args:
+            sync_data: Model Garden返回的同步数据
+            
+        Returns:
+            按实体名称汇总的同步结果
+        """
+        dependencies = entity_dependencies()
+        session_factory = sessionmaker(bind=self.db_session.get_bind(), autoflush=False)
+        workers = asyncio.Semaphore(max(self.settings.SYNC_PARALLEL_WORKERS, 1))
+        started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+        writes: List[asyncio.Future] = []
+        self._parallel_abort.clear()
+        
+        async def run(name: str) -> Dict[str, Any]:
+            if dependencies[name]:
+                await asyncio.gather(*(tasks[dependency] for dependency in dependencies[name]))
+            async with workers:
+                ready = time.perf_counter()
+                # 取消任务不会停止线程池中的写入，保留引用以便失败时等待其结束
+                write = asyncio.ensure_future(
+                    run_in_db_executor(self._sync_entity_group, session_factory, name, sync_data)
+                )
+                writes.append(write)
+                counts = await asyncio.shield(write)
+            finished = time.perf_counter()
+            logger.debug(
+                "并行同步实体完成",
+                entity=name,
+                depends_on=dependencies[name],
+                wait_seconds=round(ready - started, 3),
+                seconds=round(finished - ready, 3)
+            )
+            return {**counts, "wait_seconds": ready - started, "seconds": finished - ready}
+        
+        for name in dependencies:
+            tasks[name] = asyncio.create_task(run(name))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            self._parallel_abort.set()
+            raise
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), *writes, return_exceptions=True)
+        
+        return {name: task.result() for name, task in tasks.items()}
+    
+    def _sync_entity_group(self, session_factory: sessionmaker, name: str,
+                           sync_data: Dict[str, Any]) -> Dict[str, int]:
+        """在独立会话中写入同名的所有实体（如限制及其使用量）并提交"""
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "errors": 0}
+        session = session_factory()
+        try:
+            for entity in SYNC_ENTITIES:
+                if entity.name != name:
+                    continue
+                rows = entity.payload_rows(sync_data)
+                for key, value in self._write_entity(session, entity, rows).items():
+                    counts[key] += value
+            self._check_parallel_abort()
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        return counts
+    
+    async def _bulk_sync_entity(self, entity: SyncEntity, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """在数据库线程池中批量写入单个实体"""
+        return await run_in_db_executor(self._write_entity, self.db_session, entity, rows)
+    
+    def _write_entity(self, session: Session, entity: SyncEntity, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        在指定会话中批量写入单个实体
+        
+        bulk模式按SYNC_BATCH_SIZE分块upsert；copy模式把整个实体COPY进暂存表
+        后用一条MERGE合并。每个分块在独立的SAVEPOINT中执行，失败时回滚该分块并逐行重试，
+        只有出错的行计入错误数。每个分块完成后按SYNC_COMMIT_CHUNKS提交
+        
+        Args:
+            session: 数据库会话
+            entity: 同步实体描述
+            rows: 该实体的负载数据
+            
+        Returns:
+            创建/更新/未变化/错误数量
+        """
         created = 0
         updated = 0
+        unchanged = 0
         errors = 0
+        repository = entity.repository(session)
+        if self.settings.SYNC_WRITE_MODE == "copy":
+            write = repository.copy_merge
+            batch_size = max(len(rows), 1)
+        else:
+            write = repository.bulk_upsert
+            batch_size = max(self.settings.SYNC_BATCH_SIZE, 1)
         
-        for budget_data in budgets_data:
+        reported = (0, 0, 0, 0)
+        for offset in range(0, len(rows), batch_size):
+            chunk = rows[offset:offset + batch_size]
+            # MERGE不返回逐行结果，copy模式的分块按已应用输出
+            changes: Optional[List[Tuple[str, Dict[str, Any]]]] = [] if self._row_sink is not None else None
+            tracked = {"changes": changes} if changes is not None else {}
             try:
-                # 分离预算和使用情况数据
-                if budget_data.get("type") == "budget":
-                    existing = self.budget_repo.get_by_use_case_id(budget_data.get("use_case_id"))
-                    
-                    if existing:
-                        updated_budget = self.budget_repo.update(str(existing.id), **budget_data)
-                        if updated_budget:
-                            updated += 1
-                    else:
-                        new_budget = self.budget_repo.create(**budget_data)
-                        if new_budget:
-                            created += 1
-                
-                elif budget_data.get("type") == "usage":
-                    existing_usage = self.budget_repo.get_usage_by_use_case_and_period(
-                        budget_data.get("use_case_id"),
-                        budget_data.get("usage_period"),
-                        budget_data.get("scope")
-                    )
-                    
-                    if existing_usage:
-                        updated_usage = self.budget_repo.update_usage(str(existing_usage.id), **budget_data)
-                        if updated_usage:
-                            updated += 1
+                with session.begin_nested():
+                    if self.settings.SYNC_WRITE_MODE == "copy":
+                        chunk_created, chunk_updated, chunk_unchanged = write(chunk, entity.conflict_columns)
+                        if changes is not None:
+                            changes.extend(("applied", row) for row in chunk)
                     else:
-                        new_usage = self.budget_repo.create_usage(**budget_data)
-                        if new_usage:
-                            created += 1
-                            
+                        chunk_created, chunk_updated, chunk_unchanged = write(
+                            chunk, entity.conflict_columns, **tracked
+                        )
+                created += chunk_created
+                updated += chunk_updated
+                unchanged += chunk_unchanged
             except Exception as e:
-                errors += 1
-                logger.error("同步预算失败", budget_data=budget_data, error=str(e))
+                logger.warning(
+                    "批量同步分块失败，逐行重试",
+                    entity=entity.name,
+                    table=entity.model.__tablename__,
+                    offset=offset,
+                    rows=len(chunk),
+                    error=str(e)
+                )
+                if changes is not None:
+                    changes.clear()
+                for row in chunk:
+                    try:
+                        row_changes = {"changes": []} if changes is not None else {}
+                        with session.begin_nested():
+                            row_created, row_updated, row_unchanged = repository.bulk_upsert(
+                                [row], entity.conflict_columns, **row_changes
+                            )
+                        if changes is not None:
+                            changes.extend(row_changes["changes"])
+                        created += row_created
+                        updated += row_updated
+                        unchanged += row_unchanged
+                    except Exception as e:
+                        errors += 1
+                        logger.error(
+                            "批量同步失败",
+                            entity=entity.name,
+                            table=entity.model.__tablename__,
+                            row=row,
+                            error=str(e)
+                        )
+            self._commit_chunk(session)
+            self._emit_rows(entity.name, changes)
+            self._report_progress(
+                entity.name, created=created - reported[0], updated=updated - reported[1],
+                unchanged=unchanged - reported[2], errors=errors - reported[3]
+            )
+            reported = (created, updated, unchanged, errors)
         
-        return {"created": created, "updated": updated, "errors": errors}
+        logger.debug(
+            "批量同步实体完成",
+            entity=entity.name,
+            table=entity.model.__tablename__,
+            created=created,
+            updated=updated,
+            unchanged=unchanged,
+            errors=errors
+        )
+        return {"created": created, "updated": updated, "unchanged": unchanged, "errors": errors}
     
-    async def _sync_models(self, models_data: List[Dict[str, Any]]) -> Dict[str, int]:
-        """同步模型数据"""
-        created = 0
-        updated = 0
-        errors = 0
+    def _commit_chunk(self, session: Session):
+        """
+        提交当前分块并清空identity map
+        
+        避免整次同步成为一个长事务长时间持有锁，会话内存也不随同步数据量增长。
+        提交前确认栅栏令牌仍是当前锁的持有者，失去租约的同步不会提交
+        """
+        if self._lease_lost:
+            raise RuntimeError("同步租约已丢失，放弃提交")
+        self._check_parallel_abort()
+        if not self.settings.SYNC_COMMIT_CHUNKS:
+            return
+        if not self._holds_fence():
+            self._lease_lost = True
+            raise RuntimeError("同步锁已被其他同步持有，放弃提交")
+        session.commit()
+        session.expunge_all()
+    
+    def _check_parallel_abort(self):
+        """并行同步中其他实体已失败时放弃提交"""
+        if self._parallel_abort.is_set():
+            raise RuntimeError("并行同步中其他实体失败，放弃提交")
+    
+    def _holds_fence(self) -> bool:
+        """
+        在数据库线程中确认同步锁仍由本次同步的栅栏令牌持有
+        
+        Redis不可用或确认超时时视为已失去租约；未加锁执行或在主事件循环线程中调用时只依赖心跳结果
+        
+        Returns:
+            是否仍持有同步锁
+        """
+        fence = self._fence
+        if fence is None:
+            return True
+        token, loop = fence
+        try:
+            if asyncio.get_running_loop() is loop:
+                return True
+        except RuntimeError:
+            pass
+        future = asyncio.run_coroutine_threadsafe(self.redis_service.get_sync_lock_token(), loop)
+        try:
+            return future.result(timeout=self.settings.SYNC_LOCK_TTL_SECONDS) == token
+        except Exception as e:
+            future.cancel()
+            logger.error("确认同步锁失败", token=token, error=str(e))
+            return False
+    
+    def _sync_rows_in_chunks(self, name: str, rows: List[Dict[str, Any]],
+                             sync_row: Callable[[Dict[str, Any]], Optional[str]],
+                             error_message: str, data_key: str) -> Dict[str, int]:
+        """
+        按SYNC_BATCH_SIZE分块逐行同步
         
-        for model_data in models_data:
+        每个分块在独立的SAVEPOINT中执行，失败时回滚该分块并逐行重试，只有出错的行计入错误数
+        
+        Args:
+            name: 实体名称
+            rows: 负载数据
+            sync_row: 同步单行的函数，返回"created"、"updated"、"unchanged"或None
+            error_message: 单行失败时的日志消息
+            data_key: 日志中负载数据的字段名
+            
+        Returns:
+            创建/更新/未变化/错误数量
+        """
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "errors": 0}
+        batch_size = max(self.settings.SYNC_BATCH_SIZE, 1)
+        
+        for offset in range(0, len(rows), batch_size):
+            chunk = rows[offset:offset + batch_size]
             try:
-                existing = self.model_repo.get_by_name(model_data.get("model_name"))
-                
-                if existing:
-                    updated_model = self.model_repo.update(str(existing.id), **model_data)
-                    if updated_model:
-                        updated += 1
-                else:
-                    new_model = self.model_repo.create(**model_data)
-                    if new_model:
-                        created += 1
-                        
+                with self.db_session.begin_nested():
+                    outcomes = [sync_row(row) for row in chunk]
             except Exception as e:
-                errors += 1
-                logger.error("同步模型失败", model_data=model_data, error=str(e))
+                if len(chunk) > 1:
+                    logger.warning("同步分块失败，逐行重试", offset=offset, rows=len(chunk), error=str(e))
+                outcomes = []
+                for row in chunk:
+                    try:
+                        with self.db_session.begin_nested():
+                            outcomes.append(sync_row(row))
+                    except Exception as e:
+                        outcomes.append("errors")
+                        logger.error(error_message, **{data_key: row}, error=str(e))
+            
+            chunk_counts = {"created": 0, "updated": 0, "unchanged": 0, "errors": 0}
+            for outcome in outcomes:
+                if outcome:
+                    chunk_counts[outcome] += 1
+            self._commit_chunk(self.db_session)
+            self._emit_rows(name, [
+                (outcome, row) for outcome, row in zip(outcomes, chunk) if outcome in ("created", "updated")
+            ])
+            self._report_progress(name, **chunk_counts)
+            for key, value in chunk_counts.items():
+                counts[key] += value
         
-        return {"created": created, "updated": updated, "errors": errors}
+        return counts
     
-    async def _sync_deployments(self, deployments_data: List[Dict[str, Any]]) -> Dict[str, int]:
-        """同步部署数据"""
-        created = 0
-        updated = 0
-        errors = 0
+    def _update_changed(self, model: type, existing: Any, data: Dict[str, Any],
+                        update: Callable[..., Any]) -> Optional[str]:
+        """
+        只更新负载中与现有记录不同的列
         
-        for deployment_data in deployments_data:
-            try:
-                existing = self.deployment_repo.get_by_model_and_name(
-                    deployment_data.get("model_id"),
-                    deployment_data.get("deployment_name")
+        比较口径与批量模式的BaseRepository._diff_rows一致，内容相同的行不写入，updated_time也不变
+        
+        Args:
+            model: 目标模型类
+            existing: 已存在的记录
+            data: 负载数据
+            update: 仓储的更新方法，接收记录ID和要更新的列
+            
+        Returns:
+            "updated"、"unchanged"，更新失败时返回None
+        """
+        comparer = self._comparers.get(model)
+        if comparer is None:
+            comparer = self._comparers[model] = BaseRepository(model, self.db_session)
+        changes = comparer.changed_values(existing, data)
+        if not changes:
+            return "unchanged"
+        return "updated" if update(str(existing.id), **changes) else None
+    
+    async def _sync_projects(self, projects_data: List[Dict[str, Any]]) -> Dict[str, int]:
+        """同步项目数据"""
+        def sync_project(project_data: Dict[str, Any]) -> Optional[str]:
+            existing = self.project_repo.get_by_project_code(project_data.get("project_code"))
+            
+            if existing:
+                # 更新现有项目
+                # 负载中出现的项目视为有效，恢复对账时被软删除的项目
+                outcome = self._update_changed(Project, existing, {
+                    "project_name": project_data.get("project_name"),
+                    "project_code": project_data.get("project_code"),
+                    "is_active": project_data.get("is_active", True)
+                }, self.project_repo.update)
+                if outcome == "updated":
+                    logger.debug("更新项目", project_id=existing.id, project_code=project_data.get("project_code"))
+                return outcome
+            else:
+                # 创建新项目
+                new_project = self.project_repo.create(
+                    project_name=project_data.get("project_name"),
+                    project_code=project_data.get("project_code")
                 )
+                if new_project:
+                    logger.debug("创建项目", project_id=new_project.id, project_code=project_data.get("project_code"))
+                    return "created"
+            return None
+        
+        return self._sync_rows_in_chunks("projects", projects_data, sync_project, "同步项目失败", "project_data")
+    
+    async def _sync_use_cases(self, use_cases_data: List[Dict[str, Any]]) -> Dict[str, int]:
+        """同步用例数据"""
+        def sync_use_case(use_case_data: Dict[str, Any]) -> Optional[str]:
+            existing = self.use_case_repo.get_by_project_and_name(
+                use_case_data.get("project_id"),
+                use_case_data.get("use_case_name")
+            )
+            
+            if existing:
+                # 更新现有用例
+                outcome = self._update_changed(UseCase, existing, use_case_data, self.use_case_repo.update)
+                if outcome == "updated":
+                    logger.debug("更新用例", use_case_id=existing.id)
+                return outcome
+            else:
+                # 创建新用例
+                new_use_case = self.use_case_repo.create(**use_case_data)
+                if new_use_case:
+                    logger.debug("创建用例", use_case_id=new_use_case.id)
+                    return "created"
+            return None
+        
+        return self._sync_rows_in_chunks("use_cases", use_cases_data, sync_use_case, "同步用例失败", "use_case_data")
+    
+    async def _sync_budgets(self, budgets_data: List[Dict[str, Any]]) -> Dict[str, int]:
+        """同步预算数据"""
+        def sync_budget(budget_data: Dict[str, Any]) -> Optional[str]:
+            # 分离预算和使用情况数据
+            if budget_data.get("type") == "budget":
+                existing = self.budget_repo.get_by_use_case_id(budget_data.get("use_case_id"))
                 
                 if existing:
-                    updated_deployment = self.deployment_repo.update(str(existing.id), **deployment_data)
-                    if updated_deployment:
-                        updated += 1
-                else:
-                    new_deployment = self.deployment_repo.create(**deployment_data)
-                    if new_deployment:
-                        created += 1
-                        
-            except Exception as e:
-                errors += 1
-                logger.error("同步部署失败", deployment_data=deployment_data, error=str(e))
+                    return self._update_changed(UseCaseBudget, existing, budget_data, self.budget_repo.update)
+                elif self.budget_repo.create(**budget_data):
+                    return "created"
+            
+            elif budget_data.get("type") == "usage":
+                existing_usage = self.budget_repo.get_usage_by_use_case_and_period(
+                    budget_data.get("use_case_id"),
+                    budget_data.get("usage_period"),
+                    budget_data.get("scope")
+                )
+                
+                if existing_usage:
+                    return self._update_changed(
+                        UseCaseBudgetUsage, existing_usage, budget_data, self.budget_repo.update_usage
+                    )
+                elif self.budget_repo.create_usage(**budget_data):
+                    return "created"
+            return None
         
-        return {"created": created, "updated": updated, "errors": errors}
+        return self._sync_rows_in_chunks("budgets", budgets_data, sync_budget, "同步预算失败", "budget_data")
     
-    async def _sync_pricing(self, pricing_data: List[Dict[str, Any]]) -> Dict[str, int]:
-        """同步定价数据"""
-        created = 0
-        updated = 0
-        errors = 0
+    async def _sync_models(self, models_data: List[Dict[str, Any]]) -> Dict[str, int]:
+        """同步模型数据"""
+        def sync_model(model_data: Dict[str, Any]) -> Optional[str]:
+            existing = self.model_repo.get_by_name(model_data.get("model_name"))
+            
+            if existing:
+                return self._update_changed(Model, existing, model_data, self.model_repo.update)
+            elif self.model_repo.create(**model_data):
+                return "created"
+            return None
         
-        for price_data in pricing_data:
-            try:
-                existing = self.pricing_repo.get_by_model_and_type(
-                    price_data.get("model_id"),
-                    price_data.get("pricing_type")
+        return self._sync_rows_in_chunks("models", models_data, sync_model, "同步模型失败", "model_data")
+    
+    async def _sync_deployments(self, deployments_data: List[Dict[str, Any]]) -> Dict[str, int]:
+        """同步部署数据"""
+        def sync_deployment(deployment_data: Dict[str, Any]) -> Optional[str]:
+            existing = self.deployment_repo.get_by_model_and_name(
+                deployment_data.get("model_id"),
+                deployment_data.get("deployment_name")
+            )
+            
+            if existing:
+                return self._update_changed(
+                    ModelDeployment, existing, deployment_data, self.deployment_repo.update
                 )
-                
-                if existing:
-                    updated_pricing = self.pricing_repo.update(str(existing.id), **price_data)
-                    if updated_pricing:
-                        updated += 1
-                else:
-                    new_pricing = self.pricing_repo.create(**price_data)
-                    if new_pricing:
-                        created += 1
-                        
-            except Exception as e:
-                errors += 1
-                logger.error("同步定价失败", price_data=price_data, error=str(e))
+            elif self.deployment_repo.create(**deployment_data):
+                return "created"
+            return None
         
-        return {"created": created, "updated": updated, "errors": errors}
+        return self._sync_rows_in_chunks(
+            "deployments", deployments_data, sync_deployment, "同步部署失败", "deployment_data"
+        )
+    
+    async def _sync_pricing(self, pricing_data: List[Dict[str, Any]]) -> Dict[str, int]:
+        """同步定价数据"""
+        def sync_price(price_data: Dict[str, Any]) -> Optional[str]:
+            existing = self.pricing_repo.get_by_model_and_type(
+                price_data.get("model_id"),
+                price_data.get("pricing_type")
+            )
+            
+            if existing:
+                return self._update_changed(ModelPricing, existing, price_data, self.pricing_repo.update)
+            elif self.pricing_repo.create(**price_data):
+                return "created"
+            return None
+        
+        return self._sync_rows_in_chunks("pricing", pricing_data, sync_price, "同步定价失败", "price_data")
     
     async def _sync_subscriptions(self, subscriptions_data: List[Dict[str, Any]]) -> Dict[str, int]:
         """同步订阅数据"""
-        created = 0
-        updated = 0
-        errors = 0
-        
-        for subscription_data in subscriptions_data:
-            try:
-                existing = self.subscription_repo.get_by_use_case_and_model(
-                    subscription_data.get("use_case_id"),
-                    subscription_data.get("model_id")
+        def sync_subscription(subscription_data: Dict[str, Any]) -> Optional[str]:
+            existing = self.subscription_repo.get_by_use_case_and_model(
+                subscription_data.get("use_case_id"),
+                subscription_data.get("model_id")
+            )
+            
+            if existing:
+                return self._update_changed(
+                    Subscription, existing, subscription_data, self.subscription_repo.update
                 )
-                
-                if existing:
-                    updated_subscription = self.subscription_repo.update(str(existing.id), **subscription_data)
-                    if updated_subscription:
-                        updated += 1
-                else:
-                    new_subscription = self.subscription_repo.create(**subscription_data)
-                    if new_subscription:
-                        created += 1
-                        
-            except Exception as e:
-                errors += 1
-                logger.error("同步订阅失败", subscription_data=subscription_data, error=str(e))
+            elif self.subscription_repo.create(**subscription_data):
+                return "created"
+            return None
         
-        return {"created": created, "updated": updated, "errors": errors}
+        return self._sync_rows_in_chunks(
+            "subscriptions", subscriptions_data, sync_subscription, "同步订阅失败", "subscription_data"
+        )
     
     async def _sync_limits(self, limits_data: List[Dict[str, Any]]) -> Dict[str, int]:
         """同步限制数据"""
-        created = 0
-        updated = 0
-        errors = 0
-        
-        for limit_data in limits_data:
-            try:
-                # 分离限制和使用情况数据
-                if limit_data.get("type") == "limit":
-                    existing = self.limit_repo.get_by_use_case_and_model(
-                        limit_data.get("use_case_id"),
-                        limit_data.get("model_id")
-                    )
-                    
-                    if existing:
-                        updated_limit = self.limit_repo.update(str(existing.id), **limit_data)
-                        if updated_limit:
-                            updated += 1
-                    else:
-                        new_limit = self.limit_repo.create(**limit_data)
-                        if new_limit:
-                            created += 1
+        def sync_limit(limit_data: Dict[str, Any]) -> Optional[str]:
+            # 分离限制和使用情况数据
+            if limit_data.get("type") == "limit":
+                existing = self.limit_repo.get_by_use_case_and_model(
+                    limit_data.get("use_case_id"),
+                    limit_data.get("model_id")
+                )
                 
-                elif limit_data.get("type") == "usage":
-                    existing_usage = self.limit_repo.get_usage_by_limit_and_period(
-                        limit_data.get("limit_id"),
-                        limit_data.get("usage_period"),
-                        limit_data.get("scope")
+                if existing:
+                    return self._update_changed(ModelLimit, existing, limit_data, self.limit_repo.update)
+                elif self.limit_repo.create(**limit_data):
+                    return "created"
+            
+            elif limit_data.get("type") == "usage":
+                existing_usage = self.limit_repo.get_usage_by_limit_and_period(
+                    limit_data.get("limit_id"),
+                    limit_data.get("usage_period"),
+                    limit_data.get("scope")
+                )
+                
+                if existing_usage:
+                    return self._update_changed(
+                        ModelLimitUsage, existing_usage, limit_data, self.limit_repo.update_usage
                     )
-                    
-                    if existing_usage:
-                        updated_usage = self.limit_repo.update_usage(str(existing_usage.id), **limit_data)
-                        if updated_usage:
-                            updated += 1
-                    else:
-                        new_usage = self.limit_repo.create_usage(**limit_data)
-                        if new_usage:
-                            created += 1
-                            
-            except Exception as e:
-                errors += 1
-                logger.error("同步限制失败", limit_data=limit_data, error=str(e))
+                elif self.limit_repo.create_usage(**limit_data):
+                    return "created"
+            return None
         
-        return {"created": created, "updated": updated, "errors": errors} 
\ No newline at end of file
+        return self._sync_rows_in_chunks("limits", limits_data, sync_limit, "同步限制失败", "limit_data") 
\ No newline at end of file
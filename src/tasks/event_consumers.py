@@ -0,0 +1,317 @@
+"""
+事件消费者
+EVENT_ASYNC_INGEST开启时，事件接口按entity_id把事件写入EVENT_PARTITIONS个分区事件流，
+由各实例的一组消费者按批读取并通过EventService应用到数据库。
+每个分区同一时刻只由持有分区租约的一个消费者处理，同一实体的事件因此按写入顺序应用；
+不同分区由不同消费者（可在不同实例上）并行处理。
+事件在应用（或确定无法应用）之后才批量确认。持有者崩溃后租约到期，接管的消费者先用XAUTOCLAIM
+认领该分区遗留的未确认事件再读取新事件，重试不会越过更早的事件
+"""
+
+import asyncio
+import os
+import socket
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from src.config.database import SessionLocal, get_async_session_factory
+from src.config.settings import get_settings
+from src.schemas.event_request import EventRequest
+from src.services.event_service import EventService, partition_stream
+from src.services.idempotency_store import EventIdempotencyStore
+from src.services.redis_service import RedisService
+from src.utils.db_executor import run_in_db_executor
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+# 分区租约键，值为持有租约的消费者名称
+PARTITION_LEASE_KEY = "events:lease:{stream}"
+
+# Redis或数据库不可用时重试前的等待时间（秒）
+_IDLE_BACKOFF_SECONDS = 1.0
+
+
+class EventConsumerPool:
+    """事件消费者池"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.redis_service = RedisService()
+        self._consumers: List[asyncio.Task] = []
+        self._name_prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self._stopping = asyncio.Event()
+        # 本实例当前持有租约的分区事件流
+        self._leased: Set[str] = set()
+        self._counts = {"applied": 0, "failed": 0, "retrying": 0, "invalid": 0, "coalesced": 0, "batches": 0}
+        self._started_at: Optional[float] = None
+
+    def partition_streams(self) -> List[str]:
+        """所有分区事件流名称"""
+        return [
+            partition_stream(self.settings.EVENT_INGEST_STREAM, partition)
+            for partition in range(max(self.settings.EVENT_PARTITIONS, 1))
+        ]
+
+    async def start(self):
+        """EVENT_ASYNC_INGEST开启时启动消费者"""
+        if not self.settings.EVENT_ASYNC_INGEST or self._consumers:
+            return
+        # 每次启动新建，避免绑定到上一次生命周期的事件循环
+        self._stopping = asyncio.Event()
+        self._started_at = time.monotonic()
+        consumers = max(self.settings.EVENT_CONSUMERS, 1)
+        for index in range(consumers):
+            name = f"{self._name_prefix}-{index}"
+            self._consumers.append(asyncio.create_task(self._consume(name, index, consumers)))
+        logger.info(
+            "事件消费者已启动",
+            stream=self.settings.EVENT_INGEST_STREAM,
+            partitions=self.settings.EVENT_PARTITIONS,
+            group=self.settings.EVENT_CONSUMER_GROUP,
+            consumers=len(self._consumers)
+        )
+
+    async def stop(self):
+        """
+        停止消费者
+
+        等待进行中的批次应用并确认后释放分区租约；超过EVENT_CONSUMER_SHUTDOWN_SECONDS仍未结束的
+        消费者被取消，其未确认的事件在租约到期后由其他消费者认领
+        """
+        if not self._consumers:
+            await self.redis_service.close()
+            return
+        self._stopping.set()
+        _, pending = await asyncio.wait(self._consumers, timeout=self.settings.EVENT_CONSUMER_SHUTDOWN_SECONDS)
+        for consumer in pending:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        if pending:
+            logger.warning("事件消费者未在限定时间内停止，已取消", consumers=len(pending))
+        self._consumers = []
+        await self.redis_service.close()
+
+    async def _consume(self, name: str, index: int, consumers: int):
+        """依次尝试每个分区的租约，处理获得租约的分区；所有分区都没有事件时等待轮询间隔"""
+        streams = self.partition_streams()
+        # 同一实例的消费者从不同分区开始轮询，减少租约争用
+        offset = index * len(streams) // consumers
+        streams = streams[offset:] + streams[:offset]
+        while not self._stopping.is_set():
+            if not await self.redis_service.health_check():
+                await self._sleep(_IDLE_BACKOFF_SECONDS)
+                continue
+            processed = 0
+            for stream in streams:
+                if self._stopping.is_set():
+                    break
+                processed += await self._drain_partition(stream, name)
+            if not processed:
+                await self._sleep(self.settings.EVENT_POLL_INTERVAL_MS / 1000)
+
+    async def _drain_partition(self, stream: str, name: str) -> int:
+        """
+        持有分区租约期间按序应用该分区的事件，直到没有事件、需要重试或租约丢失
+
+        Args:
+            stream: 分区事件流
+            name: 消费者名称
+
+        Returns:
+            处理的条目数，未获得租约时为0
+        """
+        group = self.settings.EVENT_CONSUMER_GROUP
+        batch_size = max(self.settings.EVENT_CONSUMER_BATCH_SIZE, 1)
+        lease_key = PARTITION_LEASE_KEY.format(stream=stream)
+        lease_ms = self.settings.EVENT_PARTITION_LEASE_MS
+        if not await self.redis_service.acquire_lease(lease_key, name, lease_ms):
+            return 0
+        self._leased.add(stream)
+        processed = 0
+        lost = asyncio.Event()
+        # 批次应用（含合并窗口）可能超过租约时长，持有期间在后台续租，避免其他消费者中途接管分区
+        heartbeat = asyncio.create_task(self._renew_lease(lease_key, name, lease_ms, lost))
+        try:
+            while not self._stopping.is_set():
+                # 持有租约时该分区没有其他处理者，先认领所有遗留的未确认事件（包括本消费者待重试的事件）
+                entries = await self.redis_service.claim_events(stream, group, name, 0, batch_size)
+                if not entries:
+                    entries = await self.redis_service.read_events(stream, group, name, batch_size, block_ms=None)
+                if not entries:
+                    break
+                if self.settings.EVENT_COALESCE:
+                    entries = await self._collect_window(stream, name, entries, batch_size)
+                counts = await self.apply_entries(stream, entries)
+                processed += len(entries)
+                if counts["retrying"]:
+                    # 数据库不可用，释放租约退避，未确认的事件在下次获得租约时按原顺序重试
+                    await self._sleep(_IDLE_BACKOFF_SECONDS)
+                    break
+                if lost.is_set() or not await self.redis_service.renew_lease(lease_key, name, lease_ms):
+                    logger.warning("分区租约已丢失", stream=stream, consumer=name)
+                    break
+        except Exception as e:
+            # 未确认的事件在下次获得租约时重新认领
+            logger.error("分区事件应用出错", stream=stream, consumer=name, error=str(e), exc_info=True)
+            await self._sleep(_IDLE_BACKOFF_SECONDS)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            self._leased.discard(stream)
+            await self.redis_service.release_lease(lease_key, name)
+        return processed
+
+    async def _renew_lease(self, lease_key: str, name: str, lease_ms: int, lost: asyncio.Event):
+        """每三分之一租约时长续租一次，续租失败时设置lost并退出"""
+        while True:
+            await asyncio.sleep(lease_ms / 3000)
+            if not await self.redis_service.renew_lease(lease_key, name, lease_ms):
+                lost.set()
+                return
+
+    async def _collect_window(self, stream: str, name: str, entries: List[Dict[Any, Any]],
+                              batch_size: int) -> List[Dict[Any, Any]]:
+        """
+        在EVENT_COALESCE_WINDOW_MS内继续读取同一分区的新事件，使短时间内的连续事件在同一批中合并
+
+        Args:
+            stream: 分区事件流
+            name: 消费者名称
+            entries: 已读取的条目
+            batch_size: 每批最大条目数
+
+        Returns:
+            窗口内读取到的全部条目，不超过batch_size
+        """
+        deadline = time.monotonic() + self.settings.EVENT_COALESCE_WINDOW_MS / 1000
+        while len(entries) < batch_size and not self._stopping.is_set():
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            more = await self.redis_service.read_events(
+                stream, self.settings.EVENT_CONSUMER_GROUP, name, batch_size - len(entries), block_ms=remaining_ms
+            )
+            if not more:
+                break
+            entries = entries + more
+        return entries
+
+    async def _sleep(self, seconds: float):
+        """等待指定时间，停止时提前返回"""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def apply_entries(self, stream: str, entries: List[Dict[Any, Any]]) -> Dict[str, int]:
+        """
+        在一个事务中按序应用一批Stream条目并用一次XACK确认
+
+        无法解析的条目直接确认丢弃；应用失败但可重试（数据库连接或提交错误、同一实体更早的事件
+        正在处理中）的事件不确认，等待重新认领后按原顺序应用；其余事件（包括单个事件的数据错误）在结果发布后确认，确认后裁剪事件流
+
+        Args:
+            stream: 条目所在的事件流
+            entries: read_events/claim_events返回的条目
+
+        Returns:
+            applied/failed/retrying/invalid数量，以及applied中因合并而未单独写入的coalesced数量
+        """
+        group = self.settings.EVENT_CONSUMER_GROUP
+        events: List[Tuple[Any, EventRequest]] = []
+        acks: List[Any] = []
+        for entry in entries:
+            event = self._decode(entry)
+            if event is None:
+                acks.append(entry["id"])
+            else:
+                events.append((entry["id"], event))
+
+        results = await self._process([event for _, event in events]) if events else []
+        retrying = 0
+        failed = 0
+        coalesced = 0
+        for (entry_id, _), result in zip(events, results):
+            if result.get("retryable"):
+                retrying += 1
+                continue
+            if not result.get("success"):
+                failed += 1
+            elif result.get("status") in ("coalesced", "cancelled"):
+                coalesced += 1
+            acks.append(entry_id)
+        if acks:
+            await self.redis_service.ack_events(stream, group, acks)
+            # 已确认的条目不再需要，及时从事件流中删除，避免事件流无限增长
+            await self.redis_service.trim_acknowledged(stream, group)
+
+        counts = {
+            "applied": len(events) - failed - retrying,
+            "failed": failed,
+            "retrying": retrying,
+            "invalid": len(entries) - len(events),
+            "coalesced": coalesced
+        }
+        for key, value in counts.items():
+            self._counts[key] += value
+        self._counts["batches"] += 1
+        logger.info("事件批次已应用", stream=stream, **counts)
+        return counts
+
+    def _decode(self, entry: Dict[Any, Any]) -> Optional[EventRequest]:
+        """把Stream条目还原为事件请求，无法解析时返回None"""
+        raw = entry.get(b"event", entry.get("event"))
+        try:
+            return EventRequest(**self.redis_service.serializer.loads(raw))
+        except (TypeError, ValueError, ValidationError) as e:
+            logger.error("无法解析的事件条目，已丢弃", entry_id=entry.get("id"), error=str(e))
+            return None
+
+    async def _process(self, events: List[EventRequest]) -> List[Dict[str, Any]]:
+        """使用独立的数据库会话批量应用事件，复用消费者池的Redis连接"""
+        if self.settings.DATABASE_ASYNC:
+            async with get_async_session_factory()() as session:
+                return await self._event_service(session).process_events(events)
+        session = SessionLocal()
+        try:
+            return await self._event_service(session).process_events(events)
+        finally:
+            await run_in_db_executor(session.close)
+
+    def _event_service(self, session: Any) -> EventService:
+        """创建使用指定会话的事件服务"""
+        service = EventService(session)
+        service.redis_service = self.redis_service
+        service.idempotency_store = EventIdempotencyStore(self.redis_service)
+        return service
+
+    async def metrics(self) -> Dict[str, Any]:
+        """
+        获取消费者指标
+
+        Returns:
+            本实例的消费者数量、持有租约的分区、累计计数和吞吐量，以及各分区的积压（集群范围）
+        """
+        elapsed = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        handled = self._counts["applied"] + self._counts["failed"]
+        partitions = []
+        for stream in self.partition_streams():
+            info = await self.redis_service.stream_group_info(stream, self.settings.EVENT_CONSUMER_GROUP)
+            partitions.append({"stream": stream, "leased": stream in self._leased, **(info or {})})
+        return {
+            "enabled": self.settings.EVENT_ASYNC_INGEST,
+            "consumers": len(self._consumers),
+            "uptime_seconds": round(elapsed, 3),
+            **self._counts,
+            "events_per_second": round(handled / elapsed, 2) if elapsed > 0 else 0.0,
+            "pending": sum(partition.get("pending") or 0 for partition in partitions),
+            "lag": sum(partition.get("lag") or 0 for partition in partitions),
+            "partitions": partitions
+        }
+
+
+# 全局事件消费者池
+event_consumer_pool = EventConsumerPool()
@@ -0,0 +1,206 @@
+"""
+异步同步任务
+同步请求入队后立即返回任务ID，由后台worker执行SyncService.sync_all，
+任务状态（阶段、进度、吞吐量、最终结果）保存在Redis中，任一实例都可以查询
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from src.config.database import SessionLocal
+from src.config.settings import get_settings
+from src.services.redis_service import RedisService
+from src.services.sync_service import SyncService
+from src.utils.db_executor import run_in_db_executor
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+SYNC_JOB_KEY = "sync:job:{job_id}"
+
+# 本实例保留的最近任务数量，Redis不可用时仍可查询
+_LOCAL_JOB_LIMIT = 100
+
+
+class SyncJobManager:
+    """同步任务管理器"""
+    
+    def __init__(self):
+        self.settings = get_settings()
+        self.redis_service = RedisService()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # 尚未开始执行的任务，相同参数的请求合并到同一个任务
+        self._pending: Dict[Optional[str], str] = {}
+    
+    async def start(self):
+        """启动后台worker"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._work())
+            logger.info("同步任务worker已启动")
+    
+    async def stop(self):
+        """停止后台worker，未执行的任务标记为失败"""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        for job_id in list(self._pending.values()):
+            job = self._jobs[job_id]
+            job.update(status="failed", phase="cancelled", error="服务关闭，任务未执行",
+                       finished_at=datetime.now(timezone.utc).isoformat())
+            await self._save(job)
+        self._pending.clear()
+        await self.redis_service.close()
+    
+    async def submit(self, updated_since: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        提交同步任务
+        
+        Args:
+            updated_since: 可选的增量同步时间
+        
+        Returns:
+            任务状态字典
+        """
+        since = updated_since.isoformat() if updated_since else None
+        pending_id = self._pending.get(since)
+        if pending_id is not None:
+            return dict(self._jobs[pending_id])
+        
+        await self.start()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "phase": "queued",
+            "updated_since": since,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "progress": {},
+            "rows_processed": 0,
+            "rows_per_sec": None,
+            "totals": None,
+            "error": None
+        }
+        self._remember(job)
+        self._pending[since] = job["job_id"]
+        await self._save(job)
+        self._queue.put_nowait((job["job_id"], updated_since))
+        
+        logger.info("同步任务已入队", job_id=job["job_id"], updated_since=since, queued=self._queue.qsize())
+        return dict(job)
+    
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取任务状态，优先读取Redis以获取其他实例执行的任务
+        
+        Args:
+            job_id: 任务ID
+        
+        Returns:
+            任务状态字典，不存在时返回None
+        """
+        job = await self.redis_service.get_cache(SYNC_JOB_KEY.format(job_id=job_id))
+        if isinstance(job, dict):
+            return job
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+    
+    def _remember(self, job: Dict[str, Any]):
+        """在本实例保留任务状态，超出上限时淘汰最早的任务"""
+        self._jobs[job["job_id"]] = job
+        while len(self._jobs) > _LOCAL_JOB_LIMIT:
+            self._jobs.popitem(last=False)
+    
+    async def _save(self, job: Dict[str, Any]):
+        """保存任务状态"""
+        await self.redis_service.set_cache(
+            SYNC_JOB_KEY.format(job_id=job["job_id"]), job, expire=self.settings.SYNC_JOB_TTL_SECONDS
+        )
+    
+    async def _work(self):
+        """按提交顺序逐个执行任务"""
+        while True:
+            job_id, updated_since = await self._queue.get()
+            try:
+                await self._execute(self._jobs[job_id], updated_since)
+            except Exception as e:
+                logger.error("同步任务执行出错", job_id=job_id, error=str(e), exc_info=True)
+            finally:
+                self._queue.task_done()
+    
+    async def _execute(self, job: Dict[str, Any], updated_since: Optional[datetime]):
+        """
+        执行单个任务，执行期间每SYNC_HEARTBEAT_SECONDS刷新一次进度和吞吐量
+        
+        Args:
+            job: 任务状态字典
+            updated_since: 可选的增量同步时间
+        """
+        self._pending.pop(job["updated_since"], None)
+        started = time.monotonic()
+        job.update(status="running", phase="fetching", started_at=datetime.now(timezone.utc).isoformat())
+        await self._save(job)
+        
+        session = SessionLocal()
+        sync_service = SyncService(session)
+        try:
+            task = asyncio.create_task(sync_service.sync_all(updated_since, session=session))
+            while not task.done():
+                await asyncio.wait({task}, timeout=self.settings.SYNC_HEARTBEAT_SECONDS)
+                if not task.done():
+                    self._update_progress(job, sync_service.get_progress(), time.monotonic() - started)
+                    await self._save(job)
+            result = task.result()
+            if result.get("success"):
+                await run_in_db_executor(session.commit)
+            else:
+                await run_in_db_executor(session.rollback)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        finally:
+            await run_in_db_executor(session.close)
+        
+        self._update_progress(job, sync_service.get_progress(), time.monotonic() - started)
+        job.update(
+            status="succeeded" if result.get("success") else "failed",
+            phase="joined" if result.get("joined") else ("completed" if result.get("success") else "failed"),
+            finished_at=datetime.now(timezone.utc).isoformat(),
+            totals=result.get("totals"),
+            error=result.get("error")
+        )
+        await self._save(job)
+        
+        logger.info(
+            "同步任务完成",
+            job_id=job["job_id"],
+            status=job["status"],
+            rows_processed=job["rows_processed"],
+            rows_per_sec=job["rows_per_sec"]
+        )
+    
+    @staticmethod
+    def _update_progress(job: Dict[str, Any], progress: Dict[str, Any], elapsed: float):
+        """根据同步服务的进度更新任务的阶段、各实体计数和吞吐量"""
+        entities = progress.get("entities", {})
+        rows = sum(
+            counts.get(key, 0)
+            for counts in entities.values()
+            for key in ("created", "updated", "unchanged", "errors")
+        )
+        if progress.get("phase"):
+            job["phase"] = progress["phase"]
+        job["progress"] = entities
+        job["rows_processed"] = rows
+        job["rows_per_sec"] = round(rows / elapsed, 1) if elapsed > 0 else None
+
+
+# 应用进程内共享的任务管理器
+sync_job_manager = SyncJobManager()
@@ -5,18 +5,28 @@
 
 import asyncio
 import structlog
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+from src.config.database import SessionLocal
 from src.services.sync_service import SyncService
-from src.services.model_garden_client import ModelGardenClient
+from src.services.model_garden_client import (
+    ModelGardenClient,
+    close_shared_client,
+    get_shared_client,
+    open_shared_client,
+)
 from src.config.settings import get_settings
+from src.utils.db_executor import run_in_db_executor
 from src.utils.logger import setup_logging
 
 # 设置日志
 setup_logging()
 logger = structlog.get_logger()
 
+# 最近一次定时漂移检查的变更计划
+SYNC_DRIFT_KEY = "sync:drift:latest"
+
 class SyncScheduler:
     """同步调度器"""
     
@@ -26,6 +36,7 @@ class SyncScheduler:
         self.model_garden_client = ModelGardenClient()
         self.is_running = False
         self.last_sync_time: Optional[datetime] = None
+        self._scheduled_runs = 0
         
     async def start(self):
         """启动调度器"""
@@ -36,6 +47,11 @@ class SyncScheduler:
         self.is_running = True
         logger.info("同步调度器已启动")
         
+        # 在应用进程内运行时复用应用的共享客户端，独立运行时自行打开并负责关闭
+        owns_client = get_shared_client() is None
+        if owns_client:
+            await open_shared_client()
+        
         try:
             while self.is_running:
                 await self._run_sync()
@@ -44,6 +60,8 @@ class SyncScheduler:
             logger.error("同步调度器运行出错", error=str(e), exc_info=True)
             self.is_running = False
         finally:
+            if owns_client:
+                await close_shared_client()
             logger.info("同步调度器已停止")
     
     async def stop(self):
@@ -56,27 +74,82 @@ class SyncScheduler:
         try:
             logger.info("开始执行全量同步任务")
             
-            # 计算增量同步的时间范围
-            updated_since = None
-            if self.last_sync_time:
-                updated_since = self.last_sync_time.isoformat()
-            
-            # 调用Model Garden的同步API
-            sync_data = await self.model_garden_client.sync_all(updated_since)
+            if self.settings.SYNC_DRIFT_CHECK:
+                await self._check_drift()
             
-            # 处理同步数据
-            await self.sync_service.process_sync_data(sync_data)
+            # 增量范围由持久化的实体水位决定，重启后不会退化为全量同步
+            result = await self._sync(use_watermarks=self._scheduled_watermarks())
+            if not result.get("success"):
+                raise RuntimeError(result.get("error"))
             
-            # 更新最后同步时间
-            self.last_sync_time = datetime.utcnow()
+            # 仅记录最后一次成功同步的时间，不再作为增量起点
+            self.last_sync_time = datetime.now(timezone.utc)
             
             logger.info("全量同步任务完成", 
-                       last_sync_time=self.last_sync_time.isoformat())
+                       last_sync_time=self.last_sync_time.isoformat(),
+                       not_modified=result.get("not_modified", False))
             
         except Exception as e:
             logger.error("同步任务执行失败", error=str(e), exc_info=True)
             # 这里可以添加告警通知逻辑
     
+    async def _check_drift(self):
+        """同步前计算变更计划，记录并缓存与Model Garden的配置漂移，失败不影响同步"""
+        session = SessionLocal()
+        try:
+            plan = await self.sync_service.sync_all(session=session, dry_run=True)
+        except Exception as e:
+            logger.warning("漂移检查失败", error=str(e))
+            return
+        finally:
+            await run_in_db_executor(session.close)
+        if not plan.get("success"):
+            logger.warning("漂移检查失败", error=plan.get("error"))
+            return
+        
+        totals = plan["totals"]
+        if totals["create"] or totals["update"] or totals["delete"]:
+            logger.warning(
+                "检测到配置漂移",
+                totals=totals,
+                entities=sorted(
+                    name for name, entry in plan["plan"].items()
+                    if entry["create"] or entry["update"] or entry["delete"]
+                )
+            )
+        else:
+            logger.info("未检测到配置漂移", duration_seconds=plan["duration_seconds"])
+        await self.sync_service.redis_service.set_cache(
+            SYNC_DRIFT_KEY, plan, expire=self.settings.SYNC_INTERVAL_MINUTES * 60 * 2
+        )
+    
+    def _scheduled_watermarks(self) -> Optional[bool]:
+        """
+        本次定时同步是否按水位增量同步
+        
+        水位增量同步不执行对账删除，开启SYNC_WATERMARKS时按SYNC_FULL_SYNC_EVERY定期改为全量同步
+        
+        Returns:
+            False表示本次执行全量同步，None表示按SYNC_WATERMARKS
+        """
+        self._scheduled_runs += 1
+        every = self.settings.SYNC_FULL_SYNC_EVERY
+        if self.settings.SYNC_WATERMARKS and every > 0 and (self._scheduled_runs - 1) % every == 0:
+            return False
+        return None
+    
+    async def _sync(self, updated_since: Optional[datetime] = None,
+                    use_watermarks: Optional[bool] = None) -> dict:
+        """使用独立的数据库会话执行一次同步并提交，use_watermarks为None时按SYNC_WATERMARKS"""
+        session = SessionLocal()
+        try:
+            result = await self.sync_service.sync_all(updated_since, session=session, use_watermarks=use_watermarks)
+            if result.get("success"):
+                await run_in_db_executor(session.commit)
+            return result
+        finally:
+            await run_in_db_executor(session.close)
+    
     async def _wait_for_next_sync(self):
         """等待下次同步"""
         sync_interval = self.settings.SYNC_INTERVAL_MINUTES
@@ -88,14 +161,11 @@ class SyncScheduler:
         try:
             logger.info("手动触发同步任务", updated_since=updated_since)
             
-            # 调用Model Garden的同步API
-            sync_data = await self.model_garden_client.sync_all(updated_since)
-            
-            # 处理同步数据
-            await self.sync_service.process_sync_data(sync_data)
+            result = await self._sync(datetime.fromisoformat(updated_since) if updated_since else None)
+            if not result.get("success"):
+                raise RuntimeError(result.get("error"))
             
-            # 更新最后同步时间
-            self.last_sync_time = datetime.utcnow()
+            self.last_sync_time = datetime.now(timezone.utc)
             
             logger.info("手动同步任务完成")
             return True
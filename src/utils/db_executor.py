@@ -0,0 +1,90 @@
+"""
+数据库线程池
+同步SQLAlchemy Session的调用放到有界线程池中执行，避免阻塞事件循环
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+
+from src.config.settings import get_settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_thread_local = threading.local()
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """
+    获取数据库线程池（首次调用时创建）
+
+    Returns:
+        大小为DB_EXECUTOR_WORKERS的线程池
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(get_settings().DB_EXECUTOR_WORKERS, 1),
+                    thread_name_prefix="db"
+                )
+    return _executor
+
+
+def shutdown_db_executor(wait: bool = True) -> None:
+    """关闭数据库线程池，下次使用时重新创建"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+async def run_in_db_executor(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    在数据库线程池中执行同步函数
+
+    与asyncio.to_thread一样会复制当前上下文，日志上下文变量在线程中仍然可用
+
+    Args:
+        func: 同步函数
+        *args: 位置参数
+        **kwargs: 关键字参数
+
+    Returns:
+        函数返回值
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_db_executor(), call)
+
+
+def _run_coroutine(coroutine_function: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+    """在工作线程自己的事件循环中执行协程"""
+    loop = getattr(_thread_local, "loop", None)
+    if loop is None:
+        loop = _thread_local.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(coroutine_function(*args, **kwargs))
+
+
+async def run_coroutine_in_db_executor(coroutine_function: Callable[..., Awaitable[Any]],
+                                       *args: Any, **kwargs: Any) -> Any:
+    """
+    在数据库线程池中执行只包含同步数据库调用的协程函数
+
+    用于内部直接调用同步Session的async def方法；协程不能等待绑定在主事件循环上的对象（如Redis客户端）
+
+    Args:
+        coroutine_function: 协程函数
+        *args: 位置参数
+        **kwargs: 关键字参数
+
+    Returns:
+        协程返回值
+    """
+    return await run_in_db_executor(_run_coroutine, coroutine_function, *args, **kwargs)
@@ -0,0 +1,217 @@
+"""
+同步负载编解码
+负责JSON/MessagePack序列化以及gzip/zstd压缩，orjson、msgpack、zstandard均为可选依赖，
+未安装时对应格式不参与协商
+"""
+
+import gzip
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, AsyncIterator, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 未安装时使用标准库json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 未安装时只协商JSON
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 未安装时只协商gzip
+    zstandard = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# 常见的MessagePack媒体类型写法
+_MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+
+
+def orjson_available() -> bool:
+    """当前环境是否安装了orjson"""
+    return orjson is not None
+
+
+def json_default(value: Any) -> Any:
+    """标准库json无法序列化的值：日期时间和UUID按orjson的格式输出"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def json_dumps(value: Any) -> bytes:
+    """序列化为JSON字节，优先使用orjson，允许非字符串键"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=json_default).encode("utf-8")
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """解析JSON字节或字符串，优先使用orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def available_formats() -> List[str]:
+    """返回当前环境可解码的负载格式，按优先级排列"""
+    return ["msgpack", "json"] if msgpack is not None else ["json"]
+
+
+def available_encodings() -> List[str]:
+    """返回当前环境可解压的内容编码，按优先级排列"""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+def build_accept(payload_format: str) -> str:
+    """
+    构建Accept请求头
+
+    Args:
+        payload_format: 首选负载格式（json/msgpack），msgpack不可用时只接受JSON
+
+    Returns:
+        Accept头的值，首选格式之外保留JSON作为回退
+    """
+    if payload_format == "msgpack" and msgpack is not None:
+        return f"{MSGPACK_MEDIA_TYPE}, {JSON_MEDIA_TYPE};q=0.9"
+    return JSON_MEDIA_TYPE
+
+
+def build_accept_encoding(preferred: str) -> str:
+    """
+    构建Accept-Encoding请求头
+
+    Args:
+        preferred: 逗号分隔的首选编码，例如"zstd, gzip"
+
+    Returns:
+        过滤掉当前环境无法解压的编码后的Accept-Encoding值
+    """
+    supported = available_encodings()
+    encodings = [item.strip().lower() for item in preferred.split(",") if item.strip()]
+    encodings = [item for item in encodings if item in supported or item == "identity"]
+    return ", ".join(encodings) or "identity"
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    按内容编码压缩
+
+    Args:
+        data: 原始字节
+        encoding: gzip/zstd
+
+    Returns:
+        压缩后的字节
+
+    Raises:
+        ValueError: 编码不受支持
+    """
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise ValueError(f"不支持的内容编码: {encoding}")
+
+
+def decompress(data: bytes, encoding: Optional[str]) -> bytes:
+    """
+    按Content-Encoding解压，多个编码按逆序依次解压
+
+    Args:
+        data: 响应体字节
+        encoding: Content-Encoding头的值
+
+    Returns:
+        解压后的字节
+
+    Raises:
+        ValueError: 编码不受支持
+    """
+    if not encoding:
+        return data
+    for item in reversed([value.strip().lower() for value in encoding.split(",")]):
+        if item in ("", "identity"):
+            continue
+        if item == "gzip":
+            data = gzip.decompress(data)
+        elif item == "zstd" and zstandard is not None:
+            # 流式压缩的帧头中可能没有内容大小，使用decompressobj解压
+            data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        else:
+            raise ValueError(f"不支持的内容编码: {item}")
+    return data
+
+
+async def decompress_stream(byte_iterator: AsyncIterator[bytes], encoding: Optional[str]) -> AsyncIterator[bytes]:
+    """
+    增量解压zstd字节流，其他编码原样透传
+
+    Args:
+        byte_iterator: 响应体字节迭代器
+        encoding: 尚未解压的内容编码
+
+    Yields:
+        解压后的字节块
+    """
+    if encoding != "zstd":
+        async for chunk in byte_iterator:
+            yield chunk
+        return
+    if zstandard is None:
+        raise ValueError("不支持的内容编码: zstd")
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    async for chunk in byte_iterator:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+
+
+def is_msgpack(content_type: Optional[str]) -> bool:
+    """判断Content-Type是否为MessagePack"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return media_type in _MSGPACK_MEDIA_TYPES
+
+
+def decode_body(data: bytes, content_type: Optional[str] = None) -> Any:
+    """
+    按Content-Type解析已解压的负载
+
+    Args:
+        data: 已解压的字节
+        content_type: Content-Type头的值，非MessagePack时按JSON解析
+
+    Returns:
+        解析后的对象
+
+    Raises:
+        ValueError: 响应为MessagePack但未安装msgpack
+    """
+    if is_msgpack(content_type):
+        if msgpack is None:
+            raise ValueError("响应为MessagePack，但未安装msgpack")
+        return msgpack.unpackb(data, raw=False)
+    return json_loads(data)
+
+
+def encode_body(value: Any, payload_format: str = "json") -> bytes:
+    """
+    按负载格式序列化
+
+    Args:
+        value: 要序列化的对象
+        payload_format: json/msgpack
+
+    Returns:
+        序列化后的字节
+    """
+    if payload_format == "msgpack" and msgpack is not None:
+        return msgpack.packb(value, use_bin_type=True)
+    return json_dumps(value)
@@ -0,0 +1,112 @@
+"""
+JSON序列化器
+Redis缓存和事件流使用的可插拔序列化实现，默认orjson，未安装时回退标准库json；
+orjson的可选导入和编解码统一由payload_codec提供
+"""
+
+import json
+from typing import Any, Protocol, Union
+
+from src.utils.logger import get_logger
+from src.utils.payload_codec import json_default, json_dumps, json_loads, orjson_available
+
+logger = get_logger()
+
+
+class Serializer(Protocol):
+    """序列化器接口"""
+
+    name: str
+
+    def dumps(self, value: Any) -> bytes: ...
+
+    def loads(self, data: Union[bytes, str]) -> Any: ...
+
+
+class JsonSerializer:
+    """标准库json序列化器，日期时间和UUID按orjson的格式输出"""
+
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        """
+        序列化为UTF-8编码的JSON
+
+        Args:
+            value: 要序列化的对象
+
+        Returns:
+            JSON字节
+        """
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        解析JSON
+
+        Args:
+            data: JSON字节或字符串
+
+        Returns:
+            解析后的对象
+
+        Raises:
+            ValueError: 不是合法的JSON
+        """
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    """orjson序列化器，使用payload_codec的JSON编解码"""
+
+    name = "orjson"
+
+    def dumps(self, value: Any) -> bytes:
+        """
+        序列化为UTF-8编码的JSON，允许非字符串键
+
+        Args:
+            value: 要序列化的对象
+
+        Returns:
+            JSON字节
+        """
+        return json_dumps(value)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        解析JSON
+
+        Args:
+            data: JSON字节或字符串
+
+        Returns:
+            解析后的对象
+
+        Raises:
+            ValueError: 不是合法的JSON（orjson.JSONDecodeError是ValueError的子类）
+        """
+        return json_loads(data)
+
+
+def get_serializer(name: str = "orjson") -> Serializer:
+    """
+    按名称获取序列化器
+
+    Args:
+        name: orjson/json，orjson未安装时回退json
+
+    Returns:
+        序列化器实例
+
+    Raises:
+        ValueError: 名称不受支持
+    """
+    if name == "orjson":
+        if orjson_available():
+            return OrjsonSerializer()
+        logger.warning("未安装orjson，序列化回退为标准库json")
+        return JsonSerializer()
+    if name == "json":
+        return JsonSerializer()
+    raise ValueError(f"不支持的序列化器: {name}")
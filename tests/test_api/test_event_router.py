@@ -4,7 +4,7 @@
 
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, AsyncMock
+from unittest.mock import Mock, AsyncMock, patch
 from datetime import datetime
 
 from src.schemas.event_request import EventRequest
@@ -100,6 +100,131 @@ class TestEventRouter:
             # 清理依赖重写
             app.dependency_overrides.clear()
     
+    def test_receive_events_batch(
+        self,
+        client_with_mocked_dependencies,
+        sample_event_request,
+        mock_event_service
+    ):
+        """测试批量接收事件返回逐个事件的状态"""
+        mock_event_service.process_events = AsyncMock(return_value=[
+            {"success": True, "status": "created", "entity_id": "proj-001"},
+            {"success": True, "status": "already_processed", "event_id": "evt-2"},
+            {"success": False, "error": "boom", "event_id": "evt-3"}
+        ])
+        events = [
+            {**sample_event_request, "event_id": event_id}
+            for event_id in ("evt-1", "evt-2", "evt-3")
+        ]
+        
+        response = client_with_mocked_dependencies.post("/api/v1/model-garden/events/batch", json=events)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["status"], data["processed"], data["skipped"], data["failed"]) == ("partial", 1, 1, 1)
+        assert [result["event_id"] for result in data["results"]] == ["evt-1", "evt-2", "evt-3"]
+        assert data["results"][2]["error"] == "boom"
+        assert [event.event_id for event in mock_event_service.process_events.call_args[0][0]] == [
+            "evt-1", "evt-2", "evt-3"
+        ]
+    
+    def test_receive_events_batch_too_large(
+        self,
+        client_with_mocked_dependencies,
+        sample_event_request,
+        mock_event_service
+    ):
+        """测试超过EVENT_BATCH_MAX_SIZE的批量请求返回413"""
+        from src.config.settings import get_settings
+        
+        mock_event_service.process_events = AsyncMock()
+        with patch.object(get_settings(), "EVENT_BATCH_MAX_SIZE", 1):
+            response = client_with_mocked_dependencies.post(
+                "/api/v1/model-garden/events/batch",
+                json=[sample_event_request, sample_event_request]
+            )
+        
+        assert response.status_code == 413
+        mock_event_service.process_events.assert_not_called()
+    
+    def test_receive_events_batch_async_ingest(
+        self,
+        client_with_mocked_dependencies,
+        sample_event_request,
+        mock_event_service
+    ):
+        """测试异步接收模式下批量事件写入分区事件流后返回202，不在请求中应用"""
+        from src.config.settings import get_settings
+        
+        mock_event_service.enqueue_events = AsyncMock(return_value=True)
+        mock_event_service.process_events = AsyncMock()
+        events = [{**sample_event_request, "event_id": event_id} for event_id in ("evt-1", "evt-2")]
+        with patch.object(get_settings(), "EVENT_ASYNC_INGEST", True):
+            response = client_with_mocked_dependencies.post("/api/v1/model-garden/events/batch", json=events)
+        
+        assert response.status_code == 202
+        data = response.json()
+        assert data["status"] == "accepted"
+        assert [(result["event_id"], result["status"]) for result in data["results"]] == [
+            ("evt-1", "queued"), ("evt-2", "queued")
+        ]
+        mock_event_service.process_events.assert_not_called()
+        
+        mock_event_service.enqueue_events = AsyncMock(return_value=False)
+        with patch.object(get_settings(), "EVENT_ASYNC_INGEST", True):
+            response = client_with_mocked_dependencies.post("/api/v1/model-garden/events/batch", json=events)
+        assert response.status_code == 503
+    
+    def test_receive_event_async_ingest(
+        self,
+        client_with_mocked_dependencies,
+        sample_event_request,
+        mock_event_service
+    ):
+        """测试异步接收模式下事件入队后返回202，不在请求中应用"""
+        from src.config.settings import get_settings
+        
+        mock_event_service.enqueue_event = AsyncMock(return_value="1-0")
+        with patch.object(get_settings(), "EVENT_ASYNC_INGEST", True):
+            response = client_with_mocked_dependencies.post("/api/v1/model-garden/events", json=sample_event_request)
+        
+        assert response.status_code == 202
+        assert response.json()["status"] == "accepted"
+        mock_event_service.enqueue_event.assert_awaited_once()
+        mock_event_service.process_event.assert_not_called()
+    
+    def test_receive_event_async_ingest_queue_unavailable(
+        self,
+        client_with_mocked_dependencies,
+        sample_event_request,
+        mock_event_service
+    ):
+        """测试异步接收模式下事件流不可用时返回503"""
+        from src.config.settings import get_settings
+        
+        mock_event_service.enqueue_event = AsyncMock(return_value=None)
+        with patch.object(get_settings(), "EVENT_ASYNC_INGEST", True):
+            response = client_with_mocked_dependencies.post("/api/v1/model-garden/events", json=sample_event_request)
+        
+        assert response.status_code == 503
+        mock_event_service.process_event.assert_not_called()
+    
+    def test_event_consumer_metrics(self, client_with_mocked_dependencies):
+        """测试获取事件消费者指标"""
+        from src.api.dependencies import get_event_consumer_pool
+        from src.main import app
+        
+        mock_pool = Mock()
+        mock_pool.metrics = AsyncMock(return_value={"consumers": 4, "lag": 12, "events_per_second": 350.5})
+        app.dependency_overrides[get_event_consumer_pool] = lambda: mock_pool
+        try:
+            response = client_with_mocked_dependencies.get("/api/v1/model-garden/events/consumers")
+        finally:
+            app.dependency_overrides.pop(get_event_consumer_pool, None)
+        
+        assert response.status_code == 200
+        assert response.json()["lag"] == 12
+    
     def test_health_check(self, client_with_mocked_dependencies):
         """测试健康检查端点"""
         response = client_with_mocked_dependencies.get("/api/v1/model-garden/health")
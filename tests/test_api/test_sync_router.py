@@ -3,12 +3,15 @@
 测试修复后的同步路由实现
 """
 
+import json
 import pytest
 from unittest.mock import patch, Mock, AsyncMock, MagicMock
 from fastapi import HTTPException
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 
+from src.main import app
+from src.api.dependencies import get_sync_job_manager
 from src.schemas.sync_request import SyncRequest
 from src.schemas.sync_response import SyncResponse
 
@@ -79,6 +82,11 @@ class TestSyncRouter:
             "totals": {"created": 10, "updated": 5, "errors": 0}
         }
         mock_redis.is_sync_in_progress.return_value = False
+        mock_redis.get_sync_progress.return_value = {
+            "state": "running",
+            "token": 3,
+            "entities": {"projects": {"created": 1, "updated": 0, "unchanged": 0, "errors": 0}}
+        }
         mock_service.redis_service = mock_redis
         
         return mock_service
@@ -268,6 +276,54 @@ class TestSyncRouter:
             # FastAPI的Pydantic验证会拒绝无效格式
             assert response.status_code == 422
     
+    def test_sync_all_async_job(self, client_with_mocked_dependencies, mock_sync_service):
+        """测试异步任务模式立即返回202和任务ID，不在请求内执行同步"""
+        mock_job_manager = AsyncMock()
+        mock_job_manager.submit.return_value = {
+            "job_id": "job-001",
+            "status": "queued",
+            "phase": "queued",
+            "updated_since": "2025-07-01T00:00:00+00:00",
+            "created_at": "2025-07-20T10:00:00+00:00"
+        }
+        app.dependency_overrides[get_sync_job_manager] = lambda: mock_job_manager
+        
+        response = client_with_mocked_dependencies.post(
+            "/api/v1/model-garden/sync/all?async_job=true",
+            json={"updated_since": "2025-07-01T00:00:00Z"}
+        )
+        
+        assert response.status_code == 202
+        assert response.json()["job_id"] == "job-001"
+        assert response.headers["location"] == "/api/v1/model-garden/sync/jobs/job-001"
+        mock_job_manager.submit.assert_called_once_with(datetime(2025, 7, 1, tzinfo=timezone.utc))
+        mock_sync_service.sync_all.assert_not_called()
+    
+    def test_get_sync_job(self, client_with_mocked_dependencies):
+        """测试查询同步任务状态，任务不存在时返回404"""
+        mock_job_manager = AsyncMock()
+        mock_job_manager.get_job.side_effect = lambda job_id: {
+            "job_id": "job-001",
+            "status": "running",
+            "phase": "writing",
+            "created_at": "2025-07-20T10:00:00+00:00",
+            "started_at": "2025-07-20T10:00:01+00:00",
+            "progress": {"projects": {"created": 10, "updated": 0, "unchanged": 0, "errors": 0}},
+            "rows_processed": 10,
+            "rows_per_sec": 5.0
+        } if job_id == "job-001" else None
+        app.dependency_overrides[get_sync_job_manager] = lambda: mock_job_manager
+        
+        response = client_with_mocked_dependencies.get("/api/v1/model-garden/sync/jobs/job-001")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["phase"] == "writing"
+        assert data["rows_per_sec"] == 5.0
+        assert data["progress"]["projects"]["created"] == 10
+        
+        response = client_with_mocked_dependencies.get("/api/v1/model-garden/sync/jobs/missing")
+        assert response.status_code == 404
+    
     def test_get_sync_status_success(
         self,
         client_with_mocked_dependencies,
@@ -298,6 +354,7 @@ class TestSyncRouter:
             assert data["last_sync"] == "2025-07-20T10:05:00Z"
             assert data["sync_in_progress"] is False
             assert data["last_sync_totals"]["created"] == 10
+            assert data["sync_progress"]["entities"]["projects"]["created"] == 1
     
     def test_get_sync_status_redis_service_failure(
         self,
@@ -541,4 +598,54 @@ class TestSyncRouter:
             assert response.status_code == 200
             # 应该能处理缺少的totals字段
             data = response.json()
-            assert all(data[key] == [] for key in ["projects", "use_cases", "budgets", "models", "model_deployments", "pricing", "use_case_llm_models", "limits"]) 
\ No newline at end of file
+            assert all(data[key] == [] for key in ["projects", "use_cases", "budgets", "models", "model_deployments", "pricing", "use_case_llm_models", "limits"])     
+    def test_default_response_class_is_orjson(self):
+        """测试应用默认使用ORJSONResponse"""
+        pytest.importorskip("orjson")
+        from fastapi.responses import ORJSONResponse
+        
+        assert app.router.default_response_class is ORJSONResponse
+    
+    def test_sync_all_ndjson_stream(self, client_with_mocked_dependencies, mock_sync_service):
+        """测试Accept: application/x-ndjson时逐行流式返回记录"""
+        async def stream_sync_records(updated_since=None):
+            yield {"type": "started", "updated_since": None}
+            yield {"type": "record", "entity": "projects", "status": "created", "data": {"id": "proj-001"}}
+            yield {"type": "summary", "success": True, "totals": {"created": 1}}
+        
+        mock_sync_service.stream_sync_records = Mock(side_effect=stream_sync_records)
+        response = client_with_mocked_dependencies.post(
+            "/api/v1/model-garden/sync/all", headers={"Accept": "application/x-ndjson"}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["type"] for line in lines] == ["started", "record", "summary"]
+        assert lines[1]["data"] == {"id": "proj-001"}
+        mock_sync_service.sync_all.assert_not_called()
+        mock_sync_service.stream_sync_records.assert_called_once_with(None)
+    
+    def test_sync_all_dry_run(self, client_with_mocked_dependencies, mock_sync_service, mock_db_session):
+        """测试dry_run返回变更计划"""
+        mock_sync_service.sync_all.return_value = {
+            "success": True,
+            "dry_run": True,
+            "start_time": "2025-07-20T10:00:00Z",
+            "end_time": "2025-07-20T10:00:01Z",
+            "duration_seconds": 1.0,
+            "totals": {"create": 1, "update": 0, "unchanged": 5, "delete": 0},
+            "plan": {"models": {"create": 1, "update": 0, "unchanged": 5, "delete": 0}}
+        }
+        response = client_with_mocked_dependencies.post(
+            "/api/v1/model-garden/sync/all", json={"dry_run": True}
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["dry_run"] is True
+        assert data["totals"]["create"] == 1
+        assert data["plan"]["models"]["unchanged"] == 5
+        mock_sync_service.sync_all.assert_called_once_with(
+            updated_since=None, session=mock_db_session, dry_run=True
+        )
@@ -128,4 +128,23 @@ class TestModelRelationships:
         assert limit.subscription_id == "123e4567-e89b-12d3-a456-426614174000"
         assert limit.type == "input_token_limit"
         assert limit.scope == "daily"
-        assert limit.value == 1000000 
\ No newline at end of file
+        assert limit.value == 1000000     
+    def test_foreign_keys_on_sqlite(self):
+        """测试外键列在SQLite上可建表，并能按关系加载"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import Session
+        from src.models.base import Base
+        
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            project = Project(project_name="Test Project", project_code="TEST_PROJ")
+            session.add(project)
+            session.flush()
+            session.add(UseCase(project_id=str(project.id), use_case_name="Test Use Case", ad_group="test_group"))
+            session.commit()
+            
+            use_case = session.query(UseCase).one()
+            assert use_case.project_id == project.id
+            assert use_case.project.project_code == "TEST_PROJ"
+        engine.dispose()
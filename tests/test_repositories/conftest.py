@@ -5,8 +5,11 @@
 
 import os
 import pytest
+import pytest_asyncio
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 # 确保在导入模型之前设置测试环境变量
 os.environ['TESTING'] = 'true'
@@ -20,6 +23,7 @@ from tests.test_models import (
 
 # 导入仓储类
 from src.repositories.base_repository import BaseRepository
+from src.repositories.async_base_repository import AsyncBaseRepository
 
 # 创建测试专用的仓储类
 class TestProjectRepository(BaseRepository[TestProjectModel]):
@@ -62,6 +66,10 @@ class TestLimitUsageRepository(BaseRepository[TestLimitUsageModel]):
     def __init__(self, session):
         super().__init__(TestLimitUsageModel, session)
 
+class TestAsyncProjectRepository(AsyncBaseRepository[TestProjectModel]):
+    def __init__(self, session):
+        super().__init__(TestProjectModel, session)
+
 @pytest.fixture
 def engine():
     """创建内存SQLite引擎"""
@@ -131,4 +139,49 @@ def limit_repository(session):
 @pytest.fixture
 def limit_usage_repository(session):
     """限制使用仓储实例"""
-    return TestLimitUsageRepository(session) 
\ No newline at end of file
+    return TestLimitUsageRepository(session)
+
+@pytest_asyncio.fixture
+async def async_session():
+    """创建内存SQLite异步会话"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(TestBase.metadata.create_all)
+    session = async_sessionmaker(bind=engine, expire_on_commit=False)()
+    try:
+        yield session
+    finally:
+        await session.close()
+        await engine.dispose()
+
+@pytest.fixture
+def async_base_repository(async_session):
+    """异步基础仓储实例"""
+    return TestAsyncProjectRepository(async_session)
+
+@pytest.fixture
+def pg_session():
+    """
+    PostgreSQL会话，设置TEST_DATABASE_URL时可用
+
+    在独立schema中创建src模型的表，测试结束后整体回滚
+    """
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url or not url.startswith("postgresql"):
+        pytest.skip("未设置PostgreSQL的TEST_DATABASE_URL")
+    from src.models import Base
+
+    engine = create_engine(url)
+    connection = engine.connect()
+    transaction = connection.begin()
+    connection.exec_driver_sql("CREATE SCHEMA _repository_test")
+    connection.exec_driver_sql("SET LOCAL search_path TO _repository_test")
+    Base.metadata.create_all(connection)
+    session = sessionmaker(bind=connection)()
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+        engine.dispose()
@@ -0,0 +1,58 @@
+"""
+异步基础仓储测试
+"""
+
+import pytest
+from datetime import datetime
+
+class TestAsyncBaseRepository:
+    """异步基础仓储测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_create_and_get_by_id(self, async_base_repository, async_session):
+        """测试创建并根据ID获取记录"""
+        await async_base_repository.create(
+            id="test1",
+            name="Test Project",
+            code="TEST",
+            created_at=datetime.now(),
+            updated_at=datetime.now()
+        )
+        await async_session.commit()
+        
+        found = await async_base_repository.get_by_id("test1")
+        assert found is not None
+        assert found.name == "Test Project"
+        assert await async_base_repository.exists("test1") is True
+        assert await async_base_repository.get_by_id("missing") is None
+    
+    @pytest.mark.asyncio
+    async def test_update_and_delete(self, async_base_repository, async_session):
+        """测试更新和删除记录"""
+        await async_base_repository.create(
+            id="test1", name="Original", code="TEST",
+            created_at=datetime.now(), updated_at=datetime.now()
+        )
+        
+        updated = await async_base_repository.update("test1", name="Updated")
+        assert updated.name == "Updated"
+        assert await async_base_repository.update("missing", name="x") is None
+        
+        assert await async_base_repository.delete("test1") is True
+        assert await async_base_repository.delete("test1") is False
+        assert await async_base_repository.count() == 0
+    
+    @pytest.mark.asyncio
+    async def test_find_by_and_get_all(self, async_base_repository, async_session):
+        """测试条件查询和分页获取"""
+        await async_base_repository.bulk_create([
+            {"id": f"test{i}", "name": f"Project {i}", "code": f"T{i}",
+             "created_at": datetime.now(), "updated_at": datetime.now()}
+            for i in range(3)
+        ])
+        
+        assert [p.id for p in await async_base_repository.find_by(code="T1")] == ["test1"]
+        assert (await async_base_repository.find_one_by(name="Project 2")).id == "test2"
+        assert await async_base_repository.find_one_by(unknown="x") is None
+        assert len(await async_base_repository.get_all(limit=2)) == 2
+        assert await async_base_repository.count() == 3
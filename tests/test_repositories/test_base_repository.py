@@ -4,6 +4,7 @@
 
 import pytest
 from datetime import datetime
+from src.repositories.base_repository import BaseRepository
 from tests.test_models import TestProjectModel
 
 class TestBaseRepository:
@@ -299,4 +300,177 @@ class TestBaseRepository:
         
         # 验证删除
         assert base_repository.get_by_id("test1") is None
-        assert base_repository.get_by_id("test2") is None 
\ No newline at end of file
+        assert base_repository.get_by_id("test2") is None
+    
+    def test_bulk_upsert(self, base_repository, session):
+        """测试批量插入或更新"""
+        base_repository.create(
+            id="test1",
+            name="Original 1",
+            code="TEST1",
+            created_at=datetime.now(),
+            updated_at=datetime.now()
+        )
+        session.commit()
+        
+        timestamps = {"created_at": "2025-07-01T00:00:00Z", "updated_at": "2025-07-10T00:00:00Z"}
+        rows = [
+            {"id": "test1", "name": "Updated 1", "code": "TEST1", "unknown_field": "ignored", **timestamps},
+            {"id": "test2", "name": "New 2", "code": "TEST2", **timestamps},
+            {"id": "test2", "name": "New 2 again", "code": "TEST2", **timestamps}
+        ]
+        
+        created, updated, unchanged = base_repository.bulk_upsert(rows)
+        session.expire_all()
+        
+        assert (created, updated, unchanged) == (1, 1, 0)
+        assert base_repository.count() == 2
+        assert base_repository.get_by_id("test1").name == "Updated 1"
+        assert base_repository.get_by_id("test2").name == "New 2 again"
+        assert base_repository.get_by_id("test2").updated_at == datetime(2025, 7, 10)
+    
+    def test_bulk_upsert_empty(self, base_repository, session):
+        """测试空数据批量插入或更新"""
+        assert base_repository.bulk_upsert([]) == (0, 0, 0)
+    
+    def test_bulk_upsert_skips_unchanged_rows(self, base_repository, session):
+        """测试批量写入跳过内容未变化的行，只更新变化的列"""
+        rows = [
+            {"id": "test1", "name": "Project 1", "code": "TEST1", "created_at": "2025-07-01T00:00:00Z",
+             "updated_at": "2025-07-01T00:00:00Z"},
+            {"id": "test2", "name": "Project 2", "code": "TEST2", "created_at": "2025-07-01T00:00:00Z",
+             "updated_at": "2025-07-01T00:00:00Z"}
+        ]
+        assert base_repository.bulk_upsert(rows) == (2, 0, 0)
+        session.commit()
+        
+        # 直接修改一列，验证未出现在变化列中的值不会被覆盖
+        session.execute(TestProjectModel.__table__.update().values(description="local note"))
+        
+        rows[1] = {**rows[1], "name": "Project 2 renamed"}
+        assert base_repository.bulk_upsert(rows) == (0, 1, 1)
+        session.expire_all()
+        
+        assert base_repository.get_by_id("test1").name == "Project 1"
+        assert base_repository.get_by_id("test2").name == "Project 2 renamed"
+        assert base_repository.get_by_id("test2").description == "local note"
+    
+    def test_delete_missing(self, base_repository, session):
+        """测试删除不在键集合中的记录，软删除只处理有效记录"""
+        timestamps = {"created_at": "2025-07-01T00:00:00Z", "updated_at": "2025-07-01T00:00:00Z"}
+        rows = [
+            {"id": f"test{i}", "name": f"Project {i}", "code": f"TEST{i}", "is_active": True, **timestamps}
+            for i in range(1, 6)
+        ]
+        base_repository.bulk_upsert(rows)
+        session.commit()
+        
+        keep = [("TEST1",), ("TEST2",), ("TEST3",), ("TEST4",)]
+        assert base_repository.delete_missing(keep, ("code",), soft_delete_column="is_active") == (1, 5)
+        assert base_repository.delete_missing(keep, ("code",), soft_delete_column="is_active") == (0, 4)
+        session.expire_all()
+        assert base_repository.get_by_id("test5").is_active is False
+        
+        assert base_repository.delete_missing([("test1",), ("test2",), (None,)]) == (3, 5)
+        session.commit()
+        assert sorted(project.id for project in base_repository.get_all()) == ["test1", "test2"]
+    
+    def test_delete_missing_threshold(self, base_repository, session):
+        """测试待删除比例超过阈值时不删除任何记录"""
+        timestamps = {"created_at": "2025-07-01T00:00:00Z", "updated_at": "2025-07-01T00:00:00Z"}
+        base_repository.bulk_upsert([
+            {"id": f"test{i}", "name": f"Project {i}", "code": f"TEST{i}", **timestamps} for i in range(1, 5)
+        ])
+        session.commit()
+        
+        with pytest.raises(ValueError):
+            base_repository.delete_missing([("test1",)], max_ratio=0.5)
+        assert base_repository.count() == 4
+        assert base_repository.delete_missing([("test1",), ("test2",)], max_ratio=0.5) == (2, 4)
+    
+    def test_delete_missing_small_table_below_min_rows(self, base_repository, session):
+        """测试小表上待删除行数不超过min_rows时不受比例阈值限制"""
+        timestamps = {"created_at": "2025-07-01T00:00:00Z", "updated_at": "2025-07-01T00:00:00Z"}
+        base_repository.bulk_upsert([
+            {"id": f"test{i}", "name": f"Project {i}", "code": f"TEST{i}", **timestamps} for i in range(1, 4)
+        ])
+        session.commit()
+        
+        # 3行中删除1行已超过20%
+        with pytest.raises(ValueError):
+            base_repository.delete_missing([("test1",), ("test2",)], max_ratio=0.2)
+        assert base_repository.delete_missing([("test1",), ("test2",)], max_ratio=0.2, min_rows=1) == (1, 3)
+        assert sorted(project.id for project in base_repository.get_all()) == ["test1", "test2"]
+    
+    def test_plan_upsert_and_deletes(self, base_repository, session):
+        """测试变更计划统计创建/更新/删除且不写入数据"""
+        timestamps = {"created_at": "2025-07-01T00:00:00Z", "updated_at": "2025-07-01T00:00:00Z"}
+        rows = [
+            {"id": f"test{i}", "name": f"Project {i}", "code": f"TEST{i}", "is_active": True, **timestamps}
+            for i in range(1, 4)
+        ]
+        base_repository.bulk_upsert(rows)
+        session.commit()
+        
+        incoming = [
+            rows[0],
+            {**rows[1], "name": "Project 2 renamed"},
+            {"id": "test4", "name": "Project 4", "code": "TEST4", **timestamps}
+        ]
+        plan = base_repository.plan_upsert(incoming)
+        assert (plan["create"], plan["update"], plan["unchanged"]) == (1, 1, 1)
+        assert plan["changed_columns"] == {"name": 1}
+        assert plan["samples"] == {"create": [["test4"]], "update": [{"key": ["test2"], "columns": ["name"]}]}
+        
+        deletes = base_repository.plan_deletes(
+            [("TEST1",), ("TEST2",)], ("code",), soft_delete_column="is_active", sample_size=5
+        )
+        assert deletes == {"delete": 1, "total": 3, "samples": [["TEST3"]]}
+        
+        session.expire_all()
+        assert base_repository.count() == 3
+        assert base_repository.get_by_id("test2").name == "Project 2"
+        assert base_repository.get_by_id("test3").is_active is True
+    
+    def test_copy_merge_requires_postgresql(self, base_repository, session):
+        """测试COPY合并仅支持PostgreSQL"""
+        with pytest.raises(ValueError):
+            base_repository.copy_merge([{"id": "test1", "name": "Project", "code": "TEST1"}])
+    
+    def test_copy_merge_keeps_uncarried_columns(self, pg_session):
+        """测试COPY合并不改写负载未携带的列，默认值只用于新插入的行"""
+        from src.models import Project
+        repository = BaseRepository(Project, pg_session)
+        created_time = datetime(2020, 1, 1)
+        existing = Project(
+            project_name="Old", project_code="P1", is_active=False,
+            created_time=created_time, updated_time=created_time
+        )
+        pg_session.add(existing)
+        pg_session.flush()
+        
+        rows = [
+            {"project_code": "P1", "project_name": "Renamed"},
+            {"project_code": "P2", "project_name": "Second", "is_active": False},
+        ]
+        assert repository.copy_merge(rows, ("project_code",)) == (1, 1, 0)
+        
+        pg_session.expire_all()
+        project = repository.find_one_by(project_code="P1")
+        assert project.id == existing.id
+        assert project.project_name == "Renamed"
+        assert project.is_active is False
+        assert project.created_time == created_time
+        assert project.updated_time > created_time
+        second = repository.find_one_by(project_code="P2")
+        assert second.id is not None and second.created_time is not None
+        assert second.is_active is False
+        
+        assert repository.copy_merge(rows, ("project_code",)) == (0, 0, 2)
+    
+    def test_copy_text_value(self, base_repository):
+        """测试COPY文本格式编码"""
+        assert base_repository._copy_text_value(None) == "\\N"
+        assert base_repository._copy_text_value(True) == "t"
+        assert base_repository._copy_text_value(datetime(2025, 7, 1)) == "2025-07-01T00:00:00"
+        assert base_repository._copy_text_value("a\tb\nc\\d") == "a\\tb\\nc\\\\d"
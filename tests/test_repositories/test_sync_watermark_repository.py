@@ -0,0 +1,40 @@
+"""
+同步水位仓储测试
+"""
+
+import pytest
+from datetime import datetime
+
+from src.models.sync_watermark import SyncWatermark
+from src.repositories.sync_watermark_repository import SyncWatermarkRepository
+
+@pytest.fixture
+def watermark_repository(engine, session):
+    """同步水位仓储实例"""
+    SyncWatermark.__table__.create(engine)
+    return SyncWatermarkRepository(session)
+
+class TestSyncWatermarkRepository:
+    """同步水位仓储测试类"""
+    
+    def test_advance_creates_watermarks(self, watermark_repository, session):
+        """测试首次推进时创建水位"""
+        advanced = watermark_repository.advance({"projects": (datetime(2025, 7, 1), "p1")})
+        session.commit()
+        
+        assert advanced == {"projects": (datetime(2025, 7, 1), "p1")}
+        assert watermark_repository.get_watermarks() == {"projects": (datetime(2025, 7, 1), "p1")}
+    
+    def test_advance_only_moves_forward(self, watermark_repository, session):
+        """测试水位只前进，相同时间按id推进"""
+        watermark_repository.advance({"projects": (datetime(2025, 7, 1), "p2")})
+        session.commit()
+        
+        assert watermark_repository.advance({"projects": (datetime(2025, 6, 30), "p9")}) == {}
+        assert watermark_repository.advance({"projects": (datetime(2025, 7, 1), "p1")}) == {}
+        assert watermark_repository.advance({"projects": (datetime(2025, 7, 1), "p3")}) == {
+            "projects": (datetime(2025, 7, 1), "p3")
+        }
+        session.commit()
+        
+        assert watermark_repository.get_watermarks()["projects"] == (datetime(2025, 7, 1), "p3")
@@ -0,0 +1,153 @@
+"""
+事件合并测试
+"""
+
+from src.schemas.event_request import EventRequest
+from src.services.event_coalescer import coalesce_events
+
+
+def make_event(index, event_type, entity_id, timestamp="2025-07-15T14:20:00Z", entity_type="project", **payload):
+    """构建事件请求"""
+    return EventRequest(
+        event_id=f"e{index}",
+        event_type=event_type,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        timestamp=timestamp,
+        payload=payload
+    )
+
+
+class TestCoalesceEvents:
+    """事件合并测试类"""
+    
+    def test_updates_merge_last_write_wins(self):
+        """测试连续UPDATE按时间戳逐字段后写覆盖，迟到的旧UPDATE不覆盖新值"""
+        events = [
+            make_event(1, "UPDATE", "a", "2025-07-15T14:20:02Z", name="new", budget=1),
+            make_event(2, "UPDATE", "b", "2025-07-15T14:20:00Z", name="other"),
+            make_event(3, "UPDATE", "a", "2025-07-15T14:20:01Z", name="old", code="X")
+        ]
+        
+        batch = coalesce_events(events)
+        
+        assert [event.event_id for event in batch.events] == ["e1", "e2"]
+        assert batch.events[0].payload == {"name": "new", "budget": 1, "code": "X"}
+        assert batch.events[0].timestamp == "2025-07-15T14:20:02Z"
+        assert batch.folded == [[2], []]
+        assert batch.saved == 1
+    
+    def test_create_then_update_folds_into_create(self):
+        """测试CREATE之后的UPDATE并入CREATE"""
+        events = [
+            make_event(1, "CREATE", "a", id="a", name="draft"),
+            make_event(2, "UPDATE", "a", "2025-07-15T14:20:01Z", name="final")
+        ]
+        
+        batch = coalesce_events(events)
+        
+        assert len(batch.events) == 1
+        assert batch.events[0].event_type == "CREATE"
+        assert batch.events[0].payload == {"id": "a", "name": "final"}
+    
+    def test_create_then_delete_cancels(self):
+        """测试CREATE（及其UPDATE）之后的DELETE相互抵消"""
+        events = [
+            make_event(1, "CREATE", "a", id="a"),
+            make_event(2, "UPDATE", "a", name="x"),
+            make_event(3, "UPDATE", "b", name="y"),
+            make_event(4, "DELETE", "a")
+        ]
+        
+        batch = coalesce_events(events)
+        
+        assert [event.event_id for event in batch.events] == ["e3"]
+        assert batch.cancelled == [0, 1, 3]
+        assert batch.saved == 3
+    
+    def test_referenced_create_is_not_cancelled(self):
+        """测试期间有其他实体引用时不抵消CREATE和DELETE"""
+        events = [
+            make_event(1, "CREATE", "proj-1", id="proj-1"),
+            make_event(2, "CREATE", "uc-1", entity_type="usecase", id="uc-1", project_id="proj-1"),
+            make_event(3, "DELETE", "proj-1")
+        ]
+        
+        batch = coalesce_events(events)
+        
+        assert [event.event_id for event in batch.events] == ["e1", "e2", "e3"]
+        assert batch.cancelled == []
+    
+    def test_update_referencing_later_create_is_not_folded(self):
+        """测试引用期间创建的实体的UPDATE不提前到该实体创建之前"""
+        events = [
+            make_event(1, "CREATE", "d1", entity_type="deployment", id="d1", model_id="m1"),
+            make_event(2, "CREATE", "m9", entity_type="model", id="m9"),
+            make_event(3, "UPDATE", "d1", entity_type="deployment", model_id="m9"),
+            make_event(4, "UPDATE", "d1", entity_type="deployment", name="final")
+        ]
+        
+        batch = coalesce_events(events)
+        
+        assert [event.event_id for event in batch.events] == ["e1", "e2", "e3"]
+        assert batch.events[0].payload == {"id": "d1", "model_id": "m1"}
+        assert batch.events[2].payload == {"model_id": "m9", "name": "final"}
+        assert batch.folded == [[], [], [3]]
+    
+    def test_update_then_delete_keeps_delete(self):
+        """测试DELETE之前的UPDATE并入DELETE，DELETE保持原位置"""
+        events = [
+            make_event(1, "UPDATE", "a", name="x"),
+            make_event(2, "CREATE", "b", id="b"),
+            make_event(3, "DELETE", "a")
+        ]
+        
+        batch = coalesce_events(events)
+        
+        assert [event.event_id for event in batch.events] == ["e2", "e3"]
+        assert batch.owners == [1, 2]
+        assert batch.folded == [[], [0]]
+    
+    def test_delete_breaks_run(self):
+        """测试DELETE之后的事件不再合并到DELETE之前的事件"""
+        events = [
+            make_event(1, "UPDATE", "a", name="x"),
+            make_event(2, "DELETE", "a"),
+            make_event(3, "CREATE", "a", id="a"),
+            make_event(4, "UPDATE", "a", name="y")
+        ]
+        
+        batch = coalesce_events(events)
+        
+        assert [event.event_id for event in batch.events] == ["e2", "e3"]
+        assert batch.events[1].payload == {"id": "a", "name": "y"}
+    
+    def test_expand_results(self):
+        """测试净事件结果展开为逐个原事件的结果"""
+        events = [
+            make_event(1, "UPDATE", "a", name="x"),
+            make_event(2, "UPDATE", "a", name="y"),
+            make_event(3, "CREATE", "b", id="b"),
+            make_event(4, "DELETE", "b")
+        ]
+        batch = coalesce_events(events)
+        
+        results = batch.expand([{"success": False, "error": "boom", "event_id": "e1"}], events)
+        
+        assert results[0] == {"success": False, "error": "boom", "event_id": "e1"}
+        assert results[1] == {
+            "success": False, "status": "coalesced", "event_id": "e2", "entity_id": "a",
+            "coalesced_into": "e1", "error": "boom"
+        }
+        assert [result["status"] for result in results[2:]] == ["cancelled", "cancelled"]
+    
+    def test_unparseable_timestamps_keep_arrival_order(self):
+        """测试时间戳无法解析时按到达顺序合并"""
+        events = [
+            make_event(1, "UPDATE", "a", "later", name="x"),
+            make_event(2, "UPDATE", "a", "earlier", name="y")
+        ]
+        
+        batch = coalesce_events(events)
+        
+        assert batch.events[0].payload == {"name": "y"}
@@ -2,15 +2,28 @@
 事件服务测试
 """
 
+import asyncio
+import threading
+import time
 import pytest
-from unittest.mock import AsyncMock, Mock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.services.event_service import EventService
+from src.services.event_service import EventService, event_partition
+from src.services.idempotency_store import EventIdempotencyStore
+from src.repositories.project_repository import AsyncProjectRepository
 from src.schemas.event_request import EventRequest
 
 
+def make_idempotency_store():
+    """构建幂等存储的Mock，默认所有事件都预留成功"""
+    store = AsyncMock(spec=EventIdempotencyStore)
+    store.reserve.side_effect = lambda event_ids: [EventIdempotencyStore.RESERVED] * len(event_ids)
+    return store
+
+
 class TestEventService:
     """事件服务测试类"""
     
@@ -18,6 +31,8 @@ class TestEventService:
         """测试前准备"""
         self.mock_session = Mock(spec=Session)
         self.service = EventService(self.mock_session)
+        self.idempotency_store = make_idempotency_store()
+        self.service.idempotency_store = self.idempotency_store
     
     def test_init_with_session(self):
         """测试带数据库会话初始化"""
@@ -43,12 +58,9 @@ class TestEventService:
             timestamp=datetime.now(timezone.utc).isoformat()
         )
         
-        with patch.object(self.service.redis_service, 'get_cache') as mock_get_cache, \
-             patch.object(self.service, '_dispatch_event') as mock_dispatch, \
-             patch.object(self.service.redis_service, 'set_cache') as mock_set_cache, \
+        with patch.object(self.service, '_dispatch_event') as mock_dispatch, \
              patch.object(self.service.redis_service, 'publish_event') as mock_publish:
             
-            mock_get_cache.return_value = None  # 事件未处理过
             mock_dispatch.return_value = {"success": True, "status": "created", "entity_id": "proj123"}
             
             result = await self.service.process_event(event_request)
@@ -56,8 +68,9 @@ class TestEventService:
             assert result["success"] is True
             assert result["status"] == "created"
             
-            # 验证缓存和事件发布
-            mock_set_cache.assert_called_once()
+            # 验证预留、已处理标记和事件发布
+            self.idempotency_store.reserve.assert_awaited_once_with(["evt123"])
+            self.idempotency_store.complete.assert_awaited_once_with(["evt123"])
             mock_publish.assert_called_once()
     
     @pytest.mark.asyncio
@@ -72,14 +85,37 @@ class TestEventService:
             timestamp=datetime.now(timezone.utc).isoformat()
         )
         
-        with patch.object(self.service.redis_service, 'get_cache') as mock_get_cache:
-            mock_get_cache.return_value = {"processed_at": "2023-01-01T00:00:00Z"}
-            
+        self.idempotency_store.reserve.side_effect = None
+        self.idempotency_store.reserve.return_value = [EventIdempotencyStore.PROCESSED]
+        with patch.object(self.service, '_dispatch_event') as mock_dispatch:
             result = await self.service.process_event(event_request)
             
             assert result["success"] is True
             assert result["status"] == "already_processed"
             assert result["event_id"] == "evt123"
+            mock_dispatch.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_process_event_in_progress(self):
+        """测试并发的重复事件未获得预留时不处理，标记为可重试"""
+        event_request = EventRequest(
+            event_id="evt123",
+            event_type="CREATE",
+            entity_type="project",
+            entity_id="proj123",
+            payload={"project_name": "Test Project"},
+            timestamp=datetime.now(timezone.utc).isoformat()
+        )
+        
+        self.idempotency_store.reserve.side_effect = None
+        self.idempotency_store.reserve.return_value = [EventIdempotencyStore.IN_PROGRESS]
+        with patch.object(self.service, '_dispatch_event') as mock_dispatch:
+            result = await self.service.process_event(event_request)
+        
+        assert result["status"] == "in_progress"
+        assert result["retryable"] is True
+        mock_dispatch.assert_not_called()
+        self.idempotency_store.release.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_process_event_failure(self):
@@ -93,11 +129,9 @@ class TestEventService:
             timestamp=datetime.now(timezone.utc).isoformat()
         )
         
-        with patch.object(self.service.redis_service, 'get_cache') as mock_get_cache, \
-             patch.object(self.service, '_dispatch_event') as mock_dispatch, \
+        with patch.object(self.service, '_dispatch_event') as mock_dispatch, \
              patch.object(self.service.redis_service, 'publish_event') as mock_publish:
             
-            mock_get_cache.return_value = None
             mock_dispatch.side_effect = ValueError("不支持的实体类型: invalid")
             
             result = await self.service.process_event(event_request)
@@ -105,10 +139,235 @@ class TestEventService:
             assert result["success"] is False
             assert "error" in result
             
+            # 失败后释放预留，重新投递时可以再次处理
+            self.idempotency_store.release.assert_awaited_once_with(["evt123"])
+            self.idempotency_store.complete.assert_not_called()
+            
             # 验证发布失败事件
             call_args = mock_publish.call_args[0][1]
             assert call_args["status"] == "failed"
     
+    @pytest.mark.asyncio
+    async def test_process_events_batch(self):
+        """测试批量事件一次预留，失败的事件只回滚自身并释放预留，其余在同一事务中提交"""
+        def make_event(event_id, entity_type="project"):
+            return EventRequest(
+                event_id=event_id,
+                event_type="CREATE",
+                entity_type=entity_type,
+                entity_id=f"ent-{event_id}",
+                payload={"project_name": "Test Project", "project_code": event_id},
+                timestamp=datetime.now(timezone.utc).isoformat()
+            )
+        
+        events = [make_event("e1"), make_event("e2"), make_event("e3", "invalid"), make_event("e1"), make_event("e4")]
+        self.mock_session.begin_nested.return_value = MagicMock()
+        
+        async def handle(event_type, request):
+            return {"success": True, "status": "created", "entity_id": request.entity_id}
+        
+        self.idempotency_store.reserve.side_effect = None
+        self.idempotency_store.reserve.return_value = ["reserved", "processed", "reserved", "reserved"]
+        with patch.object(self.service.redis_service, 'publish_events') as mock_publish, \
+             patch.object(self.service, '_handle_project_event', side_effect=handle) as mock_handle:
+            
+            results = await self.service.process_events(events)
+        
+        assert [result.get("status") for result in results] == [
+            "created", "already_processed", None, "already_processed", "created"
+        ]
+        assert results[2]["success"] is False
+        assert "invalid" in results[2]["error"]
+        assert [call.args[1].event_id for call in mock_handle.call_args_list] == ["e1", "e4"]
+        # 批内重复的e1不参与预留
+        self.idempotency_store.reserve.assert_awaited_once_with(["e1", "e2", "e3", "e4"])
+        
+        # 每个可分发的事件一个SAVEPOINT，整批只提交一次
+        assert self.mock_session.begin_nested.call_count == 2
+        self.mock_session.commit.assert_called_once()
+        self.idempotency_store.complete.assert_awaited_once_with(["e1", "e4"])
+        self.idempotency_store.release.assert_awaited_once_with(["e3"])
+        published = mock_publish.call_args[0][1]
+        assert [(event["event_id"], event["status"]) for event in published] == [
+            ("e1", "success"), ("e3", "failed"), ("e4", "success")
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_process_events_defers_entity_behind_in_progress_event(self):
+        """测试同一实体更早的事件正在处理中时，其后的事件不应用并释放预留，其他实体照常处理"""
+        def make_event(event_id, entity_id, event_type="UPDATE"):
+            return EventRequest(
+                event_id=event_id,
+                event_type=event_type,
+                entity_type="project",
+                entity_id=entity_id,
+                payload={"project_name": "Test Project", "project_code": event_id},
+                timestamp=datetime.now(timezone.utc).isoformat()
+            )
+        
+        events = [make_event("e1", "p1", "CREATE"), make_event("e2", "p1"), make_event("e3", "p2")]
+        self.mock_session.begin_nested.return_value = MagicMock()
+        self.idempotency_store.reserve.side_effect = None
+        self.idempotency_store.reserve.return_value = [
+            EventIdempotencyStore.IN_PROGRESS, EventIdempotencyStore.RESERVED, EventIdempotencyStore.RESERVED
+        ]
+        
+        async def handle(event_type, request):
+            return {"success": True, "status": "updated", "entity_id": request.entity_id}
+        
+        with patch.object(self.service.redis_service, 'publish_events'), \
+             patch.object(self.service, '_handle_project_event', side_effect=handle) as mock_handle:
+            
+            results = await self.service.process_events(events)
+        
+        assert [result["status"] for result in results] == ["in_progress", "deferred", "updated"]
+        assert results[1]["retryable"] is True
+        assert [call.args[1].event_id for call in mock_handle.call_args_list] == ["e3"]
+        self.idempotency_store.complete.assert_awaited_once_with(["e3"])
+        self.idempotency_store.release.assert_awaited_once_with(["e2"])
+    
+    @pytest.mark.asyncio
+    async def test_process_events_commit_failure(self):
+        """测试整批提交失败时回滚并把所有待处理事件标记为可重试的失败"""
+        event = EventRequest(
+            event_id="evt123",
+            event_type="CREATE",
+            entity_type="project",
+            entity_id="proj123",
+            payload={"project_name": "Test Project", "project_code": "TEST"},
+            timestamp=datetime.now(timezone.utc).isoformat()
+        )
+        self.mock_session.begin_nested.return_value = MagicMock()
+        self.mock_session.commit.side_effect = RuntimeError("connection lost")
+        
+        with patch.object(self.service.redis_service, 'publish_events'), \
+             patch.object(self.service, '_handle_project_event',
+                          AsyncMock(return_value={"success": True, "status": "created"})):
+            
+            results = await self.service.process_events([event])
+        
+        assert results == [{"success": False, "error": "connection lost", "event_id": "evt123", "retryable": True}]
+        self.mock_session.rollback.assert_called_once()
+        self.idempotency_store.complete.assert_awaited_once_with([])
+        self.idempotency_store.release.assert_awaited_once_with(["evt123"])
+    
+    @pytest.mark.asyncio
+    async def test_process_events_coalesce(self):
+        """测试开启合并时只应用净事件，被合并和抵消的事件也写入已处理标记"""
+        def make_event(event_id, event_type, entity_id, **payload):
+            return EventRequest(
+                event_id=event_id,
+                event_type=event_type,
+                entity_type="project",
+                entity_id=entity_id,
+                payload=payload,
+                timestamp="2025-07-15T14:20:00Z"
+            )
+        
+        events = [
+            make_event("e1", "UPDATE", "p1", project_name="A"),
+            make_event("e2", "UPDATE", "p1", project_name="B"),
+            make_event("e3", "CREATE", "p2", id="p2"),
+            make_event("e4", "DELETE", "p2")
+        ]
+        self.mock_session.begin_nested.return_value = MagicMock()
+        handler = AsyncMock(return_value={"success": True, "status": "updated", "entity_id": "p1"})
+        
+        with patch.object(self.service.settings, 'EVENT_COALESCE', True), \
+             patch.object(self.service.redis_service, 'publish_events'), \
+             patch.object(self.service, '_handle_project_event', handler):
+            
+            results = await self.service.process_events(events)
+        
+        handler.assert_awaited_once()
+        assert handler.call_args[0][1].payload == {"project_name": "B"}
+        assert [result["status"] for result in results] == ["updated", "coalesced", "cancelled", "cancelled"]
+        assert results[1]["coalesced_into"] == "e1"
+        self.idempotency_store.complete.assert_awaited_once_with(["e1", "e2", "e3", "e4"])
+        self.mock_session.commit.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_process_events_connection_error_is_retryable(self):
+        """测试数据库连接错误使整批回滚并标记为可重试"""
+        from sqlalchemy.exc import OperationalError
+        
+        event = EventRequest(
+            event_id="evt123",
+            event_type="CREATE",
+            entity_type="project",
+            entity_id="proj123",
+            payload={"project_name": "Test Project", "project_code": "TEST"},
+            timestamp=datetime.now(timezone.utc).isoformat()
+        )
+        self.mock_session.begin_nested.return_value = MagicMock()
+        
+        with patch.object(self.service.redis_service, 'publish_events'), \
+             patch.object(self.service, '_handle_project_event',
+                          AsyncMock(side_effect=OperationalError("INSERT", {}, Exception("server closed")))):
+            
+            results = await self.service.process_events([event, event.model_copy(update={"event_id": "evt124"})])
+        
+        assert all(result["retryable"] and not result["success"] for result in results)
+        self.mock_session.rollback.assert_called_once()
+        self.mock_session.commit.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_enqueue_event(self):
+        """测试事件按entity_id写入分区事件流"""
+        event = EventRequest(
+            event_id="evt123",
+            event_type="CREATE",
+            entity_type="project",
+            entity_id="proj123",
+            payload={"project_name": "Test Project"},
+            timestamp="2025-07-15T14:20:00Z"
+        )
+        
+        with patch.object(self.service.redis_service, 'publish_event', return_value="1-0") as mock_publish:
+            assert await self.service.enqueue_event(event) == "1-0"
+        
+        stream, fields = mock_publish.call_args[0]
+        assert stream == f"events:ingest:{event_partition('proj123', 16)}"
+        assert fields["event_id"] == "evt123"
+        assert EventRequest(**fields["event"]) == event
+    
+    @pytest.mark.asyncio
+    async def test_enqueue_events_one_pipeline_per_partition(self):
+        """测试批量入队时每个分区用一次pipeline写入，分区内保持数组顺序"""
+        entity_ids = ["proj-a", "proj-b", "proj-a"]
+        events = [
+            EventRequest(
+                event_id=f"evt{index}",
+                event_type="UPDATE",
+                entity_type="project",
+                entity_id=entity_id,
+                payload={},
+                timestamp="2025-07-15T14:20:00Z"
+            )
+            for index, entity_id in enumerate(entity_ids)
+        ]
+        
+        with patch.object(self.service.redis_service, 'publish_events',
+                          side_effect=lambda stream, fields: [f"{index}-0" for index in range(len(fields))]) as mock_publish:
+            assert await self.service.enqueue_events(events) is True
+        
+        published = {call[0][0]: [fields["event_id"] for fields in call[0][1]] for call in mock_publish.call_args_list}
+        assert published[f"events:ingest:{event_partition('proj-a', 16)}"][-2:] == ["evt0", "evt2"]
+        assert "evt1" in published[f"events:ingest:{event_partition('proj-b', 16)}"]
+        assert sum(len(ids) for ids in published.values()) == 3
+        
+        with patch.object(self.service.redis_service, 'publish_events', return_value=[None]):
+            assert await self.service.enqueue_events(events[:1]) is False
+    
+    def test_event_partition_is_stable(self):
+        """测试分区只由entity_id决定，且落在分区范围内"""
+        partitions = {event_partition(f"proj-{i}", 16) for i in range(200)}
+        
+        assert event_partition("proj123", 16) == event_partition("proj123", 16)
+        assert partitions <= set(range(16))
+        assert len(partitions) > 1
+        assert event_partition("proj123", 0) == 0
+    
     @pytest.mark.asyncio
     async def test_dispatch_event_project(self):
         """测试分发项目事件"""
@@ -129,6 +388,63 @@ class TestEventService:
             assert result["success"] is True
             mock_handle.assert_called_once_with("CREATE", event_request)
     
+    @pytest.mark.asyncio
+    async def test_dispatch_event_runs_in_db_executor(self):
+        """测试事件处理器在数据库线程池中执行，不阻塞事件循环"""
+        event_request = EventRequest(
+            event_id="evt123",
+            event_type="CREATE",
+            entity_type="project",
+            entity_id="proj123",
+            payload={"project_name": "Test Project", "project_code": "TEST"},
+            timestamp=datetime.now(timezone.utc).isoformat()
+        )
+        ticks = []
+        
+        async def slow_handler(event_type, request):
+            # 模拟同步Session的阻塞调用
+            time.sleep(0.2)
+            return {"success": True, "thread": threading.current_thread().name}
+        
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+        
+        with patch.object(self.service, '_handle_project_event', side_effect=slow_handler):
+            result, _ = await asyncio.gather(self.service._dispatch_event(event_request), ticker())
+        
+        assert result["thread"].startswith("db")
+        assert ticks[-1] - ticks[0] < 0.15
+    
+    @pytest.mark.asyncio
+    async def test_process_event_with_async_session(self):
+        """测试AsyncSession使用异步仓储在事件循环中处理并提交"""
+        async_session = Mock(spec=AsyncSession)
+        service = EventService(async_session)
+        assert isinstance(service.project_repo, AsyncProjectRepository)
+        
+        service.project_repo = Mock()
+        service.project_repo.create = AsyncMock(return_value=Mock(id="proj123"))
+        event_request = EventRequest(
+            event_id="evt123",
+            event_type="CREATE",
+            entity_type="project",
+            entity_id="proj123",
+            payload={"project_name": "Test Project", "project_code": "TEST"},
+            timestamp=datetime.now(timezone.utc).isoformat()
+        )
+        
+        service.idempotency_store = make_idempotency_store()
+        with patch.object(service.redis_service, 'publish_event'), \
+             patch('src.services.event_service.run_coroutine_in_db_executor') as mock_executor:
+            result = await service.process_event(event_request)
+        
+        assert result["status"] == "created"
+        assert result["entity_id"] == "proj123"
+        async_session.commit.assert_awaited_once()
+        mock_executor.assert_not_called()
+    
     @pytest.mark.asyncio
     async def test_dispatch_event_unsupported_entity(self):
         """测试不支持的实体类型"""
@@ -909,13 +1225,11 @@ class TestEventService:
             timestamp=datetime.now(timezone.utc).isoformat()
         )
         
+        service.idempotency_store = make_idempotency_store()
         with patch.object(service, '_init_repositories') as mock_init, \
-             patch.object(service.redis_service, 'get_cache') as mock_get_cache, \
              patch.object(service, '_dispatch_event') as mock_dispatch, \
-             patch.object(service.redis_service, 'set_cache'), \
              patch.object(service.redis_service, 'publish_event'):
             
-            mock_get_cache.return_value = None
             mock_dispatch.return_value = {"success": True, "status": "created"}
             
             await service.process_event(event_request, session=mock_session)
@@ -0,0 +1,131 @@
+"""
+事件幂等存储测试
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.services.idempotency_store import EventIdempotencyStore, ProcessedEventCache
+
+
+class TestProcessedEventCache:
+    """已处理事件缓存测试类"""
+    
+    def test_evicts_least_recently_used(self):
+        """测试超出容量时淘汰最久未使用的事件"""
+        cache = ProcessedEventCache(2)
+        cache.add([b"a", b"b"])
+        assert b"a" in cache
+        
+        cache.add([b"c"])
+        
+        assert b"b" not in cache
+        assert b"a" in cache and b"c" in cache
+        assert len(cache) == 2
+    
+    def test_disabled(self):
+        """测试容量为0时不缓存"""
+        cache = ProcessedEventCache(0)
+        cache.add([b"a"])
+        assert b"a" not in cache
+
+
+class TestEventIdempotencyStore:
+    """事件幂等存储测试类"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.redis_service = AsyncMock()
+        self.redis_service.get_cache_many.side_effect = lambda keys: [None] * len(keys)
+        self.store = EventIdempotencyStore(self.redis_service, ProcessedEventCache(100))
+    
+    def test_member_is_compact_and_stable(self):
+        """测试事件ID摘要为固定的12字节"""
+        member = EventIdempotencyStore.member("evt-0001")
+        assert len(member) == 12
+        assert member == EventIdempotencyStore.member("evt-0001")
+        assert member != EventIdempotencyStore.member("evt-0002")
+    
+    def test_bucket_keys_cover_retention(self):
+        """测试分桶键从当前小时向前覆盖整个保留期，当前桶在保留期结束后过期"""
+        now = 1752588000.0 + 1800  # 某个整点后30分钟
+        keys = self.store._bucket_keys(now)
+        
+        assert len(keys) == 25
+        assert keys[0] == "events:processed:486830"
+        assert keys[-1] == "events:processed:486806"
+        assert self.store._expire_at(now) == 486831 * 3600 + 86400
+        
+        with patch.object(self.store.settings, 'EVENT_IDEMPOTENCY_BUCKET_SECONDS', 6 * 3600):
+            assert len(self.store._bucket_keys(now)) == 5
+    
+    @pytest.mark.asyncio
+    async def test_reserve_maps_states(self):
+        """测试一次调用预留整批事件，已处理的事件写入进程内缓存"""
+        self.redis_service.reserve_events.return_value = [0, 1, 2]
+        
+        states = await self.store.reserve(["e1", "e2", "e3"])
+        
+        assert states == ["reserved", "processed", "in_progress"]
+        keys, members, now_ms, reserve_until_ms, expire_at = self.redis_service.reserve_events.call_args[0]
+        assert len(keys) == 25
+        assert members == [EventIdempotencyStore.member(event_id) for event_id in ["e1", "e2", "e3"]]
+        assert reserve_until_ms - now_ms == 60000
+        assert EventIdempotencyStore.member("e2") in self.store.cache
+    
+    @pytest.mark.asyncio
+    async def test_reserve_honours_legacy_markers(self):
+        """测试升级前的逐事件标记仍然有效，命中后写入新的已处理标记"""
+        self.redis_service.reserve_events.return_value = [0, 0, 1]
+        self.redis_service.get_cache_many.side_effect = lambda keys: [{"processed_at": "x"}, None]
+        
+        states = await self.store.reserve(["e1", "e2", "e3"])
+        
+        assert states == ["processed", "reserved", "processed"]
+        self.redis_service.get_cache_many.assert_awaited_once_with(["event:processed:e1", "event:processed:e2"])
+        assert self.redis_service.complete_events.call_args[0][1] == [EventIdempotencyStore.member("e1")]
+        assert EventIdempotencyStore.member("e1") in self.store.cache
+        
+        self.redis_service.get_cache_many.reset_mock()
+        with patch.object(self.store.settings, 'EVENT_IDEMPOTENCY_LEGACY_KEYS', False):
+            await self.store.reserve(["e4"])
+        self.redis_service.get_cache_many.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_reserve_cache_hit_skips_redis(self):
+        """测试进程内缓存命中的事件不访问Redis"""
+        self.store.cache.add([EventIdempotencyStore.member("e1")])
+        self.redis_service.reserve_events.return_value = [0]
+        
+        assert await self.store.reserve(["e1"]) == ["processed"]
+        self.redis_service.reserve_events.assert_not_called()
+        
+        assert await self.store.reserve(["e1", "e2"]) == ["processed", "reserved"]
+        assert self.redis_service.reserve_events.call_args[0][1] == [EventIdempotencyStore.member("e2")]
+    
+    @pytest.mark.asyncio
+    async def test_reserve_redis_unavailable(self):
+        """测试Redis不可用时不阻塞事件处理"""
+        self.redis_service.reserve_events.return_value = None
+        
+        assert await self.store.reserve(["e1", "e2"]) == ["reserved", "reserved"]
+    
+    @pytest.mark.asyncio
+    async def test_complete_and_release(self):
+        """测试完成写入当前桶并缓存，释放查找当前桶和上一个桶"""
+        await self.store.complete(["e1"])
+        
+        key, members, expire_at = self.redis_service.complete_events.call_args[0]
+        assert key == self.store._bucket_keys(expire_at - 86400 - 1, 1)[0]
+        assert members == [EventIdempotencyStore.member("e1")]
+        assert EventIdempotencyStore.member("e1") in self.store.cache
+        
+        await self.store.release(["e2"])
+        keys, members = self.redis_service.release_events.call_args[0]
+        assert len(keys) == 2
+        assert members == [EventIdempotencyStore.member("e2")]
+        
+        await self.store.complete([])
+        await self.store.release([])
+        assert self.redis_service.complete_events.await_count == 1
+        assert self.redis_service.release_events.await_count == 1
@@ -2,12 +2,20 @@
 Model Garden客户端测试
 """
 
+import gzip
+import json
 import pytest
 import httpx
 from unittest.mock import AsyncMock, Mock, patch
 from datetime import datetime, timezone
 
-from src.services.model_garden_client import ModelGardenClient
+from src.services.model_garden_client import (
+    ModelGardenClient,
+    close_shared_client,
+    get_shared_client,
+    open_shared_client,
+)
+from src.utils.payload_codec import json_dumps, json_loads
 
 
 class TestModelGardenClient:
@@ -50,7 +58,8 @@ class TestModelGardenClient:
             
             mock_response = Mock()
             mock_response.status_code = 200
-            mock_response.json.return_value = mock_response_data
+            mock_response.headers = {"content-type": "application/json"}
+            mock_response.content = json.dumps(mock_response_data).encode()
             mock_client.post.return_value = mock_response
             
             result = await self.client.sync_all()
@@ -71,7 +80,8 @@ class TestModelGardenClient:
             
             mock_response = Mock()
             mock_response.status_code = 200
-            mock_response.json.return_value = mock_response_data
+            mock_response.headers = {"content-type": "application/json"}
+            mock_response.content = json.dumps(mock_response_data).encode()
             mock_client.post.return_value = mock_response
             
             result = await self.client.sync_all(updated_since)
@@ -79,8 +89,8 @@ class TestModelGardenClient:
             assert result == mock_response_data
             # 验证请求参数包含updated_since
             call_args = mock_client.post.call_args
-            assert "json" in call_args.kwargs
-            assert "updated_since" in call_args.kwargs["json"]
+            assert "content" in call_args.kwargs
+            assert "updated_since" in json.loads(call_args.kwargs["content"])
     
     @pytest.mark.asyncio
     async def test_sync_all_http_error(self):
@@ -196,4 +206,210 @@ class TestModelGardenClient:
                 )
             
             assert call_count == 2  # 原始调用 + 1次重试
-            mock_sleep.assert_called_once_with(0.5)  # base_delay * 2^0 
\ No newline at end of file
+            mock_sleep.assert_called_once_with(0.5)  # base_delay * 2^0
+    
+    @pytest.mark.asyncio
+    async def test_stream_sync_all_yields_chunks(self):
+        """测试流式同步按块产出各实体数组"""
+        body = (
+            b'{"projects": [{"id": "p1", "tags": {"a": 1}}, {"id": "p2"}, {"id": "p3"}],'
+            b' "use_cases": [], "limits": [{"id": "l1"}]}'
+        )
+        
+        async def body_stream():
+            # 模拟网络分片，切分点落在对象中间
+            for offset in range(0, len(body), 7):
+                yield body[offset:offset + 7]
+        
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body_stream()))
+        with patch.dict(self.client.client_config, {"transport": transport}):
+            chunks = [chunk async for chunk in self.client.stream_sync_all(chunk_size=2)]
+        
+        assert chunks == [
+            ("projects", [{"id": "p1", "tags": {"a": 1}}, {"id": "p2"}]),
+            ("projects", [{"id": "p3"}]),
+            ("limits", [{"id": "l1"}])
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_stream_sync_all_parses_floats(self):
+        """测试流式解析的小数与整体解析一致为float，可直接序列化"""
+        body = b'{"pricing": [{"id": "m1", "input_price": 0.002, "output_price": 1.5e-3, "tokens": 10}]}'
+        
+        async def body_stream():
+            yield body
+        
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body_stream()))
+        with patch.dict(self.client.client_config, {"transport": transport}):
+            chunks = [chunk async for chunk in self.client.stream_sync_all(chunk_size=10)]
+        
+        assert chunks == [("pricing", [json.loads(body)["pricing"][0]])]
+        row = chunks[0][1][0]
+        assert type(row["input_price"]) is float and type(row["tokens"]) is int
+        assert json_loads(json_dumps(row)) == row
+    
+    @pytest.mark.asyncio
+    async def test_paginated_sync_all(self):
+        """测试分页获取按实体顺序产出，带total的实体并发翻页"""
+        limits = [{"id": f"l{i}"} for i in range(5)]
+        requests = []
+        
+        def handler(request):
+            body = json.loads(request.content)
+            requests.append(body)
+            entity, offset, limit = body["entities"][0], body["offset"], body["limit"]
+            if entity == "limits":
+                return httpx.Response(200, json={"limits": limits[offset:offset + limit], "total": len(limits)})
+            if entity == "projects":
+                # 无total时顺序翻页直到不满一页
+                return httpx.Response(200, json={"projects": [{"id": "p1"}, {"id": "p2"}][offset:offset + limit]})
+            return httpx.Response(200, json={entity: []})
+        
+        with patch.dict(self.client.client_config, {"transport": httpx.MockTransport(handler)}):
+            pages = [page async for page in self.client.paginated_sync_all(page_size=2, concurrency=2)]
+        
+        assert [key for key, _ in pages] == ["projects", "limits", "limits", "limits"]
+        assert pages[0] == ("projects", [{"id": "p1"}, {"id": "p2"}])
+        assert sorted(row["id"] for key, rows in pages if key == "limits" for row in rows) == \
+            [row["id"] for row in limits]
+        assert sorted(r["offset"] for r in requests if r["entities"] == ["projects"]) == [0, 2]
+    
+    @pytest.mark.asyncio
+    async def test_paginated_sync_all_retries_failed_page(self):
+        """测试单页失败时只重试该页"""
+        attempts = {}
+        
+        def handler(request):
+            body = json.loads(request.content)
+            key = (body["entities"][0], body["offset"])
+            attempts[key] = attempts.get(key, 0) + 1
+            if key == ("models", 0) and attempts[key] == 1:
+                return httpx.Response(503)
+            return httpx.Response(200, json={body["entities"][0]: [{"id": "m1"}] if key[0] == "models" else []})
+        
+        with patch.dict(self.client.client_config, {"transport": httpx.MockTransport(handler)}), \
+             patch("asyncio.sleep", new_callable=AsyncMock):
+            pages = [page async for page in self.client.paginated_sync_all(page_size=10)]
+        
+        assert pages == [("models", [{"id": "m1"}])]
+        assert attempts[("models", 0)] == 2
+        assert attempts[("projects", 0)] == 1
+    
+    @pytest.mark.asyncio
+    async def test_shared_client_reused_across_instances(self):
+        """测试共享客户端打开后各实例复用同一连接池"""
+        requests = []
+        
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"projects": []})
+        
+        client = await open_shared_client(transport=httpx.MockTransport(handler))
+        try:
+            assert await open_shared_client() is client
+            with patch("httpx.AsyncClient") as mock_async_client:
+                await ModelGardenClient().sync_all()
+                await ModelGardenClient().sync_all()
+                mock_async_client.assert_not_called()
+            assert len(requests) == 2
+            assert requests[0].headers["Authorization"].startswith("Bearer ")
+        finally:
+            await close_shared_client()
+        
+        assert client.is_closed
+        assert get_shared_client() is None
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_if_changed_not_modified(self):
+        """测试携带校验信息时304直接返回None"""
+        seen = {}
+        
+        def handler(request):
+            seen.update(request.headers)
+            return httpx.Response(304)
+        
+        validators = {"etag": None, "last_modified": "Wed, 01 Jul 2025 00:00:00 GMT", "digest": "abc"}
+        with patch.dict(self.client.client_config, {"transport": httpx.MockTransport(handler)}):
+            data, current = await self.client.sync_all_if_changed(validators=validators)
+        
+        assert data is None
+        assert current == validators
+        assert seen["if-none-match"] == '"abc"'
+        assert seen["if-modified-since"] == validators["last_modified"]
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_if_changed_digest(self):
+        """测试服务端不支持条件请求时按响应体摘要判断是否变化"""
+        body = b'{"projects": [{"id": "p1"}]}'
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body, headers={"ETag": '"v1"'}))
+        
+        with patch.dict(self.client.client_config, {"transport": transport}):
+            data, current = await self.client.sync_all_if_changed()
+            assert data == {"projects": [{"id": "p1"}]}
+            assert current["etag"] == '"v1"'
+            
+            with patch("src.services.model_garden_client.decode_body") as mock_decode:
+                data, _ = await self.client.sync_all_if_changed(validators=current)
+                mock_decode.assert_not_called()
+        
+        assert data is None
+    
+    @pytest.mark.asyncio
+    async def test_stream_sync_all_http_error(self):
+        """测试流式同步HTTP错误"""
+        transport = httpx.MockTransport(lambda request: httpx.Response(500, content=b"boom"))
+        with patch.dict(self.client.client_config, {"transport": transport}):
+            with pytest.raises(httpx.HTTPStatusError):
+                async for _ in self.client.stream_sync_all():
+                    pass
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_msgpack_zstd_response(self):
+        """测试协商MessagePack和zstd时解压并解析响应"""
+        msgpack = pytest.importorskip("msgpack")
+        zstandard = pytest.importorskip("zstandard")
+        payload = {"projects": [{"id": "p1"}], "limits": [{"id": "l1", "limit_value": 10}]}
+        seen = {}
+        
+        def handler(request):
+            seen.update(request.headers)
+            body = zstandard.ZstdCompressor().compress(msgpack.packb(payload))
+            return httpx.Response(
+                200, content=body,
+                headers={"Content-Type": "application/msgpack", "Content-Encoding": "zstd"}
+            )
+        
+        with patch.dict(self.client.client_config, {"transport": httpx.MockTransport(handler)}), \
+             patch.object(self.client.settings, "MODEL_GARDEN_PAYLOAD_FORMAT", "msgpack"):
+            data = await self.client.sync_all()
+        
+        assert data == payload
+        assert seen["accept"].startswith("application/msgpack")
+        assert seen["accept-encoding"] == "zstd, gzip"
+    
+    @pytest.mark.asyncio
+    async def test_request_compression_and_zstd_stream(self):
+        """测试请求体按配置压缩，流式同步增量解压zstd响应"""
+        zstandard = pytest.importorskip("zstandard")
+        body = b'{"projects": [{"id": "p1"}, {"id": "p2"}], "limits": [{"id": "l1"}]}'
+        compressed = zstandard.ZstdCompressor().compress(body)
+        requests = []
+        
+        async def body_stream():
+            for offset in range(0, len(compressed), 5):
+                yield compressed[offset:offset + 5]
+        
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, content=body_stream(), headers={"Content-Encoding": "zstd"})
+        
+        watermarks = {"limits": {"updated_since": "2025-01-01T00:00:00", "after_id": "l0"}}
+        with patch.dict(self.client.client_config, {"transport": httpx.MockTransport(handler)}), \
+             patch.object(self.client.settings, "MODEL_GARDEN_REQUEST_ENCODING", "gzip"), \
+             patch.object(self.client.settings, "MODEL_GARDEN_REQUEST_COMPRESS_MIN_BYTES", 0):
+            chunks = [chunk async for chunk in self.client.stream_sync_all(chunk_size=10, watermarks=watermarks)]
+        
+        assert chunks == [("projects", [{"id": "p1"}, {"id": "p2"}]), ("limits", [{"id": "l1"}])]
+        assert requests[0].headers["content-encoding"] == "gzip"
+        assert requests[0].headers["accept"] == "application/json"
+        assert json.loads(gzip.decompress(requests[0].content))["watermarks"] == watermarks
@@ -4,7 +4,7 @@ Redis服务测试
 
 import pytest
 import json
-from unittest.mock import AsyncMock, Mock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 from datetime import datetime
 
 from src.services.redis_service import RedisService
@@ -96,8 +96,11 @@ class TestRedisService:
             result = await self.service.set_cache("test_key", test_dict)
             
             assert result is True
-            expected_json = json.dumps(test_dict, ensure_ascii=False)
-            mock_client.set.assert_called_once_with("test_key", expected_json, ex=None)
+            mock_client.set.assert_called_once()
+            key, value = mock_client.set.call_args.args
+            assert key == "test_key"
+            assert json.loads(value) == test_dict
+            assert mock_client.set.call_args.kwargs == {"ex": None}
     
     @pytest.mark.asyncio
     async def test_set_cache_error(self):
@@ -212,6 +215,207 @@ class TestRedisService:
             assert "source" in event_with_metadata
             assert event_with_metadata["source"] == "synchronize_api"
     
+    @pytest.mark.asyncio
+    async def test_publish_event_serializes_nested_fields(self):
+        """测试Stream字段中的字典、布尔值和None按序列化器编码"""
+        with patch.object(self.service, 'get_client') as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.xadd.return_value = "1-0"
+            mock_get_client.return_value = mock_client
+            
+            await self.service.publish_event("sync_events", {
+                "event_type": "sync_completed",
+                "totals": {"created": 3, "名称": "项目"},
+                "not_modified": False,
+                "error": None,
+                "duration_seconds": 1.5
+            })
+            
+            fields = mock_client.xadd.call_args[0][1]
+            assert json.loads(fields["totals"]) == {"created": 3, "名称": "项目"}
+            assert fields["not_modified"] == b"false"
+            assert fields["error"] == b"null"
+            assert fields["duration_seconds"] == 1.5
+            assert fields["event_type"] == "sync_completed"
+    
+    @pytest.mark.asyncio
+    async def test_batch_cache_and_publish(self):
+        """测试批量缓存用一次MGET读取，批量写入和发布各用一次pipeline"""
+        with patch.object(self.service, 'get_client') as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.mget.return_value = [None, b'{"processed_at": "2025-07-20"}', b"plain"]
+            mock_pipeline = Mock()
+            mock_pipeline.execute = AsyncMock(side_effect=[[True, True], ["1-0", "1-1"]])
+            mock_client.pipeline = Mock(return_value=mock_pipeline)
+            mock_get_client.return_value = mock_client
+            
+            values = await self.service.get_cache_many(["a", "b", "c"])
+            assert values == [None, {"processed_at": "2025-07-20"}, "plain"]
+            mock_client.mget.assert_awaited_once_with(["a", "b", "c"])
+            
+            assert await self.service.set_cache_many({"a": {"x": 1}, "b": "v"}, expire=60) is True
+            mock_pipeline.set.assert_any_call("a", self.service.serializer.dumps({"x": 1}), ex=60)
+            
+            event_ids = await self.service.publish_events("event_processed", [
+                {"event_id": "e1", "status": "success"},
+                {"event_id": "e2", "status": "failed", "error": None}
+            ])
+            assert event_ids == ["1-0", "1-1"]
+            assert [call.args[1]["event_id"] for call in mock_pipeline.xadd.call_args_list] == ["e1", "e2"]
+            assert mock_pipeline.xadd.call_args_list[1].args[1]["error"] == b"null"
+            assert mock_pipeline.execute.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_batch_cache_redis_unavailable(self):
+        """测试Redis不可用时批量读取返回全None，批量发布返回全None"""
+        with patch.object(self.service, 'get_client', side_effect=ConnectionError("down")):
+            assert await self.service.get_cache_many(["a", "b"]) == [None, None]
+            assert await self.service.set_cache_many({"a": 1}) is False
+            assert await self.service.publish_events("s", [{"a": 1}]) == [None]
+    
+    @pytest.mark.asyncio
+    async def test_claim_and_ack_events(self):
+        """测试认领空闲事件并用一次XACK确认多个事件"""
+        with patch.object(self.service, 'get_client') as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.xautoclaim.return_value = [b"0-0", [(b"1-0", {b"event": b"{}"}), (b"1-1", None)], []]
+            mock_client.xack.return_value = 2
+            mock_get_client.return_value = mock_client
+            
+            events = await self.service.claim_events("events:ingest", "group", "c1", 30000, count=5)
+            assert events == [{"id": b"1-0", "stream": "events:ingest", b"event": b"{}"}]
+            mock_client.xautoclaim.assert_awaited_once_with(
+                "events:ingest", "group", "c1", 30000, start_id="0-0", count=5
+            )
+            
+            assert await self.service.ack_events("events:ingest", "group", [b"1-0", b"1-1"]) == 2
+            mock_client.xack.assert_awaited_once_with("events:ingest", "group", b"1-0", b"1-1")
+            assert await self.service.ack_events("events:ingest", "group", []) == 0
+    
+    @pytest.mark.asyncio
+    async def test_read_events_creates_group_once(self):
+        """测试消费者组只创建一次，NOGROUP错误后重新创建"""
+        import redis.asyncio as redis
+        
+        with patch.object(self.service, 'get_client') as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.xgroup_create.side_effect = redis.ResponseError("BUSYGROUP Consumer Group name already exists")
+            mock_client.xreadgroup.return_value = []
+            mock_get_client.return_value = mock_client
+            
+            await self.service.read_events("test_stream", "test_group", "c1", block_ms=None)
+            await self.service.read_events("test_stream", "test_group", "c1", block_ms=None)
+            assert mock_client.xgroup_create.await_count == 1
+            assert mock_client.xreadgroup.call_args[1]["block"] is None
+            
+            mock_client.xreadgroup.side_effect = redis.ResponseError("NOGROUP No such key")
+            await self.service.read_events("test_stream", "test_group", "c1")
+            mock_client.xreadgroup.side_effect = None
+            await self.service.read_events("test_stream", "test_group", "c1")
+            assert mock_client.xgroup_create.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_stream_group_info(self):
+        """测试获取事件流长度、待确认数和积压数"""
+        with patch.object(self.service, 'get_client') as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.xlen.return_value = 10
+            mock_client.xinfo_groups.return_value = [
+                {"name": b"other", "pending": 9, "lag": 9},
+                {"name": b"test_group", "pending": 2, "lag": 3}
+            ]
+            mock_get_client.return_value = mock_client
+            
+            assert await self.service.stream_group_info("s", "test_group") == {"length": 10, "pending": 2, "lag": 3}
+            assert await self.service.stream_group_info("s", "missing") == {"length": 10, "pending": 0, "lag": 10}
+            
+            mock_client.xlen.side_effect = Exception("Redis error")
+            assert await self.service.stream_group_info("s", "test_group") is None
+    
+    @pytest.mark.asyncio
+    async def test_lease_lifecycle(self):
+        """测试租约以持有者为值获取、续租和释放"""
+        with patch.object(self.service, 'get_client') as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.set.return_value = True
+            mock_client.eval.return_value = 1
+            mock_get_client.return_value = mock_client
+            
+            assert await self.service.acquire_lease("lease", "c1", 30000) is True
+            mock_client.set.assert_awaited_once_with("lease", "c1", nx=True, px=30000)
+            assert await self.service.renew_lease("lease", "c1", 30000) is True
+            assert mock_client.eval.call_args[0][1:] == (1, "lease", "c1", 30000)
+            assert await self.service.release_lease("lease", "c1") is True
+            
+            mock_client.set.side_effect = Exception("Redis error")
+            assert await self.service.acquire_lease("lease", "c2", 30000) is False
+    
+    @pytest.mark.asyncio
+    async def test_trim_acknowledged(self):
+        """测试裁剪到最早的未确认条目，没有未确认条目时裁剪到最后投递的条目之后"""
+        with patch.object(self.service, 'get_client') as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.xpending.return_value = {"pending": 2, "min": b"5-1", "max": b"6-0", "consumers": []}
+            mock_client.xtrim.return_value = 7
+            mock_get_client.return_value = mock_client
+            
+            assert await self.service.trim_acknowledged("events:ingest:0", "event_appliers") == 7
+            mock_client.xtrim.assert_awaited_with("events:ingest:0", minid=b"5-1", approximate=True)
+            
+            mock_client.xpending.return_value = {"pending": 0, "min": None, "max": None, "consumers": []}
+            mock_client.xinfo_groups.return_value = [{"name": b"event_appliers", "last-delivered-id": b"6-0"}]
+            await self.service.trim_acknowledged("events:ingest:0", "event_appliers")
+            mock_client.xtrim.assert_awaited_with("events:ingest:0", minid="6-1", approximate=True)
+            
+            mock_client.xpending.side_effect = Exception("NOGROUP")
+            assert await self.service.trim_acknowledged("events:ingest:0", "event_appliers") == 0
+    
+    @pytest.mark.asyncio
+    async def test_reserve_complete_release_events(self):
+        """测试预留用一次Lua调用，完成用一次pipeline，Redis不可用时预留返回None"""
+        with patch.object(self.service, 'get_client') as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.eval.return_value = [0, 1, 2]
+            mock_pipeline = MagicMock()
+            mock_pipeline.execute = AsyncMock(return_value=[1, True])
+            mock_client.pipeline = MagicMock(return_value=mock_pipeline)
+            mock_get_client.return_value = mock_client
+            
+            states = await self.service.reserve_events(["b2", "b1"], [b"m1", b"m2", b"m3"], 1000, 61000, 7200)
+            assert states == [0, 1, 2]
+            assert mock_client.eval.call_args[0][1:] == (2, "b2", "b1", 1000, 61000, 7200, b"m1", b"m2", b"m3")
+            
+            assert await self.service.complete_events("b2", [b"m1"], 7200) is True
+            mock_pipeline.hset.assert_called_once_with("b2", mapping={b"m1": 1})
+            mock_pipeline.expireat.assert_called_once_with("b2", 7200)
+            
+            mock_client.eval.return_value = 1
+            assert await self.service.release_events(["b2", "b1"], [b"m1"]) == 1
+            
+            mock_client.eval.side_effect = Exception("Redis error")
+            assert await self.service.reserve_events(["b2"], [b"m1"], 1000, 61000, 7200) is None
+    
+    @pytest.mark.asyncio
+    async def test_custom_serializer(self):
+        """测试可注入自定义序列化器，标准库实现与orjson输出一致"""
+        from src.utils.serializers import JsonSerializer, get_serializer
+        
+        service = RedisService(serializer=JsonSerializer())
+        with patch.object(service, 'get_client') as mock_get_client:
+            mock_client = AsyncMock()
+            mock_get_client.return_value = mock_client
+            value = {"at": datetime(2025, 1, 1, 8, 30), "名称": "项目"}
+            
+            await service.set_cache("key", value)
+            stored = mock_client.set.call_args.args[1]
+            assert stored == get_serializer("orjson").dumps(value)
+            
+            mock_client.get.return_value = stored
+            assert await service.get_cache("key") == {"at": "2025-01-01T08:30:00", "名称": "项目"}
+        
+        with pytest.raises(ValueError):
+            get_serializer("pickle")
+    
     @pytest.mark.asyncio
     async def test_publish_event_error(self):
         """测试发布事件出错"""
@@ -348,4 +552,55 @@ class TestRedisService:
             
             result = await self.service.health_check()
             
-            assert result is False 
\ No newline at end of file
+            assert result is False
+    
+    @pytest.mark.asyncio
+    async def test_acquire_sync_lock(self):
+        """测试获取同步锁返回栅栏令牌，锁被占用时返回None，Redis不可用时返回0"""
+        with patch.object(self.service, 'get_client') as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.eval.side_effect = [7, None, Exception("Redis error")]
+            mock_get_client.return_value = mock_client
+            
+            assert await self.service.acquire_sync_lock(30) == 7
+            assert await self.service.acquire_sync_lock(30) is None
+            assert await self.service.acquire_sync_lock(30) == 0
+            
+            args = mock_client.eval.call_args_list[0].args
+            assert args[1:] == (2, "sync:lock", "sync:fence", 30000)
+    
+    @pytest.mark.asyncio
+    async def test_sync_progress_roundtrip(self):
+        """测试以令牌为条件写入进度，读取时解码JSON字段"""
+        with patch.object(self.service, 'get_client') as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.eval.return_value = 1
+            mock_client.hgetall.return_value = {
+                b"state": b"running",
+                b"token": b"7",
+                b"entities": json.dumps({"projects": {"created": 3}}).encode()
+            }
+            mock_get_client.return_value = mock_client
+            
+            assert await self.service.set_sync_progress(7, {"state": "running", "entities": {"projects": {"created": 3}}})
+            args = mock_client.eval.call_args.args
+            assert args[1:6] == (2, "sync:lock", "sync:progress", 7, 86400)
+            assert args[6:] == (
+                "state", "running", "entities", self.service.serializer.dumps({"projects": {"created": 3}}), "token", 7
+            )
+            
+            assert await self.service.get_sync_progress() == {
+                "state": "running", "token": 7, "entities": {"projects": {"created": 3}}
+            }
+    
+    @pytest.mark.asyncio
+    async def test_is_sync_in_progress(self):
+        """测试根据锁是否存在判断同步状态"""
+        with patch.object(self.service, 'get_client') as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.get.side_effect = [b"3", None]
+            mock_get_client.return_value = mock_client
+            
+            assert await self.service.is_sync_in_progress() is True
+            assert await self.service.is_sync_in_progress() is False
+
@@ -2,12 +2,18 @@
 同步服务测试
 """
 
+import threading
+import time
 import pytest
-from unittest.mock import AsyncMock, Mock, patch
-from datetime import datetime, timezone
+from dataclasses import replace
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from datetime import date, datetime, timezone
 from sqlalchemy.orm import Session
 
+from src.config.settings import get_settings
+from src.services.model_garden_client import SYNC_ENTITY_KEYS
 from src.services.sync_service import SyncService
+from src.services.sync_entities import SYNC_ENTITIES, entity_dependencies, entity_names
 
 
 class TestSyncService:
@@ -16,8 +22,15 @@ class TestSyncService:
     def setup_method(self):
         """测试前准备"""
         self.mock_session = Mock(spec=Session)
+        self.mock_session.begin_nested.return_value = MagicMock()
         self.service = SyncService(self.mock_session)
     
+    @pytest.fixture(autouse=True)
+    def lock_fail_open(self):
+        """测试环境没有Redis，获取不到同步锁时不加锁执行"""
+        with patch.object(get_settings(), 'SYNC_LOCK_FAIL_OPEN', True):
+            yield
+    
     def test_init_with_session(self):
         """测试带数据库会话初始化"""
         service = SyncService(self.mock_session)
@@ -196,7 +209,8 @@ class TestSyncService:
         self.service.project_repo.update.assert_called_once_with(
             "existing-project-id",
             project_name="Updated Project",
-            project_code="EXISTING"
+            project_code="EXISTING",
+            is_active=True
         )
     
     @pytest.mark.asyncio
@@ -216,6 +230,30 @@ class TestSyncService:
         assert result["updated"] == 0
         assert result["errors"] == 1
     
+    @pytest.mark.asyncio
+    async def test_sync_projects_chunk_retried_row_by_row(self):
+        """测试逐行同步按分块提交，失败分块回滚后逐行重试"""
+        projects_data = [{"project_name": f"Project {i}", "project_code": f"P{i}"} for i in range(5)]
+        
+        self.service.project_repo = Mock()
+        self.service.project_repo.get_by_project_code.return_value = None
+        
+        def create(project_name, project_code):
+            if project_code == "P3":
+                raise Exception("constraint")
+            return Mock(id=project_code)
+        
+        self.service.project_repo.create.side_effect = create
+        
+        with patch.object(self.service.settings, 'SYNC_BATCH_SIZE', 2):
+            result = await self.service._sync_projects(projects_data)
+        
+        assert result == {"created": 4, "updated": 0, "unchanged": 0, "errors": 1}
+        # 第二个分块失败后P2、P3逐行重试
+        assert self.service.project_repo.create.call_count == 7
+        assert self.mock_session.commit.call_count == 3
+        assert self.mock_session.expunge_all.call_count == 3
+    
     @pytest.mark.asyncio
     async def test_sync_use_cases_create_new(self):
         """测试创建新用例"""
@@ -506,6 +544,26 @@ class TestSyncService:
         assert result["updated"] == 0
         assert result["errors"] == 0
     
+    @pytest.mark.asyncio
+    async def test_sync_projects_unchanged_row_not_written(self):
+        """测试逐行同步跳过内容未变化的项目，只更新有变化的列"""
+        projects_data = [
+            {"project_name": "Same", "project_code": "SAME"},
+            {"project_name": "Renamed", "project_code": "OLD"}
+        ]
+        
+        self.service.project_repo = Mock()
+        existing = {
+            "SAME": Mock(id="same-id", project_name="Same", project_code="SAME", is_active=True),
+            "OLD": Mock(id="old-id", project_name="Old", project_code="OLD", is_active=True)
+        }
+        self.service.project_repo.get_by_project_code.side_effect = existing.get
+        
+        result = await self.service._sync_projects(projects_data)
+        
+        assert result == {"created": 0, "updated": 1, "unchanged": 1, "errors": 0}
+        self.service.project_repo.update.assert_called_once_with("old-id", project_name="Renamed")
+    
     @pytest.mark.asyncio
     async def test_sync_use_cases_update_existing(self):
         """测试更新现有用例"""
@@ -559,8 +617,9 @@ class TestSyncService:
         assert result["updated"] == 1
         assert result["errors"] == 0
         
+        # type不是表中的列，不参与更新
         self.service.budget_repo.update.assert_called_once_with(
-            "existing-budget-id", **budgets_data[0]
+            "existing-budget-id", use_case_id="uc1", budget_cents=20000, currency="USD"
         )
     
     @pytest.mark.asyncio
@@ -590,7 +649,7 @@ class TestSyncService:
         assert result["errors"] == 0
         
         self.service.budget_repo.update_usage.assert_called_once_with(
-            "existing-usage-id", **budgets_data[0]
+            "existing-usage-id", use_case_id="uc1", usage_period=date(2023, 1, 1), scope="daily", used_cents=6000
         )
     
     @pytest.mark.asyncio
@@ -599,7 +658,7 @@ class TestSyncService:
         models_data = [
             {
                 "model_name": "gpt-4",
-                "model_provider": "openai"
+                "provider": "openai"
             }
         ]
         
@@ -655,7 +714,7 @@ class TestSyncService:
             {
                 "model_id": "model1",
                 "pricing_type": "input",
-                "price_per_unit": 0.002
+                "input_token_price_cpm": 2
             }
         ]
         
@@ -673,7 +732,7 @@ class TestSyncService:
         assert result["errors"] == 0
         
         self.service.pricing_repo.update.assert_called_once_with(
-            "existing-pricing-id", **pricing_data[0]
+            "existing-pricing-id", model_id="model1", input_token_price_cpm=2
         )
     
     @pytest.mark.asyncio
@@ -730,7 +789,7 @@ class TestSyncService:
         assert result["errors"] == 0
         
         self.service.limit_repo.update.assert_called_once_with(
-            "existing-limit-id", **limits_data[0]
+            "existing-limit-id", limit_type="request_per_minute", limit_value=200
         )
     
     @pytest.mark.asyncio
@@ -742,7 +801,7 @@ class TestSyncService:
                 "limit_id": "limit1",
                 "usage_period": "2023-01-01",
                 "scope": "daily",
-                "used_value": 75
+                "value": 75
             }
         ]
         
@@ -760,7 +819,7 @@ class TestSyncService:
         assert result["errors"] == 0
         
         self.service.limit_repo.update_usage.assert_called_once_with(
-            "existing-usage-id", **limits_data[0]
+            "existing-usage-id", limit_id="limit1", usage_period=datetime(2023, 1, 1), scope="daily", value=75
         ) 
     
     @pytest.mark.asyncio
@@ -785,12 +844,20 @@ class TestSyncService:
         
         self.service.project_repo = Mock()
         
-        # 第一个项目：新建成功
-        self.service.project_repo.get_by_project_code.side_effect = [
-            None,  # 第一个项目不存在
-            Mock(id="existing-id"),  # 第二个项目存在
-            Exception("Database error")  # 第三个项目查询出错
-        ]
+        # 按项目代码返回，失败分块逐行重试时结果保持一致
+        existing_projects = {
+            "NEW": None,  # 第一个项目不存在
+            "EXISTING": Mock(id="existing-id"),  # 第二个项目存在
+            "ERROR": Exception("Database error")  # 第三个项目查询出错
+        }
+        
+        def get_by_project_code(project_code):
+            existing = existing_projects[project_code]
+            if isinstance(existing, Exception):
+                raise existing
+            return existing
+        
+        self.service.project_repo.get_by_project_code.side_effect = get_by_project_code
         
         new_project = Mock()
         new_project.id = "new-id"
@@ -842,4 +909,656 @@ class TestSyncService:
         
         assert result["created"] == 0
         assert result["updated"] == 0
-        assert result["errors"] == 0 
\ No newline at end of file
+        assert result["errors"] == 0     
+    @pytest.mark.asyncio
+    async def test_sync_all_bulk_mode(self):
+        """测试批量模式下的全量同步"""
+        mock_sync_data = {
+            "projects": [{"project_name": "P", "project_code": "P"}],
+            "budgets": [
+                {"use_case_id": "uc1", "budget_cents": 100},
+                {"type": "usage", "use_case_id": "uc1", "used_cents": 10}
+            ]
+        }
+        
+        with patch.object(self.service.settings, 'SYNC_WRITE_MODE', 'bulk'), \
+             patch.object(self.service.model_garden_client, 'sync_all', return_value=mock_sync_data), \
+             patch.object(self.service, '_bulk_sync_entity') as mock_bulk_sync_entity, \
+             patch.object(self.service, '_sync_projects') as mock_sync_projects, \
+             patch.object(self.service.redis_service, 'set_cache'), \
+             patch.object(self.service.redis_service, 'publish_event'):
+            
+            mock_bulk_sync_entity.return_value = {"created": 1, "updated": 0, "unchanged": 1, "errors": 0}
+            
+            result = await self.service.sync_all()
+            
+            assert result["success"] is True
+            assert result["details"]["budgets"] == {"created": 2, "updated": 0, "unchanged": 2, "errors": 0}
+            assert result["totals"]["unchanged"] == 10
+            mock_sync_projects.assert_not_called()
+            
+            rows_by_table = {
+                call.args[0].model.__tablename__: call.args[1]
+                for call in mock_bulk_sync_entity.call_args_list
+            }
+            assert rows_by_table["use_case_budget"] == [mock_sync_data["budgets"][0]]
+            assert rows_by_table["use_case_budget_usage"] == [mock_sync_data["budgets"][1]]
+            assert rows_by_table["llm_model_limits"] == []
+    
+    @pytest.mark.asyncio
+    async def test_bulk_sync_entity_chunks(self):
+        """测试批量同步按SYNC_BATCH_SIZE分块，失败分块逐行重试并逐块提交"""
+        entity = SYNC_ENTITIES[0]
+        mock_repository = Mock()
+        mock_repository.bulk_upsert.side_effect = [
+            (2, 0, 0), Exception("constraint"), (1, 0, 0), Exception("constraint"), (0, 1, 0)
+        ]
+        rows = [{"project_code": f"P{i}"} for i in range(5)]
+        self.mock_session.begin_nested.return_value = MagicMock()
+        
+        with patch.object(self.service.settings, 'SYNC_BATCH_SIZE', 2):
+            result = await self.service._bulk_sync_entity(
+                replace(entity, repository=Mock(return_value=mock_repository)),
+                rows
+            )
+        
+        assert result == {"created": 3, "updated": 1, "unchanged": 0, "errors": 1}
+        assert mock_repository.bulk_upsert.call_count == 5
+        mock_repository.bulk_upsert.assert_any_call([rows[3]], ("project_code",))
+        assert self.mock_session.begin_nested.call_count == 5
+        assert self.mock_session.commit.call_count == 3
+        assert self.mock_session.expunge_all.call_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_bulk_sync_entity_copy_mode(self):
+        """测试copy模式下整个实体只执行一次COPY合并"""
+        entity = SYNC_ENTITIES[0]
+        mock_repository = Mock()
+        mock_repository.copy_merge.return_value = (3, 1, 1)
+        rows = [{"project_code": f"P{i}"} for i in range(5)]
+        self.mock_session.begin_nested.return_value = MagicMock()
+        
+        with patch.object(self.service.settings, 'SYNC_WRITE_MODE', 'copy'), \
+             patch.object(self.service.settings, 'SYNC_BATCH_SIZE', 2):
+            result = await self.service._bulk_sync_entity(
+                replace(entity, repository=Mock(return_value=mock_repository)),
+                rows
+            )
+        
+        assert result == {"created": 3, "updated": 1, "unchanged": 1, "errors": 0}
+        mock_repository.copy_merge.assert_called_once_with(rows, ("project_code",))
+        mock_repository.bulk_upsert.assert_not_called()
+    
+    def test_entity_dependencies(self):
+        """测试依赖关系由模型外键推导"""
+        dependencies = entity_dependencies()
+        
+        assert list(dependencies) == entity_names()
+        assert dependencies["projects"] == []
+        assert dependencies["models"] == []
+        assert dependencies["use_cases"] == ["projects"]
+        assert dependencies["deployments"] == ["models"]
+        assert set(dependencies["subscriptions"]) == {"projects", "use_cases", "models"}
+        assert dependencies["limits"] == ["subscriptions"]
+    
+    @pytest.mark.asyncio
+    async def test_parallel_sync_respects_dependencies(self):
+        """测试并行同步只在依赖实体完成后开始"""
+        finished = []
+        dependencies = entity_dependencies()
+        
+        def sync_entity_group(session_factory, name, sync_data):
+            assert all(dependency in finished for dependency in dependencies[name])
+            finished.append(name)
+            return {"created": len(sync_data.get(name, [])), "updated": 0, "unchanged": 0, "errors": 0}
+        
+        with patch.object(self.service.settings, 'SYNC_WRITE_MODE', 'bulk'), \
+             patch.object(self.service.settings, 'SYNC_PARALLEL', True), \
+             patch.object(self.service, '_sync_entity_group', side_effect=sync_entity_group):
+            results = await self.service._apply_sync_data({"projects": [{"id": "p1"}], "models": []})
+        
+        assert sorted(finished) == sorted(entity_names())
+        assert results["projects"]["created"] == 1
+        assert results["limits"]["wait_seconds"] >= results["subscriptions"]["wait_seconds"]
+        assert all("seconds" in counts for counts in results.values())
+    
+    @pytest.mark.asyncio
+    async def test_parallel_sync_failure_propagates(self):
+        """测试并行同步中实体写入异常时整体失败"""
+        def sync_entity_group(session_factory, name, sync_data):
+            if name == "models":
+                raise RuntimeError("connection lost")
+            return {"created": 0, "updated": 0, "unchanged": 0, "errors": 0}
+        
+        with patch.object(self.service.settings, 'SYNC_WRITE_MODE', 'bulk'), \
+             patch.object(self.service.settings, 'SYNC_PARALLEL', True), \
+             patch.object(self.service, '_sync_entity_group', side_effect=sync_entity_group):
+            with pytest.raises(RuntimeError):
+                await self.service._apply_sync_data({})
+    
+    @pytest.mark.asyncio
+    async def test_parallel_sync_failure_waits_for_running_writes(self):
+        """测试实体失败后其余实体放弃提交，返回前线程池中已开始的写入都已结束"""
+        projects_started = threading.Event()
+        projects_finished = threading.Event()
+        outcomes = {}
+        
+        def sync_entity_group(session_factory, name, sync_data):
+            if name == "models":
+                projects_started.wait(5)
+                raise RuntimeError("connection lost")
+            if name == "projects":
+                projects_started.set()
+                self.service._parallel_abort.wait(5)
+                try:
+                    self.service._check_parallel_abort()
+                    outcomes[name] = "committed"
+                except RuntimeError:
+                    outcomes[name] = "aborted"
+                time.sleep(0.05)
+                projects_finished.set()
+            return {"created": 0, "updated": 0, "unchanged": 0, "errors": 0}
+        
+        with patch.object(self.service.settings, 'SYNC_WRITE_MODE', 'bulk'), \
+             patch.object(self.service.settings, 'SYNC_PARALLEL', True), \
+             patch.object(self.service, '_sync_entity_group', side_effect=sync_entity_group):
+            with pytest.raises(RuntimeError):
+                await self.service._apply_sync_data({})
+        
+        assert projects_finished.is_set()
+        assert outcomes == {"projects": "aborted"}
+    
+    @pytest.mark.asyncio
+    async def test_parallel_sync_disabled_on_sqlite(self):
+        """测试SQLite上不并发写入，按顺序批量同步"""
+        self.mock_session.get_bind.return_value.dialect.name = "sqlite"
+        with patch.object(self.service.settings, 'SYNC_WRITE_MODE', 'bulk'), \
+             patch.object(self.service.settings, 'SYNC_PARALLEL', True), \
+             patch.object(self.service, '_parallel_sync_all') as mock_parallel, \
+             patch.object(self.service, '_bulk_sync_all', return_value={}) as mock_bulk:
+            assert await self.service._apply_sync_data({}) == {}
+        
+        mock_parallel.assert_not_called()
+        mock_bulk.assert_called_once_with({})
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_streaming(self):
+        """测试流式同步逐块入库并汇总结果"""
+        async def stream_sync_all(updated_since=None):
+            yield "projects", [{"project_code": "P1"}, {"project_code": "P2"}]
+            yield "projects", [{"project_code": "P3"}]
+            yield "limits", [{"subscription_id": "s1"}]
+        
+        with patch.object(self.service.settings, 'SYNC_STREAMING', True), \
+             patch.object(self.service.model_garden_client, 'stream_sync_all', stream_sync_all), \
+             patch.object(self.service.model_garden_client, 'sync_all') as mock_sync_all, \
+             patch.object(self.service, '_apply_sync_data') as mock_apply, \
+             patch.object(self.service.redis_service, 'set_cache'), \
+             patch.object(self.service.redis_service, 'publish_event'):
+            
+            mock_apply.side_effect = lambda data: {
+                name: {"created": len(rows), "updated": 0, "errors": 0} for name, rows in data.items()
+            }
+            
+            result = await self.service.sync_all()
+            
+            assert result["success"] is True
+            assert result["details"]["projects"]["created"] == 3
+            assert result["details"]["limits"]["created"] == 1
+            assert mock_apply.call_count == 3
+            mock_sync_all.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_paginated(self):
+        """测试分页获取逐页入库"""
+        async def paginated_sync_all(updated_since=None):
+            yield "projects", [{"project_code": "P1"}]
+            yield "use_cases", [{"id": "u1"}, {"id": "u2"}]
+        
+        with patch.object(self.service.settings, 'SYNC_PAGINATED', True), \
+             patch.object(self.service.model_garden_client, 'paginated_sync_all', paginated_sync_all), \
+             patch.object(self.service.model_garden_client, 'sync_all') as mock_sync_all, \
+             patch.object(self.service, '_apply_sync_data') as mock_apply, \
+             patch.object(self.service.redis_service, 'set_cache'), \
+             patch.object(self.service.redis_service, 'publish_event'):
+            
+            mock_apply.side_effect = lambda data: {
+                name: {"created": len(rows), "updated": 0, "errors": 0} for name, rows in data.items()
+            }
+            
+            result = await self.service.sync_all()
+            
+            assert result["success"] is True
+            assert result["details"]["use_cases"]["created"] == 2
+            assert mock_apply.call_count == 2
+            mock_sync_all.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_conditional_not_modified(self):
+        """测试负载未变化时跳过入库并记录无变化结果"""
+        validators = {"etag": '"v1"', "last_modified": None, "digest": "abc", "updated_since": None}
+        
+        with patch.object(self.service.settings, 'SYNC_CONDITIONAL', True), \
+             patch.object(self.service.model_garden_client, 'sync_all_if_changed',
+                          return_value=(None, validators)) as mock_fetch, \
+             patch.object(self.service, '_apply_sync_data') as mock_apply, \
+             patch.object(self.service.redis_service, 'get_cache', return_value=validators), \
+             patch.object(self.service.redis_service, 'set_cache') as mock_set_cache, \
+             patch.object(self.service.redis_service, 'publish_event') as mock_publish:
+            
+            result = await self.service.sync_all()
+        
+        assert result["success"] is True
+        assert result["not_modified"] is True
+        assert result["totals"]["created"] == 0
+        mock_fetch.assert_called_once_with(None, validators)
+        mock_apply.assert_not_called()
+        # 只缓存同步结果，不覆盖校验信息
+        assert mock_set_cache.call_count == 1
+        assert mock_publish.call_args[0][1]["not_modified"] is True
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_conditional_ignored_when_streaming(self):
+        """测试同时开启流式获取时流式优先，条件获取不生效并记录警告"""
+        async def stream_sync_all(updated_since=None):
+            yield "projects", [{"project_code": "P1"}]
+        
+        with patch.object(self.service.settings, 'SYNC_CONDITIONAL', True), \
+             patch.object(self.service.settings, 'SYNC_STREAMING', True), \
+             patch.object(self.service.model_garden_client, 'stream_sync_all', stream_sync_all), \
+             patch.object(self.service.model_garden_client, 'sync_all_if_changed') as mock_fetch, \
+             patch.object(self.service, '_apply_sync_data',
+                          return_value={"projects": {"created": 1, "updated": 0, "errors": 0}}), \
+             patch.object(self.service.redis_service, 'set_cache'), \
+             patch.object(self.service.redis_service, 'publish_event'), \
+             patch('src.services.sync_service.logger') as mock_logger:
+            
+            result = await self.service.sync_all()
+        
+        assert result["success"] is True
+        assert result["totals"]["created"] == 1
+        mock_fetch.assert_not_called()
+        assert any("SYNC_CONDITIONAL" in call.args[0] for call in mock_logger.warning.call_args_list)
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_conditional_saves_validators(self):
+        """测试负载变化且无错误时保存新的校验信息，参数不同的旧校验信息不发送"""
+        current = {"etag": None, "last_modified": None, "digest": "def"}
+        since = datetime(2025, 7, 1, tzinfo=timezone.utc)
+        
+        with patch.object(self.service.settings, 'SYNC_CONDITIONAL', True), \
+             patch.object(self.service.model_garden_client, 'sync_all_if_changed',
+                          return_value=({"projects": [{"project_code": "P1"}]}, current)) as mock_fetch, \
+             patch.object(self.service, '_apply_sync_data',
+                          return_value={"projects": {"created": 1, "updated": 0, "errors": 0}}), \
+             patch.object(self.service.redis_service, 'get_cache', return_value={"digest": "abc", "updated_since": None}), \
+             patch.object(self.service.redis_service, 'set_cache') as mock_set_cache, \
+             patch.object(self.service.redis_service, 'publish_event'):
+            
+            result = await self.service.sync_all(updated_since=since)
+        
+        assert result["totals"]["created"] == 1
+        assert "not_modified" not in result
+        mock_fetch.assert_called_once_with(since, None)
+        mock_set_cache.assert_any_call("sync:validators", {**current, "updated_since": since.isoformat()})
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_with_watermarks(self):
+        """测试按持久化水位增量获取，并推进无错误实体的水位"""
+        stored = {key: (datetime(2025, 7, 1), "a") for key in SYNC_ENTITY_KEYS}
+        stored["limits"] = (datetime(2025, 6, 1), "z")
+        sync_data = {
+            "projects": [
+                {"id": "p1", "updated_time": "2025-07-02T00:00:00Z"},
+                {"id": "p2", "updated_time": "2025-07-02T00:00:00Z"}
+            ],
+            "limits": [{"id": "l1", "updated_time": "2025-07-03T08:00:00+08:00"}]
+        }
+        
+        async def apply_sync_data(data):
+            self.service._record_watermark_candidates(data)
+            return {
+                "projects": {"created": 2, "updated": 0, "errors": 0},
+                "limits": {"created": 0, "updated": 0, "errors": 1}
+            }
+        
+        with patch.object(self.service.watermark_repo, 'get_watermarks', return_value=stored), \
+             patch.object(self.service.watermark_repo, 'advance', side_effect=lambda w: w) as mock_advance, \
+             patch.object(self.service.model_garden_client, 'sync_all', return_value=sync_data) as mock_fetch, \
+             patch.object(self.service, '_apply_sync_data', side_effect=apply_sync_data), \
+             patch.object(self.service.redis_service, 'publish_event'):
+            
+            result = await self.service.sync_all(use_watermarks=True)
+        
+        assert result["success"] is True
+        args, kwargs = mock_fetch.call_args
+        assert args == (datetime(2025, 6, 1, tzinfo=timezone.utc),)
+        assert kwargs["watermarks"]["limits"] == {"updated_since": "2025-06-01T00:00:00+00:00", "after_id": "z"}
+        # limits有错误，保持原水位
+        mock_advance.assert_called_once_with({"projects": (datetime(2025, 7, 2), "p2")})
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_watermarks_missing_entity_fetches_all(self):
+        """测试有实体缺少水位时不带updated_since，显式updated_since优先于水位"""
+        with patch.object(self.service.watermark_repo, 'get_watermarks',
+                          return_value={"projects": (datetime(2025, 7, 1), "p1")}), \
+             patch.object(self.service.model_garden_client, 'sync_all', return_value={}) as mock_fetch, \
+             patch.object(self.service, '_apply_sync_data', return_value={}), \
+             patch.object(self.service.redis_service, 'publish_event'):
+            
+            await self.service.sync_all(use_watermarks=True)
+            assert mock_fetch.call_args.args == (None,)
+            
+            since = datetime(2025, 7, 1, tzinfo=timezone.utc)
+            await self.service.sync_all(updated_since=since, use_watermarks=True)
+            mock_fetch.assert_called_with(since)
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_reconcile_deletes(self):
+        """测试全量同步后按负载中的键对账删除，子表先于父表处理"""
+        sync_data = {
+            "projects": [{"id": "p1", "project_code": "P1"}],
+            "limits": [{"id": "l1", "type": "limit"}, {"id": "u1", "type": "usage"}]
+        }
+        calls = []
+        
+        def delete_missing(self, keys, key_columns=("id",), soft_delete_column=None, max_ratio=None, min_rows=0):
+            calls.append((self.model.__tablename__, set(keys), tuple(key_columns), soft_delete_column))
+            return (2, 10) if self.model.__tablename__ == "llm_model_limits" else (0, 10)
+        
+        self.mock_session.begin_nested.return_value = MagicMock()
+        with patch.object(self.service.settings, 'SYNC_RECONCILE_DELETES', True), \
+             patch.object(self.service.model_garden_client, 'sync_all', return_value=sync_data), \
+             patch.object(self.service, '_row_sync_all', return_value={}), \
+             patch('src.repositories.base_repository.BaseRepository.delete_missing', delete_missing), \
+             patch.object(self.service.redis_service, 'publish_event'):
+            
+            result = await self.service.sync_all()
+        
+        assert result["reconcile"]["aborted"] is False
+        assert result["details"]["limits"]["deleted"] == 2
+        assert result["totals"]["deleted"] == 2
+        tables = [call[0] for call in calls]
+        assert tables.index("llm_model_limits") < tables.index("models") < tables.index("projects")
+        assert ("projects", {("P1",)}, ("project_code",), "is_active") in calls
+        assert ("llm_model_limits", {("l1",)}, ("id",), None) in calls
+    
+    def test_soft_deleted_project_reactivated_when_it_reappears(self):
+        """测试对账时被软删除的项目重新出现在负载中后恢复有效"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from src.models import Base, Project
+        
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        entity = SYNC_ENTITIES[0]
+        service = SyncService(session)
+        full = {"projects": [
+            {"project_code": "P1", "project_name": "One"},
+            {"project_code": "P2", "project_name": "Two"}
+        ]}
+        
+        try:
+            with patch.object(service.settings, 'SYNC_WRITE_MODE', 'bulk'):
+                service._write_entity(session, entity, entity.payload_rows(full))
+                repository = entity.repository(session)
+                assert repository.delete_missing([("P1",)], ("project_code",), soft_delete_column="is_active") == (1, 2)
+                session.commit()
+                assert session.query(Project).filter_by(project_code="P2").one().is_active is False
+                
+                plan = repository.plan_upsert(entity.payload_rows(full), ("project_code",))
+                assert plan["changed_columns"] == {"is_active": 1}
+                counts = service._write_entity(session, entity, entity.payload_rows(full))
+            
+            assert counts["updated"] == 1 and counts["unchanged"] == 1
+            session.expire_all()
+            assert session.query(Project).filter_by(project_code="P2").one().is_active is True
+        finally:
+            session.close()
+            engine.dispose()
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_reconcile_skipped_for_incremental_sync(self):
+        """测试增量同步不做对账删除，超过阈值时放弃对账"""
+        since = datetime(2025, 7, 1, tzinfo=timezone.utc)
+        self.mock_session.begin_nested.return_value = MagicMock()
+        with patch.object(self.service.settings, 'SYNC_RECONCILE_DELETES', True), \
+             patch.object(self.service.model_garden_client, 'sync_all', return_value={}), \
+             patch.object(self.service, '_row_sync_all', return_value={}), \
+             patch('src.repositories.base_repository.BaseRepository.delete_missing',
+                   side_effect=ValueError("超过阈值")) as mock_delete, \
+             patch.object(self.service.redis_service, 'publish_event'):
+            
+            result = await self.service.sync_all(updated_since=since)
+            assert "reconcile" not in result
+            mock_delete.assert_not_called()
+            
+            result = await self.service.sync_all()
+            assert result["success"] is True
+            assert result["reconcile"] == {"aborted": True, "error": "超过阈值", "deleted": {}}
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_holds_lock_and_publishes_result(self):
+        """测试持有同步锁时执行同步，结束后保存结果、发布进度并释放锁"""
+        redis_service = self.service.redis_service
+        with patch.object(redis_service, 'acquire_sync_lock', return_value=5), \
+             patch.object(redis_service, 'get_sync_lock_token', return_value=5) as mock_token, \
+             patch.object(redis_service, 'release_sync_lock') as mock_release, \
+             patch.object(redis_service, 'set_sync_result') as mock_set_result, \
+             patch.object(redis_service, 'set_sync_progress') as mock_set_progress, \
+             patch.object(self.service.model_garden_client, 'sync_all', return_value={"projects": [{}]}), \
+             patch.object(self.service, '_row_sync_all',
+                          return_value={"projects": {"created": 1, "updated": 0, "errors": 0}}), \
+             patch.object(redis_service, 'publish_event'):
+            
+            result = await self.service.sync_all()
+        
+        assert result["success"] is True
+        # 提交前在数据库线程中确认栅栏令牌
+        mock_token.assert_awaited()
+        self.mock_session.commit.assert_called_once()
+        mock_set_result.assert_called_once_with(5, result)
+        mock_release.assert_called_once_with(5)
+        token, progress = mock_set_progress.call_args.args
+        assert token == 5
+        assert progress["state"] == "completed"
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_fails_closed_without_lock(self):
+        """测试Redis不可用时默认不执行同步，开启SYNC_LOCK_FAIL_OPEN后不加锁执行"""
+        redis_service = self.service.redis_service
+        with patch.object(redis_service, 'acquire_sync_lock', return_value=0), \
+             patch.object(self.service, '_execute_sync', return_value={"success": True}) as mock_execute:
+            with patch.object(self.service.settings, 'SYNC_LOCK_FAIL_OPEN', False):
+                result = await self.service.sync_all()
+            
+            assert result["success"] is False
+            mock_execute.assert_not_called()
+            
+            assert await self.service.sync_all() == {"success": True}
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_does_not_commit_after_losing_lock(self):
+        """测试同步锁已被新的令牌持有时不提交分块"""
+        redis_service = self.service.redis_service
+        with patch.object(redis_service, 'acquire_sync_lock', return_value=5), \
+             patch.object(redis_service, 'get_sync_lock_token', return_value=6), \
+             patch.object(redis_service, 'release_sync_lock'), \
+             patch.object(redis_service, 'set_sync_result'), \
+             patch.object(redis_service, 'set_sync_progress'), \
+             patch.object(self.service.model_garden_client, 'sync_all', return_value={"projects": [{}]}), \
+             patch.object(self.service, '_row_sync_all',
+                          return_value={"projects": {"created": 1, "updated": 0, "errors": 0}}), \
+             patch.object(redis_service, 'publish_event'):
+            
+            result = await self.service.sync_all()
+        
+        assert result["success"] is False
+        self.mock_session.commit.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_releases_lock_when_cancelled_or_failed(self):
+        """测试同步被取消或抛出异常时同样发布结果并释放锁"""
+        import asyncio
+        
+        redis_service = self.service.redis_service
+        started = asyncio.Event()
+        
+        async def hang(*args):
+            started.set()
+            await asyncio.sleep(3600)
+        
+        with patch.object(redis_service, 'acquire_sync_lock', return_value=5), \
+             patch.object(redis_service, 'release_sync_lock') as mock_release, \
+             patch.object(redis_service, 'set_sync_result') as mock_set_result, \
+             patch.object(redis_service, 'set_sync_progress') as mock_set_progress:
+            with patch.object(self.service, '_execute_sync', side_effect=hang):
+                task = asyncio.create_task(self.service.sync_all())
+                await started.wait()
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+            
+            mock_release.assert_called_once_with(5)
+            assert mock_set_result.call_args.args[1]["cancelled"] is True
+            assert mock_set_progress.call_args.args[1]["state"] == "cancelled"
+            
+            with patch.object(self.service, '_execute_sync', side_effect=RuntimeError("boom")):
+                with pytest.raises(RuntimeError):
+                    await self.service.sync_all()
+            
+            assert mock_release.call_count == 2
+            assert mock_set_result.call_args.args[1] == {"success": False, "error": "boom"}
+            assert mock_set_progress.call_args.args[1]["state"] == "failed"
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_joins_running_sync(self):
+        """测试锁已被占用时不执行同步，等待并返回正在执行的同步结果"""
+        redis_service = self.service.redis_service
+        running_result = {"success": True, "totals": {"created": 2}}
+        with patch.object(self.service.settings, 'SYNC_HEARTBEAT_SECONDS', 0), \
+             patch.object(redis_service, 'acquire_sync_lock', return_value=None), \
+             patch.object(redis_service, 'get_sync_lock_token', side_effect=[9, 9, None]), \
+             patch.object(redis_service, 'get_sync_result', return_value=running_result) as mock_get_result, \
+             patch.object(self.service.model_garden_client, 'sync_all') as mock_fetch:
+            
+            result = await self.service.sync_all()
+        
+        assert result == {**running_result, "joined": True}
+        mock_get_result.assert_called_once_with(9)
+        mock_fetch.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_commit_chunk_stops_after_lease_lost(self):
+        """测试租约丢失后不再提交，进度按实体累加"""
+        self.service._progress = {}
+        self.service._progress_lock = threading.Lock()
+        self.service._report_progress("projects", created=2)
+        self.service._report_progress("projects", created=1, errors=1)
+        assert self.service._progress == {"projects": {"created": 3, "errors": 1}}
+        
+        self.service._lease_lost = True
+        with pytest.raises(RuntimeError):
+            self.service._commit_chunk(self.mock_session)
+        self.mock_session.commit.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_streaming_parse_error(self):
+        """测试流式解析失败时同步返回失败结果"""
+        async def stream_sync_all(updated_since=None):
+            yield "projects", [{"project_code": "P1"}]
+            raise ValueError("bad json")
+        
+        with patch.object(self.service.settings, 'SYNC_STREAMING', True), \
+             patch.object(self.service.model_garden_client, 'stream_sync_all', stream_sync_all), \
+             patch.object(self.service, '_apply_sync_data', return_value={}), \
+             patch.object(self.service.redis_service, 'publish_event'):
+            
+            result = await self.service.sync_all()
+            
+            assert result["success"] is False
+            assert result["error"] == "bad json"
+    
+    @pytest.mark.asyncio
+    async def test_stream_sync_records(self):
+        """测试流式同步在每个分块提交后输出变化的行，最后输出统计"""
+        from src.repositories.base_repository import BaseRepository
+        
+        def fake_bulk_upsert(repository, rows, conflict_columns=("id",), changes=None):
+            if changes is not None:
+                changes.extend(("created", row) for row in rows)
+            return len(rows), 0, 0
+        
+        sync_data = {
+            "projects": [{"project_code": f"P{i}"} for i in range(3)],
+            "models": [{"id": "m1"}]
+        }
+        with patch.object(self.service.settings, 'SYNC_WRITE_MODE', 'bulk'), \
+             patch.object(self.service.settings, 'SYNC_BATCH_SIZE', 1), \
+             patch.object(self.service.settings, 'SYNC_STREAM_QUEUE_SIZE', 1), \
+             patch('src.services.sync_service.SessionLocal', return_value=self.mock_session), \
+             patch.object(BaseRepository, 'bulk_upsert', fake_bulk_upsert), \
+             patch.object(self.service.model_garden_client, 'sync_all', return_value=sync_data), \
+             patch.object(self.service.redis_service, 'set_cache'), \
+             patch.object(self.service.redis_service, 'publish_event'):
+            
+            records = [record async for record in self.service.stream_sync_records()]
+        
+        assert records[0] == {"type": "started", "updated_since": None}
+        assert [(r["entity"], r["status"], r["data"]) for r in records[1:-1]] == [
+            ("projects", "created", {"project_code": "P0", "is_active": True}),
+            ("projects", "created", {"project_code": "P1", "is_active": True}),
+            ("projects", "created", {"project_code": "P2", "is_active": True}),
+            ("models", "created", {"id": "m1"})
+        ]
+        summary = records[-1]
+        assert summary["type"] == "summary"
+        assert summary["success"] is True
+        assert summary["totals"]["created"] == 4
+        assert summary["entities"]["projects"]["created"] == 3
+        assert self.service._row_sink is None
+        self.mock_session.close.assert_called()
+    
+    @pytest.mark.asyncio
+    async def test_sync_all_dry_run(self):
+        """测试dry_run只计算变更计划，不获取同步锁也不写入"""
+        from src.repositories.base_repository import BaseRepository
+        
+        def fake_plan_upsert(repository, rows, conflict_columns=("id",), sample_size=20):
+            return {
+                "create": len(rows), "update": 0, "unchanged": 0, "changed_columns": {},
+                "samples": {"create": [[row.get("id")] for row in rows][:sample_size], "update": []}
+            }
+        
+        def fake_plan_deletes(repository, keys, key_columns=("id",), soft_delete_column=None, sample_size=20):
+            return {"delete": 1, "total": len(keys) + 1, "samples": [["stale"]]}
+        
+        sync_data = {
+            "models": [{"id": "m1"}, {"id": "m2"}],
+            "limits": [{"id": "l1", "type": "limit"}, {"id": "u1", "type": "usage"}]
+        }
+        with patch.object(self.service.settings, 'SYNC_BATCH_SIZE', 1), \
+             patch.object(self.service.settings, 'SYNC_DRY_RUN_SAMPLE_SIZE', 1), \
+             patch.object(BaseRepository, 'plan_upsert', fake_plan_upsert), \
+             patch.object(BaseRepository, 'plan_deletes', fake_plan_deletes), \
+             patch.object(self.service.model_garden_client, 'sync_all', return_value=sync_data), \
+             patch.object(self.service.redis_service, 'acquire_sync_lock') as mock_lock, \
+             patch.object(self.service.redis_service, 'set_cache') as mock_set_cache, \
+             patch.object(self.service.redis_service, 'publish_event') as mock_publish:
+            
+            result = await self.service.sync_all(session=self.mock_session, dry_run=True)
+        
+        assert result["success"] is True
+        assert result["dry_run"] is True
+        assert result["plan"]["models"]["create"] == 2
+        assert result["plan"]["models"]["samples"]["create"] == [["m1"]]
+        assert result["plan"]["limits"]["create"] == 2
+        assert result["plan"]["limits"]["delete"] == 2
+        # 每个实体描述各计入一条待删除记录
+        assert result["totals"]["delete"] == 10
+        mock_lock.assert_not_called()
+        mock_set_cache.assert_not_called()
+        mock_publish.assert_not_called()
+        self.mock_session.rollback.assert_called_once()
+        self.mock_session.commit.assert_not_called()
@@ -0,0 +1,188 @@
+"""
+事件消费者测试
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.tasks.event_consumers import EventConsumerPool
+from src.utils.serializers import get_serializer
+
+
+def make_entry(entry_id, event_id):
+    """构建read_events返回的Stream条目"""
+    return {
+        "id": entry_id,
+        "stream": b"events:ingest:0",
+        b"event_id": event_id.encode(),
+        b"event": json.dumps({
+            "event_id": event_id,
+            "event_type": "CREATE",
+            "entity_type": "project",
+            "entity_id": f"proj-{event_id}",
+            "timestamp": "2025-07-15T14:20:00Z",
+            "payload": {"project_name": "Test Project", "project_code": event_id}
+        }).encode()
+    }
+
+
+class TestEventConsumerPool:
+    """事件消费者池测试类"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.pool = EventConsumerPool()
+        self.pool.redis_service = AsyncMock()
+        self.pool.redis_service.serializer = get_serializer("json")
+    
+    @pytest.mark.asyncio
+    async def test_apply_entries_acks_all_but_retryable(self):
+        """测试已应用、数据错误和无法解析的条目被确认，可重试的失败留待重新认领"""
+        entries = [
+            make_entry(b"1-0", "e1"),
+            make_entry(b"1-1", "e2"),
+            make_entry(b"1-2", "e3"),
+            {"id": b"1-3", b"event": b"not json"}
+        ]
+        results = [
+            {"success": True, "status": "created"},
+            {"success": False, "error": "NotNullViolation"},
+            {"success": False, "error": "connection lost", "retryable": True}
+        ]
+        
+        with patch.object(self.pool, '_process', AsyncMock(return_value=results)) as mock_process:
+            counts = await self.pool.apply_entries("events:ingest:0", entries)
+        
+        assert [event.event_id for event in mock_process.call_args[0][0]] == ["e1", "e2", "e3"]
+        assert counts == {"applied": 1, "failed": 1, "retrying": 1, "invalid": 1, "coalesced": 0}
+        stream, group, acks = self.pool.redis_service.ack_events.call_args[0]
+        assert (stream, group) == ("events:ingest:0", "event_appliers")
+        assert sorted(acks) == [b"1-0", b"1-1", b"1-3"]
+        self.pool.redis_service.trim_acknowledged.assert_awaited_once_with("events:ingest:0", "event_appliers")
+    
+    @pytest.mark.asyncio
+    async def test_start_disabled(self):
+        """测试未开启EVENT_ASYNC_INGEST时不启动消费者"""
+        with patch.object(self.pool.settings, 'EVENT_ASYNC_INGEST', False):
+            await self.pool.start()
+        assert self.pool._consumers == []
+    
+    @pytest.mark.asyncio
+    async def test_start_and_stop(self):
+        """测试启动配置数量的消费者并在停止时取消"""
+        self.pool.redis_service.claim_events.return_value = []
+        self.pool.redis_service.read_events.return_value = []
+        self.pool.redis_service.health_check.return_value = False
+        with patch.object(self.pool.settings, 'EVENT_ASYNC_INGEST', True), \
+             patch.object(self.pool.settings, 'EVENT_CONSUMERS', 2):
+            await self.pool.start()
+            assert len(self.pool._consumers) == 2
+            await self.pool.stop()
+        
+        assert self.pool._consumers == []
+        self.pool.redis_service.close.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_drain_partition_claims_pending_before_reading(self):
+        """测试持有租约时先认领遗留事件再读取新事件，处理完后释放租约"""
+        redis_service = self.pool.redis_service
+        redis_service.acquire_lease.return_value = True
+        redis_service.renew_lease.return_value = True
+        redis_service.claim_events.side_effect = [[make_entry(b"1-0", "e1")], [], []]
+        redis_service.read_events.side_effect = [[make_entry(b"2-0", "e2")], []]
+        applied = []
+        
+        async def apply_entries(stream, entries):
+            applied.extend(entry["id"] for entry in entries)
+            return {"applied": len(entries), "failed": 0, "retrying": 0, "invalid": 0}
+        
+        with patch.object(self.pool, 'apply_entries', side_effect=apply_entries):
+            processed = await self.pool._drain_partition("events:ingest:3", "c1")
+        
+        assert processed == 2
+        assert applied == [b"1-0", b"2-0"]
+        assert redis_service.claim_events.call_args_list[0][0] == ("events:ingest:3", "event_appliers", "c1", 0, 100)
+        redis_service.release_lease.assert_awaited_once_with("events:lease:events:ingest:3", "c1")
+        assert self.pool._leased == set()
+    
+    @pytest.mark.asyncio
+    async def test_collect_window(self):
+        """测试开启合并时在窗口内继续读取同一分区的事件，达到批次大小即停止"""
+        self.pool.redis_service.read_events.side_effect = [
+            [make_entry(b"1-1", "e2")],
+            [make_entry(b"1-2", "e3"), make_entry(b"1-3", "e4")]
+        ]
+        
+        with patch.object(self.pool.settings, 'EVENT_COALESCE_WINDOW_MS', 1000):
+            entries = await self.pool._collect_window("events:ingest:3", "c1", [make_entry(b"1-0", "e1")], 4)
+        
+        assert [entry["id"] for entry in entries] == [b"1-0", b"1-1", b"1-2", b"1-3"]
+        first_read = self.pool.redis_service.read_events.call_args_list[0]
+        assert first_read[0][3] == 3
+        assert 0 < first_read[1]["block_ms"] <= 1000
+    
+    @pytest.mark.asyncio
+    async def test_drain_partition_stops_on_retry(self):
+        """测试批次需要重试时释放租约，不再读取更晚的事件"""
+        redis_service = self.pool.redis_service
+        redis_service.acquire_lease.return_value = True
+        redis_service.claim_events.return_value = [make_entry(b"1-0", "e1")]
+        
+        with patch.object(self.pool, 'apply_entries',
+                          AsyncMock(return_value={"applied": 0, "failed": 0, "retrying": 1, "invalid": 0})), \
+             patch.object(self.pool, '_sleep', AsyncMock()):
+            processed = await self.pool._drain_partition("events:ingest:3", "c1")
+        
+        assert processed == 1
+        redis_service.read_events.assert_not_called()
+        redis_service.renew_lease.assert_not_called()
+        redis_service.release_lease.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_drain_partition_renews_lease_during_batch(self):
+        """测试批次应用超过租约时长时在后台续租，续租失败后不再开始下一批"""
+        redis_service = self.pool.redis_service
+        redis_service.acquire_lease.return_value = True
+        redis_service.renew_lease.side_effect = [True, False]
+        redis_service.claim_events.return_value = [make_entry(b"1-0", "e1")]
+        
+        async def apply_entries(stream, entries):
+            await asyncio.sleep(0.05)
+            return {"applied": len(entries), "failed": 0, "retrying": 0, "invalid": 0}
+        
+        with patch.object(self.pool.settings, 'EVENT_PARTITION_LEASE_MS', 60), \
+             patch.object(self.pool, 'apply_entries', side_effect=apply_entries):
+            processed = await self.pool._drain_partition("events:ingest:3", "c1")
+        
+        assert processed == 1
+        redis_service.renew_lease.assert_any_await("events:lease:events:ingest:3", "c1", 60)
+        assert redis_service.renew_lease.await_count == 2
+        redis_service.release_lease.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_drain_partition_lease_held_elsewhere(self):
+        """测试分区租约被其他消费者持有时跳过该分区"""
+        self.pool.redis_service.acquire_lease.return_value = False
+        
+        assert await self.pool._drain_partition("events:ingest:3", "c1") == 0
+        self.pool.redis_service.claim_events.assert_not_called()
+        self.pool.redis_service.release_lease.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_metrics(self):
+        """测试指标汇总各分区积压和本实例的累计计数"""
+        self.pool.redis_service.stream_group_info.side_effect = [
+            {"length": 10, "pending": 2, "lag": 3},
+            None
+        ]
+        self.pool._counts["applied"] = 5
+        
+        with patch.object(self.pool.settings, 'EVENT_PARTITIONS', 2):
+            metrics = await self.pool.metrics()
+        
+        assert metrics["applied"] == 5
+        assert metrics["pending"] == 2
+        assert metrics["lag"] == 3
+        assert [partition["stream"] for partition in metrics["partitions"]] == ["events:ingest:0", "events:ingest:1"]
@@ -0,0 +1,63 @@
+"""
+异步同步任务测试
+"""
+
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.tasks.sync_jobs import SyncJobManager
+
+
+class TestSyncJobManager:
+    """同步任务管理器测试类"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.manager = SyncJobManager()
+        self.manager.redis_service = AsyncMock()
+        self.manager.redis_service.get_cache.return_value = None
+    
+    @pytest.mark.asyncio
+    async def test_submit_merges_pending_jobs(self):
+        """测试相同参数的未执行任务合并为同一个任务"""
+        since = datetime(2025, 7, 1, tzinfo=timezone.utc)
+        with patch.object(self.manager, 'start', AsyncMock()):
+            self.manager._queue = MagicMock()
+            first = await self.manager.submit()
+            second = await self.manager.submit()
+            incremental = await self.manager.submit(since)
+        
+        assert first["status"] == "queued"
+        assert second["job_id"] == first["job_id"]
+        assert incremental["job_id"] != first["job_id"]
+        assert self.manager._queue.put_nowait.call_count == 2
+        assert (await self.manager.get_job(first["job_id"]))["status"] == "queued"
+        assert await self.manager.get_job("missing") is None
+    
+    @pytest.mark.asyncio
+    async def test_execute_records_progress_and_totals(self):
+        """测试执行任务后记录阶段、进度、吞吐量和汇总统计"""
+        mock_session = MagicMock()
+        mock_service = MagicMock()
+        mock_service.sync_all = AsyncMock(return_value={"success": True, "totals": {"created": 3}})
+        mock_service.get_progress.return_value = {
+            "phase": "writing",
+            "entities": {"projects": {"created": 3, "updated": 0, "unchanged": 1, "errors": 0}}
+        }
+        job = {"job_id": "job1", "updated_since": None}
+        self.manager._pending[None] = "job1"
+        
+        with patch('src.tasks.sync_jobs.SessionLocal', return_value=mock_session), \
+             patch('src.tasks.sync_jobs.SyncService', return_value=mock_service):
+            await self.manager._execute(job, None)
+        
+        assert job["status"] == "succeeded"
+        assert job["phase"] == "completed"
+        assert job["totals"] == {"created": 3}
+        assert job["rows_processed"] == 4
+        assert job["progress"]["projects"]["created"] == 3
+        assert job["finished_at"] is not None
+        assert None not in self.manager._pending
+        mock_session.commit.assert_called_once()
+        mock_session.close.assert_called_once()
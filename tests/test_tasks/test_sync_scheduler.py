@@ -0,0 +1,38 @@
+"""
+同步调度器测试
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.tasks.sync_scheduler import SyncScheduler
+
+
+class TestSyncScheduler:
+    """同步调度器测试类"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.scheduler = SyncScheduler()
+        self.scheduler.sync_service = MagicMock()
+        self.scheduler.sync_service.sync_all = AsyncMock(return_value={"success": True})
+    
+    async def run_scheduled(self, times):
+        """执行若干次定时同步，返回每次的use_watermarks参数"""
+        with patch('src.tasks.sync_scheduler.SessionLocal', return_value=MagicMock()):
+            for _ in range(times):
+                await self.scheduler._run_sync()
+        return [call.kwargs["use_watermarks"] for call in self.scheduler.sync_service.sync_all.call_args_list]
+    
+    @pytest.mark.asyncio
+    async def test_scheduled_sync_follows_setting(self):
+        """测试未开启SYNC_WATERMARKS时定时同步按设置执行全量同步"""
+        with patch.object(self.scheduler.settings, 'SYNC_WATERMARKS', False):
+            assert await self.run_scheduled(2) == [None, None]
+    
+    @pytest.mark.asyncio
+    async def test_scheduled_full_sync_cadence(self):
+        """测试开启SYNC_WATERMARKS时第1次及此后每N次定时同步为全量同步"""
+        with patch.object(self.scheduler.settings, 'SYNC_WATERMARKS', True), \
+             patch.object(self.scheduler.settings, 'SYNC_FULL_SYNC_EVERY', 3):
+            assert await self.run_scheduled(5) == [False, None, None, False, None]